@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.translation import gettext_lazy as _
 import dj_database_url
 from celery.schedules import crontab
@@ -46,24 +47,35 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'ngo.apps.NgoStaticFilesConfig',
+    'django.contrib.postgres',
     'ngo',
     'corsheaders',
     'crispy_forms',
     'crispy_bootstrap5',
 ]
 
+# Ordre : /healthz puis les fichiers statiques (WhiteNoise) sont servis avant
+# tout middleware qui touche à la session, à l'utilisateur ou à la base ;
+# les réponses dynamiques sont minifiées et compressées en dernier (ngo.compression) ;
+# la langue est négociée après la session (cookie) et avant CommonMiddleware,
+# sauf pour les URL statiques et media (ngo.middleware.AssetLocaleMiddleware).
+# Mesure : python manage.py bench_middleware
 MIDDLEWARE = [
-    'corsheaders.middleware.CorsMiddleware',
+    'ngo.middleware.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    'ngo.middleware.CompressionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'ngo.middleware.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'ngo.middleware.AssetLocaleMiddleware',
+    'ngo.middleware.LiteModeMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
-    'django.middleware.locale.LocaleMiddleware',
 ]
 
 ROOT_URLCONF = 'crowdfunding.urls'
@@ -88,6 +100,14 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'crowdfunding.wsgi.application'
+ASGI_APPLICATION = 'crowdfunding.asgi.application'
+
+# Tableaux de bord asynchrones (worker ASGI du Procfile / render.yaml) :
+# requêtes indépendantes lancées en parallèle sur ASYNC_DASHBOARD_THREADS threads
+# (une connexion chacun au plus) par processus. ASYNC_DASHBOARDS=False pour un
+# déploiement WSGI, où elles seraient exécutées l'une après l'autre.
+ASYNC_DASHBOARDS = config("ASYNC_DASHBOARDS", default=True, cast=bool)
+ASYNC_DASHBOARD_THREADS = config("ASYNC_DASHBOARD_THREADS", default=4, cast=int)
 
 
 # -----------------------------
@@ -95,21 +115,71 @@ WSGI_APPLICATION = 'crowdfunding.wsgi.application'
 # -----------------------------
 DATABASE_URL = config("DATABASE_URL", default=None)
 
+# Gestion des connexions (DB_POOL_MODE) :
+# - "persistent" (défaut) : une connexion conservée par worker (DB_CONN_MAX_AGE),
+#   vérifiée avant d'être réutilisée après une requête (CONN_HEALTH_CHECKS) ;
+# - "pool" : pool psycopg 3 intégré à Django (paquet psycopg[pool]), un pool
+#   par processus, connexions vérifiées à chaque emprunt ;
+# - "pgbouncer" : derrière PgBouncer en mode transaction, sans curseurs côté
+#   serveur (ils ne survivent pas au changement de connexion serveur).
+# La base gratuite de Render limite le nombre de connexions : DB_MAX_CONNECTIONS
+# est le budget de l'application, partagé entre les WEB_CONCURRENCY workers
+# gunicorn (taille par défaut du pool de chaque worker).
+DB_POOL_MODE = config("DB_POOL_MODE", default="persistent")
+DB_MAX_CONNECTIONS = config("DB_MAX_CONNECTIONS", default=20, cast=int)
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", default=2, cast=int)
+
 if DATABASE_URL:
     # Production / Render
     DATABASES = {
-        "default": dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=True)
+        "default": dj_database_url.parse(DATABASE_URL, ssl_require=True)
     }
 else:
     # Local fallback
     DATABASES = {
         "default": dj_database_url.parse(
             f"postgresql://{config('DATABASE_USER','')}:{config('DATABASE_PASSWORD','')}@{config('DATABASE_HOST','localhost')}:{config('DATABASE_PORT','5432')}/{config('DATABASE_NAME','')}",
-            conn_max_age=600,
             ssl_require=False,
         )
     }
 
+if DB_POOL_MODE == "pool":
+    from psycopg_pool import ConnectionPool
+
+    # Le pool remplace les connexions persistantes (Django exige CONN_MAX_AGE = 0)
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", default=1, cast=int),
+        "max_size": config("DB_POOL_MAX_SIZE", default=max(1, DB_MAX_CONNECTIONS // WEB_CONCURRENCY), cast=int),
+        "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),  # secondes d'attente d'une connexion libre
+        "max_idle": config("DB_POOL_MAX_IDLE", default=300, cast=float),
+        "check": ConnectionPool.check_connection,
+    }
+elif DB_POOL_MODE in ("persistent", "pgbouncer"):
+    DATABASES["default"]["CONN_MAX_AGE"] = config("DB_CONN_MAX_AGE", default=600, cast=int)
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = DB_POOL_MODE == "pgbouncer"
+else:
+    raise ImproperlyConfigured(f"DB_POOL_MODE inconnu : {DB_POOL_MODE!r} (persistent, pool ou pgbouncer)")
+
+# Réplique en lecture (optionnelle) : pages publiques, tableaux de bord, rapports
+# et exports y lisent (voir ngo.routers). Une autre base PostgreSQL, ou une copie
+# SQLite en local ; dans les tests, l'alias pointe sur la base de test du primaire.
+DATABASE_REPLICA_URL = config("DATABASE_REPLICA_URL", default=None)
+if DATABASE_REPLICA_URL:
+    replica = dj_database_url.parse(DATABASE_REPLICA_URL)
+    if replica["ENGINE"] == DATABASES["default"]["ENGINE"]:
+        # Même gestion des connexions que le primaire (un pool distinct par alias)
+        for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "DISABLE_SERVER_SIDE_CURSORS", "OPTIONS"):
+            if key in DATABASES["default"]:
+                replica[key] = DATABASES["default"][key]
+    replica["TEST"] = {"MIRROR": "default"}
+    DATABASES["replica"] = replica
+
+DATABASE_ROUTERS = ["ngo.routers.ReplicaRouter"]
+# Durée pendant laquelle un utilisateur qui vient d'écrire lit sur le primaire
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=10, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -166,7 +236,42 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "ngo/static"),
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# STATICFILES_STORAGE n'est plus lu depuis Django 5.1 : stockages déclarés dans STORAGES
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "ngo.staticfiles.BundledStaticFilesStorage"},
+}
+
+# Chaîne des statiques (ngo/staticfiles.py, commande audit_static)
+STATIC_UNUSED_FILE = BASE_DIR / "static_unused.txt"  # motifs ignorés par collectstatic
+STATIC_AUDIT_KEEP = ["docs/*"]  # lus depuis le disque (CGU), jamais référencés par URL
+STATIC_COMPRESS_WORKERS = config("STATIC_COMPRESS_WORKERS", default=0, cast=int) or None  # 0 = un par CPU
+STATIC_BUNDLES_ENABLED = config("STATIC_BUNDLES_ENABLED", default=not DEBUG, cast=bool)
+STATIC_BUNDLES = {
+    # Tableaux de bord (base_entrepreneur / base_investisseur / base_intermediaire)
+    "bundles/dashboard.css": [
+        "bison/assets/vendors/mdi/css/materialdesignicons.min.css",
+        "bison/assets/vendors/css/vendor.bundle.base.css",
+        "bison/assets/vendors/jvectormap/jquery-jvectormap.css",
+        "bison/assets/vendors/flag-icon-css/css/flag-icon.min.css",
+        "bison/assets/vendors/owl-carousel-2/owl.carousel.min.css",
+        "bison/assets/vendors/owl-carousel-2/owl.theme.default.min.css",
+        "bison/assets/css/style.css",
+    ],
+    "bundles/dashboard.js": [
+        "bison/assets/vendors/js/vendor.bundle.base.js",
+        "bison/assets/vendors/chart.js/Chart.min.js",
+        "bison/assets/vendors/progressbar.js/progressbar.min.js",
+        "bison/assets/vendors/jvectormap/jquery-jvectormap.min.js",
+        "bison/assets/vendors/jvectormap/jquery-jvectormap-world-mill-en.js",
+        "bison/assets/vendors/owl-carousel-2/owl.carousel.min.js",
+        "bison/assets/js/off-canvas.js",
+        "bison/assets/js/hoverable-collapse.js",
+        "bison/assets/js/misc.js",
+        "bison/assets/js/settings.js",
+        "bison/assets/js/todolist.js",
+    ],
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -191,6 +296,81 @@ EMAIL_HOST_PASSWORD = "ton_mot_de_passe_app"  # (ou app password Gmail)
 DEFAULT_FROM_EMAIL = "IGIA <ton_adresse_email@gmail.com>"
 
 
+# -----------------------------
+# Cache
+# -----------------------------
+# En production, CACHE_URL=redis://... : cache partagé entre les workers gunicorn
+CACHE_URL = config("CACHE_URL", default="")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Événements poussés en SSE (ngo/events.py, servis par le worker ASGI) :
+# redis://... pour relayer les événements entre processus (workers, Celery)
+EVENTS_BROKER_URL = config("EVENTS_BROKER_URL", default="")
+EVENTS_KEEPALIVE = config("EVENTS_KEEPALIVE", default=20, cast=int)  # secondes
+# Progression des campagnes : au plus une publication par intervalle et par campagne
+CAMPAIGN_PROGRESS_INTERVAL = config("CAMPAIGN_PROGRESS_INTERVAL", default=1, cast=float)  # secondes
+
+# Devise des rapports et totaux multi-devises (ngo/currency.py)
+REPORTING_CURRENCY = config("REPORTING_CURRENCY", default="USD")
+
+# Données de référence en mémoire (ngo/reference.py)
+REFERENCE_DATA_CHECK_INTERVAL = config("REFERENCE_DATA_CHECK_INTERVAL", default=5, cast=int)  # secondes
+REFERENCE_DATA_MAX_AGE = config("REFERENCE_DATA_MAX_AGE", default=300, cast=int)  # secondes
+
+# Limitation des tentatives de connexion (ngo/throttle.py) : seaux à jetons par IP et
+# par e-mail, en mémoire de chaque worker, ou partagés avec LOGIN_THROTTLE_URL=redis://...
+LOGIN_THROTTLE_URL = config("LOGIN_THROTTLE_URL", default=CACHE_URL)
+LOGIN_THROTTLE_IP_BURST = config("LOGIN_THROTTLE_IP_BURST", default=20, cast=int)
+LOGIN_THROTTLE_IP_PER_MINUTE = config("LOGIN_THROTTLE_IP_PER_MINUTE", default=10, cast=float)
+LOGIN_THROTTLE_EMAIL_BURST = config("LOGIN_THROTTLE_EMAIL_BURST", default=5, cast=int)
+LOGIN_THROTTLE_EMAIL_PER_MINUTE = config("LOGIN_THROTTLE_EMAIL_PER_MINUTE", default=1, cast=float)
+# Proxys de confiance devant l'application (Render : 1) ; 0 = REMOTE_ADDR
+TRUSTED_PROXY_COUNT = config("TRUSTED_PROXY_COUNT", default=0, cast=int)
+
+# Réponses dynamiques (ngo/compression.py) : HTML minifié, puis Brotli (ou gzip selon
+# Accept-Encoding) au-delà de RESPONSE_COMPRESSION_MIN_SIZE octets ; mesure : bench_compression
+HTML_MINIFY = config("HTML_MINIFY", default=not DEBUG, cast=bool)
+HTML_MINIFY_TYPES = ["text/html"]
+RESPONSE_COMPRESSION = config("RESPONSE_COMPRESSION", default=True, cast=bool)
+RESPONSE_COMPRESSION_MIN_SIZE = config("RESPONSE_COMPRESSION_MIN_SIZE", default=860, cast=int)
+RESPONSE_COMPRESSION_BROTLI_QUALITY = config("RESPONSE_COMPRESSION_BROTLI_QUALITY", default=5, cast=int)
+RESPONSE_COMPRESSION_TYPES = [
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+]
+
+# Mode allégé (ngo/lite.py) : ?lite=1, cookie ou en-tête Save-Data ; pages sans carrousel
+# ni JavaScript tiers, miniatures de LITE_THUMBNAIL_SIZE px, listes de LITE_PAGE_SIZE éléments
+LITE_PAGE_SIZE = config("LITE_PAGE_SIZE", default=10, cast=int)
+LITE_PAGE_BUDGET = config("LITE_PAGE_BUDGET", default=16 * 1024, cast=int)  # octets de HTML, avant compression
+LITE_THUMBNAIL_SIZE = config("LITE_THUMBNAIL_SIZE", default=240, cast=int)
+
+# Pages d'information construites et pré-rendues une fois par langue (ngo/content.py)
+INFO_PAGES_CACHE = config("INFO_PAGES_CACHE", default=not DEBUG, cast=bool)
+
+# Webhooks de paiement (ngo/payments.py) : secret HMAC partagé avec les prestataires
+PAYMENT_WEBHOOK_SECRET = config("PAYMENT_WEBHOOK_SECRET", default="")
+PAYMENT_EVENTS_BATCH_SIZE = config("PAYMENT_EVENTS_BATCH_SIZE", default=500, cast=int)
+
 # -----------------------------
 # Celery Configuration
 # -----------------------------
@@ -206,6 +386,34 @@ CELERY_BEAT_SCHEDULE = {
         "task": "ngo.tasks.delete_inactive_users",
         "schedule": crontab(hour=3, minute=0),  # tous les jours à 03:00
     },
+    "snapshot-exchange-rates-daily": {
+        "task": "ngo.tasks.snapshot_exchange_rates",
+        "schedule": crontab(hour=0, minute=5),  # tous les jours à 00:05
+    },
+    "update-repayment-schedules-daily": {
+        "task": "ngo.tasks.update_repayment_schedules",
+        "schedule": crontab(hour=0, minute=15),  # tous les jours à 00:15
+    },
+    "close-campaigns": {
+        "task": "ngo.tasks.close_campaigns",
+        "schedule": crontab(minute="*/5"),  # toutes les 5 minutes
+    },
+    "assign-rewards": {
+        "task": "ngo.tasks.assign_rewards",
+        "schedule": crontab(minute="*/5"),  # toutes les 5 minutes
+    },
+    "compute-revenue": {
+        "task": "ngo.tasks.compute_revenue",
+        "schedule": crontab(minute=20),  # toutes les heures
+    },
+    "rollup-analytics": {
+        "task": "ngo.tasks.rollup_analytics",
+        "schedule": crontab(minute="*/15"),  # toutes les 15 minutes
+    },
+    "process-payment-events": {
+        "task": "ngo.tasks.process_payment_events",
+        "schedule": 30.0,  # filet de sécurité si un déclenchement immédiat a été perdu
+    },
 }
 
 
@@ -20,9 +20,13 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
 
+from ngo import views as ngo_views
+
 urlpatterns = [
     # Inclut les routes pour set_language et autres fonctionnalités i18n
     path('i18n/', include('django.conf.urls.i18n')),
+    # Webhooks des prestataires de paiement (hors i18n : URL fixe, pas de redirection)
+    path('payments/webhook/<str:provider>/', ngo_views.payment_webhook, name='payment_webhook'),
 ]
 
 # URLs de l'application avec support i18n
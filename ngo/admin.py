@@ -3,16 +3,46 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from django.urls import reverse,path
+from django.db.models import Count, Q, Sum
 from .admin_views import admin_reply_message
 from . import admin_views
+from . import search as search_engine
+from . import repayments
+from . import proofs
+from . import ledger
 from .models import (
     User, EntrepreneurProfile, InvestisseurProfile, IntermediaireProfile,
     Country, Category, Project, ProjectPhoto,Notification,
     Campaign, LoanCampaign, Contribution,Payment,
     Reward, Partner, Update, Testimonial,Region,Message,
-    ContactMessage, TeamMember,IntermediairePayment,Currency,WithdrawalRequest
+    ContactMessage, TeamMember,IntermediairePayment,Currency,WithdrawalRequest,
+    ExchangeRate, RepaymentInstallment, PaymentEvent, CampaignLifecycleRun,
+    LedgerEntry, ProjectBalance, Commission, RevenueRollup, DailyMetric
 )
 
+# --------------------------
+# Recherche plein texte dans l'admin
+# --------------------------
+class FullTextSearchAdminMixin:
+    """
+    Sous PostgreSQL, remplace les icontains de search_fields par le tsvector indexé (GIN).
+    ``search_exact_fields`` garde des correspondances exactes (email, ...) en complément.
+    Sous SQLite, le comportement standard de l'admin est conservé.
+    """
+    search_exact_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search_engine.is_postgres():
+            return super().get_search_results(request, queryset, search_term)
+
+        spec = search_engine.SPECS_BY_MODEL[self.model]
+        matches = search_engine.filter_queryset(self.model.objects.all(), spec, search_term)
+        condition = Q(pk__in=matches.values("pk"))
+        for field in self.search_exact_fields:
+            condition |= Q(**{f"{field}__iexact": search_term})
+        return queryset.filter(condition), False
+
+
 # --------------------------
 # User
 # --------------------------
@@ -166,6 +196,17 @@ class IntermediaireProfileAdmin(admin.ModelAdmin):
     ordering = ("user__full_name",)
 
 
+# --------------------------
+# ExchangeRate Admin
+# --------------------------
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ("currency", "date", "valid_until", "rate_to_usd", "created_at")
+    list_filter = ("currency", "date")
+    date_hierarchy = "date"
+    ordering = ("-date", "currency")
+
+
 # --------------------------
 # Region Admin
 # --------------------------
@@ -229,10 +270,11 @@ class ProjectPhotoInline(admin.TabularInline):
 # Project
 # --------------------------
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ("title", "entrepreneur", "country", "target_amount", "collected_amount", "status", "created_at")
     list_filter = ("status", "country", "categories", "created_at")
     search_fields = ("title", "entrepreneur__email", "description")
+    search_exact_fields = ("entrepreneur__email",)
     autocomplete_fields = ("entrepreneur", "country", "categories")
     readonly_fields = ("slug", "collected_amount", "created_at")
     inlines = [ProjectPhotoInline]
@@ -266,12 +308,13 @@ class ContributionInline(admin.TabularInline):
 
 
 @admin.register(Campaign)
-class CampaignAdmin(admin.ModelAdmin):
+class CampaignAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ("title", "project", "goal_amount", "collected_amount", "status", "start_date", "end_date")
     list_filter = ("status", "start_date", "end_date")
     search_fields = ("title", "project__title")
+    search_exact_fields = ("project__title",)
     inlines = [RewardInline, ContributionInline]
-    readonly_fields = ("collected_amount",)
+    readonly_fields = ("collected_amount", "goal_reached_at", "closed_at")
     ordering = ("-start_date",)
 
 
@@ -287,7 +330,67 @@ class LoanCampaignAdmin(admin.ModelAdmin):
     list_filter = ("status", "start_date", "end_date")
     search_fields = ("title", "project__title")
     inlines = [ContributionInline]
-    readonly_fields = ("collected_amount",)
+    readonly_fields = ("collected_amount", "goal_reached_at", "closed_at")
+
+
+# --------------------------
+# Planificateur des campagnes (journal)
+# --------------------------
+@admin.register(CampaignLifecycleRun)
+class CampaignLifecycleRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "started_at", "duration", "goals_reached", "campaigns_completed", "campaigns_failed",
+        "loans_completed", "loans_failed", "notifications_sent", "error",
+    )
+    date_hierarchy = "started_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# --------------------------
+# Échéances de remboursement
+# --------------------------
+@admin.register(RepaymentInstallment)
+class RepaymentInstallmentAdmin(admin.ModelAdmin):
+    list_display = ("loan_campaign", "contribution", "number", "due_date", "principal", "interest", "amount", "currency", "status")
+    list_filter = ("status", "due_date", "currency")
+    search_fields = ("loan_campaign__title", "contribution__investor__email")
+    date_hierarchy = "due_date"
+    list_select_related = ("loan_campaign__project", "contribution__investor", "contribution__campaign", "contribution__loan_campaign")
+    readonly_fields = ("loan_campaign", "contribution", "number", "principal", "interest", "amount", "currency", "paid_at")
+
+    actions = ["mark_installments_paid"]
+
+    def mark_installments_paid(self, request, queryset):
+        updated = repayments.mark_paid(queryset, sender=request.user)
+        self.message_user(request, f"{updated} échéance(s) marquée(s) payée(s) 💸")
+
+    mark_installments_paid.short_description = "💸 Marquer les échéances sélectionnées comme payées"
+
+
+# --------------------------
+# Événements de paiement (webhooks)
+# --------------------------
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ("provider", "transaction_id", "event_type", "status", "contribution", "received_at", "processed_at")
+    list_filter = ("status", "provider", "event_type")
+    search_fields = ("transaction_id",)
+    date_hierarchy = "received_at"
+    list_select_related = ("contribution__investor", "contribution__campaign", "contribution__loan_campaign")
+    readonly_fields = ("provider", "transaction_id", "event_type", "payload", "contribution", "received_at", "processed_at")
+
+    actions = ["requeue_events"]
+
+    def requeue_events(self, request, queryset):
+        updated = queryset.exclude(status="pending").update(status="pending", error="", processed_at=None)
+        self.message_user(request, f"{updated} événement(s) remis en file d'attente 🔁")
+
+    requeue_events.short_description = "🔁 Retraiter les événements sélectionnés"
 
 
 # --------------------------
@@ -297,21 +400,53 @@ class LoanCampaignAdmin(admin.ModelAdmin):
 class ContributionAdmin(admin.ModelAdmin):
     list_display = (
         "contributor_name", "amount", "contribution_type", "payment_status",
-        "campaign", "loan_campaign", "created_at"
+        "campaign", "loan_campaign", "reward", "created_at"
     )
     list_filter = ("contribution_type", "payment_status", "created_at")
     search_fields = ("contributor_name", "transaction_id", "campaign__title", "loan_campaign__title")
-    readonly_fields = ("created_at",)
+    readonly_fields = ("created_at", "reward_evaluated_at")
+    list_select_related = ("campaign__project", "loan_campaign__project", "reward")
+
+
+# --------------------------
+# Récompenses (suivi des remises)
+# --------------------------
+@admin.register(Reward)
+class RewardAdmin(admin.ModelAdmin):
+    list_display = ("title", "campaign", "minimum_amount", "backers", "total")
+    list_filter = ("campaign",)
+    search_fields = ("title", "campaign__title")
+    list_select_related = ("campaign__project",)
+    ordering = ("campaign", "minimum_amount")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            backers_count=Count("contributions"),
+            total_amount=Sum("contributions__amount"),
+        )
+
+    def backers(self, obj):
+        return obj.backers_count
+
+    backers.short_description = _("Contributeurs récompensés")
+    backers.admin_order_field = "backers_count"
+
+    def total(self, obj):
+        return obj.total_amount or 0
+
+    total.short_description = _("Montant total")
+    total.admin_order_field = "total_amount"
 
 
 # --------------------------
 # Partner
 # --------------------------
 @admin.register(Partner)
-class PartnerAdmin(admin.ModelAdmin):
+class PartnerAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ("name", "partner_type", "email", "phone", "active")
     list_filter = ("partner_type", "active")
     search_fields = ("name", "email", "phone")
+    search_exact_fields = ("email", "phone")
     prepopulated_fields = {"slug": ("name",)}
 
 
@@ -381,24 +516,76 @@ class TeamMemberAdmin(admin.ModelAdmin):
 # --------------------------
 # IntermediairePayment Admin
 # --------------------------
+class ProofPreviewMixin:
+    """Miniature de la preuve dans la liste et le formulaire."""
+
+    def proof_preview(self, obj):
+        image = obj.proof_thumbnail or obj.proof
+        if not image:
+            return "—"
+        return format_html('<a href="{}" target="_blank"><img src="{}" style="max-height:60px;border-radius:4px;"></a>',
+                           obj.proof.url if obj.proof else image.url, image.url)
+
+    proof_preview.short_description = _("Preuve")
+
+
 @admin.register(IntermediairePayment)
-class IntermediairePaymentAdmin(admin.ModelAdmin):
-    list_display = ("intermediaire", "amount", "currency", "status", "created_at")
+class IntermediairePaymentAdmin(ProofPreviewMixin, admin.ModelAdmin):
+    list_display = ("intermediaire", "amount", "currency", "status", "proof_preview", "created_at")
     list_filter = ("status", "currency", "created_at")
     search_fields = ("intermediaire__email", "intermediaire__full_name")
-    readonly_fields = ("created_at",)
+    readonly_fields = ("created_at", "proof_preview", "proof_hash", "reviewed_at", "reviewed_by")
+    list_select_related = ("intermediaire",)
     ordering = ("-created_at",)
 
+    actions = ["approve_payments", "reject_payments"]
+
+    def approve_payments(self, request, queryset):
+        updated = proofs.review_intermediaire_payments(list(queryset.values_list("pk", flat=True)), True, request.user)
+        self.message_user(request, f"{updated} paiement(s) validé(s) ✅")
+
+    approve_payments.short_description = "✅ Valider les paiements sélectionnés"
+
+    def reject_payments(self, request, queryset):
+        updated = proofs.review_intermediaire_payments(list(queryset.values_list("pk", flat=True)), False, request.user)
+        self.message_user(request, f"{updated} paiement(s) rejeté(s) ❌")
+
+    reject_payments.short_description = "❌ Rejeter les paiements sélectionnés"
+
 
 # --------------------------
 # Paiement
 # --------------------------
-class PaymentAdmin(admin.ModelAdmin):
-    list_display = ("user", "project", "amount", "currency", "payment_type", "payment_method", "is_successful", "created_at")
+@admin.register(Payment)
+class PaymentAdmin(ProofPreviewMixin, admin.ModelAdmin):
+    list_display = ("user", "project", "amount", "currency", "payment_type", "payment_method", "is_successful", "proof_preview", "created_at")
     list_filter = ("payment_type", "payment_method", "is_successful", "currency")
     search_fields = ("user__email", "user__full_name", "project__title", "transaction_code")
+    readonly_fields = ("created_at", "proof_preview", "proof_hash", "reviewed_at", "reviewed_by")
+    list_select_related = ("user", "project")
     ordering = ("-created_at",)
 
+    actions = ["approve_payments", "reject_payments"]
+
+    def get_urls(self):
+        urls = [
+            path("verification/", self.admin_site.admin_view(admin_views.payment_review_queue),
+                 name="ngo_payment_review_queue"),
+        ]
+        return urls + super().get_urls()
+
+    def approve_payments(self, request, queryset):
+        updated = proofs.review_payments(list(queryset.values_list("pk", flat=True)), True, request.user)
+        self.message_user(request, f"{updated} paiement(s) validé(s) ✅")
+
+    approve_payments.short_description = "✅ Valider les paiements sélectionnés"
+
+    def reject_payments(self, request, queryset):
+        updated = proofs.review_payments(list(queryset.values_list("pk", flat=True)), False, request.user)
+        self.message_user(request, f"{updated} paiement(s) rejeté(s) ❌")
+
+    reject_payments.short_description = "❌ Rejeter les paiements sélectionnés"
+
 # --------------------------
 # Message
 # --------------------------
@@ -475,9 +662,126 @@ class NotificationAdmin(admin.ModelAdmin):
 # -----------------------------------------------
 @admin.register(WithdrawalRequest)
 class WithdrawalRequestAdmin(admin.ModelAdmin):
-    list_display = ("entrepreneur", "project", "amount", "status", "created_at")
+    list_display = ("entrepreneur", "project", "amount", "currency", "status", "created_at", "processed_at")
     list_filter = ("status",)
-    search_fields = ("entrepreneur__username", "project__title")
+    search_fields = ("entrepreneur__email", "project__title")
+    list_select_related = ("entrepreneur", "project")
+    # Le statut ne change que par les actions : chaque transition passe une écriture au grand livre
+    readonly_fields = ("entrepreneur", "project", "amount", "currency", "status", "processed_at")
+
+    actions = ["approve_withdrawals", "reject_withdrawals", "mark_withdrawals_paid"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def approve_withdrawals(self, request, queryset):
+        updated = ledger.set_withdrawal_status(queryset.values_list("pk", flat=True), "approved")
+        self.message_user(request, f"{updated} demande(s) de retrait approuvée(s) ✅")
+
+    def reject_withdrawals(self, request, queryset):
+        updated = ledger.set_withdrawal_status(queryset.values_list("pk", flat=True), "rejected")
+        self.message_user(request, f"{updated} demande(s) de retrait rejetée(s), montant(s) restitué(s) ❌")
+
+    def mark_withdrawals_paid(self, request, queryset):
+        updated = ledger.set_withdrawal_status(queryset.values_list("pk", flat=True), "paid")
+        self.message_user(request, f"{updated} retrait(s) marqué(s) versé(s) 💸")
+
+    approve_withdrawals.short_description = "✅ Approuver les demandes sélectionnées"
+    reject_withdrawals.short_description = "❌ Rejeter les demandes sélectionnées"
+    mark_withdrawals_paid.short_description = "💸 Marquer les retraits sélectionnés comme versés"
+
+
+# -----------------------------------------------
+# Grand livre et soldes des projets (lecture seule)
+# -----------------------------------------------
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "project", "kind", "account", "amount", "currency", "contribution", "withdrawal")
+    list_filter = ("kind", "account", "currency")
+    search_fields = ("project__title", "entry")
+    date_hierarchy = "created_at"
+    list_select_related = ("project", "contribution", "withdrawal__project", "withdrawal__entrepreneur")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ProjectBalance)
+class ProjectBalanceAdmin(admin.ModelAdmin):
+    list_display = ("project", "available", "reserved", "withdrawn", "commission", "collected", "currency", "updated_at")
+    list_filter = ("currency",)
+    search_fields = ("project__title",)
+    list_select_related = ("project",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+# -----------------------------------------------
+# Commissions et revenus (calculés par la tâche compute_revenue)
+# -----------------------------------------------
+@admin.register(Commission)
+class CommissionAdmin(admin.ModelAdmin):
+    list_display = ("contribution", "date", "country", "gross", "rate", "amount", "currency")
+    list_filter = ("country", "currency")
+    date_hierarchy = "date"
+    list_select_related = ("contribution__investor", "contribution__campaign", "contribution__loan_campaign")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RevenueRollup)
+class RevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ("period_start", "period", "source", "country", "currency", "count", "gross", "amount")
+    list_filter = ("period", "source", "country", "currency")
+    date_hierarchy = "period_start"
+    list_select_related = ("country", "currency")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# -----------------------------------------------
+# Statistiques journalières (tableau de bord : voir admin_views.analytics_dashboard)
+# -----------------------------------------------
+@admin.register(DailyMetric)
+class DailyMetricAdmin(admin.ModelAdmin):
+    list_display = ("date", "metric", "country", "category", "currency", "count", "amount")
+    list_filter = ("metric", "country", "currency")
+    date_hierarchy = "date"
+    list_select_related = ("country", "category", "currency")
+
+    def get_urls(self):
+        urls = [
+            path("tableau-de-bord/", self.admin_site.admin_view(admin_views.analytics_dashboard),
+                 name="ngo_dailymetric_dashboard"),
+        ]
+        return urls + super().get_urls()
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 # -----------------------------------------------
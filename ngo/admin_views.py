@@ -1,12 +1,19 @@
 # ngo/admin_views.py
+from django.contrib import admin, messages
 from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import Paginator
+from datetime import timedelta
 from django.shortcuts import get_object_or_404, render, redirect
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
-from .models import Message
+from .models import Message, Payment, IntermediairePayment, DailyMetric
 from .forms import MessageForm
+from .reference import reference_data
+from . import analytics, proofs
+from .routers import replica_reads
 
 User = get_user_model()
 
@@ -39,3 +46,130 @@ def admin_reply_message(request, pk):
         'original': original,
         'title': _("Répondre au message"),
     })
+
+
+# ---------------------------
+# File de vérification des preuves de paiement
+# ---------------------------
+REVIEW_QUEUE_PER_PAGE = 24
+
+ADMIN_CHANGE_URLS = {
+    "payment": "admin:ngo_payment_change",
+    "intermediaire_payment": "admin:ngo_intermediairepayment_change",
+}
+
+
+def _review_queryset(kind):
+    """Paiements en attente de vérification, les plus anciens d'abord."""
+    if kind == "intermediaire_payment":
+        return (
+            IntermediairePayment.objects.filter(status="pending")
+            .select_related("intermediaire", "currency")
+            .order_by("created_at", "pk")
+        )
+    return (
+        Payment.objects.filter(reviewed_at__isnull=True, is_successful=False, proof__gt="")
+        .select_related("user", "project", "currency", "country")
+        .order_by("created_at", "pk")
+    )
+
+
+@staff_member_required
+def payment_review_queue(request):
+    """File paginée des preuves de paiement, avec validation / rejet par lots au clavier."""
+    kind = request.POST.get("kind") or request.GET.get("kind")
+    if kind not in proofs.PROOF_MODELS:
+        kind = "payment"
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+        ids = [int(pk) for pk in request.POST.getlist("ids") if pk.isdigit()]
+        if action in ("approve", "reject") and ids:
+            count = proofs.REVIEWERS[kind](ids, action == "approve", request.user)
+            if action == "approve":
+                messages.success(request, _("%(count)s paiement(s) validé(s) ✅") % {"count": count})
+            else:
+                messages.warning(request, _("%(count)s paiement(s) rejeté(s) ❌") % {"count": count})
+        return redirect(f"{reverse('admin:ngo_payment_review_queue')}?kind={kind}&page={request.POST.get('page', 1)}")
+
+    page = Paginator(_review_queryset(kind), REVIEW_QUEUE_PER_PAGE).get_page(request.GET.get("page"))
+    items = proofs.attach_duplicates(page.object_list)
+    for item in items:
+        item.duplicate_urls = [reverse(ADMIN_CHANGE_URLS[label], args=[pk]) for label, pk in item.duplicates]
+
+    return render(request, "ngo/admin/payment_review_queue.html", {
+        **admin.site.each_context(request),
+        "title": _("Vérification des preuves de paiement"),
+        "kind": kind,
+        "page": page,
+        "items": items,
+        "counts": {
+            label: page.paginator.count if label == kind else _review_queryset(label).count()
+            for label in proofs.PROOF_MODELS
+        },
+    })
+
+
+# ---------------------------
+# Tableau de bord statistique (lit uniquement DailyMetric)
+# ---------------------------
+ANALYTICS_RANGES = {"30": 30, "90": 90, "365": 365, "730": 730}
+
+
+def _int_param(request, name):
+    value = request.GET.get(name, "")
+    return int(value) if value.isdigit() else None
+
+
+@staff_member_required
+@replica_reads()
+def analytics_dashboard(request):
+    """Séries temporelles des indicateurs de la plateforme, filtrables par pays / catégorie / devise."""
+    days = ANALYTICS_RANGES.get(request.GET.get("range"), 90)
+    granularity = request.GET.get("granularity")
+    if granularity not in analytics.GRANULARITIES:
+        granularity = "day" if days <= 90 else "week" if days <= 365 else "month"
+    filters = {key: _int_param(request, key) for key in ("country", "category", "currency")}
+
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    labels = analytics.buckets(start, end, granularity)
+    positions = {bucket: index for index, bucket in enumerate(labels)}
+    data = reference_data()
+
+    charts = []
+    for metric, label in DailyMetric.METRIC_CHOICES:
+        if filters["category"] and metric not in ("contributions", "projects"):
+            continue
+        counts = [0] * len(labels)
+        amounts = {}
+        for row in analytics.series(metric, start, end, granularity, **filters):
+            index = positions.get(row["bucket"])
+            if index is None:
+                continue
+            counts[index] += row["count"]
+            if row["amount"]:
+                code = data.currency(row["currency_id"]).code if row["currency_id"] else "—"
+                amounts.setdefault(code, [0] * len(labels))[index] += float(row["amount"])
+        charts.append({
+            "metric": metric,
+            "label": label,
+            "total": sum(counts),
+            "counts": counts,
+            "amounts": amounts,
+        })
+
+    return render(request, "ngo/admin/analytics_dashboard.html", {
+        **admin.site.each_context(request),
+        "title": _("Statistiques de la plateforme"),
+        "labels": [bucket.isoformat() for bucket in labels],
+        "charts": charts,
+        "days": str(days),
+        "ranges": ANALYTICS_RANGES,
+        "granularity": granularity,
+        "filters": filters,
+        "countries": data.objects("countries"),
+        "categories": data.objects("categories"),
+        "currencies": data.objects("currencies"),
+        "last_computed": DailyMetric.objects.order_by("-computed_at").values_list("computed_at", flat=True).first(),
+    })
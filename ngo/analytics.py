@@ -0,0 +1,205 @@
+"""
+Statistiques de la plateforme (tableau de bord de l'administration).
+
+La tâche périodique ``rollup_analytics`` agrège les tables brutes en
+compartiments journaliers ``DailyMetric`` (indicateur × jour × pays × devise,
+et × catégorie pour les contributions et les projets) :
+
+- contributions payées (nombre, montant) ;
+- nouveaux projets (nombre, montant cible) ;
+- inscriptions par rôle ;
+- paiements de frais validés (soumission de projet, abonnements intermédiaires) ;
+- demandes de retrait (nombre, montant).
+
+Chaque passage recalcule les ``ROLLUP_DAYS`` derniers jours (les paiements
+validés avec retard y sont rattrapés) ; ``run(start, end)`` reconstruit une
+plage quelconque par tranches d'un mois. Le tableau de bord ne lit que
+``DailyMetric`` (``series``) : quelques centaines de lignes agrégées par
+période, quel que soit le volume des tables brutes.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import (
+    Contribution, DailyMetric, IntermediairePayment, Payment, Project, User, WithdrawalRequest,
+)
+from .reference import country_currency_id
+
+ROLLUP_DAYS = getattr(settings, "ANALYTICS_ROLLUP_DAYS", 3)
+CHUNK_DAYS = 31
+BATCH_SIZE = 2000
+
+GRANULARITIES = {
+    "day": F("date"),
+    "week": TruncWeek("date"),
+    "month": TruncMonth("date"),
+}
+
+
+def _bounds(start, end):
+    """Bornes horodatées [start 00:00, end+1 00:00[ dans le fuseau courant (filtres indexables)."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def _grouped(queryset, date_field, start, end, country, currency=None, amount=None, category=None):
+    """Lignes {day, country, currency, category, count, amount} d'une source, groupées en base."""
+    lower, upper = _bounds(start, end)
+    queryset = queryset.filter(**{f"{date_field}__gte": lower, f"{date_field}__lt": upper}).annotate(
+        day=TruncDate(date_field), country_ref=country
+    )
+    keys = ["day", "country_ref"]
+    for key, expression in (("currency_ref", currency), ("category_ref", category)):
+        if expression is not None:
+            queryset = queryset.annotate(**{key: expression})
+            keys.append(key)
+    if category is not None:
+        queryset = queryset.filter(category_ref__isnull=False)
+    aggregates = {"count": Count("pk")}
+    if amount:
+        aggregates["total"] = Sum(amount)
+    for row in queryset.order_by().values(*keys).annotate(**aggregates):
+        yield {
+            "day": row["day"],
+            "country": row["country_ref"],
+            "currency": row.get("currency_ref"),
+            "category": row.get("category_ref"),
+            "count": row["count"],
+            "amount": row.get("total") or 0,
+        }
+
+
+# --------------------------
+# Sources
+# --------------------------
+def _contributions(start, end):
+    queryset = Contribution.objects.filter(payment_status="completed")
+    country = Coalesce("campaign__project__country_id", "loan_campaign__project__country_id")
+    category = Coalesce("campaign__project__categories", "loan_campaign__project__categories")
+    for cat in (None, category):
+        for row in _grouped(queryset, "created_at", start, end, country, F("currency_id"), "amount", cat):
+            yield "contributions", row
+
+
+def _projects(start, end):
+    for cat in (None, F("categories")):
+        for row in _grouped(Project.objects.all(), "created_at", start, end, F("country_id"), None, "target_amount", cat):
+            # Devise du pays du projet (les montants cibles y sont exprimés)
+            row["currency"] = country_currency_id(row["country"])
+            yield "projects", row
+
+
+def _registrations(start, end):
+    for role, _label in User.ROLE_CHOICES:
+        for row in _grouped(User.objects.filter(role=role), "date_joined", start, end, F("country_id")):
+            yield f"registrations_{role}", row
+
+
+def _payments(start, end):
+    for row in _grouped(Payment.objects.filter(is_successful=True), "created_at", start, end,
+                        F("country_id"), F("currency_id"), "amount"):
+        yield "payments", row
+    for row in _grouped(IntermediairePayment.objects.filter(status="validated"), "created_at", start, end,
+                        F("intermediaire__country_id"), F("currency_id"), "amount"):
+        yield "payments", row
+
+
+def _withdrawals(start, end):
+    for row in _grouped(WithdrawalRequest.objects.all(), "created_at", start, end,
+                        F("project__country_id"), F("currency_id"), "amount"):
+        yield "withdrawals", row
+
+
+SOURCES = (_contributions, _projects, _registrations, _payments, _withdrawals)
+
+
+# --------------------------
+# Agrégation
+# --------------------------
+@transaction.atomic
+def rollup(start, end):
+    """Recalcule les compartiments des jours [start, end]. Renvoie le nombre de lignes écrites."""
+    buckets = defaultdict(lambda: [0, 0])
+    for source in SOURCES:
+        for metric, row in source(start, end):
+            bucket = buckets[(metric, row["day"], row["country"], row["category"], row["currency"])]
+            bucket[0] += row["count"]
+            bucket[1] += row["amount"]
+    DailyMetric.objects.filter(date__gte=start, date__lte=end).delete()
+    DailyMetric.objects.bulk_create(
+        [
+            DailyMetric(
+                metric=metric, date=day, country_id=country_id, category_id=category_id,
+                currency_id=currency_id, count=count, amount=amount,
+            )
+            for (metric, day, country_id, category_id, currency_id), (count, amount) in buckets.items()
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return len(buckets)
+
+
+def first_day():
+    """Premier jour couvert par les données brutes (première inscription)."""
+    joined = User.objects.aggregate(first=Min("date_joined"))["first"]
+    return timezone.localdate(joined) if joined else timezone.localdate()
+
+
+def run(start=None, end=None):
+    """
+    Recalcule les compartiments de [start, end] par tranches d'un mois
+    (par défaut : les ``ROLLUP_DAYS`` derniers jours). Renvoie le nombre de lignes écrites.
+    """
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=ROLLUP_DAYS)
+    written = 0
+    while start <= end:
+        chunk_end = min(start + timedelta(days=CHUNK_DAYS - 1), end)
+        written += rollup(start, chunk_end)
+        start = chunk_end + timedelta(days=1)
+    return written
+
+
+# --------------------------
+# Lecture (tableau de bord)
+# --------------------------
+def series(metric, start, end, granularity="day", country=None, category=None, currency=None):
+    """
+    Série temporelle d'un indicateur lue dans les compartiments :
+    [{bucket, currency_id, count, amount}] triée par période.
+    """
+    queryset = DailyMetric.objects.filter(metric=metric, date__gte=start, date__lte=end)
+    queryset = queryset.filter(category_id=category) if category else queryset.filter(category__isnull=True)
+    if country:
+        queryset = queryset.filter(country_id=country)
+    if currency:
+        queryset = queryset.filter(currency_id=currency)
+    return list(
+        queryset.annotate(bucket=GRANULARITIES[granularity])
+        .order_by()
+        .values("bucket", "currency_id")
+        .annotate(count=Sum("count"), amount=Sum("amount"))
+        .order_by("bucket", "currency_id")
+    )
+
+
+def buckets(start, end, granularity="day"):
+    """Début de chaque période entre start et end (axe des abscisses, sans trou)."""
+    if granularity == "month":
+        current, result = start.replace(day=1), []
+        while current <= end:
+            result.append(current)
+            current = (current + timedelta(days=32)).replace(day=1)
+        return result
+    step = 7 if granularity == "week" else 1
+    current = start - timedelta(days=start.weekday()) if granularity == "week" else start
+    return [current + timedelta(days=step * index) for index in range((end - current).days // step + 1)]
@@ -1,9 +1,22 @@
 from django.apps import AppConfig
+from django.contrib.staticfiles.apps import StaticFilesConfig
 
 
 class NgoConfig(AppConfig):
+    default = True  # deux AppConfig dans ce module : celle-ci pour 'ngo'
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ngo'
 
     def ready(self):
         import ngo.signals
+        from ngo import throttle
+        throttle.warn_if_local()
+
+
+class NgoStaticFilesConfig(StaticFilesConfig):
+    """collectstatic ignore aussi les fichiers jugés inutilisés (voir ngo.staticfiles)."""
+
+    def ready(self):
+        super().ready()
+        from ngo import staticfiles
+        self.ignore_patterns = [*StaticFilesConfig.ignore_patterns, *staticfiles.ignore_patterns()]
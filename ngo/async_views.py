@@ -0,0 +1,423 @@
+"""
+Vues asynchrones : tableaux de bord (entrepreneur, investisseur,
+intermédiaire) et flux d'événements SSE (``event_stream``, voir ngo/events.py).
+
+Mêmes pages que les vues synchrones de ``ngo.views``, servies à leur place
+quand ``ASYNC_DASHBOARDS`` est activé (worker ASGI, voir le Procfile) : les
+agrégats indépendants d'un tableau de bord (compteurs, sommes, listes
+récentes) sont lancés ensemble avec ``asyncio.gather`` au lieu de l'être l'un
+après l'autre.
+
+Les méthodes asynchrones de l'ORM (``acount``, ``aaggregate``…) passent
+toutes par le même thread et s'exécutent donc en série : chaque agrégat part
+ici dans un pool de threads dédié, de ``ASYNC_DASHBOARD_THREADS`` threads par
+processus (une connexion par thread au plus, gérée comme celles des requêtes
+— ``CONN_MAX_AGE`` ou pool). Le rendu du gabarit reste synchrone.
+"""
+import asyncio
+import contextvars
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.db.models import Count, Q, Sum
+from django.shortcuts import aget_object_or_404, redirect
+from django.utils.timesince import timesince
+from django.utils.translation import gettext as _
+
+from . import currency as currency_engine
+from . import events, lite, routers
+from .models import (
+    Campaign, Contribution, IntermediairePayment, IntermediaireProfile, InvestisseurProfile, Message,
+    Notification, Project, WithdrawalRequest,
+)
+
+DEFAULT_IMAGE = "/static/assets/img/team/default.jpg"
+EVENTS_KEEPALIVE = getattr(settings, "EVENTS_KEEPALIVE", 20)  # secondes
+EVENTS_RETRY = 5000  # délai de reconnexion du navigateur, en ms
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "ASYNC_DASHBOARD_THREADS", 4), thread_name_prefix="dashboard-db"
+)
+
+
+# --------------------------
+# Exécution concurrente
+# --------------------------
+def _in_thread(func):
+    # Même cycle qu'une requête : connexion périmée fermée (ou rendue au pool)
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+async def gather(**queries):
+    """
+    Exécute des requêtes indépendantes ({nom: fonction sans argument}) en
+    parallèle dans le pool. Renvoie {nom: résultat}.
+    """
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(
+            # Contexte copié : le routage (réplique) suit la requête dans le thread
+            loop.run_in_executor(_executor, contextvars.copy_context().run, _in_thread, func)
+            for func in queries.values()
+        )
+    )
+    return dict(zip(queries, results))
+
+
+async def _render(request, template_name, context, paginate_lists=()):
+    # Version allégée si demandée (ngo.lite), comme les vues synchrones
+    return await sync_to_async(lite.render)(request, template_name, context, paginate_lists)
+
+
+def _evaluated(queryset):
+    """Le queryset, évalué (son cache sert ensuite le gabarit, ``.count`` compris)."""
+    len(queryset)
+    return queryset
+
+
+# --------------------------
+# Listes récentes
+# --------------------------
+def _recent_messages(queryset):
+    recent = list(queryset.select_related("sender")[:5])
+    for msg in recent:
+        msg.time_since = timesince(msg.created_at)
+        msg.sender_image = getattr(msg.sender, "profile_image.url", None) or DEFAULT_IMAGE
+    return recent
+
+
+def _recent_notifications(queryset):
+    recent = list(queryset[:5])
+    for notif in recent:
+        notif.time_since = timesince(notif.created_at)
+    return recent
+
+
+def _projects_with_contributions(queryset):
+    """Projets récents et leurs contributions payées, en deux requêtes."""
+    projects = list(queryset)
+    grouped = defaultdict(list)
+    contributions = (
+        Contribution.objects.filter(
+            Q(campaign__project__in=projects) | Q(loan_campaign__project__in=projects), payment_status="completed"
+        )
+        .select_related("investor", "campaign__project", "loan_campaign__project")
+        .order_by("-created_at")
+    )
+    for contribution in contributions:
+        contribution.percentage = contribution.percentage_of_project
+        grouped[contribution.project.pk].append(contribution)
+    for project in projects:
+        project.progress = project.progress_percentage()
+        project.total_collected_display = project.collected_amount or 0
+        project.contributions = grouped[project.pk]
+    return projects
+
+
+def _entrepreneur_avatar(user):
+    if hasattr(user, "entrepreneur_profile"):
+        return user.entrepreneur_profile.get_avatar_url()
+    return getattr(user, "profile_image.url", DEFAULT_IMAGE)
+
+
+def _investor_profile(user):
+    """Profil investisseur (créé au besoin), avatar et nom affiché."""
+    profile, _created = InvestisseurProfile.objects.get_or_create(
+        user=user, defaults={"capital_available": 0, "company": ""}
+    )
+    return profile, profile.get_avatar_url(), profile.get_full_name()
+
+
+def _investor_messages(user):
+    return [
+        {
+            "id": msg.id,
+            "sender_name": msg.sender.full_name or msg.sender.email,
+            "avatar_url": msg.get_sender_avatar(),
+            "subject": msg.subject,
+            "preview": msg.display_preview(),
+            "time_ago": msg.time_since(),
+            "is_read": msg.is_read,
+        }
+        for msg in Message.objects.filter(recipient=user).select_related("sender").order_by("-created_at")[:5]
+    ]
+
+
+def _contribution_images(queryset):
+    images = []
+    for contribution in queryset.iterator(chunk_size=50):
+        campaign = contribution.campaign or contribution.loan_campaign
+        if campaign and getattr(campaign, "image", None):
+            images.append(campaign.image.url)
+        if len(images) >= 5:
+            break
+    return images
+
+
+# --------------------------
+# Tableaux de bord
+# --------------------------
+@login_required
+async def dashboard_entrepreneur(request):
+    user = await request.auser()
+    if not getattr(user, "is_entrepreneur", False) and not getattr(user, "is_intermediaire", False):
+        messages.error(request, _("⛔ Accès réservé aux entrepreneurs et intermédiaires."))
+        return redirect("home")
+
+    with routers.replica_reads():
+        all_messages = Message.objects.filter(recipient=user, archived=False).order_by("-created_at")
+        all_notifications = Notification.objects.filter(recipient=user).order_by("-created_at")
+        owner = {"submitted_by": user} if getattr(user, "is_intermediaire", False) else {"entrepreneur": user}
+        all_projects = Project.objects.filter(**owner).order_by("-created_at")
+        withdrawal_requests = WithdrawalRequest.objects.filter(entrepreneur=user)
+
+        data = await gather(
+            recent_messages=lambda: _recent_messages(all_messages),
+            unread_count=all_messages.filter(is_read=False).count,
+            notifications=lambda: _recent_notifications(all_notifications),
+            unread_notifications_count=all_notifications.filter(is_read=False).count,
+            projects=lambda: _projects_with_contributions(all_projects[:5]),
+            project_stats=lambda: all_projects.aggregate(
+                total=Count("pk"),
+                approved=Count("pk", filter=Q(status="approved")),
+                pending=Count("pk", filter=Q(status="pending")),
+                rejected=Count("pk", filter=Q(status="rejected")),
+                completed=Count("pk", filter=Q(status="completed")),
+                collected=Sum("collected_amount"),
+                target=Sum("target_amount"),
+            ),
+            withdrawal_requests=lambda: _evaluated(withdrawal_requests),
+            withdrawal_stats=lambda: withdrawal_requests.aggregate(
+                requested=Sum("amount"),
+                pending=Count("pk", filter=Q(status="pending")),
+                approved=Count("pk", filter=Q(status="approved")),
+                rejected=Count("pk", filter=Q(status="rejected")),
+            ),
+            user_profile_image=lambda: _entrepreneur_avatar(user),
+        )
+
+        project_stats, withdrawal_stats = data["project_stats"], data["withdrawal_stats"]
+        total_collected = project_stats["collected"] or 0
+        total_target = project_stats["target"] or 0
+        context = {
+            "projects": data["projects"],
+            "total_projects": project_stats["total"],
+            "approved": project_stats["approved"],
+            "pending": project_stats["pending"],
+            "rejected": project_stats["rejected"],
+            "completed": project_stats["completed"],
+            "total_collected": total_collected,
+            "total_target": total_target,
+            "progress_global": round((total_collected / total_target) * 100, 2) if total_target else 0,
+            "withdrawal_requests": data["withdrawal_requests"],
+            "total_requested": withdrawal_stats["requested"] or 0,
+            "total_pending": withdrawal_stats["pending"],
+            "total_approved": withdrawal_stats["approved"],
+            "total_rejected": withdrawal_stats["rejected"],
+            "recent_messages": data["recent_messages"],
+            "unread_count": data["unread_count"],
+            "notifications": data["notifications"],
+            "unread_notifications_count": data["unread_notifications_count"],
+            "user_profile_image": data["user_profile_image"],
+            "user_full_name": getattr(user, "full_name", None) or user.email,
+            "title": _("Tableau de bord Entrepreneur"),
+        }
+        return await _render(
+            request, "ngo/dashboard/entrepreneur/entrepreneur.html", context, paginate_lists=["withdrawal_requests"]
+        )
+
+
+@login_required
+async def dashboard_investisseur(request):
+    user = await request.auser()
+    if not getattr(user, "is_investisseur", False):
+        return redirect("home")
+
+    with routers.replica_reads():
+        contributions = Contribution.objects.filter(investor=user, payment_status="completed")
+        data = await gather(
+            profile=lambda: _investor_profile(user),
+            contributions=lambda: _evaluated(
+                contributions.select_related("campaign__project", "loan_campaign__project")
+            ),
+            total_invested=lambda: currency_engine.contributions_total(contributions),
+            recent_messages=lambda: _investor_messages(user),
+            unread_messages_count=Message.objects.filter(recipient=user, is_read=False).count,
+        )
+        profile, avatar, full_name = data["profile"]
+        projects_supported = {contribution.project for contribution in data["contributions"]}
+
+        context = {
+            "profile": profile,
+            "stats": {
+                "total_invested": data["total_invested"],
+                "reporting_currency": currency_engine.reporting_currency(),
+                "projects_supported_count": len(projects_supported),
+                "capital_available": profile.capital_available,
+            },
+            "contributions": data["contributions"],
+            "projects_supported": projects_supported,
+            "user_profile_image": avatar,
+            "user_full_name": full_name,
+            "recent_messages": data["recent_messages"],
+            "unread_messages_count": data["unread_messages_count"],
+        }
+        return await _render(
+            request, "ngo/dashboard/investisseur/investisseur.html", context,
+            paginate_lists=["contributions", "projects_supported"],
+        )
+
+
+@login_required
+async def dashboard_intermediaire(request):
+    user = await request.auser()
+    if not user.is_intermediaire:
+        messages.error(request, "⛔ Accès réservé aux intermédiaires.")
+        return redirect("home")
+
+    with routers.replica_reads():
+        profile = await aget_object_or_404(IntermediaireProfile, user=user)
+        if not profile.subscription_paid:
+            messages.warning(request, "Vous devez payer votre abonnement pour accéder aux fonctionnalités.")
+            return redirect("intermediaire_payment")
+
+        entrepreneurs = profile.get_entrepreneurs()
+        projects = Project.objects.filter(entrepreneur__in=entrepreneurs).order_by("-created_at")
+        payments = IntermediairePayment.objects.filter(intermediaire=user).order_by("-created_at")
+        campaigns = Campaign.objects.filter(project__in=projects).order_by("-created_at")
+        contributions = Contribution.objects.filter(
+            Q(campaign__project__in=projects) | Q(loan_campaign__project__in=projects)
+        ).select_related("investor", "campaign", "loan_campaign").order_by("-created_at")
+        notifications = Notification.objects.filter(recipient=user)
+        received = Message.objects.filter(recipient=user)
+
+        data = await gather(
+            total_projects=projects.count,
+            total_collected=lambda: currency_engine.projects_collected_total(projects),
+            campaign_stats=lambda: campaigns.aggregate(
+                active=Count("pk", filter=Q(status="active")),
+                completed=Count("pk", filter=Q(status="completed")),
+                failed=Count("pk", filter=Q(status="failed")),
+            ),
+            total_payments=lambda: currency_engine.payments_total(payments),
+            total_contributions=contributions.count,
+            notifications=lambda: list(notifications.order_by("-created_at")[:5]),
+            unread_count=notifications.filter(is_read=False).count,
+            messages_received=lambda: list(received.filter(archived=False).order_by("-created_at")[:5]),
+            unread_messages_count=received.filter(is_read=False).count,
+            entrepreneurs=lambda: list(entrepreneurs[:5]),
+            projects=lambda: list(projects[:5]),
+            campaigns=lambda: list(campaigns[:5]),
+            contributions=lambda: list(contributions[:5]),
+            payments=lambda: list(payments[:5]),
+            projects_images=lambda: [
+                project.image.url for project in projects.exclude(image="").exclude(image__isnull=True)[:5]
+            ],
+            contributions_images=lambda: _contribution_images(contributions),
+            entrepreneurs_images=lambda: [
+                entrepreneur.profile_image.url
+                for entrepreneur in entrepreneurs.exclude(profile_image="").exclude(profile_image__isnull=True)[:5]
+            ],
+            full_name=profile.get_full_name,
+            avatar=profile.get_avatar_url,
+        )
+
+        campaign_stats = data["campaign_stats"]
+        context = {
+            "profile": profile,
+            "full_name": data["full_name"],
+            "avatar": data["avatar"],
+            "stats": {
+                "total_projects": data["total_projects"],
+                "total_collected": data["total_collected"],
+                "active_campaigns": campaign_stats["active"],
+                "completed_campaigns": campaign_stats["completed"],
+                "failed_campaigns": campaign_stats["failed"],
+                "total_payments": data["total_payments"],
+                "reporting_currency": currency_engine.reporting_currency(),
+                "total_contributions": data["total_contributions"],
+            },
+            **{
+                name: data[name]
+                for name in (
+                    "entrepreneurs", "projects", "campaigns", "contributions", "payments",
+                    "projects_images", "contributions_images", "entrepreneurs_images",
+                    "notifications", "unread_count", "messages_received", "unread_messages_count",
+                )
+            },
+        }
+        return await _render(request, "ngo/dashboard/intermediaire/intermediaire.html", context)
+
+
+# --------------------------
+# Flux d'événements (SSE)
+# --------------------------
+def _sse_response(frames):
+    return StreamingHttpResponse(
+        frames,
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _event_frames(user_id):
+    async with events.subscribe(user_id) as queue:
+        # Abonné avant la lecture des compteurs : aucun changement perdu entre les deux
+        yield f"retry: {EVENTS_RETRY}\n\n"
+        counts = await sync_to_async(events.unread_counts)([user_id])
+        yield events.frame("unread", counts[user_id])
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+
+@login_required
+async def event_stream(request):
+    """Notifications, messages et compteurs non lus de l'utilisateur connecté, en direct."""
+    if not isinstance(request, ASGIRequest):
+        # Sous WSGI le flux immobiliserait un worker : 204 = le navigateur ne se reconnecte pas
+        return HttpResponse(status=204)
+    user = await request.auser()
+    return _sse_response(_event_frames(user.pk))
+
+
+async def _progress_frames(kind, pk, progress):
+    async with events.subscribe_campaign(kind, pk) as queue:
+        # Relue une fois abonné (cache) : aucune contribution perdue entre les deux
+        progress = (await sync_to_async(events.campaign_progress)(kind, [pk])).get(pk, progress)
+        yield f"retry: {EVENTS_RETRY}\n\n"
+        yield events.frame("progress", progress)
+        # Publications déjà regroupées par campagne (events.campaigns_changed)
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            while not queue.empty():
+                payload = queue.get_nowait()  # abonné en retard : seule la plus récente compte
+            yield payload
+
+
+async def campaign_progress_stream(request, kind, pk):
+    """Progression d'une campagne (don ou prêt) en direct, pour les pages de détail publiques."""
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    # Servie par le cache : un afflux de spectateurs ne touche pas la base
+    progress = (await sync_to_async(events.campaign_progress)(kind, [pk])).get(pk)
+    if progress is None:
+        raise Http404
+    return _sse_response(_progress_frames(kind, pk, progress))
@@ -0,0 +1,17 @@
+"""Outils communs des commandes de mesure (``bench_*``)."""
+import statistics
+
+
+def percentiles(values):
+    """p50, p95, p99 et maximum d'une série de mesures."""
+    if len(values) < 2:
+        value = values[0] if values else 0
+        return {"p50": value, "p95": value, "p99": value, "max": value}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "max": max(values)}
+
+
+def latency_line(label, values):
+    """Ligne de rapport « label  p50 … p95 … p99 … max … » (valeurs en ms)."""
+    stats = percentiles(values)
+    return f"{label:<22}" + "".join(f" {name} {stats[name]:8.2f} ms  " for name in ("p50", "p95", "p99", "max"))
@@ -0,0 +1,471 @@
+"""
+Construction des catalogues de traduction (commande ``build_catalogs``).
+
+Remplace makemessages lancé dossier par dossier puis la concaténation des
+.po : les chaînes sont extraites en Python (gabarits via ``templatize`` de
+Django, modules via ``ast``), en parallèle et seulement pour les fichiers
+modifiés depuis la dernière construction (cache par empreinte de contenu).
+Chaque langue est ensuite fusionnée entrée par entrée (contexte, msgid) :
+les traductions existantes sont conservées, les nouvelles chaînes ajoutées,
+celles qui ont disparu des sources passent en obsolètes (``#~``). Un .mo
+n'est recompilé que si son catalogue a changé.
+"""
+import ast
+import hashlib
+import io
+import json
+import os
+import re
+import struct
+import tokenize
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.translation.template import templatize
+
+DOMAIN = "django"
+EXTENSIONS = {".py", ".html", ".txt"}
+IGNORED_DIRECTORIES = {"static", "staticfiles", "media", "locale", "node_modules", "venv", "env", ".venv", ".git", "__pycache__"}
+CACHE_VERSION = 1
+WIDTH = 79
+
+# Fonction -> rôle de ses premiers arguments (comme les mots-clés xgettext de makemessages)
+KEYWORDS = {
+    "_": ("msgid",),
+    "gettext": ("msgid",),
+    "gettext_lazy": ("msgid",),
+    "gettext_noop": ("msgid",),
+    "ngettext": ("msgid", "plural"),
+    "ngettext_lazy": ("msgid", "plural"),
+    "pgettext": ("context", "msgid"),
+    "pgettext_lazy": ("context", "msgid"),
+    "npgettext": ("context", "msgid", "plural"),
+    "npgettext_lazy": ("context", "msgid", "plural"),
+}
+PYTHON_FORMAT_RE = re.compile(r"%(?:\([^)]+\))?[-#0 +]*\d*(?:\.\d+)?[diouxXeEfFgGcrs]")
+
+
+# --------------------------
+# Extraction
+# --------------------------
+def _message(arguments, roles, line):
+    """(contexte, msgid, pluriel, ligne) si les arguments attendus sont des chaînes littérales."""
+    if len(arguments) < len(roles) or not all(isinstance(value, str) for value in arguments[:len(roles)]):
+        return None
+    values = dict(zip(roles, arguments))
+    if not values["msgid"]:
+        return None
+    return values.get("context"), values["msgid"], values.get("plural"), line
+
+
+def _python_messages(source):
+    messages = []
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, ast.Call):
+            continue
+        name = node.func.id if isinstance(node.func, ast.Name) else getattr(node.func, "attr", None)
+        if name not in KEYWORDS:
+            continue
+        arguments = [arg.value if isinstance(arg, ast.Constant) else None for arg in node.args]
+        message = _message(arguments, KEYWORDS[name], node.lineno)
+        if message:
+            messages.append(message)
+    return sorted(messages, key=lambda message: message[3])
+
+
+def _template_messages(source):
+    """
+    ``templatize`` réécrit le gabarit en appels gettext() sur les mêmes lignes ;
+    lignes désindentées pour que tokenize ne bute pas sur l'indentation HTML.
+    """
+    code = "\n".join(line.lstrip() for line in templatize(source).splitlines())
+    tokens = [token for token in tokenize.generate_tokens(io.StringIO(code).readline)
+              if token.type not in (tokenize.NL, tokenize.NEWLINE, tokenize.COMMENT)]
+    messages = []
+    for index, token in enumerate(tokens[:-1]):
+        if token.type != tokenize.NAME or token.string not in KEYWORDS or tokens[index + 1].string != "(":
+            continue
+        arguments, current, position = [], None, index + 2
+        # Arguments : chaînes (concaténées si adjacentes) séparées par des virgules
+        while position < len(tokens) and tokens[position].string != ")":
+            part = tokens[position]
+            if part.type == tokenize.STRING:
+                current = (current or "") + ast.literal_eval(part.string)
+            elif part.string == ",":
+                arguments.append(current)
+                current = None
+            else:
+                current = object()  # argument non littéral (compteur, variable)
+            position += 1
+        arguments.append(current)
+        message = _message(arguments, KEYWORDS[token.string], token.start[0])
+        if message:
+            messages.append(message)
+    return messages
+
+
+def extract(path):
+    """Messages d'un fichier source : [(contexte, msgid, pluriel, ligne)]."""
+    source = Path(path).read_text(encoding="utf-8")
+    if path.endswith(".py"):
+        return _python_messages(source)
+    return _template_messages(source)
+
+
+def _extract_file(path):
+    try:
+        return path, extract(path), None
+    except (SyntaxError, tokenize.TokenError, UnicodeDecodeError, ValueError) as exc:
+        return path, [], str(exc)
+
+
+def source_files(root):
+    """Fichiers à analyser sous ``root`` (chemins relatifs, triés comme la sortie de makemessages)."""
+    files = []
+    for directory, subdirectories, names in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if name not in IGNORED_DIRECTORIES)
+        for name in names:
+            if os.path.splitext(name)[1] in EXTENSIONS:
+                files.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/"))
+    return sorted(files)
+
+
+def _digest(path):
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def collect(root, cache_path, jobs=None, force=False):
+    """
+    Messages de toutes les sources : {fichier: [messages]}, en réutilisant le
+    cache pour les fichiers dont le contenu n'a pas changé.
+    Renvoie (messages, fichiers réanalysés, erreurs).
+    """
+    cache = {}
+    if cache_path.exists() and not force:
+        stored = json.loads(cache_path.read_text(encoding="utf-8"))
+        if stored.get("version") == CACHE_VERSION:
+            cache = stored["files"]
+
+    files = source_files(root)
+    digests = {name: _digest(root / name) for name in files}
+    changed = [name for name in files if cache.get(name, {}).get("digest") != digests[name]]
+    errors = {}
+    if changed:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            paths = [str(root / name) for name in changed]
+            for name, (_path, messages, error) in zip(changed, executor.map(_extract_file, paths, chunksize=8)):
+                if error:
+                    errors[name] = error  # pas mis en cache : réessayé à la prochaine construction
+                    cache.pop(name, None)
+                else:
+                    cache[name] = {"digest": digests[name], "messages": messages}
+
+    cache = {name: cache[name] for name in files if name in cache}  # fichiers supprimés oubliés
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"version": CACHE_VERSION, "files": cache}), encoding="utf-8")
+    return {name: [tuple(message) for message in entry["messages"]] for name, entry in cache.items()}, changed, errors
+
+
+# --------------------------
+# Format .po
+# --------------------------
+@dataclass
+class Entry:
+    msgid: str
+    context: str = None
+    plural: str = None
+    msgstr: list = field(default_factory=lambda: [""])
+    comments: list = field(default_factory=list)  # commentaires du traducteur (« # »)
+    references: list = field(default_factory=list)
+    flags: list = field(default_factory=list)
+    obsolete: bool = False
+
+    @property
+    def key(self):
+        return self.context, self.msgid
+
+    @property
+    def translated(self):
+        return all(self.msgstr) and "fuzzy" not in self.flags
+
+
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\t": "\\t", "\r": "\\r"}
+_UNESCAPES = {value[1]: key for key, value in _ESCAPES.items()}
+_UNESCAPE_RE = re.compile(r"\\(.)")
+
+
+def _unescape(text):
+    return _UNESCAPE_RE.sub(lambda match: _UNESCAPES.get(match[1], match[1]), text)
+
+
+def _escape(text):
+    return "".join(_ESCAPES.get(char, char) for char in text)
+
+
+def parse(lines):
+    """Lecture en flux d'un .po : une ``Entry`` à la fois (msgid multi-lignes, pluriels, contextes)."""
+    entry, field_name = Entry(msgid="", msgstr=[]), None
+    for raw in lines:
+        line = raw.strip()
+        obsolete = line.startswith("#~")
+        if obsolete:
+            line = line[2:].strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            if entry.msgstr:  # commentaire après un msgstr : l'entrée suivante commence
+                yield entry
+                entry, field_name = Entry(msgid="", msgstr=[]), None
+            if line.startswith("#:"):
+                entry.references.extend(line[2:].split())
+            elif line.startswith("#,"):
+                entry.flags.extend(flag.strip() for flag in line[2:].split(",") if flag.strip())
+            elif not line.startswith(("#.", "#|")):  # commentaires extraits, msgid précédent : régénérés
+                entry.comments.append(line[1:].strip())
+            continue
+        if line.startswith('"'):  # suite de la chaîne précédente
+            text = _unescape(line[1:-1])
+            if isinstance(field_name, int):
+                entry.msgstr[field_name] += text
+            elif field_name:
+                setattr(entry, field_name, getattr(entry, field_name) + text)
+            continue
+
+        keyword, _space, rest = line.partition(" ")
+        if keyword in ("msgctxt", "msgid") and entry.msgstr:
+            yield entry
+            entry = Entry(msgid="", msgstr=[])
+        entry.obsolete = entry.obsolete or obsolete
+        value = _unescape(rest.strip()[1:-1])
+        if keyword.startswith("msgstr"):
+            entry.msgstr.append(value)
+            field_name = len(entry.msgstr) - 1
+        else:
+            field_name = {"msgctxt": "context", "msgid": "msgid", "msgid_plural": "plural"}[keyword]
+            setattr(entry, field_name, value)
+    if entry.msgstr:
+        yield entry
+
+
+def _string_lines(keyword, text, prefix=""):
+    """``keyword "texte"`` coupé comme gettext (après chaque \\n, puis aux espaces sous 79 colonnes)."""
+    escaped = _escape(text)
+    single = f'{prefix}{keyword} "{escaped}"'
+    if len(single) <= WIDTH and "\\n" not in escaped[:-2]:
+        return [single]
+    chunks = []
+    for piece in re.split(r"(?<=\\n)", escaped):
+        if not piece:
+            continue
+        while len(piece) + len(prefix) + 2 > WIDTH:
+            cut = piece.rfind(" ", 0, WIDTH - len(prefix) - 2)
+            if cut <= 0:
+                break
+            chunks.append(piece[:cut + 1])
+            piece = piece[cut + 1:]
+        chunks.append(piece)
+    return [f'{prefix}{keyword} ""'] + [f'{prefix}"{chunk}"' for chunk in chunks]
+
+
+def _reference_lines(references):
+    lines, current = [], "#:"
+    for reference in references:
+        if len(current) + 1 + len(reference) > WIDTH and current != "#:":
+            lines.append(current)
+            current = "#:"
+        current += f" {reference}"
+    if current != "#:":
+        lines.append(current)
+    return lines
+
+
+def format_entry(entry):
+    prefix = "#~ " if entry.obsolete else ""
+    lines = [f"# {comment}".rstrip() for comment in entry.comments]
+    if not entry.obsolete:
+        lines += _reference_lines(entry.references)
+    if entry.flags:
+        lines.append("#, " + ", ".join(entry.flags))
+    if entry.context is not None:
+        lines += _string_lines("msgctxt", entry.context, prefix)
+    lines += _string_lines("msgid", entry.msgid, prefix)
+    if entry.plural is not None:
+        lines += _string_lines("msgid_plural", entry.plural, prefix)
+        for index, translation in enumerate(entry.msgstr):
+            lines += _string_lines(f"msgstr[{index}]", translation, prefix)
+    else:
+        lines += _string_lines("msgstr", entry.msgstr[0] if entry.msgstr else "", prefix)
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------
+# Fusion et compilation
+# --------------------------
+def template_entries(messages_by_file):
+    """Entrées du modèle (.pot), dans l'ordre de première apparition dans les sources."""
+    entries = {}
+    for name in sorted(messages_by_file):
+        for context, msgid, plural, line in messages_by_file[name]:
+            entry = entries.get((context, msgid))
+            if entry is None:
+                entry = entries[(context, msgid)] = Entry(msgid=msgid, context=context, plural=plural)
+                if PYTHON_FORMAT_RE.search(msgid) or (plural and PYTHON_FORMAT_RE.search(plural)):
+                    entry.flags.append("python-format")
+            entry.plural = entry.plural or plural
+            reference = f"{name}:{line}"
+            if reference not in entry.references:
+                entry.references.append(reference)
+    return list(entries.values())
+
+
+def _plural_count(header):
+    match = re.search(r"nplurals\s*=\s*(\d+)", header)
+    return int(match[1]) if match else 2
+
+
+def _new_header(language):
+    """En-tête d'un catalogue créé : formes plurielles reprises des traductions de Django."""
+    import django
+
+    plural_forms = "nplurals=2; plural=(n != 1);"
+    reference = Path(django.__file__).parent / "conf" / "locale" / language / "LC_MESSAGES" / "django.po"
+    if reference.exists():
+        match = re.search(r'"Plural-Forms: ([^"\\]*)\\n"', reference.read_text(encoding="utf-8"))
+        if match:
+            plural_forms = match[1]
+    return Entry(
+        msgid="",
+        msgstr=[
+            "MIME-Version: 1.0\n"
+            "Content-Type: text/plain; charset=UTF-8\n"
+            "Content-Transfer-Encoding: 8bit\n"
+            f"Language: {language}\n"
+            f"Plural-Forms: {plural_forms}\n"
+        ],
+    )
+
+
+def merge(template, existing, language, keep_obsolete=True):
+    """
+    Catalogue d'une langue : entrées du modèle, traductions existantes reprises
+    par (contexte, msgid). Les doublons laissés par l'ancienne concaténation
+    sont ramenés à une entrée (la première traduite l'emporte).
+    """
+    header, previous = None, {}
+    for entry in existing:
+        if entry.msgid == "" and entry.context is None:
+            header = header or entry
+            continue
+        known = previous.get(entry.key)
+        if known is None or (not known.translated and entry.translated):
+            previous[entry.key] = entry
+    header = header or _new_header(language)
+    plurals = _plural_count(header.msgstr[0])
+
+    merged = [header]
+    for entry in template:
+        known = previous.pop(entry.key, None)
+        result = Entry(
+            msgid=entry.msgid, context=entry.context, plural=entry.plural,
+            msgstr=[""] if entry.plural is None else [""] * plurals,
+            references=list(entry.references), flags=list(entry.flags),
+        )
+        if known is not None:
+            result.comments = known.comments
+            fuzzy = "fuzzy" in known.flags
+            if entry.plural is None:
+                result.msgstr = known.msgstr[:1] or [""]
+                fuzzy = fuzzy or known.plural is not None
+            elif known.plural is not None:
+                result.msgstr = (known.msgstr + [""] * plurals)[:plurals]
+            else:
+                # Devenue plurielle : forme singulière reprise, à revoir
+                result.msgstr[0], fuzzy = known.msgstr[0], True
+            if fuzzy and any(result.msgstr):
+                result.flags.insert(0, "fuzzy")
+        merged.append(result)
+    if keep_obsolete:
+        for entry in previous.values():
+            if entry.translated:
+                entry.obsolete, entry.references = True, []
+                merged.append(entry)
+    return merged
+
+
+def render(entries):
+    return "\n".join(format_entry(entry) for entry in entries)
+
+
+def compile_mo(entries):
+    """Contenu d'un .mo (format GNU, sans table de hachage) : entrées traduites et non floues."""
+    messages = {}
+    for entry in entries:
+        if entry.obsolete:
+            continue
+        is_header = entry.msgid == "" and entry.context is None
+        if not is_header and not entry.translated:
+            continue
+        key = entry.msgid if entry.plural is None else f"{entry.msgid}\x00{entry.plural}"
+        if entry.context is not None:
+            key = f"{entry.context}\x04{key}"
+        value = "\x00".join(entry.msgstr)
+        if is_header:  # comme msgfmt : date d'extraction retirée de l'en-tête compilé
+            value = re.sub(r"^POT-Creation-Date:.*\n", "", value, flags=re.MULTILINE)
+        messages[key.encode("utf-8")] = value.encode("utf-8")
+
+    keys = sorted(messages)
+    ids, strs, offsets = b"", b"", []
+    for key in keys:
+        offsets.append((len(key), len(ids), len(messages[key]), len(strs)))
+        ids += key + b"\x00"
+        strs += messages[key] + b"\x00"
+    count = len(keys)
+    ids_start = 7 * 4 + count * 16
+    strs_start = ids_start + len(ids)
+    key_table, value_table = [], []
+    for key_length, key_offset, value_length, value_offset in offsets:
+        key_table += [key_length, ids_start + key_offset]
+        value_table += [value_length, strs_start + value_offset]
+    header = struct.pack("7I", 0x950412DE, 0, count, 7 * 4, 7 * 4 + count * 8, 0, 0)
+    return header + struct.pack(f"{len(key_table)}I", *key_table) + struct.pack(f"{len(value_table)}I", *value_table) + ids + strs
+
+
+@dataclass
+class Result:
+    language: str
+    entries: int
+    untranslated: int
+    po_changed: bool
+    mo_compiled: bool
+
+
+def build_language(language, template, locale_dir, keep_obsolete=True, compile=True):
+    directory = Path(locale_dir) / language / "LC_MESSAGES"
+    po_path, mo_path = directory / f"{DOMAIN}.po", directory / f"{DOMAIN}.mo"
+    current = po_path.read_text(encoding="utf-8") if po_path.exists() else ""
+    with io.StringIO(current) as handle:
+        entries = merge(template, parse(handle), language, keep_obsolete=keep_obsolete)
+    content = render(entries)
+
+    po_changed = content != current
+    if po_changed:
+        directory.mkdir(parents=True, exist_ok=True)
+        po_path.write_text(content, encoding="utf-8")
+    mo_compiled = compile and (po_changed or not mo_path.exists() or mo_path.stat().st_mtime < po_path.stat().st_mtime)
+    if mo_compiled:
+        mo_path.write_bytes(compile_mo(entries))
+    active = [entry for entry in entries[1:] if not entry.obsolete]
+    return Result(language, len(active), sum(not entry.translated for entry in active), po_changed, mo_compiled)
+
+
+def build(languages=None, jobs=None, force=False, keep_obsolete=True, compile=True):
+    root = Path(settings.BASE_DIR)
+    locale_dir = Path(settings.LOCALE_PATHS[0])
+    cache_path = Path(getattr(settings, "I18N_CACHE_FILE", root / ".cache" / "i18n_catalogs.json"))
+    messages, changed, errors = collect(root, cache_path, jobs=jobs, force=force)
+    template = template_entries(messages)
+    languages = languages or [code for code, _name in settings.LANGUAGES]
+    results = [build_language(code, template, locale_dir, keep_obsolete, compile) for code in languages]
+    return results, changed, errors
@@ -0,0 +1,210 @@
+"""
+Compression et minification des réponses dynamiques (``CompressionMiddleware``).
+
+Les utilisateurs sont surtout sur réseaux mobiles (Afrique centrale et de
+l'Ouest) : chaque octet de HTML compte. Les fichiers statiques sont déjà
+pré-compressés (WhiteNoise, voir ngo/staticfiles.py) ; ici, les réponses
+produites par les vues :
+
+- minification sûre du HTML (``HTML_MINIFY_TYPES``) : commentaires retirés,
+  suites de blancs réduites à un espace ou un saut de ligne, sauf dans
+  ``<pre>``, ``<textarea>``, ``<script>`` et ``<style>`` ; le rendu du
+  navigateur ne change pas (sauf CSS ``white-space: pre`` hors ``<pre>``) ;
+- compression Brotli si le navigateur l'accepte, sinon gzip, pour les types
+  ``RESPONSE_COMPRESSION_TYPES`` au-delà de ``RESPONSE_COMPRESSION_MIN_SIZE``
+  octets. Les réponses en flux (exports) sont compressées morceau par
+  morceau ; jamais les flux SSE (text/event-stream).
+
+BREACH : les jetons CSRF sont masqués différemment à chaque réponse et gzip
+ajoute des octets aléatoires comme ``GZipMiddleware`` de Django.
+
+Mesure : ``python manage.py bench_compression``.
+"""
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # gzip seul
+    brotli = None
+
+GZIP_LEVEL = 6  # comme django.utils.text.compress_string
+GZIP_RANDOM_BYTES = 100  # comme django.middleware.gzip.GZipMiddleware
+NEVER_COMPRESSED = {"text/event-stream"}  # chaque événement doit partir tel quel
+STREAM_FLUSH_SIZE = 16 * 1024
+
+PROTECTED_RE = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+COMMENT_RE = re.compile(r"<!--(?!\[if|<!|>).*?-->", re.DOTALL)
+HTML_SPACES = " \t\r\f\v"  # blancs HTML (pas l'espace insécable)
+
+
+# --------------------------
+# Minification HTML
+# --------------------------
+def _collapse(text):
+    """Blancs autour des sauts de ligne réduits à un saut de ligne (même rendu HTML)."""
+    if "<!--" in text:
+        text = COMMENT_RE.sub("", text)
+    collapsed = "\n".join(filter(None, (line.strip(HTML_SPACES) for line in text.split("\n"))))
+    if not collapsed:
+        return "\n" if text else ""
+    # Un blanc en bordure sépare peut-être deux mots : gardé
+    if text[0] in HTML_SPACES or text[0] == "\n":
+        collapsed = "\n" + collapsed
+    if text[-1] in HTML_SPACES or text[-1] == "\n":
+        collapsed += "\n"
+    return collapsed
+
+
+def minify_html(html):
+    """HTML avec blancs réduits ; contenu de pre/textarea/script/style intact."""
+    chunks, position = [], 0
+    for match in PROTECTED_RE.finditer(html):
+        chunks.append(_collapse(html[position:match.start()]))
+        chunks.append(match[0])
+        position = match.end()
+    chunks.append(_collapse(html[position:]))
+    return "".join(chunks)
+
+
+# --------------------------
+# Encodages
+# --------------------------
+def accepted_encodings(header):
+    """Encodages acceptés (q > 0) d'un en-tête Accept-Encoding."""
+    encodings = set()
+    for item in header.split(","):
+        name, _sep, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _sep, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if name and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header):
+    encodings = accepted_encodings(header)
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+    return compress_string(data, max_random_bytes=GZIP_RANDOM_BYTES)
+
+
+class _StreamCompressor:
+    """
+    Compression incrémentale d'un flux : vidée dès STREAM_FLUSH_SIZE octets
+    reçus, pour que les données partent sans attendre la fin du flux ni
+    gonfler en vidant chaque petite ligne d'export.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+        self._pending = 0
+
+    def chunk(self, data):
+        self._pending += len(data)
+        if self.encoding == "br":
+            output = self._compressor.process(data)
+        else:
+            output = self._compressor.compress(data)
+        if self._pending >= STREAM_FLUSH_SIZE:
+            self._pending = 0
+            output += self._compressor.flush() if self.encoding == "br" else self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+
+    def finish(self):
+        return self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    compressor = _StreamCompressor(encoding)
+    for chunk in chunks:
+        data = compressor.chunk(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def compress_async_stream(chunks, encoding):
+    compressor = _StreamCompressor(encoding)
+    async for chunk in chunks:
+        data = compressor.chunk(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# --------------------------
+# Réponses
+# --------------------------
+def _content_type(response):
+    return response.get("Content-Type", "").split(";", 1)[0].strip().lower()
+
+
+def minify_response(response):
+    if response.streaming or _content_type(response) not in settings.HTML_MINIFY_TYPES:
+        return
+    charset = response.charset
+    try:
+        html = response.content.decode(charset)
+    except UnicodeDecodeError:
+        return
+    response.content = minify_html(html).encode(charset)
+    if response.has_header("Content-Length"):
+        response.headers["Content-Length"] = str(len(response.content))
+
+
+def compress_response(request, response):
+    content_type = _content_type(response)
+    if content_type not in settings.RESPONSE_COMPRESSION_TYPES or content_type in NEVER_COMPRESSED:
+        return
+    if response.has_header("Content-Encoding"):
+        return
+    if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+        return
+    # La réponse varie selon Accept-Encoding, même non compressée pour ce client
+    patch_vary_headers(response, ("Accept-Encoding",))
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return
+
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = compress_async_stream(response.streaming_content, encoding)
+        else:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+        # Taille finale inconnue
+        del response.headers["Content-Length"]
+    else:
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+
+    # Un ETag fort désigne des octets précis : affaibli (comme GZipMiddleware)
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response.headers["ETag"] = "W/" + etag
+    response.headers["Content-Encoding"] = encoding
@@ -0,0 +1,724 @@
+"""
+Registre du contenu des pages d'information (que faisons-nous, agrément,
+financement, guide, mentions légales, confidentialité, réclamations, CGU,
+données personnelles).
+
+Chaque page est une fonction ``@page(gabarit)`` qui construit son contexte.
+Ce contexte ne dépend que de la langue : il est construit au premier
+affichage dans chaque langue, figé (dictionnaires en lecture seule, tuples)
+et gardé par le processus. Les blocs ``title`` et ``content`` du gabarit
+sont rendus au même moment : les visites suivantes ne font plus ni recherche
+gettext ni rendu de ce contenu, seulement la mise en page commune
+(``base.html`` : navigation de l'utilisateur, messages).
+
+``INFO_PAGES_CACHE`` (désactivé avec DEBUG, pour voir les gabarits modifiés) :
+sans registre figé, contexte et gabarit sont reconstruits à chaque requête.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.conf import settings
+from django.shortcuts import render
+from django.template import Context
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode
+from django.utils import translation
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, gettext as _
+
+BASE_TEMPLATE = "base.html"
+PRERENDERED_TEMPLATE = "ngo/info/prerendered.html"
+PRERENDERED_BLOCKS = {"title", "content"}  # blocs de base.html repris par PRERENDERED_TEMPLATE
+
+PAGES = {}
+_entries = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Page:
+    name: str
+    template: str
+    build: callable
+
+
+@dataclass(frozen=True)
+class Entry:
+    context: MappingProxyType
+    blocks: MappingProxyType = None  # None : gabarit rendu à chaque requête
+
+
+def page(template):
+    """Déclare une page : la fonction renvoie le contexte du gabarit dans la langue active."""
+    def register(build):
+        PAGES[build.__name__] = Page(build.__name__, template, build)
+        return build
+    return register
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+# --------------------------
+# Pré-rendu
+# --------------------------
+def _prerender(template_name, context):
+    """
+    Blocs title / content du gabarit rendus hors requête ; None si le gabarit
+    n'hérite pas directement de base.html ou redéfinit d'autres blocs.
+    """
+    template = get_template(template_name).template
+    extends = next((node for node in template.nodelist if isinstance(node, ExtendsNode)), None)
+    if extends is None or not set(extends.blocks) <= PRERENDERED_BLOCKS:
+        return None
+    if extends.parent_name.resolve(Context()) != BASE_TEMPLATE:
+        return None
+    context = Context(dict(context))
+    with context.render_context.push_state(template), context.bind_template(template):
+        return MappingProxyType({
+            name: mark_safe(block.render(context)) for name, block in extends.blocks.items()
+        })
+
+
+def _language():
+    language = get_language() or settings.LANGUAGE_CODE
+    try:
+        return translation.get_supported_language_variant(language)
+    except LookupError:
+        return settings.LANGUAGE_CODE
+
+
+def entry(name, language=None):
+    """Contexte figé et blocs pré-rendus de la page dans la langue (active par défaut)."""
+    language = language or _language()
+    key = (name, language)
+    cached = _entries.get(key)
+    if cached is not None:
+        return cached
+    with _lock:
+        if key not in _entries:
+            current = PAGES[name]
+            with translation.override(language):
+                context = freeze(current.build())
+                _entries[key] = Entry(context, _prerender(current.template, context))
+        return _entries[key]
+
+
+def render_page(request, name):
+    if not getattr(settings, "INFO_PAGES_CACHE", False):
+        current = PAGES[name]
+        return render(request, current.template, current.build())
+    cached = entry(name)
+    if cached.blocks is None:
+        return render(request, PAGES[name].template, dict(cached.context))
+    return render(request, PRERENDERED_TEMPLATE, {"blocks": cached.blocks})
+
+
+# ---------------------------
+# Que faisons nous
+# ---------------------------
+@page("ngo/info/what_we_do.html")
+def que_faisons_nous():
+    steps = [
+        {"title": _("Dépôt du dossier de projet"), 
+         "actors": _("Porteur de projet"), 
+         "desc": _("Soumission du projet avec business plan, besoin de financement et pièces administratives."), 
+         "image": "assets/img/etude/steps/depot.jpg"},
+        {"title": _("Étude de recevabilité"), 
+         "actors": _("Cabinet d’accompagnement"), 
+         "desc": _("Analyse de la complétude et cohérence du dossier avant instruction."), 
+         "image": "assets/img/etude/steps/recevabilite.jpeg"},
+        {"title": _("Analyse technique et économique"), 
+         "actors": _("Experts IGIA"), 
+         "desc": _("Étude du modèle économique et de la faisabilité du projet."), 
+         "image": "assets/img/etude/steps/analyse.jpg"},
+        {"title": _("Contrôle de conformité légale"), 
+         "actors": _("Cabinet juridique"), 
+         "desc": _("Vérification de la conformité réglementaire et administrative."), 
+         "image": "assets/img/etude/steps/legal.jpg"},
+        {"title": _("Validation financière"), 
+         "actors": _("Comité financier"), 
+         "desc": _("Évaluation financière et recommandation du mode de financement."), 
+         "image": "assets/img/etude/steps/financier.jpg"},
+        {"title": _("Comité d’agrément"), 
+         "actors": _("Comité d’investissement"), 
+         "desc": _("Décision finale sur le financement du projet."), 
+         "image": "assets/img/etude/steps/agrement.jpg"},
+        {"title": _("Mise en ligne sur IGIA"), 
+         "actors": _("Équipe IT & Com"), 
+         "desc": _("Publication du projet sur la plateforme pour levée de fonds."), 
+         "image": "assets/img/etude/steps/mise_en_ligne.jpg"},
+        {"title": _("Suivi post-validation"), 
+         "actors": _("Cabinet de suivi"), 
+         "desc": _("Accompagnement et évaluation trimestrielle du projet."), 
+         "image": "assets/img/etude/steps/suivi.jpg"},
+    ]
+
+    domaines = [
+        {"title": _("Entrepreneuriat & Innovation"), 
+         "subtitle": _("Soutenir les jeunes et startups à fort potentiel."), 
+         "image": "assets/img/etude/domains/entrepreneurship.jpg", 
+         "points": [_("Financement de startups"), _("Incubation de projets"), _("Création de TPE/PME"), _("Innovation sociale")]},
+        {"title": _("Agriculture & Développement rural"), 
+         "subtitle": _("Appuyer la sécurité alimentaire et l’économie verte."), 
+         "image": "assets/img/etude/domains/agriculture.jpg", 
+         "points": [_("Agriculture durable"), _("Élevage et pisciculture"), _("Transformation agroalimentaire")]},
+        {"title": _("Technologie & Numérique"), 
+         "subtitle": _("Encourager l’innovation technologique."), 
+         "image": "assets/img/etude/domains/tech.jpg", 
+         "points": [_("Startups tech"), _("Solutions fintech"), _("Cybersécurité"), _("E-learning")]},
+        {"title": _("Éducation & Emploi"), 
+         "subtitle": _("Former et insérer les jeunes."), 
+         "image": "assets/img/etude/domains/education.jpg", 
+         "points": [_("Formation professionnelle"), _("Éducation financière"), _("Mentorat")]},
+        {"title": _("Énergie & Environnement"), 
+         "subtitle": _("Favoriser la transition écologique."), 
+         "image": "assets/img/etude/domains/energy.jpg", 
+         "points": [_("Énergies renouvelables"), _("Recyclage"), _("Reboisement")]},
+        {"title": _("Santé & Bien-être"), 
+         "subtitle": _("Promouvoir l’accès équitable à la santé."), 
+         "image": "assets/img/etude/domains/health.jpg", 
+         "points": [_("Centres communautaires"), _("Télé-médecine"), _("Nutrition")]},
+        {"title": _("Transport & Petits Métiers"), 
+         "subtitle": _("Soutenir les acteurs du quotidien et les petits entrepreneurs."), 
+         "image": "assets/img/etude/domains/transport.jpg", 
+         "points": [_("Moto-taxi, taxi, transport local"), _("Call-box et salons de coiffure"), _("Bars, cafés et petits commerces"), _("Artisanat et ateliers mécaniques")]},
+    ]
+
+    return {'steps': steps, 'domaines': domaines}
+
+# ---------------------------
+# Agrement securite
+# ---------------------------
+@page("ngo/info/agrement_securite.html")
+def agrement_securite():
+    sections = [
+        {"title": _("Plateforme agréée DNB"),
+         "desc": _("IGIA est enregistrée auprès des autorités financières et agréée par l’Autorité des Marchés Financiers."),
+         "image": "assets/img/lever/agrement.png"},
+        {"title": _("Label Croissance Verte"),
+         "desc": _("IGIA est reconnue pour son engagement envers la durabilité et la transparence des financements."),
+         "image": "assets/img/lever/ABN-AMRO.png"},
+        {"title": _("Confiance et transparence"),
+         "desc": _("Nous veillons à ce que chaque projet respecte les exigences éthiques et environnementales."),
+         "image": "assets/img/lever/dok.png"},
+    ]
+
+    securite_points = [
+        {"title": _("Environnement sécurisé"),
+         "desc": _("L’ensemble du site IGIA est protégé par le protocole HTTPS pour garantir la sécurité des échanges.")},
+        {"title": _("Transactions sécurisées"),
+         "desc": _("Les opérations sont gérées via des protocoles de paiement semi-automatiques pour éviter tout risque de fraude.")},
+        {"title": _("Accès crypté"),
+         "desc": _("Votre mot de passe reste confidentiel et vos données ne sont jamais partagées avec des tiers.")},
+        {"title": _("Protection des transactions"),
+         "desc": _("Nos partenaires bancaires et opérateurs assurent la continuité et la sécurité des opérations même en cas d’incident.")},
+    ]
+
+    return {
+        'sections': sections,
+        'securite_points': securite_points,
+    }
+
+# ---------------------------
+# Financement inclusif
+# ---------------------------
+@page("ngo/info/financement_igia.html")
+def financement_igia():
+    """
+    Vue combinée : Financement participatif et inclusif IGIA.
+    """
+
+    # -----------------------
+    # Contenu 1 : financement participatif
+    # -----------------------
+    types_financement = [
+        {
+            "title": _("Financement Corporate / Bridge / Mezzanine"),
+            "desc": _(
+                "IGIA structure des financements participatifs allant jusqu'à 10 M€, "
+                "en associant notre plateforme et nos partenaires financiers. "
+                "Nous adaptons les solutions corporate, bridge ou mezzanine selon le stade de développement des projets."
+            ),
+            "image": "assets/img/lever/corporate.jpg",
+        },
+        {
+            "title": _("Financements à vocation territoriale"),
+            "desc": _(
+                "IGIA favorise l’adhésion des citoyens dès la phase de développement des projets. "
+                "Nous proposons des modalités sur-mesure et une communication spécifique pour les territoires et riverains."
+            ),
+            "image": "assets/img/lever/territorial.jpg",
+        },
+        {
+            "title": _("Financements liés aux AO / AMI"),
+            "desc": _(
+                "Pour les appels d’offres nationaux et territoriaux, IGIA accompagne les projets afin d’optimiser leur sélection "
+                "grâce à l’expertise en financement participatif et à la structuration de dossiers complets."
+            ),
+            "image": "assets/img/lever/ami.png",
+        },
+    ]
+
+    accompagnement = [
+        _("Analyse financière complète du projet"),
+        _("Rédaction et vérification de la documentation contractuelle"),
+        _("Présentation du projet à notre communauté d'investisseurs"),
+        _("Communication adaptée avant, pendant et après la collecte"),
+        _("Suivi des souscriptions et clôture de l’opération"),
+        _("Suivi des transactions et reporting aux investisseurs"),
+    ]
+
+    tarifs = [
+        _("IGIA ne prélève aucun frais aux investisseurs."),
+        _("Pour chaque levée de fonds réussie, un pourcentage compris entre 2 %% et 6 %% du montant collecté est facturé au porteur de projet."),
+        _("Frais de mise en ligne détaillés par devis selon le projet."),
+        _("Frais de communication éventuels, également détaillés par devis."),
+    ]
+
+    realisations = [
+        {
+            "title": _("Opérations à enjeu local"),
+            "desc": _(
+                "IGIA associe les citoyens et riverains au financement des projets, créant une appropriation locale et "
+                "favorisant le développement territorial. "
+                "Nous atteignons jusqu'à 100%% des objectifs de collecte grâce aux investisseurs locaux."
+            ),
+            "image": "assets/img/lever/local.jpg",
+        },
+        {
+            "title": _("Opérations d’envergure jusqu’à 10 M€"),
+            "desc": _(
+                "Avec notre communauté d’investisseurs et nos partenaires financiers, IGIA structure des financements jusqu'à 10 M€. "
+                "Nous accompagnons chaque projet dans la structuration, la documentation contractuelle et la visibilité de l’opération."
+            ),
+            "image": "assets/img/lever/envergure.jpg",
+        },
+    ]
+
+    # -----------------------
+    # Contenu 2 : financement inclusif
+    # -----------------------
+    models = [
+        {
+            "title": _("Financement d’Amorçage Solidaire"),
+            "desc": _(
+                "Ce modèle s’adresse aux porteurs d’idées ou micro-projets à fort impact local. "
+                "Il permet de recevoir un micro-capital (0 à 2 000 €) grâce à des dons ou micro-investissements, "
+                "débloqués progressivement selon l’avancement du projet. "
+                "L’entrepreneur bénéficie d’un accompagnement obligatoire par un mentor IGIA."
+            ),
+            "image": "assets/img/lever/seed.jpg",
+        },
+        {
+            "title": _("Financement Communautaire Garanti"),
+            "desc": _(
+                "Le porteur de projet mobilise son entourage ou sa communauté (amis, famille, diaspora) "
+                "pour garantir symboliquement son projet. "
+                "Une fois un seuil atteint, IGIA ou un partenaire complète le montant restant. "
+                "C’est un modèle de solidarité encadrée, où la réussite du projet profite à tous."
+            ),
+            "image": "assets/img/lever/community.png",
+        },
+        {
+            "title": _("Financement par Mise à Disposition d’Actif"),
+            "desc": _(
+                "IGIA ou un investisseur achète un bien productif (voiture, moto, fauteuil, matériel). "
+                "Le bénéficiaire l’utilise via une location avec option d’achat ou un micro-crédit souple. "
+                "Les revenus générés servent à rembourser l’actif, menant à une autonomie complète en 12 à 36 mois."
+            ),
+            "image": "assets/img/lever/asset.png",
+        },
+        {
+            "title": _("Financement par Tiers de Confiance"),
+            "desc": _(
+                "IGIA collabore avec des intermédiaires locaux agréés (ONG, incubateurs, coopératives). "
+                "Ces partenaires reçoivent les fonds et accompagnent les porteurs de projets sur le terrain. "
+                "Ce modèle réduit les risques et garantit un suivi éthique et durable."
+            ),
+            "image": "assets/img/lever/trusted.png",
+        },
+    ]
+
+    avantages = [
+        {"title": _("Accessibilité"), "desc": _("Ouvert à tous les porteurs d’idées, même sans capital initial.")},
+        {"title": _("Encadrement"), "desc": _("Chaque bénéficiaire est accompagné par un mentor ou un partenaire agréé.")},
+        {"title": _("Transparence"), "desc": _("Les fonds sont débloqués étape par étape, selon les résultats concrets.")},
+        {"title": _("Autonomisation"), "desc": _("Les modèles visent à créer de véritables propriétaires et entrepreneurs.")},
+    ]
+
+    # -----------------------
+    # Devise IGIA
+    # -----------------------
+    devise = _(
+        "IGIA combine mobilisation collective et financement solidaire (Crowdlending) et "
+        "financement participatif (Crowdfunding) pour que chaque idée, qu’elle vienne d’un entrepreneur "
+        "avec ou sans capital, ait une chance de devenir réalité."
+    )
+
+    return {
+        'types_financement': types_financement,
+        'accompagnement': accompagnement,
+        'tarifs': tarifs,
+        'realisations': realisations,
+        'models': models,
+        'avantages': avantages,
+        'devise': devise,
+    }
+
+# ---------------------------
+# Guide d'utilisation
+# ---------------------------
+@page("ngo/info/guide_utilisation.html")
+def guide_utilisation():
+    # Données pour chaque profil
+    profiles = [
+        {
+            "role": _("Entrepreneur"),
+            "steps": [
+                _("Connectez-vous au Dashboard."),
+                _("Cliquez sur 'Créer un projet'."),
+                _("Remplissez le formulaire : titre, description, montant, durée, type de financement (crowdfunding/crowdlending), contreparties."),
+                _("Acquittez-vous des frais de soumission."),
+                _("Après approbation, votre projet sera visible sur la plateforme.")
+            ],
+            "note": [
+                _("Facilités de paiement disponibles selon votre région et votre pays de résidence."),
+                _("Crowdfunding : contrepartie ou produit."),
+                _("Crowdlending : remboursement avec intérêts.")
+            ],
+            "warnings": [
+                _("Projets visibles uniquement après validation : tous les projets doivent être soumis et validés par IGIA avant de pouvoir recevoir des fonds."),
+                _("Recevoir des fonds directement d’investisseurs en dehors de la plateforme peut entraîner la suspension du projet et l'exclusion définitive."),
+                _("La plateforme ne pourra pas gérer les remboursements ni calculer les intérêts si c’est fait en dehors du site.")
+            ] 
+        },
+        {
+            "role": _("Investisseur"),
+            "steps": [
+                _("Connectez-vous au Dashboard."),
+                _("Cliquez sur 'Explorer les projets'."),
+                _("Filtrez selon vos critères : montant minimal, type de financement, durée, secteur."),
+                _("Consultez la page détaillée : taux, durée, montant minimum, risques, modalités de remboursement."),
+                _("Cliquez sur 'Investir maintenant', choisissez le montant et confirmez le paiement.")
+            ],
+            "note": [
+                _("Crowdfunding : soutien et contrepartie."),
+                _("Crowdlending : prêt avec intérêts.")
+            ],
+            "warnings": [
+                _("Toujours passer par la plateforme IGIA : les investissements doivent être effectués via le site."),
+                _("Ne jamais verser directement de l’argent à l’entrepreneur sans passer par la plateforme.")
+            ],
+            "reason": [
+                _("Sécurisation des transactions."),
+                _("Suivi des remboursements et intérêts dans le cadre du crowdlending."),
+                _("Garantie de conformité aux conditions de financement.")
+            ]
+        },
+        {
+            "role": _("Intermédiaire"),
+            "steps": [
+                _("Connectez-vous au Dashboard."),
+                _("Cliquez sur 'Mes Intermédiaires'."),
+                _("Ajoutez les projets que vous représentez et les entrepreneurs que vous accompagnez."),
+                _("Soumettez les projets pour le compte de l’entrepreneur si nécessaire."),
+                _("Suivez l’avancement des investissements et recevez vos commissions automatiquement.")
+            ],
+            "note": [
+                _("Facilite la collecte de fonds et simplifie le processus pour les entrepreneurs et investisseurs.")
+            ],
+            "warnings": [
+                _("Respect strict du processus IGIA : les intermédiaires ne doivent pas contourner la plateforme."),
+                _("Toutes les transactions doivent passer par IGIA."),
+                _("Les commissions sont calculées uniquement sur les investissements effectués via la plateforme.")
+            ]
+        }
+    ]
+
+    # Sécurité et prévention des scams
+    security = {
+        "title": _("Protection contre les emails frauduleux"),
+        "message": [
+            _("Tous les emails officiels IGIA proviennent du domaine @igia.com."),
+            _("Tout email venant d’une adresse différente doit être considéré comme suspect."),
+            _("IGIA ne demande jamais de transférer de l’argent en dehors de la plateforme ni vos identifiants de compte par email."),
+            _("Suivant chaque région et pays IGIA ne fait des transactions qu'avec ses partenaires agréés et ses partenaires sont communiqués lors des paiements."),
+            _("Vérifiez toujours le Dashboard IGIA pour confirmer toute demande d’investissement ou transaction."),
+            _("Ne transférez jamais d’argent ni ne communiquez vos identifiants en dehors de la plateforme."),
+            _("Ne cliquez jamais sur des liens ou téléchargez des fichiers provenant de sources inconnues."),
+            _("En cas de suspicion, signalez immédiatement l'email à contact@igia.com."),
+            _("Vérifiez toujours votre Dashboard IGIA avant de confirmer toute transaction.")
+        ]
+    }
+
+    contact_info = {
+        "email": "contact@igia.com",
+        "phone": "01.82.83.97.52"
+    }
+
+    return {
+        "profiles": profiles,
+        "contact_info": contact_info,
+        "security": security
+    }
+
+# ---------------------------
+# Mention Legale
+# ---------------------------
+@page("ngo/info/mentions_legales.html")
+def mentions_legales():
+    """Page des mentions légales IGIA avec gestion des risques internationaux"""
+
+    categories = [
+        "politique",
+        "economique",
+        "infrastructures",
+        "social",
+        "environnement",
+        "gouvernance",
+    ]
+
+    context = {
+        "company": {
+            "name": "Infinity Global Investment & Aid (IGIA) NV",
+            "capital": "300 000 000 €",
+            "siren": "805 178 860",
+            "tva": "NE09805178860",
+            "ape": "7022Z",
+            "address": "94 rue de la Victoria, 75009 Utrecht, Pays-Bas",
+            "email": "contact@igia.com",
+            "phone": "+33 1 82 83 97 52",
+            "director": "Amaury Blais",
+            "amf_number": "PSFP 2012-22",
+        },
+        "bank": {
+            "name": "ABN AMRO BANK NV",
+            "address": "Gustav Mahlerlaan 10, 1082 PP Amsterdam, Pays-Bas",
+            "email": "customercare@be.abnamro.com",
+            "rcs": "500 486 915",
+            "agrement": "ACPR du 1 avril 2018",
+        },
+        "host": {
+            "name": "Heroku, Inc.",
+            "address": "650 7th Street, San Francisco, CA 94103",
+            "contact_url": "https://www.heroku.com/contact",
+            "security_url": "https://www.heroku.com/policy/security",
+        },
+        "risks": [
+            {"type": _("Politique & Juridique"), "solutions": _("Assurances MIGA, arbitrage international, partenaires certifiés.")},
+            {"type": _("Économique & Monétaire"), "solutions": _("Couverture de change, diversification, devises fortes.")},
+            {"type": _("Infrastructures & Logistique"), "solutions": _("Plan logistique, zones viabilisées, technologie verte.")},
+            {"type": _("Social & Culturel"), "solutions": _("Dialogue communautaire, emploi local, RSE.")},
+            {"type": _("Environnement & Climat"), "solutions": _("Études d’impact, technologies durables, plans de résilience.")},
+            {"type": _("Gouvernance & Transparence"), "solutions": _("Audit externe, suivi digital IGIA, normes ISO 37001.")},
+        ],
+        "categories": categories,
+    }
+
+    return context
+
+# ---------------------------
+# Confidentialite
+# ---------------------------
+@page("ngo/info/confidentialite.html")
+def confidentialite():
+    """Page de politique de confidentialité IGIA"""
+    
+    context = {
+        "sections": [
+            {
+                "title": _("1. Protection des données personnelles"),
+                "content": _(
+                    "IGIA respecte la législation en matière de protection des données (loi Informatique et Libertés du 6 janvier 1978). "
+                    "Le site est déclaré auprès du Department of Constitutional Affairs and Legislation (DCAL) sous le numéro 1807840. "
+                    "Les données collectées ne sont jamais utilisées à des fins publicitaires. "
+                    "Les utilisateurs disposent de droits d’accès, de rectification et d’opposition (articles 26, 34 à 38 et 36). "
+                    "Ces droits peuvent être exercés via le compte IGIA ou à l’adresse : contact@igia.com."
+                ),
+            },
+            {
+                "title": _("2. Sécurité et confidentialité des comptes"),
+                "content": _(
+                    "IGIA ne demandera jamais de mot de passe par téléphone ou e-mail. "
+                    "L’utilisateur doit se déconnecter après chaque session, en particulier sur un poste partagé. "
+                    "Les informations relatives aux projets financiers sont strictement confidentielles et ne doivent pas être divulguées. "
+                    "L’utilisateur s’engage à ne pas les utiliser à d’autres fins que l’étude des projets."
+                ),
+            },
+            {
+                "title": _("3. Politique de cookies"),
+                "content": _(
+                    "Le site IGIA utilise des cookies pour améliorer la navigation et collecter des statistiques d’utilisation. "
+                    "Les cookies ne contiennent aucune donnée personnelle et servent uniquement à identifier plus rapidement l’utilisateur. "
+                    "L’utilisateur peut désactiver les cookies via les paramètres de son navigateur, mais cela peut altérer certaines fonctionnalités."
+                ),
+            },
+        ],
+        "contact_email": "contact@igia.com",
+    }
+
+    return context
+
+# ---------------------------
+# Reclamation
+# ---------------------------
+@page("ngo/info/reclamations.html")
+def reclamations():
+    """Page de gestion des réclamations IGIA conformément au règlement européen"""
+
+    context = {
+        "contact": {
+            "email": "reclamation@igia.com",
+            "address": "94 rue de la Victoire, 75009 Paris",
+            "phone": "+33 1 82 83 97 52",
+        },
+        "procedure": [
+            {
+                "title": _("Dépôt d’une réclamation"),
+                "details": _(
+                    "La réclamation peut être envoyée par email, courrier ou via le modèle PDF disponible sur le site. "
+                    "IGIA accuse réception sous 10 jours ouvrables."
+                ),
+            },
+            {
+                "title": _("Examen et traitement"),
+                "details": _(
+                    "IGIA évalue la clarté, la complétude et la recevabilité de la réclamation. "
+                    "Des informations complémentaires peuvent être demandées pour un traitement optimal."
+                ),
+            },
+            {
+                "title": _("Décision et communication"),
+                "details": _(
+                    "Une réponse motivée est adressée dans un délai maximum de 30 jours ouvrés. "
+                    "Toute décision inclut les voies de recours possibles."
+                ),
+            },
+            {
+                "title": _("Médiation"),
+                "details": _(
+                    "En cas de désaccord, le réclamant peut saisir le Médiateur WTW : "
+                    "formulaire en ligne sur wtwco.com, téléphone +31 (0) 88 541 3000, "
+                    "ou courrier à l’Autorité des marchés financiers d’Amsterdam."
+                ),
+            },
+        ],
+        "mediator": {
+            "name": "WTW Médiation",
+            "website": "https://www.wtwco.com/fr-fr/about-us/office-locations",
+            "phone": "+31 (0) 88 541 3000",
+            "address": "Autorité des marchés financiers – Médiation, Prof. E.M. Meijerslaan 5, Amstelveen 1183 AV, Amsterdam",
+        },
+    }
+
+    return context
+
+# --------------------------------
+# Condition generale d'utilisation
+# --------------------------------
+@page("ngo/info/conditions_generales_utilisation.html")
+def conditions_generales_utilisation():
+    """
+    Page complète des Conditions Générales d’Utilisation (CGU) du site IGIA.
+    Inclut le contenu textuel du document juridique stocké dans /static/docs/cgu_igia_LANG.txt
+    et les informations de l’entreprise.
+    """
+
+    # Langue active
+    lang = get_language()  # ex: "fr", "en", "es","nl"
+    filename = f"cgu_igia_{lang}.txt"
+    cgu_path = os.path.join(settings.BASE_DIR, "ngo", "static", "docs", filename)
+
+    # Lecture sécurisée du fichier CGU traduit
+    try:
+        with open(cgu_path, "r", encoding="utf-8") as f:
+            cgu_text = f.read()
+    except FileNotFoundError:
+        # Message alternatif si le fichier n’existe pas pour la langue donnée
+        cgu_text = _(
+            "Le document officiel des Conditions Générales d’Utilisation est temporairement "
+            "indisponible dans votre langue. Veuillez réessayer ultérieurement ou contacter "
+            "notre support à contact@igia.com."
+        )
+
+    # Informations sur l’entreprise IGIA
+    company = {
+        "name": "Infinity Global Investment & Aid (IGIA)",
+        "address": "94 rue de la Victoria, 75009 Utrecht, Pays-Bas",
+        "email": "contact@igia.com",
+        "phone": "+33 1 82 83 97 52",
+        "siren": "KVB 805 168 860",
+        "tva": "NE 09805178860",
+        "capital": "300 000 000 €",
+        "rcs": "RCS de Utrecht",
+        "psfp": "n°2012-22 (AMF)",
+    }
+
+    # Contexte transmis au template
+    context = {
+        "title": _("Conditions Générales d’Utilisation"),
+        "meta_description": _(
+            "Découvrez les conditions générales d'utilisation de la plateforme IGIA : sécurité, "
+            "transparence et conformité AMF."
+        ),
+        "company": company,
+        "cgu_text": cgu_text,
+        "last_update": _("Applicables depuis le 9 novembre 2023"),
+        "hero": {
+            "title": _("Conditions Générales d’Utilisation"),
+            "subtitle": _("Sécurité, transparence et responsabilité pour chaque investisseur IGIA."),
+            "background": "assets/img/about/hero-bg.jpg",
+        },
+    }
+
+    return context
+
+# --------------------------------
+# Donnees personelles
+# --------------------------------
+@page("ngo/info/donnees_personnelles.html")
+def donnees_personnelles():
+    """
+    Page Politique de Protection des Données Personnelles (RGPD).
+    Le contenu est chargé dynamiquement selon la langue active (FR, EN, etc.).
+    """
+
+    # 🔹 Langue active
+    lang = get_language()  # Exemple : "fr", "en"
+    filename = f"donnees_personnelles_{lang}.txt"
+    file_path = os.path.join(settings.BASE_DIR, "ngo", "static", "docs/donner", filename)
+
+    # 🔹 Lecture du texte RGPD
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            rgpd_text = f.read()
+    except FileNotFoundError:
+        rgpd_text = _(
+            "La politique de protection des données personnelles est temporairement indisponible. "
+            "Veuillez réessayer plus tard ou contacter notre équipe à contact@igia.com."
+        )
+
+    # 🔹 Contexte envoyé au template
+    context = {
+        "title": _("Politique de protection des données personnelles"),
+        "meta_description": _(
+            "Découvrez comment IGIA protège vos données personnelles conformément au RGPD."
+        ),
+        "rgpd_text": rgpd_text,
+        "last_update": _("Dernière mise à jour : 9 novembre 2023"),
+        "hero": {
+            "title": _("Données personnelles"),
+            "subtitle": _("Sécurité, transparence et confidentialité de vos informations avec IGIA."),
+            "background": "assets/img/about/hero-bg.jpg",
+        },
+    }
+
+    return context
@@ -0,0 +1,241 @@
+"""
+Moteur de conversion multi-devises.
+
+Convention : ``rate_to_usd`` (ExchangeRate) et ``Currency.exchange_rate_to_usd``
+donnent la valeur d'une unité de la devise en USD. Convertir un montant de A
+vers B à la date d revient donc à ``montant * taux(A, d) / taux(B, d)``.
+
+Les taux sont historisés par jour dans ``ExchangeRate`` (tâche
+``snapshot_exchange_rates`` + à chaque modification d'une devise). Pour une
+date donnée, on prend le dernier instantané antérieur ou égal ; à défaut, le
+taux courant de la devise. Chaque instantané porte sa période de validité
+(``valid_until`` = date de l'instantané suivant, voir ``link_periods``).
+
+Les totaux multi-devises sont calculés en SQL : chaque ligne est jointe à
+l'instantané dont la période contient son jour (jointure sur l'index
+(currency, date), pas de sous-requête par ligne) et l'ensemble est agrégé en
+une requête, quel que soit le nombre de lignes. Une ligne sans devise est
+convertie avec celle du pays (``COUNTRY_CURRENCY_PATHS``).
+"""
+from bisect import bisect_right
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db.models import (
+    DateField, DecimalField, ExpressionWrapper, F, FilteredRelation, Q, Sum, Window,
+)
+from django.db.models.functions import Cast, Coalesce, Lead
+from django.utils import timezone
+
+from .models import ExchangeRate
+from .reference import reference_data
+
+USD = "USD"
+CENT = Decimal("0.01")
+
+RATE_FIELD = DecimalField(max_digits=20, decimal_places=10)
+AMOUNT_FIELD = DecimalField(max_digits=30, decimal_places=10)
+
+
+def reporting_currency():
+    """Code de la devise de reporting (settings.REPORTING_CURRENCY, USD par défaut)."""
+    return getattr(settings, "REPORTING_CURRENCY", USD)
+
+
+def quantize(amount):
+    return Decimal(amount or 0).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+# --------------------------
+# Conversion d'un montant isolé (Python)
+# --------------------------
+def rate_to_usd(code, on=None):
+    """Taux vers USD de la devise ``code`` à la date ``on`` (aujourd'hui par défaut)."""
+    if code == USD:
+        return Decimal(1)
+    currency = reference_data().currency_by_code(code)
+    if currency is None:
+        raise LookupError(f"Devise inconnue : {code}")
+    if on is None:
+        return currency.exchange_rate_to_usd
+    snapshot = (
+        ExchangeRate.objects.filter(currency_id=currency.pk, date__lte=on)
+        .order_by("-date")
+        .values_list("rate_to_usd", flat=True)
+        .first()
+    )
+    return snapshot if snapshot is not None else currency.exchange_rate_to_usd
+
+
+def convert(amount, from_code, to_code=None, on=None):
+    """Convertit ``amount`` de ``from_code`` vers ``to_code`` (devise de reporting par défaut)."""
+    to_code = to_code or reporting_currency()
+    if from_code == to_code:
+        return quantize(amount)
+    return quantize(Decimal(amount) * rate_to_usd(from_code, on) / rate_to_usd(to_code, on))
+
+
+# --------------------------
+# Expressions SQL
+# --------------------------
+# Devise de repli quand celle de la ligne est NULL (lignes antérieures à la devise figée)
+COUNTRY_CURRENCY_PATHS = {
+    "Contribution": ("campaign__project__country__currency", "loan_campaign__project__country__currency"),
+    "Payment": ("country__currency", "project__country__currency"),
+    "IntermediairePayment": ("intermediaire__country__currency",),
+    "WithdrawalRequest": ("project__country__currency",),
+    "RepaymentInstallment": ("loan_campaign__project__country__currency",),
+}
+
+
+def _currency_paths(model, currency_path):
+    """``currency_path`` puis, pour la devise propre de la ligne, celle du pays en repli."""
+    if currency_path != "currency":
+        return (currency_path,)
+    return (currency_path,) + COUNTRY_CURRENCY_PATHS.get(model.__name__, ())
+
+
+def _rate_alias(currency_path):
+    return "_rate_" + currency_path.replace("__", "_")
+
+
+def _with_rates(queryset, paths, date_field):
+    """
+    Jointure sur l'instantané de taux valable au jour de la ligne pour chaque
+    devise de ``paths`` : ``date <= jour < valid_until`` (une ligne au plus).
+    """
+    day = Cast(date_field, output_field=DateField())
+    aliases = {}
+    for path in paths:
+        relation = f"{path}__exchange_rates"
+        aliases[_rate_alias(path)] = FilteredRelation(
+            relation,
+            condition=Q(**{f"{relation}__date__lte": day})
+            & (Q(**{f"{relation}__valid_until__gt": day}) | Q(**{f"{relation}__valid_until__isnull": True})),
+        )
+    return queryset.alias(**aliases)
+
+
+def rate_expression(paths, dated=False):
+    """
+    Taux vers USD de la première devise renseignée de ``paths`` (ex. "currency",
+    "project__country__currency") :
+    - ``dated`` : taux historisé joint par ``_with_rates``, sinon taux courant ;
+    - aucun instantané à cette date : taux courant de la devise.
+    """
+    rates = []
+    for path in paths:
+        if dated:
+            rates.append(F(f"{_rate_alias(path)}__rate_to_usd"))
+        rates.append(F(f"{path}__exchange_rate_to_usd"))
+    if len(rates) == 1:
+        return rates[0]
+    return Coalesce(*rates, output_field=RATE_FIELD)
+
+
+def _target_rates(currency):
+    """Convertisseur jour -> taux vers USD de la devise cible (dernier instantané antérieur, sinon courant)."""
+    history = list(
+        ExchangeRate.objects.filter(currency_id=currency.pk).order_by("date").values_list("date", "rate_to_usd")
+    )
+    dates = [date for date, _rate in history]
+
+    def rate_on(day):
+        index = bisect_right(dates, day)
+        return history[index - 1][1] if index else currency.exchange_rate_to_usd
+
+    return rate_on
+
+
+def total(queryset, amount_field, currency_path, date_field=None, target=None):
+    """
+    Somme convertie de ``amount_field`` sur ``queryset`` dans la devise ``target``.
+
+    Chaque ligne est convertie en USD dans la requête (jointure sur les taux
+    historisés si ``date_field`` est fourni) ; vers une autre devise cible, la
+    somme est groupée par jour et divisée par le taux cible de ce jour.
+    """
+    target = target or reporting_currency()
+    paths = _currency_paths(queryset.model, currency_path)
+    if date_field is not None:
+        queryset = _with_rates(queryset, paths, date_field)
+    usd = ExpressionWrapper(F(amount_field) * rate_expression(paths, date_field is not None), output_field=AMOUNT_FIELD)
+
+    if target == USD:
+        return quantize(queryset.aggregate(total=Sum(usd))["total"])
+    currency = reference_data().currency_by_code(target)
+    if currency is None:
+        raise LookupError(f"Devise inconnue : {target}")
+    if date_field is None:
+        result = queryset.aggregate(total=Sum(usd))["total"]
+        return quantize(Decimal(result or 0) / currency.exchange_rate_to_usd)
+
+    rate_on = _target_rates(currency)
+    days = (
+        queryset.annotate(day=Cast(date_field, output_field=DateField()))
+        .values("day")
+        .annotate(total=Sum(usd))
+        .order_by()
+        .values_list("day", "total")
+    )
+    return quantize(sum((Decimal(amount or 0) / rate_on(day) for day, amount in days), Decimal(0)))
+
+
+# Raccourcis pour les montants de la plateforme (taux du jour de la transaction)
+def contributions_total(queryset, target=None):
+    return total(queryset, "amount", "currency", "created_at", target)
+
+
+def payments_total(queryset, target=None):
+    return total(queryset, "amount", "currency", "created_at", target)
+
+
+def withdrawals_total(queryset, target=None):
+    return total(queryset, "amount", "currency", "created_at", target)
+
+
+def projects_collected_total(queryset, target=None):
+    """Montants collectés des projets (encours : taux courant de la devise du pays)."""
+    return total(queryset, "collected_amount", "country__currency", None, target)
+
+
+# --------------------------
+# Historisation
+# --------------------------
+def snapshot_rates(on=None):
+    """Enregistre (ou met à jour) le taux du jour de chaque devise. Renvoie le nombre de lignes."""
+    from .models import Currency
+
+    on = on or timezone.localdate()
+    rates = [
+        ExchangeRate(currency_id=pk, date=on, rate_to_usd=rate)
+        for pk, rate in Currency.objects.values_list("pk", "exchange_rate_to_usd")
+    ]
+    ExchangeRate.objects.bulk_create(
+        rates,
+        update_conflicts=True,
+        unique_fields=["currency", "date"],
+        update_fields=["rate_to_usd"],
+    )
+    link_periods(since=on)
+    return len(rates)
+
+
+def link_periods(currency_ids=None, since=None):
+    """
+    Recalcule ``valid_until`` (date de l'instantané suivant, NULL pour le
+    dernier) des devises ``currency_ids`` (toutes par défaut). ``since`` : seuls
+    les instantanés dont la période peut changer avec un ajout à cette date.
+    Renvoie le nombre de lignes modifiées.
+    """
+    rows = ExchangeRate.objects.all()
+    if currency_ids is not None:
+        rows = rows.filter(currency_id__in=currency_ids)
+    if since is not None:
+        rows = rows.filter(Q(date__gte=since) | Q(valid_until__isnull=True) | Q(valid_until__gt=since))
+    rows = rows.annotate(
+        next_date=Window(Lead("date"), partition_by=[F("currency_id")], order_by=F("date").asc())
+    ).values_list("pk", "valid_until", "next_date")
+    changed = [ExchangeRate(pk=pk, valid_until=next_date) for pk, valid_until, next_date in rows if valid_until != next_date]
+    ExchangeRate.objects.bulk_update(changed, ["valid_until"], batch_size=500)
+    return len(changed)
@@ -0,0 +1,345 @@
+"""
+Événements poussés aux utilisateurs connectés (Server-Sent Events).
+
+Chaque utilisateur a un canal ``ngo:events:user:<id>``. Les nouveaux
+``Notification`` / ``Message`` et les changements de compteurs non lus y sont
+publiés (signaux, traitements par lots) une fois la transaction validée ;
+la vue ``event_stream`` (ASGI) relaie le canal de l'utilisateur au navigateur.
+Le travail du serveur suit le nombre d'événements, pas le nombre de pages vues.
+
+Chaque campagne (``ngo:events:campaign:<id>``, ``ngo:events:loan:<id>``) reçoit
+sa progression (montant collecté, pourcentage, contributions) quand une
+contribution est payée ; la dernière valeur est aussi gardée en cache pour
+les nouveaux spectateurs (``campaign_progress_stream``). Une campagne très
+sollicitée est publiée au plus une fois par ``CAMPAIGN_PROGRESS_INTERVAL``
+(verrou partagé dans le cache) : les changements suivants sont regroupés en
+une publication différée (tâche Celery), calculée une seule fois quel que
+soit le nombre de spectateurs.
+
+Diffusion :
+
+- ``LocalBroker`` : dans le processus (un seul worker ASGI, tests) ; les
+  événements publiés par un autre processus (worker Celery…) sont perdus ;
+- ``RedisBroker`` (``EVENTS_BROKER_URL=redis://...``) : publication Redis ;
+  chaque processus ASGI tient un seul abonnement Redis (``PSUBSCRIBE``) et
+  répartit lui-même les messages entre ses connexions SSE.
+
+Un abonné trop lent perd les événements les plus anciens ; les compteurs non
+lus sont renvoyés à chaque (re)connexion.
+"""
+import asyncio
+import json
+import logging
+import math
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Campaign, LoanCampaign, Message, Notification
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "ngo:events"
+QUEUE_SIZE = 100
+PROGRESS_KEY = "ngo:progress:{}:{}"
+PROGRESS_TIMEOUT = 300
+PROGRESS_INTERVAL = getattr(settings, "CAMPAIGN_PROGRESS_INTERVAL", 1)  # secondes entre deux publications
+PUBLISHED_KEY = "ngo:progress:published:{}:{}"
+DEFERRED_KEY = "ngo:progress:deferred:{}:{}"
+CAMPAIGN_MODELS = {"campaign": Campaign, "loan": LoanCampaign}
+
+
+def channel(user_id):
+    return f"{PREFIX}:user:{user_id}"
+
+
+def campaign_channel(kind, pk):
+    return f"{PREFIX}:{kind}:{pk}"
+
+
+def frame(event, data):
+    """Trame SSE d'un événement (formatée une fois, envoyée à chaque abonné)."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# --------------------------
+# Diffusion
+# --------------------------
+def _offer(queue, payload):
+    if queue.full():
+        queue.get_nowait()  # abonné en retard : l'événement le plus ancien est perdu
+    queue.put_nowait(payload)
+
+
+class LocalBroker:
+    """Diffusion dans le processus : une file asyncio par connexion SSE."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def listening(self, name):
+        """Une connexion de ce processus écoute-t-elle le canal ?"""
+        return name in self._subscribers
+
+    def publish_many(self, messages):
+        """Publie [(canal, trame)] ; appelable depuis n'importe quel thread."""
+        for name, payload in messages:
+            self._deliver(name, payload)
+
+    def _deliver(self, name, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(name, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                pass  # boucle fermée : l'abonné est parti
+
+    @asynccontextmanager
+    async def subscribe(self, name):
+        """File des trames publiées sur le canal, le temps du bloc."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[name].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers[name].discard(subscriber)
+                if not self._subscribers[name]:
+                    del self._subscribers[name]
+
+
+class RedisBroker(LocalBroker):
+    """Publication Redis, un abonnement par processus et répartition locale."""
+
+    def __init__(self, url):
+        super().__init__()
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._listeners = weakref.WeakKeyDictionary()  # boucle -> tâche d'écoute
+
+    def listening(self, name):
+        # Les abonnés peuvent être dans un autre processus
+        return True
+
+    def publish_many(self, messages):
+        with self._client.pipeline(transaction=False) as pipe:
+            for name, payload in messages:
+                pipe.publish(name, payload)
+            pipe.execute()
+
+    @asynccontextmanager
+    async def subscribe(self, name):
+        loop = asyncio.get_running_loop()
+        listener = self._listeners.get(loop)
+        if listener is None or listener.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        async with super().subscribe(name) as queue:
+            yield queue
+
+    async def _listen(self):
+        import redis.asyncio
+
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{PREFIX}:*")
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self._deliver(message["channel"].decode(), message["data"].decode())
+            except (redis.exceptions.ConnectionError, OSError) as exc:
+                logger.warning("Abonnement Redis des événements interrompu (%s), reconnexion", exc)
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+_broker = None
+
+
+def broker():
+    global _broker
+    if _broker is None:
+        url = getattr(settings, "EVENTS_BROKER_URL", "")
+        _broker = RedisBroker(url) if url else LocalBroker()
+    return _broker
+
+
+def subscribe(user_id):
+    return broker().subscribe(channel(user_id))
+
+
+def subscribe_campaign(kind, pk):
+    return broker().subscribe(campaign_channel(kind, pk))
+
+
+# --------------------------
+# Publication
+# --------------------------
+def listening(user_ids):
+    """Utilisateurs susceptibles d'être connectés (rien à calculer pour les autres)."""
+    current = broker()
+    return {user_id for user_id in user_ids if user_id and current.listening(channel(user_id))}
+
+
+def _send(messages):
+    """Publie [(canal, trame)] ; une panne du broker ne fait pas échouer l'appelant."""
+    if not messages:
+        return
+    try:
+        broker().publish_many(messages)
+    except Exception:
+        logger.exception("Publication de %d événement(s) impossible", len(messages))
+
+
+def publish(messages):
+    """Publie [(id utilisateur, événement, données)]."""
+    _send([(channel(user_id), frame(event, data)) for user_id, event, data in messages])
+
+
+def unread_counts(user_ids):
+    """{id utilisateur: {"notifications": n, "messages": n}} en deux requêtes groupées."""
+    counts = {pk: {"notifications": 0, "messages": 0} for pk in set(user_ids)}
+    for key, queryset in (
+        ("notifications", Notification.objects.filter(is_read=False)),
+        ("messages", Message.objects.filter(is_read=False, archived=False)),
+    ):
+        rows = (
+            queryset.filter(recipient_id__in=list(counts))
+            .order_by()
+            .values("recipient_id")
+            .annotate(count=Count("pk"))
+            .values_list("recipient_id", "count")
+        )
+        for user_id, count in rows:
+            counts[user_id][key] = count
+    return counts
+
+
+def unread_changed(user_ids):
+    user_ids = listening(user_ids)
+    if user_ids:
+        publish([(user_id, "unread", counts) for user_id, counts in unread_counts(user_ids).items()])
+
+
+def _notification_data(notification):
+    return {
+        "id": notification.pk,
+        "type": notification.type,
+        "title": notification.title,
+        "message": notification.short_message or notification.message[:50],
+        "icon": notification.icon,
+        "bg_color": notification.bg_color,
+    }
+
+
+def notifications_created(notifications):
+    """Nouvelles notifications (création unitaire ou bulk_create) et compteurs des destinataires."""
+    recipients = listening({notification.recipient_id for notification in notifications})
+    notifications = [notification for notification in notifications if notification.recipient_id in recipients]
+    if not notifications:
+        return
+    publish([(n.recipient_id, "notification", _notification_data(n)) for n in notifications])
+    unread_changed(recipients)
+
+
+def message_created(message):
+    if not listening([message.recipient_id]):
+        return
+    sender = message.sender
+    publish([(
+        message.recipient_id,
+        "message",
+        {"id": message.pk, "subject": message.subject, "sender": sender.full_name or sender.email},
+    )])
+    unread_changed([message.recipient_id])
+
+
+# --------------------------
+# Progression des campagnes
+# --------------------------
+def _progress_rows(kind, pks):
+    completed = Q(contributions__payment_status="completed")
+    rows = (
+        CAMPAIGN_MODELS[kind].objects.filter(pk__in=list(pks))
+        .annotate(contributors=Count("contributions", filter=completed))
+        .values_list("pk", "collected_amount", "goal_amount", "contributors")
+    )
+    return {
+        pk: {
+            "collected_amount": str(collected),
+            "goal_amount": str(goal),
+            "progress": float(round(collected / goal * 100, 2)) if goal > 0 else 0,
+            "contributors": contributors,
+        }
+        for pk, collected, goal, contributors in rows
+    }
+
+
+def campaign_progress(kind, pks, refresh=False):
+    """{pk: progression} des campagnes, depuis le cache (recalculée si absente ou ``refresh``)."""
+    keys = {pk: PROGRESS_KEY.format(kind, pk) for pk in pks}
+    cached = {} if refresh else cache.get_many(list(keys.values()))
+    progress = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in keys if pk not in progress]
+    if missing:
+        computed = _progress_rows(kind, missing)
+        cache.set_many({keys[pk]: data for pk, data in computed.items()}, PROGRESS_TIMEOUT)
+        progress.update(computed)
+    return progress
+
+
+def _interval():
+    # Délais de cache en secondes entières (Redis) : au moins une
+    return max(1, math.ceil(PROGRESS_INTERVAL))
+
+
+def publish_progress(kind, pks):
+    """Recalcule (une requête) et publie la progression des campagnes données."""
+    if not pks:
+        return
+    cache.set_many({PUBLISHED_KEY.format(kind, pk): 1 for pk in pks}, _interval())
+    cache.delete_many([DEFERRED_KEY.format(kind, pk) for pk in pks])
+    progress = campaign_progress(kind, pks, refresh=True)
+    _send([(campaign_channel(kind, pk), frame("progress", data)) for pk, data in progress.items()])
+
+
+def _defer(kind, pks):
+    """Publication regroupée à la fin de l'intervalle (une seule tâche par campagne en attente)."""
+    pks = [pk for pk in pks if cache.add(DEFERRED_KEY.format(kind, pk), 1, _interval() * 2)]
+    if not pks:
+        return
+    from .tasks import publish_campaign_progress
+    try:
+        publish_campaign_progress.apply_async(args=[kind, pks], countdown=PROGRESS_INTERVAL, retry=False)
+    except Exception:
+        # Broker indisponible : publication immédiate plutôt qu'une progression figée
+        publish_progress(kind, pks)
+
+
+def campaigns_changed(campaign_ids=(), loan_campaign_ids=()):
+    """
+    Contributions payées (ou retirées) : progression publiée aux campagnes
+    regardées, cache simplement invalidé pour les autres. Une rafale de
+    contributions traitée par lot ne coûte qu'une requête par table, et une
+    campagne publiée depuis moins de ``PROGRESS_INTERVAL`` attend la
+    publication différée.
+    """
+    for kind, pks in (("campaign", campaign_ids), ("loan", loan_campaign_ids)):
+        pks = {pk for pk in pks if pk}
+        current = broker()
+        watched = {pk for pk in pks if current.listening(campaign_channel(kind, pk))}
+        cache.delete_many([PROGRESS_KEY.format(kind, pk) for pk in pks])
+        due = {pk for pk in watched if cache.add(PUBLISHED_KEY.format(kind, pk), 1, _interval())}
+        publish_progress(kind, due)
+        _defer(kind, watched - due)
@@ -9,11 +9,98 @@ from crispy_forms.layout import Layout, Submit, Row, Field, Column,HTML,Fieldset
 from .models import User,ContactMessage,Project,Payment,IntermediairePayment,Message,WithdrawalRequest,EntrepreneurProfile,InvestisseurProfile,IntermediaireProfile,Country
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.forms import AuthenticationForm
-from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+from .models import Category, Currency, Region
+from .reference import reference_data
 
 User = get_user_model()
 
+
+# --------------------------
+# Champs alimentés par le cache de référence
+# --------------------------
+REFERENCE_TABLES = {
+    "countries": Country,
+    "currencies": Currency,
+    "regions": Region,
+    "categories": Category,
+}
+
+
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    """Choix tirés de l'instantané en mémoire : aucune requête au rendu."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.reference_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.reference_objects()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.reference_objects())
+
+
+class ReferenceChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField pour Country / Currency / Region / Category.
+    ``table`` : 'countries', 'currencies', 'regions' ou 'categories'.
+    """
+    iterator = ReferenceChoiceIterator
+
+    def __init__(self, table, *, active_only=False, **kwargs):
+        self.table = table
+        self.active_only = active_only
+        # Le queryset n'est jamais évalué : il sert d'identité du champ (admin, ModelForm)
+        kwargs.setdefault("queryset", REFERENCE_TABLES[table]._default_manager.none())
+        super().__init__(**kwargs)
+
+    def reference_objects(self):
+        return reference_data().objects(self.table, self.active_only)
+
+    def _lookup(self, value):
+        try:
+            obj = reference_data().get(self.table, int(value))
+        except (TypeError, ValueError):
+            obj = None
+        if obj is None or (self.active_only and not getattr(obj, "active", True)):
+            raise ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value}
+            )
+        return obj
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        return self._lookup(value)
+
+
+class ReferenceMultipleChoiceField(ReferenceChoiceField, forms.ModelMultipleChoiceField):
+    """Version multiple (ex. catégories d'un projet)."""
+
+    def to_python(self, value):
+        if not value:
+            return []
+        return [self._lookup(item) for item in value]
+
+    def clean(self, value):
+        value = self.prepare_value(value)
+        if self.required and not value:
+            raise ValidationError(self.error_messages["required"], code="required")
+        if not self.required and not value:
+            return []
+        if not isinstance(value, (list, tuple)):
+            raise ValidationError(self.error_messages["invalid_list"], code="invalid_list")
+        objects = self.to_python(value)
+        self.run_validators(value)
+        return objects
+
 class ContactForm(forms.ModelForm):
     class Meta:
         model = ContactMessage
@@ -137,6 +224,15 @@ class IntermediaireRegisterForm(BaseRegisterForm):
 # Login Form
 # --------------------------
 class CustomLoginForm(AuthenticationForm):
+    """
+    Connexion par e-mail (USERNAME_FIELD de User) : AuthenticationForm.clean()
+    authentifie une seule fois ; l'utilisateur est ensuite lu par get_user().
+    """
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        "invalid_login": "Adresse e-mail ou mot de passe invalide.",
+    }
+
     username = forms.EmailField(
         label="Adresse e-mail",
         widget=forms.EmailInput(attrs={"placeholder": "Entrez votre e-mail"}),
@@ -163,20 +259,6 @@ class CustomLoginForm(AuthenticationForm):
             )
         )
 
-    def clean(self):
-        """
-        On renvoie le champ 'username' avec l'email pour que Django Auth fonctionne.
-        """
-        cleaned_data = super().clean()
-        email = cleaned_data.get("username")
-        password = cleaned_data.get("password")
-
-        if email and password:
-            # Force Django à vérifier avec email
-            self.user_cache = authenticate(self.request, email=email, password=password)
-            if self.user_cache is None:
-                raise forms.ValidationError("Adresse e-mail ou mot de passe invalide.")
-        return cleaned_data
 
 # --------------------------
 # Password Reset Form
@@ -210,6 +292,9 @@ class UniversalPasswordResetForm(PasswordResetForm):
 # Project Form
 # --------------------------
 class ProjectForm(ModelForm):
+    country = ReferenceChoiceField("countries", active_only=True, label=_("Pays"))
+    categories = ReferenceMultipleChoiceField("categories", label=_("Catégories"), required=False)
+
     class Meta:
         model = Project
         fields = [
@@ -391,7 +476,10 @@ class WithdrawalRequestForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         project = kwargs.pop("project", None)  # pour afficher les infos du projet
+        available = kwargs.pop("available", None)  # solde disponible (grand livre)
         super().__init__(*args, **kwargs)
+        country = reference_data().country_or_fetch(project.country_id) if project and project.country_id else None
+        currency = country.currency.code if country else ""
 
         self.helper = FormHelper()
         self.helper.form_method = "post"
@@ -406,7 +494,7 @@ class WithdrawalRequestForm(forms.ModelForm):
                 <div class='alert alert-info'>
                     <strong>{_('Projet')} :</strong> {project.title if project else ''}
                     <br>
-                    <strong>{_('Montant disponible')} :</strong> {getattr(project, 'collected_amount', 0)} FCFA
+                    <strong>{_('Montant disponible')} :</strong> {available if available is not None else 0} {currency}
                 </div>
             """),
             Row(
@@ -417,10 +505,18 @@ class WithdrawalRequestForm(forms.ModelForm):
             Submit("submit", _("Soumettre la demande"), css_class="btn btn-primary btn-lg w-100 fw-bold mt-3"),
         )
 
+    def clean_amount(self):
+        amount = self.cleaned_data["amount"]
+        if amount <= 0:
+            raise forms.ValidationError(_("Le montant doit être positif."))
+        return amount
+
 # --------------------------------
 # Mise a jour de User
 # --------------------------------
 class UserUpdateForm(forms.ModelForm):
+    country = ReferenceChoiceField("countries", label=_("Pays"), required=False)
+
     class Meta:
         model = User
         fields = [
@@ -481,11 +577,7 @@ class EntrepreneurProfileForm(forms.ModelForm):
     full_name = forms.CharField(label=_("Nom complet"), required=False)
     email = forms.EmailField(label=_("Adresse e-mail"), required=False)
     phone = forms.CharField(label=_("Téléphone"), required=False)
-    country = forms.ModelChoiceField(
-        queryset=User._meta.get_field("country").remote_field.model.objects.all(),
-        label=_("Pays"),
-        required=False
-    )
+    country = ReferenceChoiceField("countries", label=_("Pays"), required=False)
     city = forms.CharField(label=_("Ville"), required=False)
     profile_image = forms.ImageField(label=_("Photo de profil"), required=False)
     bio = forms.CharField(
@@ -523,7 +615,7 @@ class EntrepreneurProfileForm(forms.ModelForm):
             self.fields["full_name"].initial = user.full_name
             self.fields["email"].initial = user.email
             self.fields["phone"].initial = user.phone
-            self.fields["country"].initial = user.country
+            self.fields["country"].initial = user.country_id
             self.fields["city"].initial = user.city
             self.fields["profile_image"].initial = user.profile_image
             self.fields["bio"].initial = user.bio
@@ -609,11 +701,7 @@ class InvestisseurProfileForm(forms.ModelForm):
     full_name = forms.CharField(label="Nom complet")
     email = forms.EmailField(label="Email")
     phone = forms.CharField(label="Téléphone", required=False)
-    country = forms.ModelChoiceField(
-        queryset=None,  # défini dynamiquement dans __init__
-        label="Pays",
-        required=False
-    )
+    country = ReferenceChoiceField("countries", label="Pays", required=False)
     city = forms.CharField(label="Ville", required=False)
     profile_image = forms.ImageField(label="Photo de profil", required=False)
     bio = forms.CharField(label="Bio", widget=forms.Textarea(attrs={"rows": 3}), required=False)
@@ -628,12 +716,8 @@ class InvestisseurProfileForm(forms.ModelForm):
         ]
 
     def __init__(self, *args, **kwargs):
-        from .models import Country  # import ici pour éviter les boucles
         super().__init__(*args, **kwargs)
 
-        # Charger les pays dans le champ
-        self.fields["country"].queryset = Country.objects.all()
-
         # Crispy Form Helper
         self.helper = FormHelper()
         self.helper.form_method = "post"
@@ -696,11 +780,7 @@ class IntermediaireProfileForm(forms.ModelForm):
     full_name = forms.CharField(label="Nom complet")
     email = forms.EmailField(label="Email")
     phone = forms.CharField(label="Téléphone", required=False)
-    country = forms.ModelChoiceField(
-        queryset=Country.objects.all(),
-        label="Pays",
-        required=False
-    )
+    country = ReferenceChoiceField("countries", label="Pays", required=False)
     city = forms.CharField(label="Ville", required=False)
     profile_image = forms.ImageField(label="Photo de profil", required=False)
     bio = forms.CharField(label="Bio", widget=forms.Textarea(attrs={"rows": 3}), required=False)
@@ -767,7 +847,7 @@ class IntermediaireProfileForm(forms.ModelForm):
             self.fields["full_name"].initial = user.full_name
             self.fields["email"].initial = user.email
             self.fields["phone"].initial = user.phone
-            self.fields["country"].initial = user.country
+            self.fields["country"].initial = user.country_id
             self.fields["city"].initial = user.city
             self.fields["profile_image"].initial = user.profile_image
             self.fields["bio"].initial = user.bio
@@ -0,0 +1,325 @@
+"""
+Grand livre des fonds des projets (comptabilité en partie double).
+
+Chaque mouvement est une écriture (``LedgerEntry.entry``) de plusieurs lignes
+dont la somme est nulle :
+
+- contribution encaissée : ``external`` −montant, ``project`` +net,
+  ``commission`` +commission (``Country.commission_rate`` du pays du projet,
+  enregistrée dans la même transaction comme ligne ``Commission`` : taux et
+  montant des revenus sont ceux de l'écriture) ;
+- contribution qui n'est plus complétée (remboursement, annulation) :
+  contre-passation, chaque compte de l'encaissement repris à l'opposé ;
+- retrait demandé : ``project`` −montant, ``reserved`` +montant ;
+- retrait rejeté : ``reserved`` −montant, ``project`` +montant ;
+- retrait versé : ``reserved`` −montant, ``payout`` +montant.
+
+``ProjectBalance`` matérialise le solde de chaque compte par projet. Il est
+modifié dans la même transaction que les écritures, sous ``select_for_update`` :
+vérifier le solde disponible est une lecture d'une ligne, et deux demandes de
+retrait simultanées sur un même projet sont sérialisées.
+"""
+import uuid
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Commission, Contribution, LedgerEntry, Project, ProjectBalance, WithdrawalRequest
+from .reference import country_currency_id, reference_data
+
+CENT = Decimal("0.01")
+BATCH_SIZE = 500
+
+# Compte du grand livre -> champ de ProjectBalance (et signe du solde)
+ACCOUNT_FIELDS = {
+    "external": ("collected", -1),  # débité à chaque encaissement
+    "project": ("available", 1),
+    "reserved": ("reserved", 1),
+    "payout": ("withdrawn", 1),
+    "commission": ("commission", 1),
+}
+
+# Statut cible -> (statuts de départ autorisés, opération, mouvements)
+TRANSITIONS = {
+    "approved": (("pending",), None, ()),
+    "rejected": (("pending", "approved"), "withdrawal_release", (("reserved", -1), ("project", 1))),
+    "paid": (("pending", "approved"), "withdrawal_paid", (("reserved", -1), ("payout", 1))),
+}
+HOLD = (("project", -1), ("reserved", 1))
+
+
+class InsufficientFunds(ValueError):
+    """Montant demandé supérieur au solde disponible du projet."""
+
+
+class PendingWithdrawal(ValueError):
+    """Une demande de retrait est déjà en attente pour ce projet."""
+
+
+# --------------------------
+# Écritures et soldes
+# --------------------------
+def commission_amount(amount, rate):
+    """Commission (arrondie au centime) d'un montant au taux ``rate`` en %."""
+    return (amount * Decimal(str(rate or 0)) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def commission_rate(country_id):
+    """Taux de commission (en %) du pays au moment de l'encaissement."""
+    if not country_id:
+        return Decimal(0)
+    return Decimal(str(reference_data().commission_rate(country_id) or 0))
+
+
+def _entry(project_id, currency_id, kind, moves, **refs):
+    """Lignes d'une écriture ; ``moves`` = [(compte, montant signé)], de somme nulle."""
+    if sum(amount for _account, amount in moves) != 0:
+        raise ValueError(f"Écriture déséquilibrée : {moves}")
+    entry = uuid.uuid4()
+    return [
+        LedgerEntry(
+            entry=entry, project_id=project_id, account=account, kind=kind,
+            amount=amount, currency_id=currency_id, **refs
+        )
+        for account, amount in moves
+        if amount
+    ]
+
+
+def _locked_balances(project_ids):
+    """
+    Soldes des projets donnés, créés au besoin puis verrouillés.
+    Verrouillés par ordre de clé pour éviter les interblocages entre workers.
+    """
+    ids = sorted(set(project_ids))
+    missing = set(ids) - set(ProjectBalance.objects.filter(pk__in=ids).values_list("pk", flat=True))
+    if missing:
+        ProjectBalance.objects.bulk_create(
+            [
+                ProjectBalance(project_id=pk, currency_id=country_currency_id(country_id))
+                for pk, country_id in Project.objects.filter(pk__in=missing).values_list("pk", "country_id")
+            ],
+            ignore_conflicts=True,
+        )
+    return {balance.pk: balance for balance in ProjectBalance.objects.select_for_update().filter(pk__in=ids).order_by("pk")}
+
+
+def _post(lines, balances):
+    """Enregistre les lignes et reporte leurs montants sur les soldes verrouillés."""
+    if not lines:
+        return
+    LedgerEntry.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+    touched = set()
+    for line in lines:
+        field, sign = ACCOUNT_FIELDS[line.account]
+        balance = balances[line.project_id]
+        setattr(balance, field, getattr(balance, field) + sign * line.amount)
+        touched.add(balance)
+    ProjectBalance.objects.bulk_update(list(touched), [field for field, _sign in ACCOUNT_FIELDS.values()])
+
+
+def available_balance(project_id):
+    """Solde disponible d'un projet (lecture de la ligne matérialisée)."""
+    return ProjectBalance.objects.filter(pk=project_id).values_list("available", flat=True).first() or Decimal(0)
+
+
+# --------------------------
+# Encaissements
+# --------------------------
+@transaction.atomic
+def record_contributions(contribution_ids):
+    """Comptabilise les contributions complétées qui ne le sont pas encore. Renvoie leur nombre."""
+    rows = list(
+        Contribution.objects.filter(pk__in=list(contribution_ids), payment_status="completed").values_list(
+            "pk", "amount", "currency_id", "created_at",
+            "campaign__project_id", "campaign__project__country_id",
+            "loan_campaign__project_id", "loan_campaign__project__country_id",
+        )
+    )
+    rows = [
+        (pk, amount, currency_id, project_id or loan_project_id, country_id or loan_country_id, created_at)
+        for pk, amount, currency_id, created_at, project_id, country_id, loan_project_id, loan_country_id in rows
+        if project_id or loan_project_id
+    ]
+    if not rows:
+        return 0
+    balances = _locked_balances(row[3] for row in rows)
+    # Après le verrou : une contribution ne peut plus être comptabilisée entre-temps
+    posted = {pk for pk, accounts in _posted([row[0] for row in rows]).items() if accounts.get("external")}
+    lines, commissions = [], []
+    for pk, amount, currency_id, project_id, country_id, created_at in rows:
+        if pk in posted:
+            continue
+        rate = commission_rate(country_id)
+        commission = commission_amount(amount, rate)
+        lines += _entry(
+            project_id, currency_id, "contribution",
+            [("external", -amount), ("project", amount - commission), ("commission", commission)],
+            contribution_id=pk,
+        )
+        commissions.append(
+            Commission(
+                contribution_id=pk, country_id=country_id, currency_id=currency_id,
+                rate=rate, gross=amount, amount=commission, date=timezone.localdate(created_at),
+            )
+        )
+    _post(lines, balances)
+    Commission.objects.bulk_create(commissions, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(commissions)
+
+
+def _posted(contribution_ids):
+    """{contribution: {compte: solde net}} des écritures déjà passées (contre-passations déduites)."""
+    net = defaultdict(lambda: defaultdict(Decimal))
+    for contribution_id, account, amount in LedgerEntry.objects.filter(
+        contribution_id__in=list(contribution_ids)
+    ).values_list("contribution_id", "account", "amount"):
+        net[contribution_id][account] += amount
+    return net
+
+
+@transaction.atomic
+def reverse_contributions(contribution_ids):
+    """
+    Contre-passe l'encaissement des contributions qui ne sont plus complétées
+    (la commission de la plateforme est annulée avec). Renvoie leur nombre.
+    """
+    rows = list(
+        Contribution.objects.filter(pk__in=list(contribution_ids)).exclude(payment_status="completed")
+        .values_list("pk", "currency_id", "campaign__project_id", "loan_campaign__project_id")
+    )
+    rows = [(pk, currency_id, project_id or loan_project_id) for pk, currency_id, project_id, loan_project_id in rows]
+    rows = [row for row in rows if row[2]]
+    if not rows:
+        return 0
+    balances = _locked_balances(row[2] for row in rows)
+    posted = _posted([row[0] for row in rows])
+    lines, reversed_ids = [], []
+    for pk, currency_id, project_id in rows:
+        accounts = posted.get(pk)
+        if not accounts or not accounts.get("external"):
+            continue
+        lines += _entry(
+            project_id, currency_id, "contribution_refund",
+            [(account, -amount) for account, amount in accounts.items()],
+            contribution_id=pk,
+        )
+        reversed_ids.append(pk)
+    _post(lines, balances)
+    Commission.objects.filter(contribution_id__in=reversed_ids).delete()
+    return len(reversed_ids)
+
+
+# --------------------------
+# Retraits
+# --------------------------
+def _withdrawal_lines(withdrawal, kind, moves):
+    return _entry(
+        withdrawal.project_id, withdrawal.currency_id, kind,
+        [(account, sign * withdrawal.amount) for account, sign in moves],
+        withdrawal_id=withdrawal.pk,
+    )
+
+
+@transaction.atomic
+def request_withdrawal(project, entrepreneur, amount, reason=None):
+    """
+    Crée une demande de retrait et réserve le montant sur le solde disponible.
+    Vérification et réservation se font sous le verrou du solde du projet.
+    """
+    balances = _locked_balances([project.pk])
+    balance = balances[project.pk]
+    if WithdrawalRequest.objects.filter(project=project, status="pending").exists():
+        raise PendingWithdrawal(project.pk)
+    if amount > balance.available:
+        raise InsufficientFunds(balance.available)
+    withdrawal = WithdrawalRequest.objects.create(
+        entrepreneur=entrepreneur,
+        project=project,
+        amount=amount,
+        currency_id=balance.currency_id,
+        reason=reason,
+    )
+    _post(_withdrawal_lines(withdrawal, "withdrawal_hold", HOLD), balances)
+    return withdrawal
+
+
+@transaction.atomic
+def set_withdrawal_status(ids, status):
+    """Fait passer des demandes de retrait au statut donné et passe les écritures correspondantes."""
+    sources, kind, moves = TRANSITIONS[status]
+    withdrawals = list(
+        WithdrawalRequest.objects.select_for_update().filter(pk__in=list(ids), status__in=sources).order_by("pk")
+    )
+    if not withdrawals:
+        return 0
+    if kind:
+        balances = _locked_balances(withdrawal.project_id for withdrawal in withdrawals)
+        _post([line for withdrawal in withdrawals for line in _withdrawal_lines(withdrawal, kind, moves)], balances)
+    WithdrawalRequest.objects.filter(pk__in=[withdrawal.pk for withdrawal in withdrawals]).update(
+        status=status, processed_at=timezone.now()
+    )
+    return len(withdrawals)
+
+
+# --------------------------
+# Reprise de l'existant et contrôle
+# --------------------------
+def backfill():
+    """
+    Comptabilise l'historique : contributions complétées puis retraits existants
+    (réservés s'ils sont en attente ou approuvés, versés s'ils sont payés).
+    Fait une première fois par la migration 0020 ; à relancer après un
+    import de données. Idempotent. Renvoie (contributions, retraits) comptabilisés.
+    """
+    contributions, last_pk = 0, 0
+    pending = Contribution.objects.filter(payment_status="completed").exclude(ledger_entries__account="external")
+    while True:
+        ids = list(pending.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        contributions += record_contributions(ids)
+        last_pk = ids[-1]
+
+    with transaction.atomic():
+        withdrawals = list(
+            WithdrawalRequest.objects.filter(status__in=("pending", "approved", "paid"))
+            .exclude(ledger_entries__kind="withdrawal_hold")
+            .order_by("pk")
+        )
+        balances = _locked_balances(withdrawal.project_id for withdrawal in withdrawals)
+        lines = []
+        for withdrawal in withdrawals:
+            lines += _withdrawal_lines(withdrawal, "withdrawal_hold", HOLD)
+            if withdrawal.status == "paid":
+                lines += _withdrawal_lines(withdrawal, "withdrawal_paid", TRANSITIONS["paid"][2])
+        _post(lines, balances)
+    return contributions, len(withdrawals)
+
+
+def check():
+    """
+    Contrôle de cohérence : écritures déséquilibrées et soldes matérialisés
+    différents de la somme des lignes. Renvoie la liste des anomalies.
+    """
+    # Comparaisons arrondies au centime (SQLite somme les décimaux en flottants)
+    problems = [
+        f"Écriture {entry} déséquilibrée ({total})"
+        for entry, total in LedgerEntry.objects.values("entry").annotate(total=Sum("amount")).values_list("entry", "total")
+        if Decimal(total).quantize(CENT) != 0
+    ]
+    totals = defaultdict(lambda: defaultdict(Decimal))
+    for project_id, account, total in LedgerEntry.objects.values("project_id", "account").annotate(
+        total=Sum("amount")
+    ).values_list("project_id", "account", "total"):
+        field, sign = ACCOUNT_FIELDS[account]
+        totals[project_id][field] += sign * Decimal(total).quantize(CENT)
+    for balance in ProjectBalance.objects.all():
+        for field, _sign in ACCOUNT_FIELDS.values():
+            expected = totals[balance.pk][field]
+            if getattr(balance, field) != expected:
+                problems.append(f"Projet {balance.pk} : {field} = {getattr(balance, field)}, grand livre = {expected}")
+    return problems
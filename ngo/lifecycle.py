@@ -0,0 +1,182 @@
+"""
+Planificateur du cycle de vie des campagnes (dons et prêts).
+
+La tâche périodique ``close_campaigns`` précalcule le statut des campagnes :
+
+- objectif atteint : ``goal_reached_at`` est renseigné (une seule fois) et
+  l'entrepreneur ainsi que les contributeurs reçoivent ``campaign_goal_reached`` ;
+- échéance dépassée (``end_date <= now``) : la campagne active passe à
+  ``completed`` si l'objectif est atteint, à ``failed`` sinon, et ``closed_at``
+  est renseigné. Les prêts terminés reçoivent ``loan_completed`` et leurs
+  échéanciers de remboursement sont générés.
+
+Chaque étape sélectionne les campagnes concernées par une requête servie par
+l'index (status, end_date), les fait changer d'état par des UPDATE groupés et
+crée les notifications par lots. Chaque passage est journalisé dans
+``CampaignLifecycleRun``.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from . import events, reports, repayments
+from .models import Campaign, CampaignLifecycleRun, Contribution, LoanCampaign, Notification
+
+NOTIFICATION_BATCH_SIZE = 500
+
+KINDS = (
+    # (modèle, champ de Contribution, relation de Notification, préfixe des compteurs)
+    (Campaign, "campaign", "related_campaign", "campaigns"),
+    (LoanCampaign, "loan_campaign", "related_loan", "loans"),
+)
+
+
+# --------------------------
+# Destinataires
+# --------------------------
+def _recipients(contribution_field, campaigns):
+    """{id campagne: {ids utilisateurs}} : entrepreneur du projet + contributeurs payés."""
+    recipients = {pk: {entrepreneur_id} for pk, _title, entrepreneur_id, *_rest in campaigns}
+    contributors = (
+        Contribution.objects.filter(
+            **{f"{contribution_field}_id__in": list(recipients)},
+            payment_status="completed",
+            investor__isnull=False,
+        )
+        .values_list(f"{contribution_field}_id", "investor_id")
+        .distinct()
+    )
+    for campaign_id, investor_id in contributors:
+        recipients[campaign_id].add(investor_id)
+    return recipients
+
+
+def _notifications(contribution_field, relation, campaigns, type, title, message, bg_color):
+    titles = {pk: campaign_title for pk, campaign_title, *_rest in campaigns}
+    notifications = []
+    for campaign_id, users in _recipients(contribution_field, campaigns).items():
+        text = message % {"title": titles[campaign_id]}
+        notifications.extend(
+            Notification(
+                recipient_id=user_id,
+                type=type,
+                title=title,
+                message=text,
+                short_message=text[:50],
+                icon="flag",
+                bg_color=bg_color,
+                **{f"{relation}_id": campaign_id},
+            )
+            for user_id in users
+            if user_id
+        )
+    return notifications
+
+
+def _locked(model, **filters):
+    """Campagnes correspondant aux filtres, verrouillées (les autres workers les sautent)."""
+    return list(
+        model.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(**filters)
+        .values_list("pk", "title", "project__entrepreneur_id", "collected_amount", "goal_amount")
+    )
+
+
+# --------------------------
+# Étapes
+# --------------------------
+def mark_goals_reached(model, contribution_field, relation, now):
+    """Campagnes actives ayant atteint leur objectif depuis le dernier passage."""
+    campaigns = _locked(
+        model,
+        status="active",
+        goal_reached_at__isnull=True,
+        goal_amount__gt=0,
+        collected_amount__gte=F("goal_amount"),
+    )
+    if not campaigns:
+        return 0, []
+    model.objects.filter(pk__in=[row[0] for row in campaigns]).update(goal_reached_at=now)
+    notifications = _notifications(
+        contribution_field, relation, campaigns,
+        "campaign_goal_reached", _("🎯 Objectif atteint"),
+        _("La campagne « %(title)s » a atteint son objectif de financement."),
+        "bg-success",
+    )
+    return len(campaigns), notifications
+
+
+def close_expired(model, contribution_field, relation, now):
+    """Campagnes actives arrivées à échéance : terminées si l'objectif est atteint, échouées sinon."""
+    campaigns = _locked(model, status="active", end_date__lte=now)
+    if not campaigns:
+        return [], [], []
+    completed = [row for row in campaigns if row[3] >= row[4]]
+    failed = [row for row in campaigns if row[3] < row[4]]
+    if completed:
+        model.objects.filter(pk__in=[row[0] for row in completed]).update(status="completed", closed_at=now)
+    if failed:
+        model.objects.filter(pk__in=[row[0] for row in failed]).update(status="failed", closed_at=now)
+
+    if model is LoanCampaign:
+        completed_type, completed_title = "loan_completed", _("🏁 Campagne de prêt terminée")
+    else:
+        completed_type, completed_title = "campaign_update", _("🏁 Campagne terminée")
+    notifications = []
+    if completed:
+        notifications += _notifications(
+            contribution_field, relation, completed, completed_type, completed_title,
+            _("La campagne « %(title)s » est terminée : objectif atteint, merci à tous !"),
+            "bg-success",
+        )
+    if failed:
+        notifications += _notifications(
+            contribution_field, relation, failed, "campaign_update", _("⏳ Campagne clôturée"),
+            _("La campagne « %(title)s » est arrivée à échéance sans atteindre son objectif."),
+            "bg-warning",
+        )
+    return completed, failed, notifications
+
+
+# --------------------------
+# Passage complet
+# --------------------------
+def run(now=None):
+    """Un passage du planificateur. Renvoie le CampaignLifecycleRun enregistré."""
+    now = now or timezone.now()
+    log = CampaignLifecycleRun.objects.create(started_at=now)
+    try:
+        with transaction.atomic():
+            notifications = []
+            for model, contribution_field, relation, prefix in KINDS:
+                reached, pending = mark_goals_reached(model, contribution_field, relation, now)
+                log.goals_reached += reached
+                notifications += pending
+
+                completed, failed, pending = close_expired(model, contribution_field, relation, now)
+                # update() ne déclenche pas post_save : rapports des intermédiaires invalidés ici
+                changed = [row[0] for row in completed + failed]
+                if changed and model is LoanCampaign:
+                    reports.touch_campaigns(loan_campaign_ids=changed)
+                elif changed:
+                    reports.touch_campaigns(campaign_ids=changed)
+                setattr(log, f"{prefix}_completed", len(completed))
+                setattr(log, f"{prefix}_failed", len(failed))
+                notifications += pending
+
+                if model is LoanCampaign and completed:
+                    # update() ne déclenche pas post_save : échéanciers générés après validation
+                    loans = list(LoanCampaign.objects.filter(pk__in=[row[0] for row in completed]))
+                    transaction.on_commit(lambda loans=loans: [repayments.generate_schedule(loan) for loan in loans])
+
+            Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+            transaction.on_commit(lambda: events.notifications_created(notifications))
+            log.notifications_sent = len(notifications)
+    except Exception as exc:
+        log.error = repr(exc)
+        raise
+    finally:
+        log.finished_at = timezone.now()
+        log.save()
+    return log
@@ -0,0 +1,186 @@
+"""
+Mode allégé (« lite ») pour les connexions lentes ou facturées à l'octet.
+
+Choix du mode, du plus fort au plus faible (``LiteModeMiddleware``) :
+
+- le paramètre ``?lite=1`` / ``?lite=0`` d'une URL, mémorisé dans un cookie ;
+- le cookie ``lite`` ;
+- l'en-tête ``Save-Data: on`` envoyé par le navigateur (économiseur de données).
+
+Les vues qui ont une version allégée (accueil, liste et détail des projets,
+détail d'une campagne, tableaux de bord) calculent le même contexte et
+appellent ``lite.render`` au lieu de ``render`` : en mode allégé, le gabarit
+``LITE_TEMPLATES`` correspondant est rendu à la place — ni carrousel, ni
+JavaScript tiers (Bootstrap, AOS, Swiper, SweetAlert…), une feuille de style
+en ligne, des miniatures (``LITE_THUMBNAIL_SIZE`` pixels, créées par une
+tâche Celery) au lieu des images d'origine et des listes paginées par
+``LITE_PAGE_SIZE``. Une page allégée
+qui dépasse ``LITE_PAGE_BUDGET`` octets de HTML est journalisée.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.shortcuts import render as full_render
+from django.utils.cache import patch_vary_headers
+from PIL import Image, UnidentifiedImageError
+
+from . import proofs
+
+logger = logging.getLogger(__name__)
+
+PARAM = "lite"
+COOKIE = "lite"
+COOKIE_MAX_AGE = 365 * 86400
+THUMBNAIL_QUALITY = 60
+THUMBNAIL_DIR = "lite"
+
+LITE_TEMPLATES = {
+    "ngo/index.html": "ngo/lite/index.html",
+    "ngo/projet/project_list.html": "ngo/lite/project_list.html",
+    "ngo/projet/project_detail.html": "ngo/lite/project_detail.html",
+    "ngo/campaign/campaign_detail.html": "ngo/lite/campaign_detail.html",
+    "ngo/dashboard/entrepreneur/entrepreneur.html": "ngo/lite/dashboard_entrepreneur.html",
+    "ngo/dashboard/investisseur/investisseur.html": "ngo/lite/dashboard_investisseur.html",
+    "ngo/dashboard/intermediaire/intermediaire.html": "ngo/lite/dashboard_intermediaire.html",
+}
+
+# URL des miniatures (cache partagé) ; création en cours ; échec retenté après FAILURE_TIMEOUT
+THUMBNAIL_KEY = "ngo:lite:thumbnail:{}"
+PENDING_KEY = "ngo:lite:thumbnail-pending:{}"
+PENDING_TIMEOUT = 300
+FAILURE_TIMEOUT = 3600
+
+
+# --------------------------
+# Choix du mode
+# --------------------------
+def requested(request):
+    """Choix explicite porté par l'URL (True / False), ou None."""
+    value = request.GET.get(PARAM)
+    if value in ("0", "1"):
+        return value == "1"
+    return None
+
+
+def is_lite(request):
+    choice = request.COOKIES.get(COOKIE)
+    if choice in ("0", "1"):
+        return choice == "1"
+    return request.headers.get("Save-Data", "").strip().lower() == "on"
+
+
+def remember(response, lite):
+    response.set_cookie(COOKIE, "1" if lite else "0", max_age=COOKIE_MAX_AGE, httponly=True, samesite="Lax")
+
+
+# --------------------------
+# Pagination
+# --------------------------
+def _page_url(request, param, number):
+    query = request.GET.copy()
+    query.pop(PARAM, None)
+    query[param] = number
+    return "?" + query.urlencode()
+
+
+def paginate(request, items, param):
+    """Page demandée (``?<param>=n``) d'une liste, avec ses liens précédent / suivant."""
+    if isinstance(items, (set, frozenset)):
+        # Ensemble (projets soutenus) : ordre stable d'une page à l'autre
+        items = sorted((item for item in items if item is not None), key=lambda item: item.pk)
+    page = Paginator(items, settings.LITE_PAGE_SIZE).get_page(request.GET.get(param))
+    page.previous_url = _page_url(request, param, page.previous_page_number()) if page.has_previous() else ""
+    page.next_url = _page_url(request, param, page.next_page_number()) if page.has_next() else ""
+    return page
+
+
+# --------------------------
+# Rendu
+# --------------------------
+def render(request, template_name, context, paginate_lists=()):
+    """
+    ``render`` de Django, ou la version allégée du gabarit si le mode est
+    actif ; ``paginate_lists`` : clés du contexte paginées en mode allégé
+    (paramètre ``?<clé>_page=n``).
+    """
+    lite = getattr(request, "lite", None)
+    if lite is None:
+        lite = is_lite(request)
+    lite_template = LITE_TEMPLATES.get(template_name)
+
+    if lite and lite_template:
+        context = dict(context)
+        for name in paginate_lists:
+            context[name] = paginate(request, context[name], f"{name}_page")
+        response = full_render(request, lite_template, context)
+        if len(response.content) > settings.LITE_PAGE_BUDGET:
+            logger.warning(
+                "Page allégée %s : %d octets (budget %d)", request.path, len(response.content), settings.LITE_PAGE_BUDGET
+            )
+    else:
+        response = full_render(request, template_name, context)
+
+    if lite_template:
+        # Même URL, deux versions : les caches doivent les distinguer
+        patch_vary_headers(response, ("Save-Data", "Cookie"))
+    return response
+
+
+# --------------------------
+# Miniatures
+# --------------------------
+def _thumbnail_name(image_name):
+    digest = hashlib.sha1(image_name.encode()).hexdigest()[:20]
+    return f"{THUMBNAIL_DIR}/{digest}-{settings.LITE_THUMBNAIL_SIZE}.jpg"
+
+
+def thumbnail_url(image):
+    """
+    URL d'une miniature JPEG d'un ImageField (``LITE_THUMBNAIL_SIZE`` pixels
+    au plus), lue dans le cache ; à la première demande, la miniature est
+    créée en arrière-plan et "" est renvoyé en attendant (comme pour une
+    image absente ou illisible).
+    """
+    if not image:
+        return ""
+    url = cache.get(THUMBNAIL_KEY.format(_thumbnail_name(image.name)))
+    if url is None:
+        schedule_thumbnail(image.name)
+        return ""
+    return url
+
+
+def schedule_thumbnail(image_name):
+    """Lance la création de la miniature, une fois par image (en ligne si le broker est indisponible)."""
+    from .tasks import generate_lite_thumbnail
+
+    if not cache.add(PENDING_KEY.format(_thumbnail_name(image_name)), True, PENDING_TIMEOUT):
+        return
+    try:
+        generate_lite_thumbnail.apply_async(args=[image_name], retry=False)
+    except Exception:
+        generate_thumbnail(image_name)
+
+
+def generate_thumbnail(image_name):
+    """Crée la miniature si elle n'est pas déjà dans le stockage et mémorise son URL ("" si l'image est illisible)."""
+    name = _thumbnail_name(image_name)
+    timeout = None
+    try:
+        stored = name
+        if not default_storage.exists(name):
+            with default_storage.open(image_name, "rb") as source, Image.open(source) as original:
+                original.load()
+                content = proofs.thumbnail(original, (settings.LITE_THUMBNAIL_SIZE,) * 2, THUMBNAIL_QUALITY)
+            stored = default_storage.save(name, content)
+        url = default_storage.url(stored)
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("Miniature impossible pour %s : %s", image_name, exc)
+        url, timeout = "", FAILURE_TIMEOUT
+    cache.set(THUMBNAIL_KEY.format(name), url, timeout)
+    cache.delete(PENDING_KEY.format(name))
+    return url
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from ngo import rewards
+from ngo.models import Contribution
+
+
+class Command(BaseCommand):
+    help = "Attribue les récompenses aux contributions payées (rattrapage de l'historique compris)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Réévaluer toutes les contributions payées")
+        parser.add_argument("--no-notify", action="store_true", help="Ne pas envoyer de notification reward_earned")
+        parser.add_argument("--batch-size", type=int, default=rewards.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = None
+        if options["all"]:
+            queryset = Contribution.objects.filter(payment_status="completed", campaign__isnull=False)
+        evaluated, assigned = rewards.assign_rewards(queryset, options["batch_size"], notify=not options["no_notify"])
+        self.stdout.write(f"{evaluated} contribution(s) évaluée(s), {assigned} récompense(s) attribuée(s) ou modifiée(s)")
@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ngo import staticfiles
+
+
+def _megabytes(size):
+    return f"{size / 1024 / 1024:.1f} Mo"
+
+
+class Command(BaseCommand):
+    help = (
+        "Recense les fichiers de ngo/static qu'aucun gabarit, module ou feuille de style "
+        "utilisée ne référence, et les {% static %} vers un fichier absent ; "
+        "--write fait ignorer les premiers par collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--list", action="store_true", help="Afficher chaque fichier inutilisé")
+        parser.add_argument("--write", action="store_true", help=f"Écrire les motifs dans {settings.STATIC_UNUSED_FILE}")
+        parser.add_argument("--depth", type=int, default=3, help="Profondeur du regroupement par répertoire")
+
+    def handle(self, *args, **options):
+        result = staticfiles.audit()
+        unused = result.unused
+        self.stdout.write(
+            f"{len(result.files)} fichiers ({_megabytes(result.size(result.files))}), "
+            f"{len(result.used)} utilisés, {len(unused)} inutilisés ({_megabytes(result.size(unused))})"
+        )
+
+        by_directory = defaultdict(int)
+        for path in unused:
+            by_directory["/".join(path.split("/")[:options["depth"]])] += result.size([path])
+        for directory, size in sorted(by_directory.items(), key=lambda item: -item[1])[:15]:
+            self.stdout.write(f"  {_megabytes(size):>9}  {directory}")
+
+        if options["list"]:
+            for path in unused:
+                self.stdout.write(f"  {path}")
+
+        for template, expression in result.dynamic:
+            # {% static variable %} : le chemin n'est connu qu'au rendu
+            self.stdout.write(self.style.WARNING(f"⚠️ Référence dynamique {{% static {expression} %}} dans {template}"))
+
+        for path, templates in sorted(result.missing.items()):
+            # Servi en 404 (manifest_strict = False) : à corriger dans le gabarit
+            self.stdout.write(self.style.ERROR(f"❌ Fichier absent {path} référencé par {', '.join(sorted(templates))}"))
+
+        if options["write"]:
+            patterns = staticfiles.unused_patterns(result.files, unused)
+            with open(settings.STATIC_UNUSED_FILE, "w", encoding="utf-8") as handle:
+                handle.write(
+                    "# Fichiers de ngo/static ignorés par collectstatic (python manage.py audit_static --write).\n"
+                    "# Références dynamiques et fichiers lus depuis le disque : STATIC_AUDIT_KEEP.\n"
+                )
+                handle.writelines(f"{pattern}\n" for pattern in patterns)
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(patterns)} motif(s) écrit(s) dans {settings.STATIC_UNUSED_FILE}"))
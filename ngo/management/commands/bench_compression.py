@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from ngo import compression
+
+DEFAULT_URLS = ["/fr/", "/fr/que-faisons-nous/", "/fr/financement-igia/", "/fr/guide-utilisation/"]
+
+
+def _kilobytes(size):
+    return f"{size / 1024:7.1f} Ko"
+
+
+def _cpu(function, repeat):
+    """Temps CPU moyen d'un appel, en ms."""
+    began = time.process_time()
+    for _index in range(repeat):
+        result = function()
+    return result, (time.process_time() - began) * 1000 / repeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Octets économisés et coût CPU par réponse de la minification HTML et de la "
+        "compression gzip / Brotli, sur des pages publiques rendues."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", action="append", help=f"Page à mesurer (défaut : {', '.join(DEFAULT_URLS)})")
+        parser.add_argument("--repeat", type=int, default=50, help="Répétitions par mesure")
+
+    def handle(self, *args, **options):
+        if compression.brotli is None:
+            raise CommandError("Paquet Brotli absent (pip install Brotli).")
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        repeat = options["repeat"]
+        totals = {}
+
+        self.stdout.write(
+            f"Brotli qualité {settings.RESPONSE_COMPRESSION_BROTLI_QUALITY}, gzip niveau {compression.GZIP_LEVEL}, "
+            f"CPU moyen sur {repeat} répétitions"
+        )
+        for url in options["url"] or DEFAULT_URLS:
+            # Corps brut : middleware désactivé pendant le rendu
+            with override_settings(HTML_MINIFY=False, RESPONSE_COMPRESSION=False, ALLOWED_HOSTS=hosts):
+                response = Client().get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} : HTTP {response.status_code}")
+            raw = response.content
+            minified, minify_ms = _cpu(lambda: compression.minify_html(raw.decode()).encode(), repeat)
+            rows = [("brut", len(raw), 0.0), ("minifié", len(minified), minify_ms)]
+            for label, body, extra in (("", raw, 0.0), ("minifié + ", minified, minify_ms)):
+                for encoding, name in (("gzip", "gzip"), ("br", "Brotli")):
+                    compressed, cost = _cpu(lambda: compression.compress(body, encoding), repeat)
+                    rows.append((f"{label}{name}", len(compressed), extra + cost))
+
+            self.stdout.write(url)
+            for label, size, cost in rows:
+                saved = 1 - size / len(raw)
+                self.stdout.write(f"  {label:<18} {_kilobytes(size)}  {saved:6.1%} économisés  {cost:6.2f} ms CPU")
+                total = totals.setdefault(label, [0, 0, 0.0])
+                total[0] += len(raw)
+                total[1] += size
+                total[2] += cost
+
+        self.stdout.write("Total")
+        for label, (raw_size, size, cost) in totals.items():
+            self.stdout.write(
+                f"  {label:<18} {_kilobytes(size)}  {1 - size / raw_size:6.1%} économisés  {cost:6.2f} ms CPU"
+            )
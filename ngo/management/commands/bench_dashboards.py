@@ -0,0 +1,110 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+from ngo import async_views, views
+from ngo.benchmarks import latency_line
+
+ROLES = ("entrepreneur", "investisseur", "intermediaire")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la latence des tableaux de bord synchrones et asynchrones "
+        "sous charge concurrente, sur les données de la base courante."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("role", choices=ROLES)
+        parser.add_argument("--user", help="E-mail de l'utilisateur (défaut : premier compte du rôle)")
+        parser.add_argument("--concurrency", type=int, default=8, help="Requêtes simultanées")
+        parser.add_argument("--requests", type=int, default=80, help="Nombre total de requêtes par variante")
+        parser.add_argument(
+            "--db-latency", type=float, default=0,
+            help="Aller-retour réseau simulé par requête SQL, en ms (base distante, ex. 2 pour Render)",
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(role=options["role"], is_active=True)
+        if options["user"]:
+            users = users.filter(email=options["user"])
+        user = users.order_by("pk").first()
+        if user is None:
+            raise CommandError(f"Aucun compte {options['role']} trouvé.")
+
+        if options["db_latency"]:
+            delay = options["db_latency"] / 1000
+
+            def network(execute, sql, params, many, context):
+                time.sleep(delay)
+                return execute(sql, params, many, context)
+
+            def add_latency(sender, connection, **kwargs):
+                if network not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(network)
+
+            connection_created.connect(add_latency, weak=False)
+
+        name = f"dashboard_{options['role']}"
+        factory = RequestFactory()
+
+        def request():
+            # Vue appelée directement (sans middlewares) : utilisateur, session et messages posés à la main
+            req = factory.get(f"/dashboard/{options['role']}/")
+            req.user = user
+            req.session = SessionBase()
+            req._messages = FallbackStorage(req)
+
+            async def auser():
+                return user
+
+            req.auser = auser
+            return req
+
+        def timed_sync():
+            began = time.perf_counter()
+            response = getattr(views, name)(request())
+            return (time.perf_counter() - began) * 1000, response.status_code
+
+        async def timed_async(semaphore):
+            async with semaphore:
+                began = time.perf_counter()
+                response = await getattr(async_views, name)(request())
+                return (time.perf_counter() - began) * 1000, response.status_code
+
+        async def run_async():
+            semaphore = asyncio.Semaphore(options["concurrency"])
+            return await asyncio.gather(*(timed_async(semaphore) for _index in range(options["requests"])))
+
+        def run_sync():
+            def worker(_index):
+                try:
+                    return timed_sync()
+                finally:
+                    connections.close_all()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                return list(pool.map(worker, range(options["requests"])))
+
+        # Échauffement (connexions, gabarits, cache des données de référence)
+        timed_sync()
+        asyncio.run(timed_async(asyncio.Semaphore(1)))
+
+        self.stdout.write(
+            f"{name} ({user.email}) : {options['requests']} requêtes, {options['concurrency']} simultanées, "
+            f"latence SQL simulée {options['db_latency']} ms"
+        )
+        for label, run in (("Synchrone", run_sync), ("Asynchrone", lambda: asyncio.run(run_async()))):
+            began = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - began
+            statuses = {status for _duration, status in results}
+            self.stdout.write(latency_line(label, [duration for duration, _status in results]))
+            self.stdout.write(f"{'':<22} {len(results) / elapsed:.1f} req/s, statuts HTTP {sorted(statuses)}")
@@ -0,0 +1,89 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+from django.utils import timezone
+
+from ngo import analytics
+from ngo.benchmarks import latency_line
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le temps d'obtention d'une connexion à la base sous un trafic concurrent "
+        "de tableaux de bord (cycle de requête Django simulé, selon DB_POOL_MODE)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Requêtes simultanées")
+        parser.add_argument("--requests", type=int, default=50, help="Requêtes par thread")
+        parser.add_argument("--days", type=int, default=30, help="Période lue par chaque tableau de bord")
+
+    def handle(self, *args, **options):
+        end = timezone.localdate()
+        start = end - timedelta(days=options["days"])
+        acquire, total, errors = [], [], []
+        lock = threading.Lock()
+        running = threading.Event()
+        peak = [0]
+
+        def dashboard():
+            # Même cycle qu'une vue : signaux de début et de fin de requête
+            # (fermeture des connexions périmées, retour au pool, vérification de santé)
+            for _index in range(options["requests"]):
+                request_started.send(sender=self.__class__)
+                began = time.perf_counter()
+                try:
+                    connection.ensure_connection()
+                    acquired = time.perf_counter()
+                    for metric in ("contributions", "projects", "withdrawals"):
+                        analytics.series(metric, start, end, "week")
+                except Exception as exc:
+                    with lock:
+                        errors.append(repr(exc))
+                    continue
+                finally:
+                    request_finished.send(sender=self.__class__)
+                with lock:
+                    acquire.append((acquired - began) * 1000)
+                    total.append((time.perf_counter() - began) * 1000)
+            connections.close_all()
+
+        def sample():
+            # Connexions ouvertes côté serveur (PostgreSQL), hors connexion d'échantillonnage
+            with connections["default"].cursor() as cursor:
+                while running.is_set():
+                    cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+                    peak[0] = max(peak[0], cursor.fetchone()[0] - 1)
+                    time.sleep(0.05)
+            connections.close_all()
+
+        workers = [threading.Thread(target=dashboard) for _index in range(options["threads"])]
+        sampler = threading.Thread(target=sample) if connection.vendor == "postgresql" else None
+        running.set()
+        if sampler:
+            sampler.start()
+        began = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - began
+        running.clear()
+        if sampler:
+            sampler.join()
+
+        self.stdout.write(
+            f"Mode {settings.DB_POOL_MODE} ({connection.vendor}) : {options['threads']} thread(s) × "
+            f"{options['requests']} requête(s) en {elapsed:.2f} s ({len(total) / elapsed:.0f} req/s)"
+        )
+        self.stdout.write(latency_line("Obtention connexion", acquire))
+        self.stdout.write(latency_line("Requête complète", total))
+        if sampler:
+            self.stdout.write(f"Connexions serveur (pic) : {peak[0]}")
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{len(errors)} erreur(s), ex. : {errors[0]}"))
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from ngo.benchmarks import latency_line
+
+# Pile d'origine, pour comparaison : WhiteNoise après session, CSRF, auth,
+# messages et clickjacking ; CORS en tête ; langue négociée pour tout
+PREVIOUS_MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'ngo.middleware.PrimaryPinMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    'django.middleware.locale.LocaleMiddleware',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le coût de la pile de middlewares d'origine et de la pile actuelle "
+        "pour un fichier statique, /healthz et une page publique (visiteur anonyme)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requêtes par URL et par pile")
+        parser.add_argument("--static", default="assets/js/events.js", help="Fichier statique servi")
+        parser.add_argument("--page", default="/fr/que-faisons-nous/", help="Page publique")
+
+    def handle(self, *args, **options):
+        urls = [
+            ("Statique", settings.STATIC_URL + options["static"]),
+            ("/healthz", "/healthz"),
+            ("Page anonyme", options["page"]),
+        ]
+        stacks = [("avant", PREVIOUS_MIDDLEWARE), ("après", settings.MIDDLEWARE)]
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        self.stdout.write(f"{options['requests']} requêtes par URL et par pile")
+        for label, url in urls:
+            for stack_label, middleware in stacks:
+                with override_settings(MIDDLEWARE=middleware, ALLOWED_HOSTS=hosts):
+                    # Un client par pile : les middlewares sont chargés à la première requête
+                    client = Client()
+                    response = client.get(url)  # échauffement (gabarits, WhiteNoise)
+                    response.close()
+                    if label == "Statique" and response.status_code != 200:
+                        raise CommandError(f"{url} : HTTP {response.status_code} (collectstatic ou --static ?)")
+                    durations, statuses = [], set()
+                    with CaptureQueriesContext(connections["default"]) as queries:
+                        for _index in range(options["requests"]):
+                            began = time.perf_counter()
+                            response = client.get(url)
+                            durations.append((time.perf_counter() - began) * 1000)
+                            statuses.add(response.status_code)
+                            response.close()  # fichier statique ouvert
+                self.stdout.write(latency_line(f"{label} ({stack_label})", durations))
+                self.stdout.write(
+                    f"{'':<22} statuts HTTP {sorted(statuses)}, "
+                    f"{len(queries) / options['requests']:.1f} requête(s) SQL par requête, "
+                    f"Vary: {response.get('Vary', '-')}"
+                )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from ngo import catalogs
+
+
+class Command(BaseCommand):
+    help = (
+        "Extrait les chaînes à traduire des fichiers modifiés, fusionne les catalogues .po "
+        "de toutes les langues et recompile les .mo qui ont changé."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-l", "--locale", action="append", help="Langue à construire (répétable, défaut : LANGUAGES)")
+        parser.add_argument("--jobs", type=int, help="Processus d'extraction (défaut : un par CPU)")
+        parser.add_argument("--force", action="store_true", help="Ignorer le cache et réanalyser toutes les sources")
+        parser.add_argument("--no-obsolete", action="store_true", help="Supprimer les traductions qui ne sont plus utilisées")
+        parser.add_argument("--no-compile", action="store_true", help="Ne pas compiler les .mo")
+
+    def handle(self, *args, **options):
+        results, changed, errors = catalogs.build(
+            languages=options["locale"],
+            jobs=options["jobs"],
+            force=options["force"],
+            keep_obsolete=not options["no_obsolete"],
+            compile=not options["no_compile"],
+        )
+        self.stdout.write(f"🔎 {len(changed)} fichier(s) source analysé(s)")
+        for name, error in errors.items():
+            self.stdout.write(self.style.WARNING(f"⚠️ {name} ignoré : {error}"))
+        for result in results:
+            status = "mis à jour" if result.po_changed else "inchangé"
+            compiled = ", .mo compilé" if result.mo_compiled else ""
+            self.stdout.write(
+                f"{result.language} : {result.entries} chaînes, {result.untranslated} à traduire, .po {status}{compiled}"
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ngo import revenue
+
+
+class Command(BaseCommand):
+    help = "Rattrape les commissions non enregistrées par le grand livre et calcule les agrégats de revenus journaliers / mensuels."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recalculer les agrégats de tous les jours")
+
+    def handle(self, *args, **options):
+        commissions, rollups = revenue.run(full=options["full"])
+        self.stdout.write(f"{commissions} commission(s) rattrapée(s), {rollups} agrégat(s) journalier(s) écrit(s)")
+        for row in revenue.revenue("month").order_by("-period_start", "source")[:12]:
+            self.stdout.write(f"  {row}")
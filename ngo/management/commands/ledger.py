@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ngo import ledger
+
+
+class Command(BaseCommand):
+    help = "Grand livre des projets : reprise de l'historique et contrôle de cohérence des soldes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backfill", action="store_true", help="Comptabiliser contributions et retraits existants")
+        parser.add_argument("--check", action="store_true", help="Vérifier l'équilibre des écritures et les soldes matérialisés")
+
+    def handle(self, *args, **options):
+        if not options["backfill"] and not options["check"]:
+            raise CommandError("Préciser --backfill et/ou --check")
+        if options["backfill"]:
+            contributions, withdrawals = ledger.backfill()
+            self.stdout.write(f"{contributions} contribution(s) et {withdrawals} retrait(s) comptabilisé(s)")
+        if options["check"]:
+            problems = ledger.check()
+            for problem in problems:
+                self.stdout.write(self.style.ERROR(problem))
+            if problems:
+                raise CommandError(f"{len(problems)} anomalie(s) dans le grand livre")
+            self.stdout.write(self.style.SUCCESS("Grand livre équilibré ✅"))
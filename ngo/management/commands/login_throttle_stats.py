@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ngo import throttle
+
+
+class Command(BaseCommand):
+    help = "Tentatives de connexion refusées par la limitation (par jour, seau IP / e-mail)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7)
+
+    def handle(self, *args, **options):
+        if not throttle.store().shared:
+            # Seaux en mémoire : les refus sont comptés dans chaque worker, pas ici
+            self.stdout.write(self.style.WARNING("⚠️ LOGIN_THROTTLE_URL non défini : compteurs propres à chaque worker."))
+            return
+        total = 0
+        for day, counts in throttle.rejections(options["days"]).items():
+            total += sum(counts.values())
+            self.stdout.write(f"{day}  IP : {counts.get('ip', 0):>6}  e-mail : {counts.get('email', 0):>6}")
+        self.stdout.write(f"{total} tentative(s) refusée(s) sur {options['days']} jour(s)")
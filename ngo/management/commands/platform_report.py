@@ -0,0 +1,54 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ngo import currency as currency_engine
+from ngo.models import Contribution, IntermediairePayment, Payment, WithdrawalRequest
+
+
+class Command(BaseCommand):
+    help = "Totaux de la plateforme convertis dans une devise de reporting (une requête agrégée par total)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--currency", default=None, help="Devise cible (défaut : REPORTING_CURRENCY)")
+        parser.add_argument("--since", type=date.fromisoformat, default=None, help="Date de début (AAAA-MM-JJ)")
+        parser.add_argument("--until", type=date.fromisoformat, default=None, help="Date de fin incluse (AAAA-MM-JJ)")
+
+    def handle(self, *args, **options):
+        target = options["currency"] or currency_engine.reporting_currency()
+
+        def period(queryset):
+            if options["since"]:
+                queryset = queryset.filter(created_at__date__gte=options["since"])
+            if options["until"]:
+                queryset = queryset.filter(created_at__date__lte=options["until"])
+            return queryset
+
+        rows = (
+            (
+                "Contributions complétées",
+                currency_engine.contributions_total,
+                Contribution.objects.filter(payment_status="completed"),
+            ),
+            (
+                "Frais de soumission validés",
+                currency_engine.payments_total,
+                Payment.objects.filter(is_successful=True),
+            ),
+            (
+                "Abonnements intermédiaires validés",
+                currency_engine.payments_total,
+                IntermediairePayment.objects.filter(status="validated"),
+            ),
+            (
+                "Retraits payés",
+                currency_engine.withdrawals_total,
+                WithdrawalRequest.objects.filter(status="paid"),
+            ),
+        )
+
+        try:
+            for label, total, queryset in rows:
+                self.stdout.write(f"{label:<40} {total(period(queryset), target):>20,.2f} {target}")
+        except LookupError as exc:
+            raise CommandError(str(exc))
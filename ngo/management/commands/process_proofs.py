@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from ngo import proofs
+
+
+class Command(BaseCommand):
+    help = "Calcule miniatures et empreintes des preuves de paiement qui n'en ont pas encore."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duplicates", action="store_true", help="Recalculer les doublons des preuves déjà traitées")
+
+    def handle(self, *args, **options):
+        for label, model in proofs.PROOF_MODELS.items():
+            pending = model.objects.filter(proof_hash="", proof__gt="").values_list("pk", flat=True)
+            done = sum(proofs.process_proof(label, pk) for pk in pending.iterator())
+            self.stdout.write(f"{model._meta.verbose_name_plural} : {done} preuve(s) traitée(s)")
+        if options["duplicates"]:
+            for label, model in proofs.PROOF_MODELS.items():
+                hashed = model.objects.exclude(proof_hash="").values_list("pk", flat=True)
+                count = 0
+                for pk in hashed.iterator():
+                    proofs.record_duplicates(label, pk)
+                    count += 1
+                self.stdout.write(f"{model._meta.verbose_name_plural} : doublons de {count} preuve(s) recalculés")
@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ngo import repayments
+
+
+class Command(BaseCommand):
+    help = "Échéances de prêt non payées dues sur un mois, pour toute la plateforme."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", type=date.fromisoformat, default=None,
+                            help="Un jour du mois voulu (AAAA-MM-JJ, défaut : mois courant)")
+        parser.add_argument("--currency", default=None, help="Devise du total (défaut : REPORTING_CURRENCY)")
+
+    def handle(self, *args, **options):
+        try:
+            owed = repayments.owed_this_month(options["month"], options["currency"])
+        except LookupError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"Du {owed['start']} au {owed['end']}")
+        for row in owed["by_currency"]:
+            code = row["currency__code"] or "?"
+            self.stdout.write(f"  {code:<6} {row['total']:>20,.2f}  ({row['installments']} échéances)")
+        self.stdout.write(f"Total {owed['total']:>20,.2f} {owed['currency']}")
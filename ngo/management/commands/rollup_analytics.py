@@ -0,0 +1,18 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from ngo import analytics
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques journalières (DailyMetric) du tableau de bord."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Reconstruire depuis la première inscription")
+        parser.add_argument("--since", type=date.fromisoformat, help="Premier jour à recalculer (AAAA-MM-JJ)")
+
+    def handle(self, *args, **options):
+        start = analytics.first_day() if options["full"] else options["since"]
+        written = analytics.run(start=start)
+        self.stdout.write(f"{written} statistique(s) journalière(s) écrite(s)")
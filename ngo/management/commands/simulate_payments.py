@@ -0,0 +1,97 @@
+import json
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+
+from ngo import payments
+from ngo.models import Campaign, LoanCampaign
+from ngo.views import payment_webhook
+
+
+class LocalProvider:
+    """
+    Prestataire factice : produit des webhooks signés au format de ngo.payments,
+    envoyés directement à la vue ``payment_webhook`` (sans réseau).
+    """
+
+    def __init__(self, provider, secret):
+        self.provider = provider
+        self.secret = secret
+        self.factory = RequestFactory()
+
+    def event(self, target, amount, failed=False):
+        key = "loan_campaign_id" if isinstance(target, LoanCampaign) else "campaign_id"
+        return {
+            "type": "payment.failed" if failed else "payment.completed",
+            "transaction_id": f"local-{uuid.uuid4().hex}",
+            "amount": str(amount),
+            key: target.pk,
+            "contributor_name": "Contributeur test",
+        }
+
+    def send(self, data):
+        body = json.dumps(data).encode()
+        request = self.factory.post(
+            reverse("payment_webhook", args=[self.provider]),
+            data=body,
+            content_type="application/json",
+            HTTP_X_SIGNATURE=payments.sign(body, self.secret),
+        )
+        return payment_webhook(request, self.provider)
+
+
+class Command(BaseCommand):
+    help = "Simule une rafale de webhooks de paiement (prestataire local) puis les traite par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--campaign", type=int, help="ID de la campagne de don")
+        parser.add_argument("--loan-campaign", type=int, help="ID de la campagne de prêt")
+        parser.add_argument("--count", type=int, default=100, help="Nombre de paiements")
+        parser.add_argument("--replays", type=float, default=0.2, help="Part de webhooks renvoyés en double")
+        parser.add_argument("--failures", type=float, default=0.05, help="Part de paiements échoués")
+        parser.add_argument("--provider", default="other", help="Méthode de paiement simulée")
+        parser.add_argument("--no-process", action="store_true", help="Ne pas vider la boîte de réception")
+
+    def handle(self, *args, **options):
+        if options["loan_campaign"]:
+            target = LoanCampaign.objects.filter(pk=options["loan_campaign"]).first()
+        else:
+            target = Campaign.objects.filter(pk=options["campaign"]).first() if options["campaign"] else Campaign.objects.first()
+        if target is None:
+            raise CommandError("Campagne introuvable.")
+
+        secret = payments.webhook_secret(options["provider"])
+        if not secret:
+            raise CommandError("Définissez PAYMENT_WEBHOOK_SECRET pour signer les webhooks.")
+        provider = LocalProvider(options["provider"], secret)
+
+        events = [
+            provider.event(target, Decimal(random.randint(10, 500) * 100), failed=random.random() < options["failures"])
+            for _index in range(options["count"])
+        ]
+        replays = random.sample(events, int(len(events) * options["replays"]))
+
+        statuses = {}
+        started = time.perf_counter()
+        for data in events + replays:
+            status = json.loads(provider.send(data).content)["status"]
+            statuses[status] = statuses.get(status, 0) + 1
+        received = time.perf_counter() - started
+        self.stdout.write(
+            f"{len(events) + len(replays)} webhooks en {received:.2f}s "
+            f"({(len(events) + len(replays)) / received:.0f}/s) : {statuses}"
+        )
+
+        if options["no_process"]:
+            return
+        started = time.perf_counter()
+        processed = payments.process_events()
+        elapsed = time.perf_counter() - started
+        target.refresh_from_db(fields=["collected_amount"])
+        self.stdout.write(f"{processed} événements appliqués en {elapsed:.2f}s")
+        self.stdout.write(f"Montant collecté de « {target.title} » : {target.collected_amount}")
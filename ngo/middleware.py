@@ -0,0 +1,139 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.middleware.locale import LocaleMiddleware
+from django.utils.deprecation import MiddlewareMixin
+
+from . import compression, lite, routers
+
+HEALTH_PATHS = {"/healthz", "/healthz/"}
+
+
+def health_response():
+    response = HttpResponse("ok", content_type="text/plain")
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+class HealthCheckMiddleware:
+    """
+    ``/healthz`` (sonde de Render) : réponse immédiate, avant tout autre
+    middleware. Ni session, ni base, ni ALLOWED_HOSTS / redirection HTTPS,
+    que la sonde interne ne satisfait pas ; le processus répond, c'est tout.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path_info in HEALTH_PATHS:
+            return health_response()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path_info in HEALTH_PATHS:
+            return health_response()
+        return await self.get_response(request)
+
+
+class AssetLocaleMiddleware(LocaleMiddleware):
+    """
+    LocaleMiddleware sans négociation de langue (préfixe, cookie,
+    Accept-Language) pour les URL statiques et media : ces fichiers ne
+    dépendent pas de la langue et ne portent pas « Vary: Accept-Language ».
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.asset_prefixes = tuple(prefix for prefix in (settings.STATIC_URL, settings.MEDIA_URL) if prefix)
+
+    def is_asset(self, request):
+        return request.path.startswith(self.asset_prefixes)
+
+    def process_request(self, request):
+        if not self.is_asset(request):
+            super().process_request(request)
+
+    def process_response(self, request, response):
+        if self.is_asset(request):
+            return response
+        return super().process_response(request, response)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Minification HTML puis compression Brotli / gzip des réponses dynamiques
+    (voir ngo.compression). Placé après WhiteNoise, qui sert ses propres
+    fichiers pré-compressés, et avant tout middleware qui modifie le contenu.
+    """
+
+    def __init__(self, get_response):
+        if not settings.HTML_MINIFY and not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if settings.HTML_MINIFY:
+            compression.minify_response(response)
+        if settings.RESPONSE_COMPRESSION:
+            compression.compress_response(request, response)
+        return response
+
+
+class LiteModeMiddleware(MiddlewareMixin):
+    """
+    Mode allégé de la requête (``request.lite``, voir ngo.lite) : ``?lite=1`` /
+    ``?lite=0`` est mémorisé dans un cookie, sinon cookie puis Save-Data.
+    """
+
+    def process_request(self, request):
+        choice = lite.requested(request)
+        request.lite_choice = choice
+        request.lite = lite.is_lite(request) if choice is None else choice
+
+    def process_response(self, request, response):
+        choice = getattr(request, "lite_choice", None)
+        if choice is not None:
+            lite.remember(response, choice)
+        return response
+
+
+class PrimaryPinMiddleware:
+    """
+    Ouvre le contexte de routage de chaque requête (voir ngo.routers).
+    Après une écriture, l'utilisateur lit sur le primaire pendant
+    ``REPLICA_PIN_SECONDS`` (cookie) pour ne pas voir de données périmées.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routers.routing_scope(pinned=routers.PIN_COOKIE in request.COOKIES) as state:
+            response = self.get_response(request)
+        return self.pin(state, response)
+
+    async def __acall__(self, request):
+        with routers.routing_scope(pinned=routers.PIN_COOKIE in request.COOKIES) as state:
+            response = await self.get_response(request)
+        return self.pin(state, response)
+
+    def pin(self, state, response):
+        if state.wrote and routers.replica_configured():
+            response.set_cookie(routers.PIN_COOKIE, "1", max_age=routers.PIN_SECONDS, httponly=True, samesite="Lax")
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:54
+
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Index GIN et remplissage initial : PostgreSQL uniquement (SQLite utilise le repli icontains)
+SEARCH_CONFIGS = ("french", "english", "dutch", "spanish")
+
+SEARCH_FIELDS = {
+    "project": (("title", "A"), ("short_description", "B"), ("description", "C")),
+    "campaign": (("title", "A"), ("description", "C")),
+    "partner": (("name", "A"), ("description", "C")),
+}
+
+
+def _index(model_name):
+    return GinIndex(fields=["search_vector"], name=f"ngo_{model_name}_search_gin")
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model("ngo", model_name)
+        schema_editor.add_index(model, _index(model_name))
+        vector = None
+        for config in SEARCH_CONFIGS:
+            for field, weight in fields:
+                part = SearchVector(field, config=config, weight=weight)
+                vector = part if vector is None else vector + part
+        model.objects.using(schema_editor.connection.alias).update(search_vector=vector)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name in SEARCH_FIELDS:
+        schema_editor.remove_index(apps.get_model("ngo", model_name), _index(model_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0005_investisseurprofile_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Index de recherche'),
+        ),
+        migrations.AddField(
+            model_name='partner',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Index de recherche'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Index de recherche'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
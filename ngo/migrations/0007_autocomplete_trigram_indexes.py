@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:30
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db.models import TextField
+from django.db.models.functions import Cast, Upper
+
+# Index trigrammes sur UPPER(col::text) : l'expression générée par Django pour
+# icontains / istartswith sous PostgreSQL. PostgreSQL uniquement.
+TRIGRAM_INDEXES = (
+    ("user", "full_name", "ngo_user_full_name_trgm"),
+    ("user", "email", "ngo_user_email_trgm"),
+    ("project", "title", "ngo_project_title_trgm"),
+)
+
+
+def _index(field, name):
+    return GinIndex(OpClass(Upper(Cast(field, TextField())), name="gin_trgm_ops"), name=name)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, field, name in TRIGRAM_INDEXES:
+        schema_editor.add_index(apps.get_model("ngo", model_name), _index(field, name))
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, field, name in TRIGRAM_INDEXES:
+        schema_editor.remove_index(apps.get_model("ngo", model_name), _index(field, name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0006_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
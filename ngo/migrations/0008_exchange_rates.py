@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def backfill_currencies(apps, schema_editor):
+    """Devise des contributions / retraits existants = devise du pays du projet ; premier instantané des taux."""
+    Campaign = apps.get_model("ngo", "Campaign")
+    LoanCampaign = apps.get_model("ngo", "LoanCampaign")
+    Project = apps.get_model("ngo", "Project")
+    Contribution = apps.get_model("ngo", "Contribution")
+    WithdrawalRequest = apps.get_model("ngo", "WithdrawalRequest")
+    Currency = apps.get_model("ngo", "Currency")
+    ExchangeRate = apps.get_model("ngo", "ExchangeRate")
+
+    Contribution.objects.filter(campaign__isnull=False).update(currency=Subquery(
+        Campaign.objects.filter(pk=OuterRef("campaign")).values("project__country__currency")[:1]
+    ))
+    Contribution.objects.filter(loan_campaign__isnull=False).update(currency=Subquery(
+        LoanCampaign.objects.filter(pk=OuterRef("loan_campaign")).values("project__country__currency")[:1]
+    ))
+    WithdrawalRequest.objects.update(currency=Subquery(
+        Project.objects.filter(pk=OuterRef("project")).values("country__currency")[:1]
+    ))
+
+    today = timezone.localdate()
+    ExchangeRate.objects.bulk_create(
+        [ExchangeRate(currency=currency, date=today, rate_to_usd=currency.exchange_rate_to_usd)
+         for currency in Currency.objects.all()],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0007_autocomplete_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contribution',
+            name='currency',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='contributions', to='ngo.currency', verbose_name='Devise'),
+        ),
+        migrations.AddField(
+            model_name='withdrawalrequest',
+            name='currency',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='withdrawal_requests', to='ngo.currency', verbose_name='Devise'),
+        ),
+        migrations.AlterField(
+            model_name='currency',
+            name='exchange_rate_to_usd',
+            field=models.DecimalField(decimal_places=10, default=1.0, help_text="Valeur d'une unité de cette devise en USD (ex. XAF ≈ 0.0016).", max_digits=20, verbose_name='Taux de change USD'),
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('rate_to_usd', models.DecimalField(decimal_places=10, max_digits=20, verbose_name='Taux vers USD')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exchange_rates', to='ngo.currency', verbose_name='Devise')),
+            ],
+            options={
+                'verbose_name': 'Taux de change',
+                'verbose_name_plural': 'Taux de change',
+                'ordering': ['-date', 'currency'],
+                'constraints': [models.UniqueConstraint(fields=('currency', 'date'), name='unique_exchange_rate_per_day')],
+            },
+        ),
+        migrations.RunPython(backfill_currencies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0008_exchange_rates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepaymentInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(verbose_name="Numéro d'échéance")),
+                ('due_date', models.DateField(verbose_name="Date d'échéance")),
+                ('principal', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Capital')),
+                ('interest', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Intérêts')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name="Montant de l'échéance")),
+                ('status', models.CharField(choices=[('due', 'À payer'), ('late', 'En retard'), ('paid', 'Payée')], default='due', max_length=10, verbose_name='Statut')),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='Payée le')),
+                ('contribution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='ngo.contribution', verbose_name='Contribution')),
+                ('currency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='installments', to='ngo.currency', verbose_name='Devise')),
+                ('loan_campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installments', to='ngo.loancampaign', verbose_name='Campagne de prêt')),
+            ],
+            options={
+                'verbose_name': 'Échéance de remboursement',
+                'verbose_name_plural': 'Échéances de remboursement',
+                'ordering': ['due_date', 'contribution', 'number'],
+                'indexes': [models.Index(fields=['status', 'due_date'], name='ngo_install_status_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('contribution', 'number'), name='unique_installment_per_contribution')],
+            },
+        ),
+    ]
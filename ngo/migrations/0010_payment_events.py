@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0009_repayment_installments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('stripe', 'Stripe'), ('paypal', 'PayPal'), ('mtn', 'MTN Mobile Money'), ('orange', 'Orange Mobile Money'), ('other', 'Autre')], max_length=50, verbose_name='Prestataire')),
+                ('transaction_id', models.CharField(max_length=100, verbose_name='ID de transaction')),
+                ('event_type', models.CharField(choices=[('payment.completed', 'Paiement complété'), ('payment.failed', 'Paiement échoué')], max_length=30, verbose_name="Type d'événement")),
+                ('payload', models.JSONField(default=dict, verbose_name='Contenu')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processed', 'Traité'), ('ignored', 'Ignoré')], default='pending', max_length=20, verbose_name='Statut')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Erreur')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Reçu le')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Traité le')),
+            ],
+            options={
+                'verbose_name': 'Événement de paiement',
+                'verbose_name_plural': 'Événements de paiement',
+                'ordering': ['-received_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(fields=['payment_method', 'transaction_id'], name='ngo_contrib_method_tx_idx'),
+        ),
+        migrations.AddField(
+            model_name='paymentevent',
+            name='contribution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_events', to='ngo.contribution', verbose_name='Contribution'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentevent',
+            index=models.Index(fields=['status', 'received_at'], name='ngo_payevent_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentevent',
+            constraint=models.UniqueConstraint(fields=('provider', 'transaction_id'), name='unique_payment_event'),
+        ),
+    ]
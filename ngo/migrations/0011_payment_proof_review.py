@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0010_payment_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='intermediairepayment',
+            name='proof_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, verbose_name='Empreinte de la preuve'),
+        ),
+        migrations.AddField(
+            model_name='intermediairepayment',
+            name='proof_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='intermediaire/payments/thumbnails/', verbose_name='Miniature de la preuve'),
+        ),
+        migrations.AddField(
+            model_name='intermediairepayment',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Vérifié le'),
+        ),
+        migrations.AddField(
+            model_name='intermediairepayment',
+            name='reviewed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Vérifié par'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, verbose_name='Empreinte de la preuve'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='payments/proofs/thumbnails/', verbose_name='Miniature de la preuve'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Vérifié le'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='reviewed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Vérifié par'),
+        ),
+        migrations.AlterField(
+            model_name='intermediairepayment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('validated', 'Validé'), ('rejected', 'Rejeté')], default='pending', max_length=20, verbose_name='Statut'),
+        ),
+    ]
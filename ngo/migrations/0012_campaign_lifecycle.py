@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:16
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def mark_existing_campaigns(apps, schema_editor):
+    """Campagnes existantes : objectifs déjà atteints et clôtures passées, sans notification rétroactive."""
+    now = timezone.now()
+    for name in ("Campaign", "LoanCampaign"):
+        model = apps.get_model("ngo", name)
+        model.objects.filter(goal_amount__gt=0, collected_amount__gte=F("goal_amount")).update(goal_reached_at=now)
+        model.objects.filter(status__in=("completed", "failed")).update(closed_at=F("end_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0011_payment_proof_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignLifecycleRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Démarré le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé le')),
+                ('goals_reached', models.PositiveIntegerField(default=0, verbose_name='Objectifs atteints')),
+                ('campaigns_completed', models.PositiveIntegerField(default=0, verbose_name='Campagnes terminées')),
+                ('campaigns_failed', models.PositiveIntegerField(default=0, verbose_name='Campagnes échouées')),
+                ('loans_completed', models.PositiveIntegerField(default=0, verbose_name='Prêts terminés')),
+                ('loans_failed', models.PositiveIntegerField(default=0, verbose_name='Prêts échoués')),
+                ('notifications_sent', models.PositiveIntegerField(default=0, verbose_name='Notifications envoyées')),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+            ],
+            options={
+                'verbose_name': 'Passage du planificateur de campagnes',
+                'verbose_name_plural': 'Passages du planificateur de campagnes',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Clôturée le'),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='goal_reached_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Objectif atteint le'),
+        ),
+        migrations.AddField(
+            model_name='loancampaign',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Clôturée le'),
+        ),
+        migrations.AddField(
+            model_name='loancampaign',
+            name='goal_reached_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Objectif atteint le'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['status', 'end_date'], name='ngo_campaign_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loancampaign',
+            index=models.Index(fields=['status', 'end_date'], name='ngo_loan_status_end_idx'),
+        ),
+        migrations.RunPython(mark_existing_campaigns, migrations.RunPython.noop),
+    ]
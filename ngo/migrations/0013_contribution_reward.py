@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0012_campaign_lifecycle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contribution',
+            name='reward',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contributions', to='ngo.reward', verbose_name='Récompense'),
+        ),
+        migrations.AddField(
+            model_name='contribution',
+            name='reward_evaluated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Récompense évaluée le'),
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=models.Index(condition=models.Q(('payment_status', 'completed'), ('reward_evaluated_at__isnull', True)), fields=['id'], name='ngo_contrib_reward_todo_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0013_contribution_reward'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectBalance',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='ngo.project', verbose_name='Projet')),
+                ('collected', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total encaissé')),
+                ('commission', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Commissions')),
+                ('reserved', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Retraits en cours')),
+                ('withdrawn', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Retraits versés')),
+                ('available', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Solde disponible')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Mis à jour le')),
+                ('currency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='project_balances', to='ngo.currency', verbose_name='Devise')),
+            ],
+            options={
+                'verbose_name': 'Solde de projet',
+                'verbose_name_plural': 'Soldes des projets',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry', models.UUIDField(db_index=True, verbose_name='Écriture')),
+                ('account', models.CharField(choices=[('external', 'Prestataires de paiement'), ('project', 'Solde disponible du projet'), ('reserved', 'Retraits en cours'), ('payout', 'Retraits versés'), ('commission', 'Commissions de la plateforme')], max_length=20, verbose_name='Compte')),
+                ('kind', models.CharField(choices=[('contribution', 'Contribution encaissée'), ('withdrawal_hold', 'Retrait demandé'), ('withdrawal_release', 'Retrait rejeté'), ('withdrawal_paid', 'Retrait versé')], max_length=20, verbose_name='Opération')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Montant')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date')),
+                ('contribution', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='ngo.contribution', verbose_name='Contribution')),
+                ('currency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='ngo.currency', verbose_name='Devise')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='ngo.project', verbose_name='Projet')),
+                ('withdrawal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='ngo.withdrawalrequest', verbose_name='Demande de retrait')),
+            ],
+            options={
+                'verbose_name': 'Écriture comptable',
+                'verbose_name_plural': 'Grand livre',
+                'ordering': ['-created_at', 'entry', 'account'],
+                'indexes': [models.Index(fields=['project', 'account'], name='ngo_ledger_project_acct_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('contribution__isnull', False)), fields=('contribution', 'account'), name='unique_ledger_contribution_account'), models.UniqueConstraint(condition=models.Q(('withdrawal__isnull', False)), fields=('withdrawal', 'kind', 'account'), name='unique_ledger_withdrawal_step')],
+            },
+        ),
+    ]
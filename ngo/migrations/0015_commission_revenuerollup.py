@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0014_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Commission',
+            fields=[
+                ('contribution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='commission', serialize=False, to='ngo.contribution', verbose_name='Contribution')),
+                ('rate', models.DecimalField(decimal_places=2, max_digits=5, verbose_name='Taux appliqué (%)')),
+                ('gross', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Montant de la contribution')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Commission')),
+                ('date', models.DateField(db_index=True, verbose_name='Date de la contribution')),
+                ('computed_at', models.DateTimeField(auto_now_add=True, verbose_name='Calculée le')),
+                ('country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='commissions', to='ngo.country', verbose_name='Pays')),
+                ('currency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='commissions', to='ngo.currency', verbose_name='Devise')),
+            ],
+            options={
+                'verbose_name': 'Commission',
+                'verbose_name_plural': 'Commissions',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Jour'), ('month', 'Mois')], max_length=5, verbose_name='Période')),
+                ('period_start', models.DateField(verbose_name='Début de période')),
+                ('source', models.CharField(choices=[('commission', 'Commissions sur contributions'), ('submission_fee', 'Frais de soumission de projet'), ('intermediaire_fee', 'Abonnements intermédiaires')], max_length=20, verbose_name='Source')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name="Nombre d'opérations")),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Volume')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Revenu')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Calculé le')),
+                ('country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='revenue_rollups', to='ngo.country', verbose_name='Pays')),
+                ('currency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='revenue_rollups', to='ngo.currency', verbose_name='Devise')),
+            ],
+            options={
+                'verbose_name': 'Revenu agrégé',
+                'verbose_name_plural': 'Revenus agrégés',
+                'ordering': ['-period_start', 'source'],
+                'indexes': [models.Index(fields=['period', 'period_start'], name='ngo_revenue_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'source', 'country', 'currency'), name='unique_revenue_rollup')],
+            },
+        ),
+    ]
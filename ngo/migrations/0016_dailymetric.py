@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0015_commission_revenuerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('metric', models.CharField(choices=[('contributions', 'Contributions payées'), ('projects', 'Nouveaux projets'), ('registrations_entrepreneur', 'Inscriptions entrepreneurs'), ('registrations_investisseur', 'Inscriptions investisseurs'), ('registrations_intermediaire', 'Inscriptions intermédiaires'), ('payments', 'Paiements de frais'), ('withdrawals', 'Demandes de retrait')], max_length=30, verbose_name='Indicateur')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Nombre')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Montant')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Calculé le')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='ngo.category', verbose_name='Catégorie')),
+                ('country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='ngo.country', verbose_name='Pays')),
+                ('currency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='daily_metrics', to='ngo.currency', verbose_name='Devise')),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'ordering': ['-date', 'metric'],
+                'indexes': [models.Index(fields=['metric', 'date'], name='ngo_metric_date_idx')],
+            },
+        ),
+    ]
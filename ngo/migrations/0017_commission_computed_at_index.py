@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0016_dailymetric'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commission',
+            name='computed_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Calculée le'),
+        ),
+    ]
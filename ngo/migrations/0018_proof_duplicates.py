@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0017_commission_computed_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='intermediairepayment',
+            name='proof_duplicates',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Doublons de la preuve'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_duplicates',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Doublons de la preuve'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0018_proof_duplicates'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='ledgerentry',
+            name='unique_ledger_contribution_account',
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='kind',
+            field=models.CharField(choices=[('contribution', 'Contribution encaissée'), ('contribution_refund', 'Contribution annulée'), ('withdrawal_hold', 'Retrait demandé'), ('withdrawal_release', 'Retrait rejeté'), ('withdrawal_paid', 'Retrait versé')], max_length=20, verbose_name='Opération'),
+        ),
+    ]
@@ -0,0 +1,124 @@
+"""
+Reprise de l'historique dans le grand livre (équivalent de ``manage.py ledger
+--backfill``, avec les modèles historiques) : sans elle, chaque projet
+existant démarre avec un solde disponible nul et toutes ses demandes de
+retrait sont refusées.
+
+- contributions complétées non comptabilisées : encaissement, net de la
+  commission au taux actuel du pays du projet (ligne Commission comprise) ;
+- retraits en attente / approuvés : montant réservé ; versés : réservé puis versé ;
+- soldes matérialisés recalculés à partir des lignes.
+"""
+import uuid
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+CENT = Decimal("0.01")
+BATCH_SIZE = 500
+ACCOUNT_FIELDS = {
+    "external": ("collected", -1),
+    "project": ("available", 1),
+    "reserved": ("reserved", 1),
+    "payout": ("withdrawn", 1),
+    "commission": ("commission", 1),
+}
+
+
+def post_history(apps, schema_editor):
+    Commission = apps.get_model("ngo", "Commission")
+    Contribution = apps.get_model("ngo", "Contribution")
+    Country = apps.get_model("ngo", "Country")
+    LedgerEntry = apps.get_model("ngo", "LedgerEntry")
+    Project = apps.get_model("ngo", "Project")
+    ProjectBalance = apps.get_model("ngo", "ProjectBalance")
+    WithdrawalRequest = apps.get_model("ngo", "WithdrawalRequest")
+
+    countries = {pk: (currency_id, rate) for pk, currency_id, rate in Country.objects.values_list("pk", "currency_id", "commission_rate")}
+    lines, commissions = [], []
+
+    def entry(project_id, currency_id, kind, moves, **refs):
+        key = uuid.uuid4()
+        lines.extend(
+            LedgerEntry(entry=key, project_id=project_id, account=account, kind=kind, amount=amount, currency_id=currency_id, **refs)
+            for account, amount in moves
+            if amount
+        )
+
+    contributions = (
+        Contribution.objects.filter(payment_status="completed")
+        .exclude(ledger_entries__account="external")
+        .values_list(
+            "pk", "amount", "currency_id", "created_at",
+            "campaign__project_id", "campaign__project__country_id",
+            "loan_campaign__project_id", "loan_campaign__project__country_id",
+        )
+    )
+    for pk, amount, currency_id, created_at, project_id, country_id, loan_project_id, loan_country_id in contributions.iterator():
+        project_id, country_id = project_id or loan_project_id, country_id or loan_country_id
+        if not project_id:
+            continue
+        rate = Decimal(str(countries.get(country_id, (None, 0))[1] or 0))
+        commission = (amount * rate / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+        entry(
+            project_id, currency_id, "contribution",
+            [("external", -amount), ("project", amount - commission), ("commission", commission)],
+            contribution_id=pk,
+        )
+        commissions.append(
+            Commission(
+                contribution_id=pk, country_id=country_id, currency_id=currency_id,
+                rate=rate, gross=amount, amount=commission, date=timezone.localdate(created_at),
+            )
+        )
+
+    withdrawals = (
+        WithdrawalRequest.objects.filter(status__in=("pending", "approved", "paid"))
+        .exclude(ledger_entries__kind="withdrawal_hold")
+        .values_list("pk", "project_id", "currency_id", "amount", "status")
+    )
+    for pk, project_id, currency_id, amount, status in withdrawals.iterator():
+        entry(project_id, currency_id, "withdrawal_hold", [("project", -amount), ("reserved", amount)], withdrawal_id=pk)
+        if status == "paid":
+            entry(project_id, currency_id, "withdrawal_paid", [("reserved", -amount), ("payout", amount)], withdrawal_id=pk)
+
+    if not lines:
+        return
+    LedgerEntry.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+    Commission.objects.bulk_create(commissions, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    # Soldes recalculés de toutes les lignes des projets touchés (sommes en Python : décimaux exacts)
+    project_ids = {line.project_id for line in lines}
+    totals = defaultdict(lambda: defaultdict(Decimal))
+    for project_id, account, amount in LedgerEntry.objects.filter(project_id__in=project_ids).values_list(
+        "project_id", "account", "amount"
+    ):
+        field, sign = ACCOUNT_FIELDS[account]
+        totals[project_id][field] += sign * amount
+    existing = ProjectBalance.objects.in_bulk(list(project_ids))
+    currencies = {
+        pk: countries.get(country_id, (None, 0))[0]
+        for pk, country_id in Project.objects.filter(pk__in=project_ids).values_list("pk", "country_id")
+    }
+    balances = []
+    for project_id in project_ids:
+        balance = existing.get(project_id) or ProjectBalance(project_id=project_id, currency_id=currencies.get(project_id))
+        for field, _sign in ACCOUNT_FIELDS.values():
+            setattr(balance, field, totals[project_id][field])
+        balances.append(balance)
+    fields = [field for field, _sign in ACCOUNT_FIELDS.values()]
+    ProjectBalance.objects.bulk_update([balance for balance in balances if balance.pk in existing], fields, batch_size=BATCH_SIZE)
+    ProjectBalance.objects.bulk_create([balance for balance in balances if balance.pk not in existing], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0019_ledger_reversal'),
+    ]
+
+    operations = [
+        migrations.RunPython(post_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+"""
+Date de clôture des campagnes déjà terminées / échouées avant qu'elle ne soit
+enregistrée : sans elle, la première échéance d'un prêt clos sans date de fin
+glisserait à chaque génération (``first_due_date`` partirait d'aujourd'hui).
+
+Date de fin si elle est passée ; sinon, pour un prêt, un mois avant la
+première échéance déjà générée ; à défaut, la date de la migration.
+"""
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db import migrations
+from django.db.models import F, Min
+from django.utils import timezone
+
+CLOSED_STATUSES = ("completed", "failed")
+
+
+def stamp_closed_at(apps, schema_editor):
+    Campaign = apps.get_model("ngo", "Campaign")
+    LoanCampaign = apps.get_model("ngo", "LoanCampaign")
+    RepaymentInstallment = apps.get_model("ngo", "RepaymentInstallment")
+    now = timezone.now()
+
+    for model in (Campaign, LoanCampaign):
+        closed = model.objects.filter(status__in=CLOSED_STATUSES, closed_at__isnull=True)
+        closed.filter(end_date__isnull=False, end_date__lte=now).update(closed_at=F("end_date"))
+
+    first_due = (
+        RepaymentInstallment.objects.filter(
+            loan_campaign__status__in=CLOSED_STATUSES, loan_campaign__closed_at__isnull=True
+        )
+        .values_list("loan_campaign_id")
+        .annotate(first=Min("due_date"))
+    )
+    for pk, due_date in first_due:
+        closed_on = due_date - relativedelta(months=1)
+        LoanCampaign.objects.filter(pk=pk).update(closed_at=timezone.make_aware(datetime.datetime.combine(closed_on, datetime.time())))
+
+    for model in (Campaign, LoanCampaign):
+        model.objects.filter(status__in=CLOSED_STATUSES, closed_at__isnull=True).update(closed_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0020_ledger_history'),
+    ]
+
+    operations = [
+        migrations.RunPython(stamp_closed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+
+def link_periods(apps, schema_editor):
+    """Période de validité des instantanés existants : jusqu'à l'instantané suivant de la devise."""
+    ExchangeRate = apps.get_model("ngo", "ExchangeRate")
+    changed, previous = [], None
+    for rate in ExchangeRate.objects.order_by("currency_id", "date").only("pk", "currency_id", "date").iterator():
+        if previous is not None and previous.currency_id == rate.currency_id:
+            previous.valid_until = rate.date
+            changed.append(previous)
+        previous = rate
+    ExchangeRate.objects.bulk_update(changed, ["valid_until"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0021_campaign_closed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exchangerate',
+            name='valid_until',
+            field=models.DateField(blank=True, editable=False, help_text="Date de l'instantané suivant (exclue) ; vide pour le plus récent.", null=True, verbose_name="Valable jusqu'au"),
+        ),
+        migrations.RunPython(link_periods, migrations.RunPython.noop),
+    ]
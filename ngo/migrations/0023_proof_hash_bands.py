@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:45
+
+from django.db import migrations, models
+
+# Même découpe que ngo.proofs.BAND_BOUNDS (empreinte de 16 caractères, 7 tranches)
+BAND_BOUNDS = [(0, 3), (3, 6), (6, 8), (8, 10), (10, 12), (12, 14), (14, 16)]
+PROOF_MODELS = {"payment": "Payment", "intermediaire_payment": "IntermediairePayment"}
+
+
+def index_hashes(apps, schema_editor):
+    """Tranches des empreintes déjà calculées."""
+    ProofHashBand = apps.get_model("ngo", "ProofHashBand")
+    rows = []
+    for label, name in PROOF_MODELS.items():
+        model = apps.get_model("ngo", name)
+        for pk, proof_hash in model.objects.exclude(proof_hash="").values_list("pk", "proof_hash").iterator():
+            rows.extend(
+                ProofHashBand(label=label, object_id=pk, band=band, value=proof_hash[start:end])
+                for band, (start, end) in enumerate(BAND_BOUNDS)
+            )
+    ProofHashBand.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ngo', '0022_exchange_rate_periods'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProofHashBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=30, verbose_name='Type de preuve')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Id de la preuve')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Tranche')),
+                ('value', models.CharField(max_length=4, verbose_name='Valeur')),
+            ],
+            options={
+                'verbose_name': "Tranche d'empreinte",
+                'verbose_name_plural': "Tranches d'empreintes",
+                'indexes': [models.Index(fields=['band', 'value'], name='ngo_proof_band_value_idx')],
+                'constraints': [models.UniqueConstraint(fields=('label', 'object_id', 'band'), name='unique_proof_hash_band')],
+            },
+        ),
+        migrations.RunPython(index_hashes, migrations.RunPython.noop),
+    ]
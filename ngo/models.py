@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.text import slugify
 from django.utils import timezone
@@ -146,7 +147,7 @@ class IntermediaireProfile(models.Model):
         """
         if self.user.profile_image and hasattr(self.user.profile_image, 'url'):
             return self.user.profile_image.url
-        return "/static/assets/img/team/default.png"
+        return "/static/assets/img/team/default.jpg"
 
     def get_full_name(self):
         """Nom complet ou email de l’intermédiaire."""
@@ -196,7 +197,7 @@ class InvestisseurProfile(models.Model):
             return self.image.url
         if self.user.profile_image and hasattr(self.user.profile_image, 'url'):
             return self.user.profile_image.url
-        return "/static/assets/img/team/default.png"
+        return "/static/assets/img/team/default.jpg"
 
     def get_full_name(self):
         """Nom complet ou email de l’utilisateur."""
@@ -241,7 +242,7 @@ class EntrepreneurProfile(models.Model):
             return self.image.url
         if self.user.profile_image:
             return self.user.profile_image.url
-        return "/static/assets/img/team/default.png"
+        return "/static/assets/img/team/default.jpg"
 
 
 # --------------------------
@@ -251,7 +252,10 @@ class Currency(models.Model):
     code = models.CharField(_("Code"), max_length=10, unique=True)
     name = models.CharField(_("Nom"), max_length=100)
     symbol = models.CharField(_("Symbole"), max_length=10, blank=True, null=True)
-    exchange_rate_to_usd = models.DecimalField(_("Taux de change USD"), max_digits=12, decimal_places=4, default=1.0)
+    exchange_rate_to_usd = models.DecimalField(
+        _("Taux de change USD"), max_digits=20, decimal_places=10, default=1.0,
+        help_text=_("Valeur d'une unité de cette devise en USD (ex. XAF ≈ 0.0016)."),
+    )
     active = models.BooleanField(_("Actif"), default=True)
 
     class Meta:
@@ -263,6 +267,37 @@ class Currency(models.Model):
         return f"{self.code} ({self.symbol or ''})"
 
 
+# --------------------------
+# ExchangeRate (historique des taux)
+# --------------------------
+class ExchangeRate(models.Model):
+    """Instantané journalier du taux d'une devise vers l'USD (voir ngo/currency.py)."""
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.CASCADE,
+        related_name="exchange_rates",
+    )
+    date = models.DateField(_("Date"))
+    valid_until = models.DateField(
+        _("Valable jusqu'au"), blank=True, null=True, editable=False,
+        help_text=_("Date de l'instantané suivant (exclue) ; vide pour le plus récent."),
+    )
+    rate_to_usd = models.DecimalField(_("Taux vers USD"), max_digits=20, decimal_places=10)
+    created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Taux de change")
+        verbose_name_plural = _("Taux de change")
+        ordering = ["-date", "currency"]
+        constraints = [
+            models.UniqueConstraint(fields=["currency", "date"], name="unique_exchange_rate_per_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.currency_id} @ {self.date} : {self.rate_to_usd}"
+
+
 # --------------------------
 # Region
 # --------------------------
@@ -322,7 +357,8 @@ class Country(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.name} ({self.currency.code})"
+        from .reference import currency_code  # import local : reference importe les modèles
+        return f"{self.name} ({currency_code(self.currency_id)})"
 
 # --------------------------
 # Tarification par region
@@ -347,7 +383,19 @@ class Payment(models.Model):
     payment_method = models.CharField(_("Méthode de paiement"), max_length=20, choices=PAYMENT_METHOD_CHOICES)
     transaction_code = models.CharField(_("Code de transaction"), max_length=255, blank=True, null=True)
     proof = models.ImageField(_("Preuve de paiement"), upload_to="payments/proofs/", blank=True, null=True)
+    proof_thumbnail = models.ImageField(_("Miniature de la preuve"), upload_to="payments/proofs/thumbnails/", blank=True, null=True, editable=False)
+    proof_hash = models.CharField(_("Empreinte de la preuve"), max_length=16, blank=True, db_index=True, editable=False)
+    proof_duplicates = models.JSONField(_("Doublons de la preuve"), default=list, blank=True, editable=False)
     is_successful = models.BooleanField(_("Réussi"), default=False)
+    reviewed_at = models.DateTimeField(_("Vérifié le"), blank=True, null=True)
+    reviewed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("Vérifié par"),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
     created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
 
     class Meta:
@@ -356,7 +404,8 @@ class Payment(models.Model):
         ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.user.display_name()} - {self.payment_type} ({self.amount} {self.currency.code})"
+        from .reference import currency_code
+        return f"{self.user.display_name()} - {self.payment_type} ({self.amount} {currency_code(self.currency_id)})"
 
 # --------------------------
 # Category
@@ -422,6 +471,7 @@ class Project(models.Model):
         blank=True,
         related_name="projects_submitted"
     )
+    search_vector = SearchVectorField(_("Index de recherche"), null=True, editable=False)
 
     class Meta:
         verbose_name = _("Projet")
@@ -510,13 +560,20 @@ class Campaign(models.Model):
     status = models.CharField(_("Statut"), max_length=20, choices=STATUS_CHOICES, default="draft")
     start_date = models.DateTimeField(_("Date de début"), default=timezone.now)
     end_date = models.DateTimeField(_("Date de fin"), blank=True, null=True)
+    goal_reached_at = models.DateTimeField(_("Objectif atteint le"), blank=True, null=True, editable=False)
+    closed_at = models.DateTimeField(_("Clôturée le"), blank=True, null=True, editable=False)
     image = models.ImageField(_("Image"), upload_to="campaigns/images/", blank=True, null=True)
     created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
+    search_vector = SearchVectorField(_("Index de recherche"), null=True, editable=False)
 
     class Meta:
         verbose_name = _("Campagne")
         verbose_name_plural = _("Campagnes")
         ordering = ["-start_date"]
+        indexes = [
+            # Campagnes actives arrivées à échéance (ngo/lifecycle.py) et listes publiques
+            models.Index(fields=["status", "end_date"], name="ngo_campaign_status_end_idx"),
+        ]
 
     def __str__(self):
         return f"{_('Campagne')} '{self.title}' {_('pour')} {self.project.title}"
@@ -590,21 +647,49 @@ class Contribution(models.Model):
     contributor_email = models.EmailField(_("Email du contributeur"), blank=True, null=True)
 
     amount = models.DecimalField(_("Montant"), max_digits=12, decimal_places=2)
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="contributions",
+        null=True,
+        blank=True,
+    )
     contribution_type = models.CharField(_("Type de contribution"), max_length=10, choices=TYPE_CHOICES)
     payment_method = models.CharField(_("Méthode de paiement"), max_length=50, choices=PAYMENT_METHODS, default="paypal")
     transaction_id = models.CharField(_("ID de transaction"), max_length=100, blank=True, null=True)
     payment_status = models.CharField(_("Statut du paiement"), max_length=20, choices=PAYMENT_STATUS, default="pending")
+    reward = models.ForeignKey(
+        "Reward",
+        verbose_name=_("Récompense"),
+        on_delete=models.SET_NULL,
+        related_name="contributions",
+        null=True,
+        blank=True,
+    )
+    reward_evaluated_at = models.DateTimeField(_("Récompense évaluée le"), blank=True, null=True, editable=False)
     created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
 
     class Meta:
         verbose_name = _("Contribution")
         verbose_name_plural = _("Contributions")
         ordering = ["-created_at"]
+        indexes = [
+            # Rapprochement des événements de paiement (ngo/payments.py)
+            models.Index(fields=["payment_method", "transaction_id"], name="ngo_contrib_method_tx_idx"),
+            # Contributions payées dont la récompense reste à attribuer (ngo/rewards.py)
+            models.Index(
+                fields=["id"],
+                name="ngo_contrib_reward_todo_idx",
+                condition=models.Q(payment_status="completed", reward_evaluated_at__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         name = self.contributor_name or (self.investor.full_name if self.investor else _("Anonyme"))
         campaign_name = self.campaign.title if self.campaign else (self.loan_campaign.title if self.loan_campaign else _("Aucune campagne"))
-        return f"{name} - {self.amount} XAF {_('pour')} {campaign_name}"
+        from .reference import currency_code
+        return f"{name} - {self.amount} {currency_code(self.currency_id)} {_('pour')} {campaign_name}"
 
     def clean(self):
         # Une contribution ne peut pas être liée à la fois à une campagne de don et à une campagne de prêt
@@ -618,6 +703,10 @@ class Contribution(models.Model):
             raise ValidationError(_("Les contributions à une campagne de prêt doivent avoir le type 'loan'."))
 
     def save(self, *args, **kwargs):
+        # Devise de la campagne (pays du projet), figée au moment de la contribution
+        if self.currency_id is None and self.project and self.project.country_id:
+            from .reference import country_currency_id
+            self.currency_id = country_currency_id(self.project.country_id)
         super().save(*args, **kwargs)
         # Met à jour les montants collectés automatiquement si paiement complété
         if self.payment_status == "completed":
@@ -656,6 +745,58 @@ class Contribution(models.Model):
     def investor_name(self):
         return self.investor.full_name if self.investor and self.investor.full_name else _("Anonyme")
 
+# --------------------------
+# PaymentEvent (boîte de réception des webhooks de paiement)
+# --------------------------
+class PaymentEvent(models.Model):
+    """
+    Événement reçu d'un prestataire de paiement, stocké tel quel avant traitement.
+    La contrainte (provider, transaction_id) rend la réception idempotente :
+    un webhook rejoué par le prestataire n'est enregistré qu'une fois.
+    """
+    EVENT_TYPES = (
+        ("payment.completed", _("Paiement complété")),
+        ("payment.failed", _("Paiement échoué")),
+    )
+
+    STATUS_CHOICES = (
+        ("pending", _("En attente")),
+        ("processed", _("Traité")),
+        ("ignored", _("Ignoré")),
+    )
+
+    provider = models.CharField(_("Prestataire"), max_length=50, choices=Contribution.PAYMENT_METHODS)
+    transaction_id = models.CharField(_("ID de transaction"), max_length=100)
+    event_type = models.CharField(_("Type d'événement"), max_length=30, choices=EVENT_TYPES)
+    payload = models.JSONField(_("Contenu"), default=dict)
+    status = models.CharField(_("Statut"), max_length=20, choices=STATUS_CHOICES, default="pending")
+    error = models.CharField(_("Erreur"), max_length=255, blank=True)
+    contribution = models.ForeignKey(
+        "Contribution",
+        verbose_name=_("Contribution"),
+        on_delete=models.SET_NULL,
+        related_name="payment_events",
+        null=True,
+        blank=True,
+    )
+    received_at = models.DateTimeField(_("Reçu le"), auto_now_add=True)
+    processed_at = models.DateTimeField(_("Traité le"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("Événement de paiement")
+        verbose_name_plural = _("Événements de paiement")
+        ordering = ["-received_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "transaction_id"], name="unique_payment_event"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "received_at"], name="ngo_payevent_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}:{self.transaction_id} ({self.event_type}, {self.status})"
+
+
 # --------------------------
 # LoanCampaign
 # --------------------------
@@ -690,6 +831,8 @@ class LoanCampaign(models.Model):
     status = models.CharField(_("Statut"), max_length=20, choices=STATUS_CHOICES, default="draft")
     start_date = models.DateTimeField(_("Date de début"), default=timezone.now)
     end_date = models.DateTimeField(_("Date de fin"), blank=True, null=True)
+    goal_reached_at = models.DateTimeField(_("Objectif atteint le"), blank=True, null=True, editable=False)
+    closed_at = models.DateTimeField(_("Clôturée le"), blank=True, null=True, editable=False)
     image = models.ImageField(_("Image"), upload_to="loan_campaigns/images/", blank=True, null=True)
     created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
 
@@ -697,6 +840,9 @@ class LoanCampaign(models.Model):
         verbose_name = _("Campagne de prêt")
         verbose_name_plural = _("Campagnes de prêt")
         ordering = ["-start_date"]
+        indexes = [
+            models.Index(fields=["status", "end_date"], name="ngo_loan_status_end_idx"),
+        ]
 
     def __str__(self):
         return f"{_('Prêt')} '{self.title}' ({self.project.title})"
@@ -708,7 +854,9 @@ class LoanCampaign(models.Model):
 
     @property
     def total_interest(self):
-        return (self.goal_amount * self.interest_rate / 100)
+        """Intérêts totaux du tableau d'amortissement pour le montant cible."""
+        from .repayments import total_interest
+        return total_interest(self.goal_amount, self.interest_rate, self.repayment_duration)
 
     @property
     def remaining_days(self):
@@ -720,6 +868,97 @@ class LoanCampaign(models.Model):
     def is_active(self):
         return self.status == "active" and (not self.end_date or self.end_date > timezone.now())
 
+
+# --------------------------
+# CampaignLifecycleRun (journal du planificateur)
+# --------------------------
+class CampaignLifecycleRun(models.Model):
+    """Passage de la tâche de clôture des campagnes (voir ngo/lifecycle.py)."""
+    started_at = models.DateTimeField(_("Démarré le"))
+    finished_at = models.DateTimeField(_("Terminé le"), blank=True, null=True)
+    goals_reached = models.PositiveIntegerField(_("Objectifs atteints"), default=0)
+    campaigns_completed = models.PositiveIntegerField(_("Campagnes terminées"), default=0)
+    campaigns_failed = models.PositiveIntegerField(_("Campagnes échouées"), default=0)
+    loans_completed = models.PositiveIntegerField(_("Prêts terminés"), default=0)
+    loans_failed = models.PositiveIntegerField(_("Prêts échoués"), default=0)
+    notifications_sent = models.PositiveIntegerField(_("Notifications envoyées"), default=0)
+    error = models.TextField(_("Erreur"), blank=True)
+
+    class Meta:
+        verbose_name = _("Passage du planificateur de campagnes")
+        verbose_name_plural = _("Passages du planificateur de campagnes")
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.started_at:%Y-%m-%d %H:%M} ({self.campaigns_completed + self.loans_completed} / {self.campaigns_failed + self.loans_failed})"
+
+    @property
+    def duration(self):
+        if self.finished_at:
+            return self.finished_at - self.started_at
+        return None
+
+
+# --------------------------
+# RepaymentInstallment (échéancier des prêts)
+# --------------------------
+class RepaymentInstallment(models.Model):
+    """Échéance mensuelle due à un prêteur (générée à la clôture de la campagne, voir ngo/repayments.py)."""
+    STATUS_CHOICES = (
+        ("due", _("À payer")),
+        ("late", _("En retard")),
+        ("paid", _("Payée")),
+    )
+
+    loan_campaign = models.ForeignKey(
+        "LoanCampaign",
+        verbose_name=_("Campagne de prêt"),
+        on_delete=models.CASCADE,
+        related_name="installments",
+    )
+    contribution = models.ForeignKey(
+        "Contribution",
+        verbose_name=_("Contribution"),
+        on_delete=models.CASCADE,
+        related_name="installments",
+    )
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="installments",
+        null=True,
+        blank=True,
+    )
+    number = models.PositiveSmallIntegerField(_("Numéro d'échéance"))
+    due_date = models.DateField(_("Date d'échéance"))
+    principal = models.DecimalField(_("Capital"), max_digits=12, decimal_places=2)
+    interest = models.DecimalField(_("Intérêts"), max_digits=12, decimal_places=2)
+    amount = models.DecimalField(_("Montant de l'échéance"), max_digits=12, decimal_places=2)
+    status = models.CharField(_("Statut"), max_length=10, choices=STATUS_CHOICES, default="due")
+    paid_at = models.DateTimeField(_("Payée le"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("Échéance de remboursement")
+        verbose_name_plural = _("Échéances de remboursement")
+        ordering = ["due_date", "contribution", "number"]
+        constraints = [
+            models.UniqueConstraint(fields=["contribution", "number"], name="unique_installment_per_contribution"),
+        ]
+        indexes = [
+            # « Qu'est-ce qui est dû ce mois-ci ? » : filtre statut + plage de dates
+            models.Index(fields=["status", "due_date"], name="ngo_install_status_due_idx"),
+        ]
+
+    def __str__(self):
+        from .reference import currency_code
+        return f"#{self.number} {self.due_date} - {self.amount} {currency_code(self.currency_id)}"
+
+    @property
+    def is_paid(self):
+        return self.status == "paid"
+
+
 # --------------------------
 # Partner
 # --------------------------
@@ -742,6 +981,7 @@ class Partner(models.Model):
     description = models.TextField(_("Description"), blank=True)
     active = models.BooleanField(_("Actif"), default=True)
     created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
+    search_vector = SearchVectorField(_("Index de recherche"), null=True, editable=False)
 
     class Meta:
         verbose_name = _("Partenaire")
@@ -840,7 +1080,9 @@ class Reward(models.Model):
         ordering = ["minimum_amount"]
 
     def __str__(self):
-        return f"{self.title} ({self.minimum_amount} XAF {_('min')})"
+        from .reference import country_currency_id, currency_code
+        currency = currency_code(country_currency_id(self.campaign.project.country_id))
+        return f"{self.title} ({self.minimum_amount} {currency} {_('min')})"
 
     def is_eligible(self, amount):
         """Vérifie si un montant donné donne droit à cette récompense"""
@@ -902,6 +1144,7 @@ class IntermediairePayment(models.Model):
     STATUS_CHOICES = (
         ("pending", _("En attente")),
         ("validated", _("Validé")),
+        ("rejected", _("Rejeté")),
     )
 
     intermediaire = models.ForeignKey(
@@ -923,12 +1166,30 @@ class IntermediairePayment(models.Model):
         blank=True,
         null=True
     )
+    proof_thumbnail = models.ImageField(
+        _("Miniature de la preuve"),
+        upload_to="intermediaire/payments/thumbnails/",
+        blank=True,
+        null=True,
+        editable=False
+    )
+    proof_hash = models.CharField(_("Empreinte de la preuve"), max_length=16, blank=True, db_index=True, editable=False)
+    proof_duplicates = models.JSONField(_("Doublons de la preuve"), default=list, blank=True, editable=False)
     status = models.CharField(
         _("Statut"),
         max_length=20,
         choices=STATUS_CHOICES,
         default="pending"
     )
+    reviewed_at = models.DateTimeField(_("Vérifié le"), blank=True, null=True)
+    reviewed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("Vérifié par"),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
     created_at = models.DateTimeField(_("Créé le"), auto_now_add=True)
 
     class Meta:
@@ -937,7 +1198,36 @@ class IntermediairePayment(models.Model):
         ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.intermediaire.display_name()} - {self.amount} {self.currency.code} ({_(self.status)})"
+        from .reference import currency_code
+        return f"{self.intermediaire.display_name()} - {self.amount} {currency_code(self.currency_id)} ({_(self.status)})"
+
+
+# --------------------------
+# ProofHashBand (index des empreintes de preuves)
+# --------------------------
+class ProofHashBand(models.Model):
+    """
+    Tranche de l'empreinte d'une preuve (voir ngo/proofs.py) : deux empreintes
+    à distance ``DUPLICATE_DISTANCE`` ou moins ont au moins une tranche commune,
+    ce qui borne la comparaison aux preuves partageant une tranche.
+    """
+    label = models.CharField(_("Type de preuve"), max_length=30)
+    object_id = models.PositiveBigIntegerField(_("Id de la preuve"))
+    band = models.PositiveSmallIntegerField(_("Tranche"))
+    value = models.CharField(_("Valeur"), max_length=4)
+
+    class Meta:
+        verbose_name = _("Tranche d'empreinte")
+        verbose_name_plural = _("Tranches d'empreintes")
+        indexes = [
+            models.Index(fields=["band", "value"], name="ngo_proof_band_value_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["label", "object_id", "band"], name="unique_proof_hash_band"),
+        ]
+
+    def __str__(self):
+        return f"{self.label} #{self.object_id} [{self.band}] {self.value}"
 
 # --------------------------
 # Message
@@ -1025,7 +1315,7 @@ class Message(models.Model):
             return self.sender_avatar.url
         if hasattr(self.sender, "profile") and getattr(self.sender.profile, "avatar", None):
             return self.sender.profile.avatar.url
-        return "/static/assets/img/team/default.png"
+        return "/static/assets/img/team/default.jpg"
 
 
 # --------------------------------------
@@ -1210,6 +1500,14 @@ class WithdrawalRequest(models.Model):
         verbose_name=_("Projet concerné")
     )
     amount = models.DecimalField(_("Montant demandé"), max_digits=12, decimal_places=2)
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="withdrawal_requests",
+        null=True,
+        blank=True,
+    )
     reason = models.TextField(_("Motif du retrait"), blank=True, null=True)
     status = models.CharField(_("Statut"), max_length=20, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(_("Date de demande"), auto_now_add=True)
@@ -1221,7 +1519,290 @@ class WithdrawalRequest(models.Model):
         ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.entrepreneur} - {self.project.title} ({self.amount} FCFA)"
+        from .reference import currency_code
+        return f"{self.entrepreneur} - {self.project.title} ({self.amount} {currency_code(self.currency_id)})"
+
+    def save(self, *args, **kwargs):
+        if self.currency_id is None and self.project.country_id:
+            from .reference import country_currency_id
+            self.currency_id = country_currency_id(self.project.country_id)
+        super().save(*args, **kwargs)
 
     def is_editable(self):
-        return self.status == "pending"
\ No newline at end of file
+        return self.status == "pending"
+
+
+# --------------------------
+# Grand livre des fonds des projets (voir ngo/ledger.py)
+# --------------------------
+class LedgerEntry(models.Model):
+    """
+    Ligne d'écriture en partie double : les lignes d'une même écriture
+    (``entry``) se compensent (somme nulle). Montant positif = crédit du compte.
+    """
+    ACCOUNT_CHOICES = (
+        ("external", _("Prestataires de paiement")),
+        ("project", _("Solde disponible du projet")),
+        ("reserved", _("Retraits en cours")),
+        ("payout", _("Retraits versés")),
+        ("commission", _("Commissions de la plateforme")),
+    )
+    KIND_CHOICES = (
+        ("contribution", _("Contribution encaissée")),
+        ("contribution_refund", _("Contribution annulée")),
+        ("withdrawal_hold", _("Retrait demandé")),
+        ("withdrawal_release", _("Retrait rejeté")),
+        ("withdrawal_paid", _("Retrait versé")),
+    )
+
+    entry = models.UUIDField(_("Écriture"), db_index=True)
+    project = models.ForeignKey(
+        "Project",
+        verbose_name=_("Projet"),
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+    )
+    account = models.CharField(_("Compte"), max_length=20, choices=ACCOUNT_CHOICES)
+    kind = models.CharField(_("Opération"), max_length=20, choices=KIND_CHOICES)
+    amount = models.DecimalField(_("Montant"), max_digits=14, decimal_places=2)
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="ledger_entries",
+        null=True,
+        blank=True,
+    )
+    contribution = models.ForeignKey(
+        "Contribution",
+        verbose_name=_("Contribution"),
+        on_delete=models.PROTECT,
+        related_name="ledger_entries",
+        null=True,
+        blank=True,
+    )
+    withdrawal = models.ForeignKey(
+        "WithdrawalRequest",
+        verbose_name=_("Demande de retrait"),
+        on_delete=models.PROTECT,
+        related_name="ledger_entries",
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(_("Date"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Écriture comptable")
+        verbose_name_plural = _("Grand livre")
+        ordering = ["-created_at", "entry", "account"]
+        constraints = [
+            # Une étape de retrait n'est comptabilisée qu'une fois. Une contribution
+            # peut l'être de nouveau après contre-passation : unicité assurée par
+            # le verrou du solde du projet (ngo/ledger.py)
+            models.UniqueConstraint(
+                fields=["withdrawal", "kind", "account"],
+                condition=models.Q(withdrawal__isnull=False),
+                name="unique_ledger_withdrawal_step",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["project", "account"], name="ngo_ledger_project_acct_idx"),
+        ]
+
+    def __str__(self):
+        from .reference import currency_code
+        return f"{self.get_account_display()} {self.amount:+} {currency_code(self.currency_id)} ({self.get_kind_display()})"
+
+
+class ProjectBalance(models.Model):
+    """Soldes matérialisés d'un projet, tenus à jour avec chaque écriture (sous verrou de ligne)."""
+    project = models.OneToOneField(
+        "Project",
+        verbose_name=_("Projet"),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="balance",
+    )
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="project_balances",
+        null=True,
+        blank=True,
+    )
+    collected = models.DecimalField(_("Total encaissé"), max_digits=14, decimal_places=2, default=0)
+    commission = models.DecimalField(_("Commissions"), max_digits=14, decimal_places=2, default=0)
+    reserved = models.DecimalField(_("Retraits en cours"), max_digits=14, decimal_places=2, default=0)
+    withdrawn = models.DecimalField(_("Retraits versés"), max_digits=14, decimal_places=2, default=0)
+    available = models.DecimalField(_("Solde disponible"), max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(_("Mis à jour le"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Solde de projet")
+        verbose_name_plural = _("Soldes des projets")
+        ordering = ["-updated_at"]
+
+    def __str__(self):
+        from .reference import currency_code
+        return f"{self.project} - {self.available} {currency_code(self.currency_id)}"
+
+
+# --------------------------
+# Commissions et revenus de la plateforme (voir ngo/revenue.py)
+# --------------------------
+class Commission(models.Model):
+    """Commission prélevée sur une contribution payée, au taux appliqué à son écriture au grand livre."""
+    contribution = models.OneToOneField(
+        "Contribution",
+        verbose_name=_("Contribution"),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="commission",
+    )
+    country = models.ForeignKey(
+        "Country",
+        verbose_name=_("Pays"),
+        on_delete=models.SET_NULL,
+        related_name="commissions",
+        null=True,
+        blank=True,
+    )
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="commissions",
+        null=True,
+        blank=True,
+    )
+    rate = models.DecimalField(_("Taux appliqué (%)"), max_digits=5, decimal_places=2)
+    gross = models.DecimalField(_("Montant de la contribution"), max_digits=12, decimal_places=2)
+    amount = models.DecimalField(_("Commission"), max_digits=12, decimal_places=2)
+    date = models.DateField(_("Date de la contribution"), db_index=True)
+    computed_at = models.DateTimeField(_("Calculée le"), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Commission")
+        verbose_name_plural = _("Commissions")
+        ordering = ["-date"]
+
+    def __str__(self):
+        from .reference import currency_code
+        return f"{self.amount} {currency_code(self.currency_id)} ({self.rate} %)"
+
+
+class RevenueRollup(models.Model):
+    """Revenus agrégés par jour ou par mois, pays, devise et source."""
+    PERIOD_CHOICES = (
+        ("day", _("Jour")),
+        ("month", _("Mois")),
+    )
+    SOURCE_CHOICES = (
+        ("commission", _("Commissions sur contributions")),
+        ("submission_fee", _("Frais de soumission de projet")),
+        ("intermediaire_fee", _("Abonnements intermédiaires")),
+    )
+
+    period = models.CharField(_("Période"), max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField(_("Début de période"))
+    source = models.CharField(_("Source"), max_length=20, choices=SOURCE_CHOICES)
+    country = models.ForeignKey(
+        "Country",
+        verbose_name=_("Pays"),
+        on_delete=models.CASCADE,
+        related_name="revenue_rollups",
+        null=True,
+        blank=True,
+    )
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="revenue_rollups",
+        null=True,
+        blank=True,
+    )
+    count = models.PositiveIntegerField(_("Nombre d'opérations"), default=0)
+    gross = models.DecimalField(_("Volume"), max_digits=16, decimal_places=2, default=0)
+    amount = models.DecimalField(_("Revenu"), max_digits=16, decimal_places=2, default=0)
+    computed_at = models.DateTimeField(_("Calculé le"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Revenu agrégé")
+        verbose_name_plural = _("Revenus agrégés")
+        ordering = ["-period_start", "source"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "period_start", "source", "country", "currency"],
+                name="unique_revenue_rollup",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["period", "period_start"], name="ngo_revenue_period_idx"),
+        ]
+
+    def __str__(self):
+        from .reference import currency_code
+        return f"{self.get_period_display()} {self.period_start} - {self.get_source_display()} : {self.amount} {currency_code(self.currency_id)}"
+
+
+# --------------------------
+# Statistiques journalières (voir ngo/analytics.py)
+# --------------------------
+class DailyMetric(models.Model):
+    """
+    Agrégat journalier d'un indicateur par pays et devise. Les lignes sans
+    catégorie portent le total ; celles avec catégorie le détail (un projet
+    pouvant avoir plusieurs catégories, elles ne s'additionnent pas).
+    """
+    METRIC_CHOICES = (
+        ("contributions", _("Contributions payées")),
+        ("projects", _("Nouveaux projets")),
+        ("registrations_entrepreneur", _("Inscriptions entrepreneurs")),
+        ("registrations_investisseur", _("Inscriptions investisseurs")),
+        ("registrations_intermediaire", _("Inscriptions intermédiaires")),
+        ("payments", _("Paiements de frais")),
+        ("withdrawals", _("Demandes de retrait")),
+    )
+
+    date = models.DateField(_("Date"))
+    metric = models.CharField(_("Indicateur"), max_length=30, choices=METRIC_CHOICES)
+    country = models.ForeignKey(
+        "Country",
+        verbose_name=_("Pays"),
+        on_delete=models.CASCADE,
+        related_name="daily_metrics",
+        null=True,
+        blank=True,
+    )
+    category = models.ForeignKey(
+        "Category",
+        verbose_name=_("Catégorie"),
+        on_delete=models.CASCADE,
+        related_name="daily_metrics",
+        null=True,
+        blank=True,
+    )
+    currency = models.ForeignKey(
+        "Currency",
+        verbose_name=_("Devise"),
+        on_delete=models.PROTECT,
+        related_name="daily_metrics",
+        null=True,
+        blank=True,
+    )
+    count = models.PositiveIntegerField(_("Nombre"), default=0)
+    amount = models.DecimalField(_("Montant"), max_digits=16, decimal_places=2, default=0)
+    computed_at = models.DateTimeField(_("Calculé le"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Statistique journalière")
+        verbose_name_plural = _("Statistiques journalières")
+        ordering = ["-date", "metric"]
+        indexes = [
+            models.Index(fields=["metric", "date"], name="ngo_metric_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.get_metric_display()} : {self.count}"
@@ -0,0 +1,314 @@
+"""
+Ingestion des paiements (webhooks des prestataires).
+
+1. Réception : ``record_event`` vérifie la signature HMAC et enregistre
+   l'événement dans la boîte de réception ``PaymentEvent``. La contrainte
+   (provider, transaction_id) rend la réception idempotente : un webhook
+   rejoué renvoie simplement « duplicate ». Aucune contribution n'est
+   modifiée dans la requête HTTP.
+2. Traitement : la tâche Celery ``process_payment_events`` applique les
+   événements en attente par lots. Chaque lot est traité dans une seule
+   transaction : les contributions sont mises à jour / créées en masse et
+   les montants collectés des campagnes touchées sont recalculés par une
+   requête par table, quel que soit le nombre de paiements du lot, et les
+   paiements complétés sont comptabilisés au grand livre (ngo/ledger.py).
+
+Format attendu (JSON, déjà normalisé par le prestataire ou sa passerelle) :
+
+    {
+        "type": "payment.completed" | "payment.failed",
+        "transaction_id": "...",
+        "amount": "10000.00",
+        "contribution_id": 12,                       (optionnel)
+        "campaign_id": 3 | "loan_campaign_id": 4,    (si pas de contribution_id)
+        "investor_email": "...", "contributor_name": "..."   (optionnels)
+    }
+
+Signature : en-tête ``X-Signature`` = HMAC-SHA256 hexadécimal du corps brut,
+avec le secret ``PAYMENT_WEBHOOK_SECRET`` (ou ``PAYMENT_WEBHOOK_SECRETS[provider]``).
+"""
+import hashlib
+import hmac
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import events, ledger, reports
+from .models import Campaign, Contribution, LoanCampaign, PaymentEvent, User
+from .reference import country_currency_id
+
+PROVIDERS = {code for code, _label in Contribution.PAYMENT_METHODS}
+EVENT_TYPES = {code for code, _label in PaymentEvent.EVENT_TYPES}
+ID_KEYS = ("contribution_id", "campaign_id", "loan_campaign_id")
+
+BATCH_SIZE = getattr(settings, "PAYMENT_EVENTS_BATCH_SIZE", 500)
+MAX_BATCHES = 20
+SCHEDULE_KEY = "payment-events:scheduled"
+SCHEDULE_DELAY = 1  # secondes : les webhooks d'une rafale partagent le même passage
+FALLBACK_INTERVAL = 30  # secondes : période de la tâche ``process-payment-events`` (CELERY_BEAT_SCHEDULE)
+
+
+class InvalidEvent(ValueError):
+    """Événement refusé (signature, prestataire ou contenu invalide)."""
+
+
+# --------------------------
+# Signature
+# --------------------------
+def webhook_secret(provider):
+    secrets = getattr(settings, "PAYMENT_WEBHOOK_SECRETS", {}) or {}
+    return secrets.get(provider) or getattr(settings, "PAYMENT_WEBHOOK_SECRET", "")
+
+
+def sign(body, secret):
+    """Signature HMAC-SHA256 (hexadécimale) d'un corps de requête."""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(provider, body, signature):
+    secret = webhook_secret(provider)
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign(body, secret), signature)
+
+
+# --------------------------
+# Réception
+# --------------------------
+def _as_id(value):
+    """Identifiant entier d'un payload (souvent envoyé en chaîne par les passerelles), None si invalide."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _clean(provider, data):
+    if provider not in PROVIDERS:
+        raise InvalidEvent(f"Prestataire inconnu : {provider}")
+    if not isinstance(data, dict):
+        raise InvalidEvent("Contenu JSON attendu")
+    event_type = data.get("type")
+    if event_type not in EVENT_TYPES:
+        raise InvalidEvent(f"Type d'événement inconnu : {event_type}")
+    transaction_id = str(data.get("transaction_id") or "").strip()
+    if not transaction_id or len(transaction_id) > 100:
+        raise InvalidEvent("transaction_id manquant ou invalide")
+    if event_type == "payment.completed":
+        try:
+            if Decimal(str(data.get("amount"))) <= 0:
+                raise InvalidEvent("Montant invalide")
+        except (InvalidOperation, TypeError):
+            raise InvalidEvent("Montant invalide")
+    if not any(data.get(key) for key in ID_KEYS):
+        raise InvalidEvent("contribution_id, campaign_id ou loan_campaign_id requis")
+    for key in ID_KEYS:
+        if data.get(key) and _as_id(data[key]) is None:
+            raise InvalidEvent(f"{key} invalide")
+    return event_type, transaction_id
+
+
+def record_event(provider, data):
+    """
+    Enregistre un événement dans la boîte de réception.
+    Renvoie (événement, créé) ; ``créé`` est faux pour un webhook rejoué.
+    """
+    event_type, transaction_id = _clean(provider, data)
+    event, created = PaymentEvent.objects.get_or_create(
+        provider=provider,
+        transaction_id=transaction_id,
+        defaults={"event_type": event_type, "payload": data},
+    )
+    if created:
+        transaction.on_commit(schedule_processing)
+    return event, created
+
+
+def schedule_processing():
+    """Programme un passage du consommateur, au plus un par ``SCHEDULE_DELAY`` secondes."""
+    if not cache.add(SCHEDULE_KEY, 1, timeout=SCHEDULE_DELAY):
+        return
+    from .tasks import process_payment_events
+    try:
+        process_payment_events.apply_async(countdown=SCHEDULE_DELAY, retry=False)
+    except Exception:
+        # Broker indisponible : on laisse la tâche périodique prendre le relais
+        # plutôt que de ralentir chaque webhook par une nouvelle tentative.
+        cache.set(SCHEDULE_KEY, 1, timeout=FALLBACK_INTERVAL)
+
+
+# --------------------------
+# Traitement par lots
+# --------------------------
+def _campaign_currencies(model, ids):
+    """{id campagne: id devise du pays du projet} en une requête."""
+    rows = model.objects.filter(pk__in=ids).values_list("pk", "project__country_id")
+    return {pk: country_currency_id(country_id) for pk, country_id in rows}
+
+
+def _collected_total(model_field):
+    completed = (
+        Contribution.objects.filter(**{model_field: OuterRef("pk")}, payment_status="completed")
+        .order_by()
+        .values(model_field)
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    amount = DecimalField(max_digits=12, decimal_places=2)
+    return Coalesce(Subquery(completed, output_field=amount), Value(Decimal(0)), output_field=amount)
+
+
+def refresh_collected_amounts(campaign_ids=(), loan_campaign_ids=()):
+    """Recalcule les montants collectés des campagnes données (une requête par table)."""
+    if campaign_ids:
+        Campaign.objects.filter(pk__in=campaign_ids).update(collected_amount=_collected_total("campaign"))
+    if loan_campaign_ids:
+        LoanCampaign.objects.filter(pk__in=loan_campaign_ids).update(collected_amount=_collected_total("loan_campaign"))
+
+
+def _payload_values(payment_events, key):
+    return [event.payload[key] for event in payment_events if event.payload.get(key)]
+
+
+def _payload_ids(payment_events, key):
+    return [_as_id(value) for value in _payload_values(payment_events, key) if _as_id(value) is not None]
+
+
+def apply_events(payment_events):
+    """
+    Applique une liste d'événements de paiement (verrouillés par l'appelant).
+    Contributions existantes : retrouvées par id ou par (méthode, transaction_id).
+    Une contribution déjà complétée n'est plus modifiée, et une confirmation
+    dont le montant diffère de celui de la contribution est ignorée (signalée
+    dans ``error``). Paiements sans contribution : contribution créée à partir
+    de la campagne.
+    """
+    now = timezone.now()
+    by_id = {
+        contribution.pk: contribution
+        for contribution in Contribution.objects.filter(pk__in=_payload_ids(payment_events, "contribution_id"))
+    }
+    by_transaction = {
+        (contribution.payment_method, contribution.transaction_id): contribution
+        for contribution in Contribution.objects.filter(
+            payment_method__in={event.provider for event in payment_events},
+            transaction_id__in=[event.transaction_id for event in payment_events],
+        )
+    }
+    campaign_currency = _campaign_currencies(Campaign, _payload_ids(payment_events, "campaign_id"))
+    loan_currency = _campaign_currencies(LoanCampaign, _payload_ids(payment_events, "loan_campaign_id"))
+    investors = dict(
+        User.objects.filter(
+            email__in=_payload_values(payment_events, "investor_email"),
+            role="investisseur",
+        ).values_list("email", "pk")
+    )
+
+    updated, created, touched_campaigns, touched_loans = {}, [], set(), set()
+    for event in payment_events:
+        payload = event.payload
+        status = "completed" if event.event_type == "payment.completed" else "failed"
+        contribution = (
+            by_id.get(_as_id(payload.get("contribution_id")))
+            or by_transaction.get((event.provider, event.transaction_id))
+        )
+
+        if contribution is not None:
+            if contribution.payment_status == "completed":
+                # Échec tardif ou seconde confirmation (autre transaction) : rien à appliquer
+                event.status, event.error = "ignored", "Contribution déjà complétée"
+            elif status == "completed" and Decimal(str(payload["amount"])) != contribution.amount:
+                event.status, event.error = "ignored", (
+                    f"Montant {payload['amount']} différent de celui de la contribution ({contribution.amount})"
+                )[:255]
+            else:
+                contribution.payment_status = status
+                contribution.payment_method = event.provider
+                contribution.transaction_id = event.transaction_id
+                updated[contribution.pk] = contribution
+                event.status = "processed"
+        elif status == "failed":
+            event.status, event.error = "ignored", "Aucune contribution correspondante"
+        else:
+            campaign_id, loan_id = _as_id(payload.get("campaign_id")), _as_id(payload.get("loan_campaign_id"))
+            currencies, key = (campaign_currency, campaign_id) if campaign_id else (loan_currency, loan_id)
+            if key not in currencies:
+                event.status, event.error = "ignored", "Campagne introuvable"
+            else:
+                contribution = Contribution(
+                    campaign_id=campaign_id or None,
+                    loan_campaign_id=None if campaign_id else loan_id,
+                    contribution_type="donation" if campaign_id else "loan",
+                    investor_id=investors.get(payload.get("investor_email")),
+                    contributor_name=(payload.get("contributor_name") or "")[:150] or None,
+                    contributor_email=payload.get("investor_email") or None,
+                    amount=Decimal(str(payload["amount"])),
+                    currency_id=currencies[key],
+                    payment_method=event.provider,
+                    transaction_id=event.transaction_id,
+                    payment_status="completed",
+                )
+                by_transaction[(event.provider, event.transaction_id)] = contribution
+                created.append((event, contribution))
+                event.status = "processed"
+
+        if contribution is not None and event.status == "processed":
+            event.contribution = contribution
+            if contribution.campaign_id:
+                touched_campaigns.add(contribution.campaign_id)
+            if contribution.loan_campaign_id:
+                touched_loans.add(contribution.loan_campaign_id)
+        event.processed_at = now
+
+    if updated:
+        Contribution.objects.bulk_update(
+            list(updated.values()), ["payment_status", "payment_method", "transaction_id"], batch_size=BATCH_SIZE
+        )
+    if created:
+        Contribution.objects.bulk_create([contribution for _event, contribution in created], batch_size=BATCH_SIZE)
+        for event, contribution in created:
+            event.contribution = contribution  # clé primaire connue après bulk_create
+    PaymentEvent.objects.bulk_update(
+        payment_events, ["status", "error", "contribution", "processed_at"], batch_size=BATCH_SIZE
+    )
+    refresh_collected_amounts(touched_campaigns, touched_loans)
+    reports.touch_campaigns(touched_campaigns, touched_loans)
+    transaction.on_commit(lambda: events.campaigns_changed(touched_campaigns, touched_loans))
+    # bulk_update / bulk_create ne déclenchent pas post_save : comptabilisation explicite
+    ledger.record_contributions(
+        event.contribution.pk for event in payment_events
+        if event.status == "processed" and event.event_type == "payment.completed"
+    )
+    return len(payment_events)
+
+
+def process_batch(batch_size=BATCH_SIZE):
+    """Traite un lot d'événements en attente dans une transaction. Renvoie sa taille."""
+    with transaction.atomic():
+        # skip_locked : plusieurs workers peuvent consommer en parallèle sans se bloquer
+        payment_events = list(
+            PaymentEvent.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("received_at", "pk")[:batch_size]
+        )
+        if not payment_events:
+            return 0
+        return apply_events(payment_events)
+
+
+def process_events(batch_size=BATCH_SIZE, max_batches=MAX_BATCHES):
+    """Vide la boîte de réception (au plus ``max_batches`` lots). Renvoie le nombre d'événements traités."""
+    total = 0
+    for _batch in range(max_batches):
+        count = process_batch(batch_size)
+        total += count
+        if count < batch_size:
+            break
+    return total
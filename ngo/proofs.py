@@ -0,0 +1,311 @@
+"""
+File de vérification des preuves de paiement.
+
+- Pré-traitement (tâche Celery) : chaque capture envoyée est réduite en une
+  miniature JPEG légère, affichée dans la file à la place de l'original, et
+  reçoit une empreinte perceptuelle (dHash 64 bits, 16 caractères hexa).
+- Doublons : deux captures dont les empreintes diffèrent de moins de
+  ``DUPLICATE_DISTANCE`` bits sont considérées comme la même image, même
+  recadrée ou recompressée. La comparaison est faite une fois, par la tâche
+  qui calcule l'empreinte, limitée aux preuves qui partagent une tranche
+  d'empreinte indexée (``ProofHashBand``), et enregistrée des deux côtés dans
+  ``proof_duplicates`` : la file lit ce champ, sans aucune comparaison.
+  Une preuve déjà envoyée par un autre utilisateur y est signalée.
+- Validation : approbation / rejet par lots, en requêtes ensemblistes
+  (paiements, projets, profils intermédiaires, notifications).
+"""
+from collections import defaultdict
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import IntermediairePayment, IntermediaireProfile, Notification, Payment, ProofHashBand, Project
+
+THUMBNAIL_SIZE = (800, 800)
+THUMBNAIL_QUALITY = 80
+HASH_SIZE = 8
+DUPLICATE_DISTANCE = 6
+
+# Modèles dont la preuve passe par la file, adressés par un libellé stable (tâches Celery)
+PROOF_MODELS = {
+    "payment": Payment,
+    "intermediaire_payment": IntermediairePayment,
+}
+PROOF_OWNER = {
+    "payment": "user_id",
+    "intermediaire_payment": "intermediaire_id",
+}
+
+
+def label_for(instance):
+    return next(label for label, model in PROOF_MODELS.items() if isinstance(instance, model))
+
+
+# --------------------------
+# Pré-traitement des images
+# --------------------------
+def dhash(image):
+    """Empreinte perceptuelle (difference hash) d'une image PIL, en hexadécimal."""
+    gray = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return f"{value:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def hamming(first, second):
+    return bin(int(first, 16) ^ int(second, 16)).count("1")
+
+
+def thumbnail(image, size=THUMBNAIL_SIZE, quality=THUMBNAIL_QUALITY):
+    """Miniature JPEG (orientation EXIF appliquée) sous forme de ContentFile."""
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail(size)
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def process_proof(label, pk):
+    """Calcule miniature et empreinte d'une preuve. Renvoie False si rien à traiter."""
+    model = PROOF_MODELS[label]
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.proof:
+        return False
+    try:
+        with instance.proof.open("rb") as source, Image.open(source) as image:
+            image.load()
+            proof_hash = dhash(image)
+            content = thumbnail(image)
+    except (OSError, UnidentifiedImageError):
+        return False
+
+    name = f"{label}-{pk}.jpg"
+    instance.proof_thumbnail.save(name, content, save=False)
+    # update() : pas de post_save, donc pas de nouveau traitement
+    model.objects.filter(pk=pk).update(proof_thumbnail=instance.proof_thumbnail.name, proof_hash=proof_hash)
+    # Après l'écriture de l'empreinte : deux preuves traitées en même temps se voient l'une l'autre
+    record_duplicates(label, pk)
+    return True
+
+
+def schedule(instance):
+    """Lance le pré-traitement en arrière-plan (en ligne si le broker est indisponible)."""
+    from .tasks import process_payment_proof
+    label = label_for(instance)
+    try:
+        process_payment_proof.apply_async(args=[label, instance.pk], retry=False)
+    except Exception:
+        process_proof(label, instance.pk)
+
+
+# --------------------------
+# Doublons
+# --------------------------
+def _band_bounds():
+    """
+    Découpe de l'empreinte (hexadécimale) en ``DUPLICATE_DISTANCE + 1`` tranches :
+    chaque bit différent ne touche qu'une tranche, donc deux empreintes
+    suffisamment proches ont au moins une tranche identique.
+    """
+    length, count = HASH_SIZE * HASH_SIZE // 4, DUPLICATE_DISTANCE + 1
+    bounds, start = [], 0
+    for band in range(count):
+        end = start + length // count + (band < length % count)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+BAND_BOUNDS = _band_bounds()
+
+
+def bands(proof_hash):
+    return [proof_hash[start:end] for start, end in BAND_BOUNDS]
+
+
+def _index(label, pk, proof_hash):
+    """Remplace les tranches indexées de la preuve (aucune si elle n'a pas d'empreinte)."""
+    ProofHashBand.objects.filter(label=label, object_id=pk).delete()
+    if proof_hash:
+        ProofHashBand.objects.bulk_create([
+            ProofHashBand(label=label, object_id=pk, band=band, value=value)
+            for band, value in enumerate(bands(proof_hash))
+        ])
+
+
+def _matches(label, pk, owner, proof_hash):
+    """
+    [[libellé, pk], …] des preuves quasi identiques envoyées par d'autres
+    utilisateurs : candidates partageant une tranche (index), puis distance exacte.
+    """
+    condition = Q()
+    for band, value in enumerate(bands(proof_hash)):
+        condition |= Q(band=band, value=value)
+    candidates = defaultdict(set)
+    for other_label, other_pk in ProofHashBand.objects.filter(condition).values_list("label", "object_id"):
+        candidates[other_label].add(other_pk)
+    candidates[label].discard(pk)
+
+    matches = []
+    for other_label, model in PROOF_MODELS.items():
+        if not candidates[other_label]:
+            continue
+        rows = (
+            model.objects.filter(pk__in=candidates[other_label]).exclude(proof_hash="")
+            .exclude(**{PROOF_OWNER[other_label]: owner})
+            .order_by("pk").values_list("pk", "proof_hash")
+        )
+        matches.extend(
+            [other_label, other_pk] for other_pk, other_hash in rows
+            if hamming(proof_hash, other_hash) <= DUPLICATE_DISTANCE
+        )
+    return matches
+
+
+def _locked_duplicates(refs):
+    """{(libellé, pk): doublons enregistrés} des preuves données, verrouillées dans un ordre fixe."""
+    locked = {}
+    for label in sorted({label for label, _pk in refs}):
+        ids = sorted(pk for ref_label, pk in refs if ref_label == label)
+        rows = (
+            PROOF_MODELS[label].objects.select_for_update().filter(pk__in=ids).order_by("pk")
+            .values_list("pk", "proof_duplicates")
+        )
+        locked.update(((label, pk), duplicates) for pk, duplicates in rows)
+    return locked
+
+
+@transaction.atomic
+def _link(label, pk, previous, matches):
+    """
+    Enregistre ``matches`` comme doublons de la preuve et, de l'autre côté,
+    la preuve comme doublon de chacun d'eux ; elle est retirée des preuves de
+    ``previous`` qui n'en sont plus.
+    """
+    ref = [label, pk]
+    others = {tuple(item) for item in previous + matches}
+    locked = _locked_duplicates(others | {(label, pk)})
+    for other, duplicates in locked.items():
+        if other == (label, pk):
+            continue
+        updated = [item for item in duplicates if item != ref]
+        if list(other) in matches:
+            updated.append(ref)
+        if updated != duplicates:
+            PROOF_MODELS[other[0]].objects.filter(pk=other[1]).update(proof_duplicates=updated)
+    if (label, pk) in locked:
+        PROOF_MODELS[label].objects.filter(pk=pk).update(proof_duplicates=matches)
+
+
+def record_duplicates(label, pk):
+    """Compare l'empreinte d'une preuve à celles qui partagent une tranche (tâche de fond) et enregistre les doublons."""
+    row = (
+        PROOF_MODELS[label].objects.filter(pk=pk)
+        .values_list(PROOF_OWNER[label], "proof_hash", "proof_duplicates").first()
+    )
+    if row is None:
+        return
+    owner, proof_hash, previous = row
+    # Tranches indexées avant la recherche : deux preuves traitées en même temps se trouvent l'une l'autre
+    _index(label, pk, proof_hash)
+    _link(label, pk, previous, _matches(label, pk, owner, proof_hash) if proof_hash else [])
+
+
+def forget_duplicates(instance):
+    """Preuve supprimée : retirée de l'index et des doublons enregistrés sur les autres preuves."""
+    label = label_for(instance)
+    _index(label, instance.pk, "")
+    if instance.proof_duplicates:
+        _link(label, instance.pk, instance.proof_duplicates, [])
+
+
+def attach_duplicates(objects):
+    """
+    Ajoute ``duplicates`` à chaque objet de la page : les preuves quasi identiques
+    envoyées par d'autres utilisateurs, telles qu'enregistrées par ``record_duplicates``.
+    """
+    objects = list(objects)
+    for obj in objects:
+        obj.duplicates = [tuple(item) for item in obj.proof_duplicates]
+    return objects
+
+
+# --------------------------
+# Validation par lots
+# --------------------------
+def _notify(user_ids, type, title, message, bg_color):
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=user_id,
+            type=type,
+            title=title,
+            message=message,
+            short_message=message[:50],
+            icon="credit-card",
+            bg_color=bg_color,
+        )
+        for user_id in user_ids
+    ])
+
+
+@transaction.atomic
+def review_payments(ids, approve, reviewer):
+    """
+    Valide ou rejette des paiements de soumission de projet non encore vérifiés.
+    Validés : les projets quittent « pending_payment » pour la validation du projet.
+    """
+    payments = Payment.objects.select_for_update().filter(pk__in=ids, reviewed_at__isnull=True)
+    rows = list(payments.values_list("pk", "user_id", "project_id"))
+    if not rows:
+        return 0
+    pks = [pk for pk, _user, _project in rows]
+    Payment.objects.filter(pk__in=pks).update(is_successful=approve, reviewed_at=timezone.now(), reviewed_by=reviewer)
+
+    users = {user_id for _pk, user_id, _project in rows}
+    if approve:
+        Project.objects.filter(pk__in=[project for *_rest, project in rows if project], status="pending_payment").update(status="pending")
+        _notify(users, "payment_validated", _("✅ Paiement validé"),
+                _("Votre paiement a été validé. Votre projet est maintenant en cours de validation."), "bg-success")
+    else:
+        _notify(users, "payment_failed", _("❌ Paiement rejeté"),
+                _("Votre preuve de paiement a été rejetée. Merci d'envoyer une nouvelle preuve."), "bg-danger")
+    return len(pks)
+
+
+@transaction.atomic
+def review_intermediaire_payments(ids, approve, reviewer):
+    """Valide ou rejette des abonnements intermédiaires en attente (profils mis à jour en masse)."""
+    payments = IntermediairePayment.objects.select_for_update().filter(pk__in=ids, status="pending")
+    rows = list(payments.values_list("pk", "intermediaire_id"))
+    if not rows:
+        return 0
+    now = timezone.now()
+    pks = [pk for pk, _user in rows]
+    users = {user_id for _pk, user_id in rows}
+    IntermediairePayment.objects.filter(pk__in=pks).update(
+        status="validated" if approve else "rejected", reviewed_at=now, reviewed_by=reviewer
+    )
+    if approve:
+        IntermediaireProfile.objects.filter(user_id__in=users).update(subscription_paid=True, subscription_date=now)
+        _notify(users, "payment_validated", _("✅ Abonnement validé"),
+                _("Votre abonnement intermédiaire a été validé."), "bg-success")
+    else:
+        _notify(users, "payment_failed", _("❌ Abonnement rejeté"),
+                _("Votre preuve de paiement a été rejetée. Merci d'envoyer une nouvelle preuve."), "bg-danger")
+    return len(pks)
+
+
+REVIEWERS = {
+    "payment": review_payments,
+    "intermediaire_payment": review_intermediaire_payments,
+}
@@ -0,0 +1,195 @@
+"""
+Cache en mémoire des données de référence : devises, régions, pays, catégories.
+
+Ces quatre tables sont minuscules et ne changent presque jamais. Elles sont
+chargées une fois par processus (4 requêtes), indexées par id / slug / code,
+puis servies sans aucune requête SQL.
+
+Invalidation :
+- un ``post_save`` / ``post_delete`` sur l'un de ces modèles incrémente un numéro
+  de version stocké dans le cache Django (partagé entre workers gunicorn quand
+  CACHES pointe vers Redis) et vide l'instantané du processus courant ;
+- chaque processus compare sa version à la version partagée au plus toutes les
+  ``REFERENCE_DATA_CHECK_INTERVAL`` secondes ;
+- sans cache partagé (LocMem), ``REFERENCE_DATA_MAX_AGE`` borne l'âge d'un instantané.
+
+Les instances renvoyées sont partagées : à utiliser en lecture seule.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Category, Country, Currency, Region
+
+VERSION_KEY = "reference-data:version"
+
+CHECK_INTERVAL = getattr(settings, "REFERENCE_DATA_CHECK_INTERVAL", 5)
+MAX_AGE = getattr(settings, "REFERENCE_DATA_MAX_AGE", 300)
+
+
+# --------------------------
+# Instantané
+# --------------------------
+class ReferenceData:
+    """Instantané des quatre tables, indexé pour des recherches O(1)."""
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        currencies = list(Currency.objects.all())
+        regions = list(Region.objects.all())
+        countries = list(Country.objects.all())
+        categories = list(Category.objects.all())
+
+        self.currencies = {currency.pk: currency for currency in currencies}
+        self.currencies_by_code = {currency.code: currency for currency in currencies}
+        self.regions = {region.pk: region for region in regions}
+        self.regions_by_slug = {region.slug: region for region in regions}
+        self.countries = {country.pk: country for country in countries}
+        self.countries_by_slug = {country.slug: country for country in countries}
+        self.countries_by_code = {country.code.upper(): country for country in countries}
+        self.categories = {category.pk: category for category in categories}
+        self.categories_by_slug = {category.slug: category for category in categories}
+
+        # Relations pré-attachées : country.currency / country.region sans requête
+        for country in countries:
+            country.currency = self.currencies[country.currency_id]
+            country.region = self.regions.get(country.region_id)
+
+        # Listes dans l'ordre Meta.ordering des modèles
+        self.tables = {
+            "currencies": currencies,
+            "regions": regions,
+            "countries": countries,
+            "categories": categories,
+        }
+
+    # ---- Recherches ----
+    def currency(self, pk):
+        return self.currencies.get(pk)
+
+    def currency_by_code(self, code):
+        return self.currencies_by_code.get(code)
+
+    def region(self, pk):
+        return self.regions.get(pk)
+
+    def country(self, pk):
+        return self.countries.get(pk)
+
+    def country_or_fetch(self, pk):
+        """
+        Pays ``pk`` ; absent de l'instantané (créé depuis son chargement, avant la
+        vérification de version) : lu en base et retenu jusqu'au prochain rechargement.
+        Lève ``Country.DoesNotExist`` si le pays n'existe pas.
+        """
+        country = self.countries.get(pk)
+        if country is None:
+            country = Country.objects.select_related("currency", "region").get(pk=pk)
+            self.countries[pk] = country
+        return country
+
+    def country_by_slug(self, slug, active_only=True):
+        country = self.countries_by_slug.get(slug)
+        if country is None or (active_only and not country.active):
+            return None
+        return country
+
+    def country_by_code(self, code):
+        return self.countries_by_code.get((code or "").upper())
+
+    def category(self, pk):
+        return self.categories.get(pk)
+
+    def category_by_slug(self, slug):
+        return self.categories_by_slug.get(slug)
+
+    def get(self, table, pk):
+        """Objet ``pk`` de la table ``table`` ('countries', 'categories', ...)."""
+        return {
+            "currencies": self.currencies,
+            "regions": self.regions,
+            "countries": self.countries,
+            "categories": self.categories,
+        }[table].get(pk)
+
+    def objects(self, table, active_only=False):
+        rows = self.tables[table]
+        if active_only:
+            return [row for row in rows if getattr(row, "active", True)]
+        return rows
+
+    # ---- Tarification ----
+    def submission_fee(self, country_id):
+        """(montant, devise) des frais de soumission de projet pour ce pays."""
+        country = self.country_or_fetch(country_id)
+        return country.project_submission_fee, country.currency
+
+    def intermediaire_fee(self, country_id):
+        """(montant, devise) de l'abonnement intermédiaire pour ce pays."""
+        country = self.country_or_fetch(country_id)
+        return country.intermediaire_fee, country.currency
+
+    def commission_rate(self, country_id):
+        """Taux de commission (en %) appliqué dans ce pays."""
+        return self.country_or_fetch(country_id).commission_rate
+
+
+# --------------------------
+# Accès et invalidation
+# --------------------------
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0.0
+
+
+def _shared_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def reference_data():
+    """Instantané courant, rechargé si la version partagée a changé."""
+    global _snapshot, _checked_at
+    snapshot, now = _snapshot, time.monotonic()
+    if snapshot is not None and now - _checked_at < CHECK_INTERVAL:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        version = _shared_version()
+        if snapshot is None or snapshot.version != version or now - snapshot.loaded_at > MAX_AGE:
+            snapshot = _snapshot = ReferenceData(version)
+        _checked_at = now
+    return snapshot
+
+
+def invalidate():
+    """Signale à tous les workers que les données de référence ont changé."""
+    global _snapshot
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # clé évincée entre add() et incr()
+        cache.set(VERSION_KEY, 1, timeout=None)
+    with _lock:
+        _snapshot = None
+
+
+def currency_code(currency_id):
+    """Code ISO d'une devise par son id (chaîne vide si inconnue)."""
+    currency = reference_data().currency(currency_id)
+    return currency.code if currency else ""
+
+
+def country_currency_id(country_id):
+    """Id de la devise d'un pays (None si inconnu), voir ``ReferenceData.country_or_fetch``."""
+    if not country_id:
+        return None
+    try:
+        return reference_data().country_or_fetch(country_id).currency_id
+    except Country.DoesNotExist:
+        return None
@@ -0,0 +1,264 @@
+"""
+Échéanciers de remboursement des campagnes de prêt.
+
+``LoanCampaign.interest_rate`` est un taux annuel nominal : chaque prêt est
+remboursé par mensualités constantes (annuité) sur ``repayment_duration`` mois,
+la première échéance tombant un mois après la clôture de la campagne.
+
+Le tableau d'amortissement ne dépend que du taux et de la durée : il est
+calculé une seule fois par campagne pour 1 unité prêtée (parts de capital et
+d'intérêts de chaque échéance, en Decimal), puis mis à l'échelle du montant de
+chaque prêteur. L'écart d'arrondi au centime est reporté sur la dernière
+échéance : la somme du capital remboursé égale exactement le montant prêté.
+
+Les échéances sont insérées en masse (``bulk_create``) et l'index
+(status, due_date) sert les requêtes « dû sur la période » de toute la plateforme.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal, localcontext
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from . import currency as currency_engine
+from . import events
+from .models import LoanCampaign, Notification, RepaymentInstallment
+
+CENT = Decimal("0.01")
+BATCH_SIZE = 1000
+OPEN_STATUSES = ("due", "late")
+
+
+# --------------------------
+# Tableau d'amortissement unitaire
+# --------------------------
+@dataclass(frozen=True)
+class UnitSchedule:
+    """Parts de capital et d'intérêts de chaque échéance pour 1 unité prêtée."""
+    principal: tuple
+    interest: tuple
+
+    @property
+    def months(self):
+        return len(self.principal)
+
+
+def unit_schedule(annual_rate, months):
+    """Tableau d'amortissement (annuité constante) pour 1 unité prêtée."""
+    months = max(int(months or 0), 1)
+    with localcontext() as ctx:
+        ctx.prec = 34
+        rate = Decimal(annual_rate or 0) / Decimal(1200)
+        if rate:
+            payment = rate / (1 - (1 + rate) ** -months)
+        else:
+            payment = Decimal(1) / months
+
+        principal, interest, balance = [], [], Decimal(1)
+        for _number in range(months):
+            part_interest = balance * rate
+            part_principal = payment - part_interest
+            balance -= part_principal
+            principal.append(part_principal)
+            interest.append(part_interest)
+    return UnitSchedule(tuple(principal), tuple(interest))
+
+
+def scale(schedule, amount):
+    """[(capital, intérêts), ...] au centime pour un prêt de ``amount``."""
+    amount = Decimal(amount)
+    rows, repaid = [], Decimal(0)
+    last = schedule.months - 1
+    for index, (part_principal, part_interest) in enumerate(zip(schedule.principal, schedule.interest)):
+        interest = (amount * part_interest).quantize(CENT)
+        principal = amount - repaid if index == last else (amount * part_principal).quantize(CENT)
+        repaid += principal
+        rows.append((principal, interest))
+    return rows
+
+
+def total_interest(amount, annual_rate, months):
+    """Intérêts totaux d'un prêt de ``amount``."""
+    return sum((interest for _principal, interest in scale(unit_schedule(annual_rate, months), amount)), Decimal(0))
+
+
+def first_due_date(loan_campaign):
+    """
+    Clôture de la campagne + 1 mois : la date de clôture enregistrée, sinon
+    (campagne encore ouverte, projection) sa date de fin ou aujourd'hui si elle est plus proche.
+    """
+    if loan_campaign.closed_at:
+        return timezone.localdate(loan_campaign.closed_at) + relativedelta(months=1)
+    closed_on = timezone.localdate()
+    if loan_campaign.end_date:
+        closed_on = min(closed_on, timezone.localdate(loan_campaign.end_date))
+    return closed_on + relativedelta(months=1)
+
+
+def _installments(loan_campaign, schedule, contribution_id, amount, currency_id, start):
+    return [
+        RepaymentInstallment(
+            loan_campaign_id=loan_campaign.pk,
+            contribution_id=contribution_id,
+            currency_id=currency_id,
+            number=number,
+            due_date=start + relativedelta(months=number - 1),
+            principal=principal,
+            interest=interest,
+            amount=principal + interest,
+        )
+        for number, (principal, interest) in enumerate(scale(schedule, amount), start=1)
+    ]
+
+
+# --------------------------
+# Génération
+# --------------------------
+def generate_schedule(loan_campaign):
+    """
+    Crée les échéances des contributions complétées qui n'en ont pas encore.
+    Idempotent : peut être rappelé si des contributions arrivent après la clôture.
+    Renvoie le nombre d'échéances créées.
+    """
+    lenders = (
+        loan_campaign.contributions.filter(payment_status="completed")
+        .exclude(pk__in=RepaymentInstallment.objects.filter(loan_campaign=loan_campaign).values("contribution_id"))
+        .values_list("pk", "amount", "currency_id")
+    )
+    lenders = list(lenders)
+    if not lenders:
+        return 0
+
+    schedule = unit_schedule(loan_campaign.interest_rate, loan_campaign.repayment_duration)
+    start = first_due_date(loan_campaign)
+    installments = []
+    for contribution_id, amount, currency_id in lenders:
+        installments.extend(_installments(loan_campaign, schedule, contribution_id, amount, currency_id, start))
+
+    with transaction.atomic():
+        RepaymentInstallment.objects.bulk_create(installments, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(installments)
+
+
+def generate_pending_schedules():
+    """Génère les échéanciers manquants de toutes les campagnes de prêt terminées."""
+    campaigns = (
+        LoanCampaign.objects.filter(
+            status="completed",
+            contributions__payment_status="completed",
+            contributions__installments__isnull=True,
+        )
+        .distinct()
+    )
+    return sum(generate_schedule(campaign) for campaign in campaigns)
+
+
+def projected_schedule(contribution):
+    """
+    Échéancier d'une contribution : les échéances enregistrées si la campagne est
+    close, sinon une projection (instances non sauvegardées).
+    """
+    loan_campaign = contribution.loan_campaign
+    if loan_campaign is None:
+        return []
+    installments = list(contribution.installments.order_by("number"))
+    if installments:
+        return installments
+    schedule = unit_schedule(loan_campaign.interest_rate, loan_campaign.repayment_duration)
+    return _installments(
+        loan_campaign, schedule, contribution.pk, contribution.amount,
+        contribution.currency_id, first_due_date(loan_campaign),
+    )
+
+
+# --------------------------
+# Suivi des échéances
+# --------------------------
+def mark_overdue(on=None):
+    """Passe en retard les échéances non payées dont la date est dépassée."""
+    on = on or timezone.localdate()
+    return RepaymentInstallment.objects.filter(status="due", due_date__lt=on).update(status="late")
+
+
+def mark_paid(installments, sender=None):
+    """
+    Marque des échéances comme payées et notifie les prêteurs (une notification
+    par échéance, insérées en masse). Renvoie le nombre d'échéances mises à jour.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        paid = list(
+            installments.select_for_update(of=("self",))
+            .filter(status__in=OPEN_STATUSES)
+            .select_related("loan_campaign", "contribution")
+        )
+        if not paid:
+            return 0
+        RepaymentInstallment.objects.filter(pk__in=[item.pk for item in paid]).update(status="paid", paid_at=now)
+
+        notifications = []
+        for item in paid:
+            investor_id = item.contribution.investor_id
+            if investor_id is None:
+                continue
+            message = _("L'échéance n°%(number)s du prêt « %(title)s » (%(amount)s) a été remboursée.") % {
+                "number": item.number,
+                "title": item.loan_campaign.title,
+                "amount": item.amount,
+            }
+            notifications.append(Notification(
+                recipient_id=investor_id,
+                sender=sender,
+                type="loan_repayment",
+                title=_("💸 Remboursement reçu"),
+                message=message,
+                short_message=message[:50],
+                icon="cash",
+                bg_color="bg-success",
+                related_loan_id=item.loan_campaign_id,
+                related_contribution_id=item.contribution_id,
+            ))
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        transaction.on_commit(lambda: events.notifications_created(notifications))
+    return len(paid)
+
+
+# --------------------------
+# Requêtes de suivi (plateforme)
+# --------------------------
+def month_bounds(on=None):
+    """(premier jour, dernier jour) du mois de ``on``."""
+    on = on or timezone.localdate()
+    first = on.replace(day=1)
+    return first, first + relativedelta(months=1) - timedelta(days=1)
+
+
+def owed_between(start, end):
+    """Échéances non payées dues entre ``start`` et ``end`` (index status, due_date)."""
+    return RepaymentInstallment.objects.filter(status__in=OPEN_STATUSES, due_date__range=(start, end))
+
+
+def owed_this_month(on=None, target=None):
+    """
+    Ce qui est dû ce mois-ci sur toute la plateforme :
+    détail par devise et total converti dans la devise de reporting.
+    """
+    start, end = month_bounds(on)
+    queryset = owed_between(start, end)
+    by_currency = list(
+        queryset.values("currency__code")
+        .annotate(total=Sum("amount"), installments=Count("pk"))
+        .order_by("currency__code")
+    )
+    return {
+        "start": start,
+        "end": end,
+        "by_currency": by_currency,
+        "total": currency_engine.total(queryset, "amount", "currency", None, target),
+        "currency": target or currency_engine.reporting_currency(),
+    }
+
@@ -0,0 +1,348 @@
+"""
+Rapports de portefeuille des intermédiaires.
+
+``portfolio`` calcule en cinq requêtes groupées (projets, campagnes de don,
+campagnes de prêt, contributions par campagne, contributions par mois) les
+indicateurs d'un intermédiaire : totaux, par entrepreneur, par projet, par
+campagne et série mensuelle des contributions. Les montants par projet sont
+dans la devise du projet ; les totaux sont convertis dans la devise de
+reporting (taux courants).
+
+Cache : le résultat est mis en cache sous une clé qui dépend de la « version »
+de chaque entrepreneur représenté. Toute modification d'un projet, d'une
+campagne ou d'une contribution change la version de l'entrepreneur concerné
+(``touch_*``, appelés par les signaux et les traitements par lots) : le
+rapport est recalculé à la lecture suivante, et pas avant. La nouvelle
+version n'est écrite qu'à la validation de la transaction : une lecture
+concurrente ne peut pas mettre en cache, sous la nouvelle version, un
+rapport calculé sur les données d'avant.
+
+Exports : les fichiers CSV / PDF sont produits par la tâche Celery
+``generate_intermediaire_report`` et stockés sous un nom dérivé de la même
+empreinte ; un export déjà généré pour des données inchangées est resservi.
+"""
+import csv
+import hashlib
+import io
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from . import currency as currency_engine
+from . import routers
+from .models import Campaign, Contribution, IntermediaireProfile, LoanCampaign, Project
+from .reference import reference_data
+
+CACHE_TIMEOUT = 60 * 60 * 24
+VERSION_KEY = "reports:entrepreneur:{}"
+PORTFOLIO_KEY = "reports:portfolio:{}:{}"
+EXPORT_PATH = "reports/intermediaires/{}/{}.{}"
+FORMATS = ("csv", "pdf")
+
+
+# --------------------------
+# Versions et empreinte
+# --------------------------
+def touch_entrepreneurs(entrepreneur_ids):
+    """Données modifiées : les rapports couvrant ces entrepreneurs seront recalculés."""
+    keys = [VERSION_KEY.format(pk) for pk in set(entrepreneur_ids) if pk]
+    if keys:
+        # Entrepreneurs résolus maintenant (lignes supprimées), version écrite après validation
+        transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), timeout=None))
+
+
+def touch_projects(project_ids):
+    touch_entrepreneurs(Project.objects.filter(pk__in=list(project_ids)).values_list("entrepreneur_id", flat=True))
+
+
+def touch_campaigns(campaign_ids=(), loan_campaign_ids=()):
+    entrepreneurs = set()
+    if campaign_ids:
+        entrepreneurs.update(
+            Campaign.objects.filter(pk__in=list(campaign_ids)).values_list("project__entrepreneur_id", flat=True)
+        )
+    if loan_campaign_ids:
+        entrepreneurs.update(
+            LoanCampaign.objects.filter(pk__in=list(loan_campaign_ids)).values_list("project__entrepreneur_id", flat=True)
+        )
+    touch_entrepreneurs(entrepreneurs)
+
+
+def _versions(profile):
+    """{clé: version} des entrepreneurs représentés par l'intermédiaire."""
+    entrepreneur_ids = sorted(profile.represented_entrepreneurs.values_list("pk", flat=True))
+    keys = [VERSION_KEY.format(pk) for pk in entrepreneur_ids]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # Version perdue (éviction) : on repart d'une version neuve plutôt que d'un rapport ancien
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return {key: versions[key] for key in keys}
+
+
+def fingerprint(profile, versions=None):
+    """Empreinte des données couvertes par le rapport (intermédiaire + versions des entrepreneurs)."""
+    versions = _versions(profile) if versions is None else versions
+    raw = f"{profile.pk}:{currency_engine.reporting_currency()}:" + ",".join(
+        f"{key}={version}" for key, version in versions.items()
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+# --------------------------
+# Calcul
+# --------------------------
+def _campaign_rows(model, projects, stats, key):
+    rows = []
+    for row in model.objects.filter(project__in=projects).order_by("-created_at").values(
+        "pk", "project_id", "title", "description", "image", "status", "goal_amount", "collected_amount", "end_date",
+    ):
+        count, amount, investors = stats.get((key, row["pk"]), (0, Decimal(0), 0))
+        row.update(
+            id=row["pk"],
+            image_url=default_storage.url(row["image"]) if row["image"] else None,
+            status_display=dict(model.STATUS_CHOICES).get(row["status"], row["status"]),
+            contributions=count,
+            contributed=amount,
+            investors=investors,
+            completion=round(row["collected_amount"] / row["goal_amount"] * 100, 2) if row["goal_amount"] else 0,
+        )
+        rows.append(row)
+    return rows
+
+
+def compute_portfolio(profile):
+    """Indicateurs du portefeuille d'un intermédiaire (cinq requêtes groupées)."""
+    data = reference_data()
+    target = currency_engine.reporting_currency()
+    projects_qs = Project.objects.filter(entrepreneur__represented_by_intermediaires=profile)
+
+    projects = {
+        row["pk"]: row
+        for row in projects_qs.order_by("-created_at").values(
+            "pk", "title", "slug", "short_description", "status", "image", "target_amount", "country_id", "created_at",
+            "entrepreneur_id", "entrepreneur__full_name", "entrepreneur__email",
+        )
+    }
+
+    stats = {}
+    contributions = Contribution.objects.filter(
+        Q(campaign__project__in=projects_qs) | Q(loan_campaign__project__in=projects_qs),
+        payment_status="completed",
+    )
+    for row in contributions.order_by().values("campaign_id", "loan_campaign_id").annotate(
+        count=Count("pk"), amount=Sum("amount"), investors=Count("investor", distinct=True)
+    ):
+        key = ("campaign", row["campaign_id"]) if row["campaign_id"] else ("loan", row["loan_campaign_id"])
+        stats[key] = (row["count"], row["amount"] or Decimal(0), row["investors"])
+
+    campaigns = _campaign_rows(Campaign, projects_qs, stats, "campaign")
+    loans = _campaign_rows(LoanCampaign, projects_qs, stats, "loan")
+
+    for project in projects.values():
+        country = data.country_or_fetch(project["country_id"]) if project["country_id"] else None
+        project.update(
+            id=project["pk"],
+            currency=country.currency.code if country else target,
+            image_url=default_storage.url(project["image"]) if project["image"] else None,
+            campaigns=[], loans=[], goal=Decimal(0), collected=Decimal(0), contributions=0,
+        )
+    for kind, rows in (("campaigns", campaigns), ("loans", loans)):
+        for row in rows:
+            project = projects[row["project_id"]]
+            project[kind].append(row)
+            project["goal"] += row["goal_amount"]
+            project["collected"] += row["collected_amount"]
+            project["contributions"] += row["contributions"]
+
+    entrepreneurs = {}
+    totals = defaultdict(Decimal)
+    for project in projects.values():
+        project["completion"] = round(project["collected"] / project["goal"] * 100, 2) if project["goal"] else 0
+        collected = currency_engine.convert(project["collected"], project["currency"], target)
+        goal = currency_engine.convert(project["goal"], project["currency"], target)
+        entrepreneur = entrepreneurs.setdefault(project["entrepreneur_id"], {
+            "id": project["entrepreneur_id"],
+            "name": project["entrepreneur__full_name"] or project["entrepreneur__email"],
+            "email": project["entrepreneur__email"],
+            "projects": 0, "collected": Decimal(0), "contributions": 0,
+        })
+        entrepreneur["projects"] += 1
+        entrepreneur["collected"] += collected
+        entrepreneur["contributions"] += project["contributions"]
+        totals["goal"] += goal
+        totals["collected"] += collected
+        totals["contributions"] += project["contributions"]
+
+    series = defaultdict(lambda: {"count": 0, "amount": Decimal(0)})
+    for row in contributions.annotate(month=TruncMonth("created_at")).order_by().values("month", "currency_id").annotate(
+        count=Count("pk"), amount=Sum("amount")
+    ):
+        code = data.currency(row["currency_id"]).code if row["currency_id"] else target
+        bucket = series[row["month"].date()]
+        bucket["count"] += row["count"]
+        bucket["amount"] += currency_engine.convert(row["amount"] or 0, code, target)
+
+    statuses = defaultdict(int)
+    for row in campaigns:
+        statuses[row["status"]] += 1
+
+    return {
+        "generated_at": timezone.now(),
+        "currency": target,
+        "totals": {
+            "projects": len(projects),
+            "campaigns": len(campaigns),
+            "loans": len(loans),
+            "active_campaigns": statuses["active"],
+            "completed_campaigns": statuses["completed"],
+            "failed_campaigns": statuses["failed"],
+            "goal": totals["goal"],
+            "collected": totals["collected"],
+            "contributions": int(totals["contributions"]),
+            "completion": round(totals["collected"] / totals["goal"] * 100, 2) if totals["goal"] else 0,
+        },
+        "entrepreneurs": sorted(entrepreneurs.values(), key=lambda row: row["collected"], reverse=True),
+        "projects": list(projects.values()),
+        "series": [{"month": month, **values} for month, values in sorted(series.items())],
+    }
+
+
+def portfolio(profile):
+    """Portefeuille de l'intermédiaire, depuis le cache tant que ses données n'ont pas changé."""
+    versions = _versions(profile)
+    key = PORTFOLIO_KEY.format(profile.pk, fingerprint(profile, versions))
+    result = cache.get(key)
+    if result is None:
+        # Données modifiées à l'instant : la réplique peut ne pas les avoir encore
+        # reçues, et le résultat resterait en cache sous la nouvelle empreinte
+        recent = max(versions.values(), default=0) > time.time_ns() - routers.PIN_SECONDS * 10**9
+        with routers.primary_reads() if recent else nullcontext():
+            result = compute_portfolio(profile)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
+
+
+# --------------------------
+# Exports CSV / PDF
+# --------------------------
+def render_csv(report):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow([_("Rapport de portefeuille"), report["generated_at"].strftime("%d/%m/%Y %H:%M")])
+    writer.writerow([])
+    writer.writerow([_("Projet"), _("Entrepreneur"), _("Statut"), _("Devise"), _("Objectif"), _("Collecté"),
+                     _("Complétion (%)"), _("Contributions")])
+    for project in report["projects"]:
+        writer.writerow([project["title"], project["entrepreneur__full_name"] or project["entrepreneur__email"],
+                         project["status"], project["currency"], project["goal"], project["collected"],
+                         project["completion"], project["contributions"]])
+    writer.writerow([])
+    writer.writerow([_("Campagne"), _("Projet"), _("Type"), _("Statut"), _("Objectif"), _("Collecté"),
+                     _("Contributions"), _("Contributeurs")])
+    for project in report["projects"]:
+        for kind, label in (("campaigns", _("Don")), ("loans", _("Prêt"))):
+            for row in project[kind]:
+                writer.writerow([row["title"], project["title"], label, row["status_display"], row["goal_amount"],
+                                 row["collected_amount"], row["contributions"], row["investors"]])
+    writer.writerow([])
+    writer.writerow([_("Mois"), _("Contributions"), f"{_('Montant')} ({report['currency']})"])
+    for row in report["series"]:
+        writer.writerow([row["month"].strftime("%Y-%m"), row["count"], row["amount"]])
+    # BOM : ouverture directe dans Excel avec les accents
+    return ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+
+def render_pdf(report, title):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(buffer, pagesize=landscape(A4), title=title)
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#417690")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
+    ])
+    totals = report["totals"]
+    currency = report["currency"]
+
+    story = [
+        Paragraph(title, styles["Title"]),
+        Paragraph(_("Généré le %(date)s") % {"date": report["generated_at"].strftime("%d/%m/%Y %H:%M")}, styles["Normal"]),
+        Spacer(1, 12),
+        Table([
+            [_("Projets"), _("Campagnes"), _("Prêts"), _("Objectif"), _("Collecté"), _("Complétion"), _("Contributions")],
+            [totals["projects"], totals["campaigns"], totals["loans"], f"{totals['goal']:,.2f} {currency}",
+             f"{totals['collected']:,.2f} {currency}", f"{totals['completion']} %", totals["contributions"]],
+        ], style=table_style),
+        Spacer(1, 12),
+        Paragraph(_("Par entrepreneur"), styles["Heading2"]),
+        Table(
+            [[_("Entrepreneur"), _("Projets"), _("Collecté"), _("Contributions")]]
+            + [[row["name"], row["projects"], f"{row['collected']:,.2f} {currency}", row["contributions"]]
+               for row in report["entrepreneurs"]],
+            style=table_style, repeatRows=1,
+        ),
+        Spacer(1, 12),
+        Paragraph(_("Par projet"), styles["Heading2"]),
+        Table(
+            [[_("Projet"), _("Statut"), _("Objectif"), _("Collecté"), _("Complétion"), _("Contributions")]]
+            + [[project["title"][:60], project["status"], f"{project['goal']:,.2f} {project['currency']}",
+                f"{project['collected']:,.2f} {project['currency']}", f"{project['completion']} %", project["contributions"]]
+               for project in report["projects"]],
+            style=table_style, repeatRows=1,
+        ),
+        Spacer(1, 12),
+        Paragraph(_("Contributions par mois"), styles["Heading2"]),
+        Table(
+            [[_("Mois"), _("Contributions"), _("Montant")]]
+            + [[row["month"].strftime("%Y-%m"), row["count"], f"{row['amount']:,.2f} {currency}"] for row in report["series"]],
+            style=table_style, repeatRows=1,
+        ),
+    ]
+    document.build(story)
+    return buffer.getvalue()
+
+
+def export_path(profile, fmt, stamp=None):
+    return EXPORT_PATH.format(profile.pk, stamp or fingerprint(profile), fmt)
+
+
+def generate_export(profile_id, fmt):
+    """Produit (si besoin) l'export du portefeuille dans le format demandé. Renvoie son chemin."""
+    profile = IntermediaireProfile.objects.select_related("user").get(pk=profile_id)
+    path = export_path(profile, fmt)
+    if default_storage.exists(path):
+        return path
+    report = portfolio(profile)
+    if fmt == "pdf":
+        content = render_pdf(report, _("Rapport de portefeuille — %(name)s") % {"name": profile.get_full_name()})
+    else:
+        content = render_csv(report)
+    return default_storage.save(path, ContentFile(content))
+
+
+def schedule_export(profile, fmt):
+    """Lance la génération en arrière-plan (en ligne si le broker est indisponible)."""
+    from .tasks import generate_intermediaire_report
+    try:
+        generate_intermediaire_report.apply_async(args=[profile.pk, fmt], retry=False)
+    except Exception:
+        generate_export(profile.pk, fmt)
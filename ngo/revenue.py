@@ -0,0 +1,189 @@
+"""
+Commissions et revenus de la plateforme.
+
+1. Les commissions sont enregistrées par le grand livre (``ledger``), dans la
+   transaction qui comptabilise la contribution, au taux appliqué à
+   l'écriture. ``compute_commissions`` rattrape les encaissements comptabilisés
+   sans ligne ``Commission`` (antérieurs à cet enregistrement) : ils sont
+   parcourus par lots (curseur sur la clé primaire) et la commission est
+   reprise de l'écriture elle-même — jamais recalculée au taux courant.
+2. ``rollup`` : les revenus (commissions, frais de soumission de projet,
+   abonnements intermédiaires) des jours touchés sont agrégés par pays et
+   devise dans ``RevenueRollup`` (période « day »), puis les mois concernés
+   sont recalculés à partir des jours (période « month »).
+
+Les rapports financiers lisent ensuite ``RevenueRollup`` (``revenue``) :
+quelques lignes par période au lieu d'un parcours des paiements.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .ledger import CENT
+from .models import Commission, IntermediairePayment, LedgerEntry, Payment, RevenueRollup
+
+BATCH_SIZE = 2000
+
+
+# --------------------------
+# Commissions
+# --------------------------
+def pending_postings():
+    """Encaissements comptabilisés dont la commission n'a pas été enregistrée."""
+    return LedgerEntry.objects.filter(kind="contribution", account="external", contribution__commission__isnull=True)
+
+
+def _effective_rate(commission, gross):
+    """Taux (en %) que représente la commission de l'écriture."""
+    if not gross:
+        return Decimal(0)
+    return (commission * 100 / gross).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def compute_commissions(batch_size=BATCH_SIZE):
+    """Enregistre les commissions manquantes. Renvoie (nombre, dates des contributions concernées)."""
+    queryset = pending_postings().annotate(
+        country=Coalesce("contribution__campaign__project__country_id", "contribution__loan_campaign__project__country_id"),
+        day=TruncDate("contribution__created_at"),
+    )
+    count, dates, last_pk = 0, set(), 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by("pk")
+            .values_list("pk", "entry", "contribution_id", "amount", "currency_id", "country", "day")[:batch_size]
+        )
+        if not rows:
+            break
+        # Ligne « commission » de la même écriture (absente si la commission est nulle)
+        commissions = dict(
+            LedgerEntry.objects.filter(entry__in=[row[1] for row in rows], account="commission")
+            .values_list("entry", "amount")
+        )
+        Commission.objects.bulk_create(
+            [
+                Commission(
+                    contribution_id=contribution_id, country_id=country_id, currency_id=currency_id,
+                    rate=_effective_rate(commissions.get(entry, Decimal(0)), -amount),
+                    gross=-amount, amount=commissions.get(entry, Decimal(0)), date=day,
+                )
+                for _pk, entry, contribution_id, amount, currency_id, country_id, day in rows
+            ],
+            ignore_conflicts=True,
+        )
+        count += len(rows)
+        dates.update(row[6] for row in rows)
+        last_pk = rows[-1][0]
+    return count, dates
+
+
+# --------------------------
+# Agrégats par jour et par mois
+# --------------------------
+def _sources():
+    """(source, queryset annoté day/country/gross/amount) des revenus de la plateforme."""
+    submission_fees = Payment.objects.filter(is_successful=True, payment_type="project_submission").annotate(
+        day=TruncDate(Coalesce("reviewed_at", "created_at")), country_ref=F("country_id"),
+        gross_ref=F("amount"), amount_ref=F("amount"),
+    )
+    intermediaire_fees = IntermediairePayment.objects.filter(status="validated").annotate(
+        day=TruncDate(Coalesce("reviewed_at", "created_at")), country_ref=F("intermediaire__country_id"),
+        gross_ref=F("amount"), amount_ref=F("amount"),
+    )
+    commissions = Commission.objects.annotate(
+        day=F("date"), country_ref=F("country_id"), gross_ref=F("gross"), amount_ref=F("amount"),
+    )
+    return (
+        ("commission", commissions),
+        ("submission_fee", submission_fees),
+        ("intermediaire_fee", intermediaire_fees),
+    )
+
+
+def _fee_dates(since):
+    """Jours des frais reconnus (vérifiés ou créés) depuis ``since``."""
+    dates = set()
+    for _source, queryset in _sources()[1:]:
+        recognised = queryset.annotate(recognised_at=Coalesce("reviewed_at", "created_at"))
+        if since is not None:
+            recognised = recognised.filter(recognised_at__gte=since)
+        dates.update(recognised.values_list("day", flat=True).distinct())
+    return dates
+
+
+@transaction.atomic
+def rollup(dates):
+    """Recalcule les agrégats journaliers des ``dates`` puis ceux des mois correspondants."""
+    dates = sorted(set(dates))
+    if not dates:
+        return 0
+    RevenueRollup.objects.filter(period="day", period_start__in=dates).delete()
+    rows = []
+    for source, queryset in _sources():
+        rows.extend(
+            RevenueRollup(
+                period="day", period_start=row["day"], source=source,
+                country_id=row["country_ref"], currency_id=row["currency_id"],
+                count=row["count"], gross=row["gross"], amount=row["total"],
+            )
+            for row in queryset.filter(day__in=dates).order_by()
+            .values("day", "country_ref", "currency_id")
+            .annotate(count=Count("pk"), gross=Sum("gross_ref"), total=Sum("amount_ref"))
+        )
+    RevenueRollup.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+    months = sorted({day.replace(day=1) for day in dates})
+    RevenueRollup.objects.filter(period="month", period_start__in=months).delete()
+    RevenueRollup.objects.bulk_create(
+        [
+            RevenueRollup(
+                period="month", period_start=row["month"], source=row["source"],
+                country_id=row["country_id"], currency_id=row["currency_id"],
+                count=row["total_count"], gross=row["total_gross"], amount=row["total_amount"],
+            )
+            for row in RevenueRollup.objects.filter(period="day", period_start__gte=months[0])
+            .annotate(month=TruncMonth("period_start"))
+            .filter(month__in=months)
+            .order_by()
+            .values("month", "source", "country_id", "currency_id")
+            .annotate(total_count=Sum("count"), total_gross=Sum("gross"), total_amount=Sum("amount"))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return len(rows)
+
+
+def run(full=False):
+    """
+    Passage du traitement : commissions manquantes, puis agrégats des jours touchés
+    depuis le dernier passage (tous les jours si ``full`` ou au premier passage).
+    Renvoie (commissions calculées, agrégats journaliers écrits).
+    """
+    since = None if full else RevenueRollup.objects.aggregate(last=Max("computed_at"))["last"]
+    count, dates = compute_commissions()
+    # Commissions enregistrées par le grand livre depuis le dernier passage
+    recorded = Commission.objects.all() if since is None else Commission.objects.filter(computed_at__gte=since)
+    dates |= set(recorded.values_list("date", flat=True).distinct())
+    # Commissions annulées par contre-passation (ligne Commission supprimée)
+    reversals = LedgerEntry.objects.filter(kind="contribution_refund")
+    if since is not None:
+        reversals = reversals.filter(created_at__gte=since)
+    dates |= set(reversals.annotate(day=TruncDate("contribution__created_at")).values_list("day", flat=True).distinct())
+    dates |= _fee_dates(since)
+    dates.add(timezone.localdate())
+    return count, rollup(dates)
+
+
+# --------------------------
+# Lecture (rapports)
+# --------------------------
+def revenue(period="month", start=None, end=None, **filters):
+    """Agrégats de revenus d'une période, filtrables (country_id, currency_id, source)."""
+    queryset = RevenueRollup.objects.filter(period=period, **filters).select_related("country", "currency")
+    if start:
+        queryset = queryset.filter(period_start__gte=start)
+    if end:
+        queryset = queryset.filter(period_start__lte=end)
+    return queryset
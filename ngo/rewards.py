@@ -0,0 +1,172 @@
+"""
+Attribution des récompenses aux contributions.
+
+Les paliers de récompense d'une campagne sont chargés une seule fois sous forme
+de tableau trié par montant minimum ; le palier le plus élevé auquel une
+contribution donne droit est trouvé par dichotomie (``bisect``), sans requête
+ni comparaison objet par objet.
+
+Les contributions complétées non encore évaluées (index partiel
+``ngo_contrib_reward_todo_idx``) sont traitées par lots : un ``bulk_update``
+par lot, et une notification ``reward_earned`` quand la récompense change
+(contributions récentes seulement : le rattrapage de l'historique est silencieux).
+Modifier les paliers d'une campagne remet ses contributions à évaluer.
+
+L'attribution étant enregistrée (``Contribution.reward``), le suivi des
+récompenses à remettre est une simple jointure indexée (``fulfilment``).
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from . import events
+from .models import Contribution, Notification, Reward
+
+BATCH_SIZE = 1000
+# Pas de notification pour les contributions plus anciennes (rattrapage de l'historique)
+NOTIFY_WINDOW = timedelta(days=7)
+
+
+# --------------------------
+# Paliers
+# --------------------------
+@dataclass(frozen=True)
+class Tiers:
+    """Paliers d'une campagne : montants minimums triés et récompenses correspondantes."""
+    amounts: tuple
+    rewards: tuple
+
+    def best(self, amount):
+        """Récompense du palier le plus élevé atteint par ``amount`` (None si aucun)."""
+        index = bisect_right(self.amounts, amount) - 1
+        return self.rewards[index] if index >= 0 else None
+
+
+NO_TIERS = Tiers((), ())
+
+
+def load_tiers(campaign_ids):
+    """{id campagne: Tiers} pour les campagnes données, en une requête."""
+    grouped = {}
+    rewards = (
+        Reward.objects.filter(campaign_id__in=campaign_ids)
+        .order_by("campaign_id", "minimum_amount", "pk")
+        .values_list("campaign_id", "minimum_amount", "pk", "title")
+    )
+    for campaign_id, minimum_amount, pk, title in rewards:
+        amounts, items = grouped.setdefault(campaign_id, ([], []))
+        amounts.append(minimum_amount)
+        items.append((pk, title))
+    return {campaign_id: Tiers(tuple(amounts), tuple(items)) for campaign_id, (amounts, items) in grouped.items()}
+
+
+# --------------------------
+# Attribution par lots
+# --------------------------
+def pending_contributions():
+    """Contributions de don payées dont la récompense n'a pas encore été évaluée."""
+    return Contribution.objects.filter(
+        payment_status="completed",
+        reward_evaluated_at__isnull=True,
+        campaign__isnull=False,
+    )
+
+
+def _reward_notification(contribution, reward_id, reward_title):
+    message = _("Merci pour votre contribution ! Vous avez débloqué la récompense « %(reward)s ».") % {
+        "reward": reward_title,
+    }
+    return Notification(
+        recipient_id=contribution.investor_id,
+        type="reward_earned",
+        title=_("🎁 Récompense débloquée"),
+        message=message,
+        short_message=message[:50],
+        icon="gift",
+        bg_color="bg-success",
+        related_reward_id=reward_id,
+        related_contribution_id=contribution.pk,
+        related_campaign_id=contribution.campaign_id,
+    )
+
+
+def assign_batch(contributions, tiers, notify=True):
+    """
+    Attribue la meilleure récompense à chaque contribution du lot.
+    ``tiers`` est complété au besoin (cache partagé entre les lots).
+    Renvoie (contributions évaluées, récompenses attribuées ou modifiées).
+    """
+    missing = {c.campaign_id for c in contributions} - tiers.keys()
+    if missing:
+        loaded = load_tiers(missing)
+        tiers.update({campaign_id: loaded.get(campaign_id, NO_TIERS) for campaign_id in missing})
+
+    now = timezone.now()
+    notify_since = now - NOTIFY_WINDOW
+    notifications, changed = [], 0
+    for contribution in contributions:
+        best = tiers[contribution.campaign_id].best(contribution.amount)
+        reward_id = best[0] if best else None
+        if reward_id != contribution.reward_id:
+            changed += 1
+            if notify and best and contribution.investor_id and contribution.created_at >= notify_since:
+                notifications.append(_reward_notification(contribution, *best))
+        contribution.reward_id = reward_id
+        contribution.reward_evaluated_at = now
+
+    with transaction.atomic():
+        Contribution.objects.bulk_update(contributions, ["reward", "reward_evaluated_at"], batch_size=BATCH_SIZE)
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        transaction.on_commit(lambda: events.notifications_created(notifications))
+    return len(contributions), changed
+
+
+def assign_rewards(queryset=None, batch_size=BATCH_SIZE, notify=True):
+    """
+    Traite toutes les contributions en attente (ou ``queryset``) par lots,
+    en parcourant la clé primaire. Renvoie (évaluées, attribuées).
+    """
+    queryset = (queryset if queryset is not None else pending_contributions()).only(
+        "pk", "campaign_id", "investor_id", "amount", "reward_id", "reward_evaluated_at", "created_at"
+    )
+    tiers, evaluated, assigned, last_pk = {}, 0, 0, 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+        if not batch:
+            break
+        done, changed = assign_batch(batch, tiers, notify)
+        evaluated += done
+        assigned += changed
+        last_pk = batch[-1].pk
+    return evaluated, assigned
+
+
+def reset_campaign(campaign_id):
+    """Paliers modifiés : les contributions de la campagne seront réévaluées."""
+    return Contribution.objects.filter(campaign_id=campaign_id, payment_status="completed").update(reward_evaluated_at=None)
+
+
+# --------------------------
+# Suivi des récompenses
+# --------------------------
+def fulfilment(campaign_id):
+    """Contributions à récompenser d'une campagne (jointure sur l'index de Contribution.reward)."""
+    return (
+        Contribution.objects.filter(campaign_id=campaign_id, reward__isnull=False)
+        .select_related("reward", "investor")
+        .order_by("reward__minimum_amount", "created_at")
+    )
+
+
+def fulfilment_summary(campaign_id):
+    """Nombre de contributeurs et montant total par palier."""
+    return (
+        Reward.objects.filter(campaign_id=campaign_id)
+        .annotate(backers=Count("contributions"), total=Sum("contributions__amount"))
+        .order_by("minimum_amount")
+    )
@@ -0,0 +1,123 @@
+"""
+Routage des lectures vers la réplique (optionnelle).
+
+Si l'alias ``replica`` est configuré (``DATABASE_REPLICA_URL``), les lectures
+faites dans ``replica_reads()`` (pages publiques, tableaux de bord, rapports,
+exports) partent vers la réplique ; tout le reste, et toutes les écritures,
+vont à ``default``.
+
+Lecture de ses propres écritures : dès qu'une écriture est exécutée sur le
+primaire, les lectures suivantes de la requête restent sur le primaire, et
+``PrimaryPinMiddleware`` pose un cookie qui maintient les lectures de
+l'utilisateur sur le primaire pendant ``REPLICA_PIN_SECONDS`` (le temps que
+la réplique rattrape son retard). Une lecture faite dans une transaction du
+primaire n'est jamais envoyée à la réplique.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+REPLICA = "replica"
+PIN_COOKIE = "db_primary"
+PIN_SECONDS = getattr(settings, "REPLICA_PIN_SECONDS", 10)
+WRITE_STATEMENTS = {"INSERT", "UPDATE", "DELETE"}
+
+
+@dataclass
+class RoutingState:
+    """Routage du contexte courant (une requête HTTP, une tâche)."""
+    replica: bool = False  # lectures autorisées sur la réplique
+    pinned: bool = False  # lectures maintenues sur le primaire
+    wrote: bool = False  # une écriture a été exécutée dans ce contexte
+
+
+_state = ContextVar("ngo_routing_state", default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _track_writes(execute, sql, params, many, context):
+    # Écritures réellement exécutées sur le primaire (un get_or_create qui
+    # ne crée rien passe par db_for_write mais ne rend rien périmé)
+    state = _state.get()
+    if state is not None and not state.wrote and str(sql).lstrip()[:6].upper() in WRITE_STATEMENTS:
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+def _install_write_tracking(sender, connection, **kwargs):
+    """
+    Installé sur chaque connexion au primaire, quel que soit son thread : les
+    connexions sont propres à chaque thread, et une vue async exécute ses
+    requêtes dans ceux de sync_to_async, où le contexte (ContextVar) la suit.
+    """
+    if connection.alias == DEFAULT_DB_ALIAS and _track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_track_writes)
+
+
+connection_created.connect(_install_write_tracking)
+
+
+@contextmanager
+def routing_scope(pinned=False):
+    """Nouveau contexte de routage (une requête, une tâche). Renvoie son état."""
+    state = RoutingState(pinned=pinned)
+    # Connexion ouverte avant l'import de ce module (pas de connection_created)
+    _install_write_tracking(None, connections[DEFAULT_DB_ALIAS])
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def _override(**values):
+    """Modifie l'état courant le temps du bloc (ouvre un contexte s'il n'y en a pas)."""
+    state = _state.get()
+    if state is None:
+        with routing_scope() as state, _override(**values):
+            yield
+        return
+    previous = {name: getattr(state, name) for name in values}
+    for name, value in values.items():
+        setattr(state, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(state, name, value)
+
+
+def replica_reads():
+    """Contexte (ou décorateur) dont les lectures peuvent être servies par la réplique."""
+    return _override(replica=True)
+
+
+def primary_reads():
+    """Contexte (ou décorateur) dont les lectures restent sur le primaire."""
+    return _override(pinned=True)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.pinned or state.wrote or not replica_configured():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Même données des deux côtés
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplique reçoit le schéma par réplication
+        return db != REPLICA
@@ -0,0 +1,263 @@
+"""
+Moteur de recherche plein texte (projets, campagnes, partenaires).
+
+Sous PostgreSQL, chaque modèle indexé possède une colonne ``search_vector``
+(tsvector) couverte par un index GIN. Le document est construit avec les
+configurations des quatre langues du site (fr/en/nl/es) : la requête est
+analysée avec la configuration de la langue active, ce qui permet de trouver
+un contenu rédigé en français depuis l'interface anglaise, et inversement.
+
+Sous SQLite (développement local), on retombe sur des ``icontains`` pondérés,
+sans index mais avec le même classement et les mêmes extraits surlignés.
+"""
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector,
+)
+from django.db import connection
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from .models import Campaign, Partner, Project, User
+
+
+# --------------------------
+# Configurations par langue
+# --------------------------
+# Codes LANGUAGES -> configurations text search de PostgreSQL
+SEARCH_CONFIGS = {
+    "fr": "french",
+    "en": "english",
+    "nl": "dutch",
+    "es": "spanish",
+}
+
+# Poids PostgreSQL par défaut (D, C, B, A) réutilisés pour le repli SQLite
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+# Marqueurs de surlignage : échappés puis remplacés par <mark>
+START_SEL = "⟦"
+STOP_SEL = "⟧"
+
+SNIPPET_LENGTH = 220
+
+
+def search_config(language=None):
+    """Configuration text search correspondant à la langue (ou à la langue active)."""
+    code = (language or get_language() or settings.LANGUAGE_CODE).split("-")[0]
+    return SEARCH_CONFIGS.get(code, SEARCH_CONFIGS["fr"])
+
+
+def is_postgres():
+    return connection.vendor == "postgresql"
+
+
+# --------------------------
+# Modèles indexés
+# --------------------------
+@dataclass(frozen=True)
+class SearchSpec:
+    model: type
+    fields: tuple          # ((champ, poids), ...)
+    snippet_field: str
+    public_filter: Q
+
+    def public(self):
+        return self.model.objects.filter(self.public_filter)
+
+
+SPECS = {
+    "projects": SearchSpec(
+        model=Project,
+        fields=(("title", "A"), ("short_description", "B"), ("description", "C")),
+        snippet_field="description",
+        public_filter=Q(status="approved"),
+    ),
+    "campaigns": SearchSpec(
+        model=Campaign,
+        fields=(("title", "A"), ("description", "C")),
+        snippet_field="description",
+        public_filter=Q(status="active"),
+    ),
+    "partners": SearchSpec(
+        model=Partner,
+        fields=(("name", "A"), ("description", "C")),
+        snippet_field="description",
+        public_filter=Q(active=True),
+    ),
+}
+
+SPECS_BY_MODEL = {spec.model: spec for spec in SPECS.values()}
+
+
+def search_document(spec):
+    """Expression tsvector : tous les champs pondérés, dans toutes les langues du site."""
+    vector = None
+    for config in dict.fromkeys(SEARCH_CONFIGS.values()):
+        for field, weight in spec.fields:
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vector(instance):
+    """Recalcule la colonne search_vector d'une instance (PostgreSQL uniquement)."""
+    spec = SPECS_BY_MODEL.get(type(instance))
+    if spec is None or not is_postgres():
+        return
+    # update() ne déclenche pas post_save : pas de récursion
+    spec.model.objects.filter(pk=instance.pk).update(search_vector=search_document(spec))
+
+
+# --------------------------
+# Recherche
+# --------------------------
+def _terms(query):
+    return [term for term in re.split(r"\s+", query.strip()) if term]
+
+
+def filter_queryset(queryset, spec, query, language=None):
+    """Filtre ``queryset`` sur ``query`` et l'annote avec un score ``rank``."""
+    if is_postgres():
+        search_query = SearchQuery(query, config=search_config(language), search_type="websearch")
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F("search_vector"), search_query)
+        )
+
+    # Repli SQLite : tous les termes doivent apparaître dans au moins un champ
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+    for term in terms:
+        match = Q()
+        for field, _weight in spec.fields:
+            match |= Q(**{f"{field}__icontains": term})
+        queryset = queryset.filter(match)
+
+    rank = Value(0.0)
+    for term in terms:
+        for field, weight in spec.fields:
+            rank = rank + Case(
+                When(**{f"{field}__icontains": term}, then=Value(WEIGHTS[weight])),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+    return queryset.annotate(rank=rank)
+
+
+def search(kind, query, language=None):
+    """Résultats publics de type ``kind`` triés par pertinence."""
+    spec = SPECS[kind]
+    return filter_queryset(spec.public(), spec, query, language).order_by("-rank", "-pk")
+
+
+# --------------------------
+# Extraits surlignés
+# --------------------------
+def _highlight(text):
+    """Échappe le texte puis remplace les marqueurs par des balises <mark>."""
+    html = escape(text).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+    return mark_safe(html)
+
+
+def _local_snippet(text, terms):
+    if not text:
+        return ""
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    found = pattern.search(text)
+    start = max((found.start() if found else 0) - SNIPPET_LENGTH // 3, 0)
+    excerpt = text[start:start + SNIPPET_LENGTH]
+    excerpt = pattern.sub(lambda m: f"{START_SEL}{m.group(0)}{STOP_SEL}", excerpt)
+    prefix = "… " if start else ""
+    suffix = " …" if start + SNIPPET_LENGTH < len(text) else ""
+    return f"{prefix}{excerpt}{suffix}"
+
+
+def attach_snippets(objects, kind, query, language=None):
+    """
+    Ajoute un attribut ``snippet`` (HTML sûr) à chaque objet de la page courante.
+    Sous PostgreSQL, ts_headline n'est calculé que pour les lignes affichées.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+    spec = SPECS[kind]
+
+    if is_postgres():
+        search_query = SearchQuery(query, config=search_config(language), search_type="websearch")
+        headlines = dict(
+            spec.model.objects.filter(pk__in=[obj.pk for obj in objects])
+            .annotate(headline=SearchHeadline(
+                spec.snippet_field,
+                search_query,
+                config=search_config(language),
+                start_sel=START_SEL,
+                stop_sel=STOP_SEL,
+                max_words=35,
+                min_words=15,
+            ))
+            .values_list("pk", "headline")
+        )
+        for obj in objects:
+            obj.snippet = _highlight(headlines.get(obj.pk) or "")
+        return objects
+
+    terms = _terms(query)
+    for obj in objects:
+        obj.snippet = _highlight(_local_snippet(getattr(obj, spec.snippet_field) or "", terms))
+    return objects
+
+
+# --------------------------
+# Autocomplétion
+# --------------------------
+# Sous PostgreSQL, les lookups icontains/istartswith ci-dessous génèrent
+# UPPER(col::text) LIKE ... : ils sont servis par les index trigrammes GIN
+# créés sur ces mêmes expressions (migration 0007).
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 10
+
+
+def _prefix_first(field, query):
+    """0 pour les correspondances en début de champ, 1 sinon : elles remontent en tête."""
+    return Case(
+        When(**{f"{field}__istartswith": query}, then=Value(0)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def autocomplete_entrepreneurs(query, queryset=None, limit=AUTOCOMPLETE_LIMIT):
+    """Entrepreneurs dont le nom contient ``query`` ou dont l'email commence par ``query``."""
+    query = query.strip()
+    if len(query) < AUTOCOMPLETE_MIN_LENGTH:
+        return []
+    if queryset is None:
+        queryset = User.objects.all()
+    return list(
+        queryset.filter(role="entrepreneur", is_active=True, is_deleted=False)
+        .filter(Q(full_name__icontains=query) | Q(email__istartswith=query))
+        .annotate(match=_prefix_first("full_name", query))
+        .order_by("match", "full_name")
+        .values("id", "full_name", "email")[:limit]
+    )
+
+
+def autocomplete_projects(query, queryset=None, limit=AUTOCOMPLETE_LIMIT):
+    """Projets dont le titre contient ``query`` (projets publics par défaut)."""
+    query = query.strip()
+    if len(query) < AUTOCOMPLETE_MIN_LENGTH:
+        return []
+    if queryset is None:
+        queryset = SPECS["projects"].public()
+    return list(
+        queryset.filter(title__icontains=query)
+        .annotate(match=_prefix_first("title", query))
+        .order_by("match", "title")
+        .values("id", "title", "slug")[:limit]
+    )
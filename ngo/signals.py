@@ -1,6 +1,13 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
 from django.dispatch import receiver
-from .models import User, EntrepreneurProfile, InvestisseurProfile, IntermediaireProfile
+from .models import (User, EntrepreneurProfile, InvestisseurProfile, IntermediaireProfile, Project, Campaign, Partner,
+                     Currency, Region, Country, Category, ExchangeRate, LoanCampaign, Payment, IntermediairePayment, Reward,
+                     Contribution, Message, Notification)
+from .search import update_search_vector
+from . import currency as currency_engine
+from . import events, ledger, proofs, reference, reports, repayments, rewards
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -15,3 +22,205 @@ def create_user_profile(sender, instance, created, **kwargs):
         elif instance.role == "intermediaire":
             IntermediaireProfile.objects.get_or_create(user=instance)
 
+
+
+# --------------------------
+# Index de recherche plein texte
+# --------------------------
+SEARCH_INDEXED_FIELDS = {
+    "Project": {"title", "short_description", "description"},
+    "Campaign": {"title", "description"},
+    "Partner": {"name", "description"},
+}
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Campaign)
+@receiver(post_save, sender=Partner)
+def refresh_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Met à jour le tsvector quand un champ indexé a pu changer."""
+    if update_fields is not None and not SEARCH_INDEXED_FIELDS[sender.__name__] & set(update_fields):
+        return
+    update_search_vector(instance)
+
+
+# --------------------------
+# Données de référence (pays, devises, ...)
+# --------------------------
+@receiver(post_save, sender=Currency)
+@receiver(post_save, sender=Region)
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Currency)
+@receiver(post_delete, sender=Region)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=Category)
+def invalidate_reference_data(sender, **kwargs):
+    """Recharge le cache de référence dans tous les workers, une fois la transaction validée."""
+    transaction.on_commit(reference.invalidate)
+
+
+@receiver(post_save, sender=Currency)
+def snapshot_currency_rate(sender, instance, **kwargs):
+    """Historise le taux du jour dès qu'une devise est modifiée."""
+    ExchangeRate.objects.update_or_create(
+        currency=instance,
+        date=timezone.localdate(),
+        defaults={"rate_to_usd": instance.exchange_rate_to_usd},
+    )
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def link_exchange_rate_periods(sender, instance, **kwargs):
+    """Instantané ajouté, modifié ou supprimé : périodes de validité de la devise recalculées."""
+    currency_engine.link_periods([instance.currency_id])
+
+
+# --------------------------
+# Échéanciers de remboursement
+# --------------------------
+CLOSED_STATUSES = ("completed", "failed")
+
+
+@receiver(pre_save, sender=Campaign)
+@receiver(pre_save, sender=LoanCampaign)
+def stamp_campaign_closure(sender, instance, **kwargs):
+    """Retient le statut précédent et date la clôture au passage à terminée / échouée."""
+    previous = sender.objects.filter(pk=instance.pk).values_list("status", flat=True).first() if instance.pk else None
+    instance._previous_status = previous
+    if instance.status in CLOSED_STATUSES and previous not in CLOSED_STATUSES and instance.closed_at is None:
+        instance.closed_at = timezone.now()
+
+
+@receiver(post_save, sender=LoanCampaign)
+def generate_repayment_schedule(sender, instance, **kwargs):
+    """À la clôture d'une campagne de prêt, génère l'échéancier des prêteurs qui n'en ont pas."""
+    if instance.status != "completed" or getattr(instance, "_previous_status", None) == "completed":
+        return
+    transaction.on_commit(lambda: repayments.generate_schedule(instance))
+
+
+# --------------------------
+# Preuves de paiement
+# --------------------------
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=IntermediairePayment)
+def reset_proof_review(sender, instance, **kwargs):
+    """Nouvelle preuve : empreinte à recalculer et paiement remis dans la file de vérification."""
+    previous = sender.objects.filter(pk=instance.pk).values_list("proof", flat=True).first() if instance.pk else None
+    instance._proof_changed = bool(instance.proof) and instance.proof.name != previous
+    if not instance._proof_changed or instance.pk is None:
+        return
+    instance.proof_hash = ""
+    instance.proof_thumbnail = None
+    instance.reviewed_at = None
+    instance.reviewed_by = None
+    if sender is IntermediairePayment and instance.status == "rejected":
+        instance.status = "pending"
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=IntermediairePayment)
+def forget_proof_duplicates(sender, instance, **kwargs):
+    """Les autres preuves ne signalent plus la preuve supprimée comme doublon."""
+    proofs.forget_duplicates(instance)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=IntermediairePayment)
+def preprocess_proof(sender, instance, **kwargs):
+    """Miniature et empreinte calculées en arrière-plan, après validation de la transaction."""
+    if getattr(instance, "_proof_changed", False):
+        transaction.on_commit(lambda: proofs.schedule(instance))
+
+
+# --------------------------
+# Paliers de récompense
+# --------------------------
+@receiver(post_save, sender=Reward)
+@receiver(post_delete, sender=Reward)
+def reevaluate_rewards(sender, instance, **kwargs):
+    """Paliers modifiés : les contributions de la campagne seront réattribuées au prochain passage."""
+    campaign_id = instance.campaign_id
+    transaction.on_commit(lambda: rewards.reset_campaign(campaign_id))
+
+
+# --------------------------
+# Grand livre
+# --------------------------
+@receiver(post_save, sender=Contribution)
+def post_contribution_to_ledger(sender, instance, created, **kwargs):
+    """
+    Contribution payée : crédit du solde du projet, net de commission ; plus
+    payée (remboursée, annulée) : contre-passation. Idempotent.
+    """
+    if instance.payment_status == "completed":
+        ledger.record_contributions([instance.pk])
+    elif not created:
+        ledger.reverse_contributions([instance.pk])
+
+
+# --------------------------
+# Rapports des intermédiaires (invalidation du cache)
+# --------------------------
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def touch_project_reports(sender, instance, **kwargs):
+    reports.touch_entrepreneurs([instance.entrepreneur_id])
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+@receiver(post_save, sender=LoanCampaign)
+@receiver(post_delete, sender=LoanCampaign)
+def touch_campaign_reports(sender, instance, **kwargs):
+    reports.touch_projects([instance.project_id])
+
+
+@receiver(post_save, sender=Contribution)
+@receiver(post_delete, sender=Contribution)
+def touch_contribution_reports(sender, instance, **kwargs):
+    reports.touch_campaigns(
+        [instance.campaign_id] if instance.campaign_id else (),
+        [instance.loan_campaign_id] if instance.loan_campaign_id else (),
+    )
+
+
+# --------------------------
+# Événements poussés (SSE, voir ngo/events.py)
+# --------------------------
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: events.notifications_created([instance]))
+    else:
+        transaction.on_commit(lambda: events.unread_changed([instance.recipient_id]))
+
+
+@receiver(post_save, sender=Message)
+def push_message(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: events.message_created(instance))
+    else:
+        transaction.on_commit(lambda: events.unread_changed([instance.recipient_id]))
+
+
+@receiver(post_delete, sender=Notification)
+@receiver(post_delete, sender=Message)
+def push_unread_counts(sender, instance, **kwargs):
+    transaction.on_commit(lambda: events.unread_changed([instance.recipient_id]))
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_save, sender=LoanCampaign)
+@receiver(post_delete, sender=Contribution)
+def push_campaign_progress(sender, instance, **kwargs):
+    # Contribution.save() enregistre le montant collecté sur la campagne : c'est ce save qui publie
+    if sender is Contribution:
+        campaign_ids = [instance.campaign_id] if instance.campaign_id else ()
+        loan_ids = [instance.loan_campaign_id] if instance.loan_campaign_id else ()
+    else:
+        campaign_ids = [instance.pk] if sender is Campaign else ()
+        loan_ids = [instance.pk] if sender is LoanCampaign else ()
+    transaction.on_commit(lambda: events.campaigns_changed(campaign_ids, loan_ids))
@@ -0,0 +1,110 @@
+/*
+ * Autocomplétion légère (sans dépendance).
+ *
+ * <div class="autocomplete" data-autocomplete-url="/fr/autocomplete/projets/">
+ *   <input type="search" class="form-control" data-autocomplete-input>
+ *   <input type="hidden" name="entrepreneur_id" data-autocomplete-value>   (optionnel)
+ * </div>
+ *
+ * Les résultats JSON ({results: [...]}) sont affichés dans une liste sous le champ.
+ * À la sélection : si l'élément a une "url", on y navigue, sinon on remplit le champ
+ * caché et on émet l'événement "autocomplete:select" (detail = élément choisi).
+ */
+(function () {
+  const DELAY = 200;
+
+  function label(item) {
+    if (item.title) return item.title;
+    return item.full_name ? `${item.full_name} — ${item.email}` : item.email;
+  }
+
+  function setup(container) {
+    const url = container.dataset.autocompleteUrl;
+    const input = container.querySelector("[data-autocomplete-input]");
+    const hidden = container.querySelector("[data-autocomplete-value]");
+    const list = document.createElement("div");
+    list.className = "list-group position-absolute w-100 shadow-sm";
+    list.style.zIndex = 1050;
+    container.style.position = "relative";
+    container.appendChild(list);
+
+    let timer = null;
+    let controller = null;
+    let items = [];
+    let active = -1;
+
+    function close() {
+      list.innerHTML = "";
+      items = [];
+      active = -1;
+    }
+
+    function choose(item) {
+      if (item.url) {
+        window.location.href = item.url;
+        return;
+      }
+      input.value = label(item);
+      if (hidden) hidden.value = item.id;
+      close();
+      container.dispatchEvent(new CustomEvent("autocomplete:select", { detail: item }));
+    }
+
+    function render() {
+      list.innerHTML = "";
+      items.forEach((item, index) => {
+        const option = document.createElement("button");
+        option.type = "button";
+        option.className = "list-group-item list-group-item-action" + (index === active ? " active" : "");
+        option.textContent = label(item);
+        option.addEventListener("mousedown", (event) => {
+          event.preventDefault();
+          choose(item);
+        });
+        list.appendChild(option);
+      });
+    }
+
+    function fetchResults() {
+      const query = input.value.trim();
+      if (hidden) hidden.value = "";
+      if (query.length < 2) return close();
+      if (controller) controller.abort();
+      controller = new AbortController();
+      const separator = url.includes("?") ? "&" : "?";
+      fetch(`${url}${separator}q=${encodeURIComponent(query)}`, { signal: controller.signal, credentials: "same-origin" })
+        .then((response) => response.json())
+        .then((data) => {
+          items = data.results || [];
+          active = -1;
+          render();
+        })
+        .catch(() => {});
+    }
+
+    input.setAttribute("autocomplete", "off");
+    input.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(fetchResults, DELAY);
+    });
+    input.addEventListener("keydown", (event) => {
+      if (!items.length) return;
+      if (event.key === "ArrowDown" || event.key === "ArrowUp") {
+        event.preventDefault();
+        const step = event.key === "ArrowDown" ? 1 : -1;
+        active = (active + step + items.length) % items.length;
+        render();
+      } else if (event.key === "Enter" && active >= 0) {
+        event.preventDefault();
+        choose(items[active]);
+      } else if (event.key === "Escape") {
+        close();
+      }
+    });
+    input.addEventListener("blur", () => setTimeout(close, 150));
+  }
+
+  document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll("[data-autocomplete-url]").forEach(setup);
+  });
+})();
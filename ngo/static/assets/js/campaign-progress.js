@@ -0,0 +1,41 @@
+/*
+ * Progression d'une campagne en direct (Server-Sent Events, voir ngo/events.py).
+ *
+ * <script src=".../campaign-progress.js" data-progress-url="/fr/events/campaign/12/"></script>
+ *
+ * <span data-progress="collected">      montant collecté
+ * <span data-progress="percent">        pourcentage de l'objectif
+ * <span data-progress="contributors">   nombre de contributions payées
+ * <div class="progress-bar" data-progress-bar>
+ *
+ * Les mises à jour sont regroupées côté serveur (au plus une par seconde).
+ */
+(function () {
+  const script = document.currentScript;
+  if (!script || !script.dataset.progressUrl || !window.EventSource) return;
+
+  function fill(name, value) {
+    document.querySelectorAll(`[data-progress="${name}"]`).forEach((el) => {
+      el.textContent = value;
+    });
+  }
+
+  const source = new EventSource(script.dataset.progressUrl);
+  source.addEventListener("progress", (event) => {
+    const data = JSON.parse(event.data);
+    fill("collected", data.collected_amount);
+    fill("percent", data.progress);
+    fill("contributors", data.contributors);
+    document.querySelectorAll("[data-progress-bar]").forEach((bar) => {
+      const width = `${Math.min(data.progress, 100)}%`;
+      bar.style.setProperty("--progress", width);
+      bar.style.width = width;
+      // aria-valuemax = 100 : valeur en pourcentage, sinon en montant
+      bar.setAttribute(
+        "aria-valuenow",
+        bar.getAttribute("aria-valuemax") === "100" ? data.progress : data.collected_amount
+      );
+    });
+    document.dispatchEvent(new CustomEvent("ngo:progress", { detail: data }));
+  });
+})();
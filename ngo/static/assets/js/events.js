@@ -0,0 +1,74 @@
+/*
+ * Événements en direct (Server-Sent Events, voir ngo/events.py).
+ *
+ * <script src=".../events.js" data-events-url="/fr/events/stream/"></script>
+ *
+ * <span data-unread="messages">3</span>       compteur mis à jour (masqué à 0)
+ * <div data-events-list="notifications" data-href="/fr/notifications/entrepreneur/0/">
+ *                                             nouvelles entrées ajoutées en tête
+ *
+ * Chaque événement est aussi réémis sur document ("ngo:unread", "ngo:notification",
+ * "ngo:message", detail = données reçues). Sans ASGI le serveur répond 204 et le
+ * navigateur ne se reconnecte pas : la page garde ses compteurs du rendu.
+ */
+(function () {
+  const script = document.currentScript;
+  if (!script || !script.dataset.eventsUrl || !window.EventSource) return;
+
+  function setCount(kind, value) {
+    document.querySelectorAll(`[data-unread="${kind}"]`).forEach((badge) => {
+      badge.textContent = value;
+      badge.style.display = value ? "" : "none";
+    });
+  }
+
+  function prepend(kind, id, title, text) {
+    document.querySelectorAll(`[data-events-list="${kind}"]`).forEach((list) => {
+      const item = document.createElement("a");
+      item.className = "dropdown-item preview-item";
+      if (list.dataset.href) item.href = list.dataset.href.replace(/0\/$/, `${id}/`);
+      const content = document.createElement("div");
+      content.className = "preview-item-content";
+      const subject = document.createElement("p");
+      subject.className = "preview-subject ellipsis mb-1";
+      subject.textContent = title;
+      const detail = document.createElement("p");
+      detail.className = "text-muted mb-0";
+      detail.textContent = text;
+      content.append(subject, detail);
+      item.appendChild(content);
+
+      // Sous l'en-tête de la liste déroulante s'il y en a un
+      const divider = list.querySelector(".dropdown-divider");
+      if (divider) {
+        const separator = document.createElement("div");
+        separator.className = "dropdown-divider";
+        divider.after(item, separator);
+      } else {
+        list.prepend(item);
+      }
+    });
+  }
+
+  const handlers = {
+    unread(data) {
+      setCount("notifications", data.notifications);
+      setCount("messages", data.messages);
+    },
+    notification(data) {
+      prepend("notifications", data.id, data.title, data.message);
+    },
+    message(data) {
+      prepend("messages", data.id, data.subject, data.sender);
+    },
+  };
+
+  const source = new EventSource(script.dataset.eventsUrl);
+  Object.keys(handlers).forEach((name) => {
+    source.addEventListener(name, (event) => {
+      const data = JSON.parse(event.data);
+      handlers[name](data);
+      document.dispatchEvent(new CustomEvent(`ngo:${name}`, { detail: data }));
+    });
+  });
+})();
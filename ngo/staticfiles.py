@@ -0,0 +1,315 @@
+"""
+Chaîne des fichiers statiques : audit, bundles et compression.
+
+- ``audit()`` : fichiers de ``ngo/static`` qu'aucun gabarit, aucun code et
+  aucune feuille de style utilisée ne référence, et balises ``{% static %}``
+  qui désignent un fichier absent (commande ``audit_static``).
+  Les motifs retenus (``STATIC_UNUSED_FILE``) sont ignorés par
+  ``collectstatic`` (voir ``ngo.apps.NgoStaticFilesConfig``) ;
+- ``STATIC_BUNDLES`` : feuilles de style et scripts communs concaténés et
+  minifiés en un fichier par bundle (balise ``{% static_bundle %}``) ;
+- ``BundledStaticFilesStorage`` : noms hachés (manifeste WhiteNoise), bundles
+  construits pendant ``collectstatic`` et pré-compression Brotli / gzip dans
+  des processus parallèles, seulement pour les fichiers nouveaux ou modifiés.
+"""
+import logging
+import os
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from functools import partial
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.finders import FileSystemFinder
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.template import engines
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+TEMPLATE_STATIC_RE = re.compile(r"""{%\s*static\s+(['"])(?P<path>[^'"]+)\1""")
+DYNAMIC_STATIC_RE = re.compile(r"""{%\s*static\s+(?P<expression>[^'"\s][^%]*?)\s*%}""")
+LITERAL_STATIC_RE = re.compile(r"""/static/(?P<path>[\w./@-]+\.\w+)""")
+QUOTED_PATH_RE = re.compile(r"""['"](?P<path>\w[\w./@-]*\.\w+)['"]""")  # "assets/img/x.jpg" dans le code
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)(?P<url>[^'")]+)\1\s*\)""")
+CSS_IMPORT_RE = re.compile(r"""@import\s+(?:url\()?\s*(['"])(?P<url>[^'"]+)\1\s*\)?[^;]*;""")
+SOURCE_MAP_RE = re.compile(r"sourceMappingURL=(?P<url>[^\s*]+)")
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------
+# Références
+# --------------------------
+def _is_external(url):
+    return url.startswith(("data:", "http:", "https:", "//", "#", "/", "about:", "%23"))
+
+
+def _resolve(base, url):
+    """Chemin statique désigné par ``url`` depuis le fichier ``base`` (sans requête ni fragment)."""
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), url))
+
+
+def css_references(name, content):
+    urls = [match["url"].strip() for match in CSS_URL_RE.finditer(content)]
+    urls += [match["url"].strip() for match in CSS_IMPORT_RE.finditer(content)]
+    urls += [match["url"] for match in SOURCE_MAP_RE.finditer(content)]
+    return {_resolve(name, url) for url in urls if url and not _is_external(url)}
+
+
+def _template_sources():
+    """(nom, contenu) de tous les gabarits du projet et des applications installées."""
+    for engine in engines.all():
+        directories = list(getattr(engine, "template_dirs", ()))
+        for directory in directories:
+            for path in Path(directory).rglob("*.html"):
+                yield str(path), path.read_text(encoding="utf-8", errors="ignore")
+
+
+def _code_sources():
+    """Modules Python des applications du projet (pas des paquets installés)."""
+    base = Path(settings.BASE_DIR).resolve()
+    for app_config in apps.get_app_configs():
+        root = Path(app_config.path).resolve()
+        if base in root.parents:
+            for path in root.rglob("*.py"):
+                if "migrations" not in path.parts:
+                    yield str(path), path.read_text(encoding="utf-8", errors="ignore")
+
+
+def _literal_paths(content):
+    paths = {match["path"] for match in LITERAL_STATIC_RE.finditer(content)}
+    paths.update(match["path"] for match in QUOTED_PATH_RE.finditer(content))
+    return paths
+
+
+def own_files():
+    """{chemin statique: chemin disque} des fichiers de STATICFILES_DIRS (admin et paquets exclus)."""
+    files = {}
+    for finder in finders.get_finders():
+        if isinstance(finder, FileSystemFinder):
+            for path, storage in finder.list([]):
+                files[path.replace(os.sep, "/")] = storage.path(path)
+    return files
+
+
+@dataclass
+class Audit:
+    files: dict
+    used: set = field(default_factory=set)
+    dynamic: list = field(default_factory=list)  # (gabarit, expression) non résolues
+    missing: dict = field(default_factory=dict)  # chemin absent -> gabarits qui le référencent
+
+    @property
+    def unused(self):
+        return sorted(set(self.files) - self.used)
+
+    def size(self, paths):
+        return sum(os.path.getsize(self.files[path]) for path in paths)
+
+
+def audit():
+    result = Audit(files=own_files())
+    pending = set()
+    for name, content in _template_sources():
+        for match in TEMPLATE_STATIC_RE.finditer(content):
+            pending.add(match["path"])
+            if match["path"] not in result.files and not finders.find(match["path"]):
+                result.missing.setdefault(match["path"], set()).add(name)
+        pending.update(_literal_paths(content))
+        result.dynamic.extend((name, match["expression"]) for match in DYNAMIC_STATIC_RE.finditer(content))
+    for _name, content in _code_sources():
+        pending.update(_literal_paths(content))
+    for sources in getattr(settings, "STATIC_BUNDLES", {}).values():
+        pending.update(sources)
+    keep = getattr(settings, "STATIC_AUDIT_KEEP", ())
+    pending.update(path for path in result.files if any(fnmatch(path, pattern) for pattern in keep))
+
+    # Fermeture : ce que référencent les feuilles de style et scripts utilisés
+    while pending:
+        path = pending.pop()
+        if path in result.used or path not in result.files:
+            continue
+        result.used.add(path)
+        if path.endswith((".css", ".js")):
+            content = Path(result.files[path]).read_text(encoding="utf-8", errors="ignore")
+            if path.endswith(".css"):
+                pending.update(css_references(path, content))
+            else:
+                pending.update(_resolve(path, match["url"]) for match in SOURCE_MAP_RE.finditer(content))
+                pending.update(_literal_paths(content))
+    return result
+
+
+def unused_patterns(files, unused):
+    """Motifs d'exclusion : un répertoire entier inutilisé devient ``répertoire/*``."""
+    unused = set(unused)
+    used_directories = set()
+    for path in set(files) - unused:
+        parts = path.split("/")[:-1]
+        used_directories.update("/".join(parts[:index]) for index in range(1, len(parts) + 1))
+    patterns = set()
+    for path in unused:
+        parts = path.split("/")[:-1]
+        # Répertoire le plus haut qui ne contient aucun fichier utilisé
+        for index in range(1, len(parts) + 1):
+            directory = "/".join(parts[:index])
+            if directory not in used_directories:
+                patterns.add(f"{directory}/*")
+                break
+        else:
+            patterns.add(path)
+    return sorted(patterns)
+
+
+def ignore_patterns():
+    """Motifs écrits par ``audit_static --write`` (aucun si le fichier n'existe pas)."""
+    path = getattr(settings, "STATIC_UNUSED_FILE", None)
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip() and not line.startswith("#")]
+
+
+# --------------------------
+# Bundles
+# --------------------------
+def bundles_enabled():
+    return getattr(settings, "STATIC_BUNDLES_ENABLED", False)
+
+
+def _rebase_css(source, bundle, content):
+    """Réécrit les url() relatives de ``source`` pour qu'elles restent valides depuis ``bundle``."""
+    def rebase(match):
+        url = match["url"].strip()
+        if _is_external(url):
+            return match[0]
+        suffix = url[len(url.split("?", 1)[0].split("#", 1)[0]):]
+        target = _resolve(source, url)
+        return f'url("{posixpath.relpath(target, posixpath.dirname(bundle))}{suffix}")'
+    return CSS_URL_RE.sub(rebase, content)
+
+
+def build_bundle(name, read):
+    """Contenu minifié du bundle ``name`` ; ``read(chemin)`` lit une source."""
+    import rcssmin
+    import rjsmin
+
+    sources = settings.STATIC_BUNDLES[name]
+    if name.endswith(".css"):
+        imports, parts = [], []
+        for source in sources:
+            content = _rebase_css(source, name, read(source))
+            # Les @import doivent précéder toute règle : remontés en tête du bundle
+            imports.extend(match[0] for match in CSS_IMPORT_RE.finditer(content))
+            parts.append(CSS_IMPORT_RE.sub("", content))
+        return rcssmin.cssmin("\n".join(imports + parts))
+    # Scripts classiques : « ; » entre deux fichiers pour ne pas fusionner leurs instructions
+    return ";\n".join(rjsmin.jsmin(read(source)) for source in sources)
+
+
+def _read_source(paths, source):
+    storage, path = paths[source]
+    with storage.open(path) as handle:
+        return handle.read().decode("utf-8")
+
+
+# --------------------------
+# Stockage (collectstatic)
+# --------------------------
+def _compress(extensions, path):
+    return Compressor(extensions=extensions, quiet=True).compress(path)
+
+
+def _already_compressed(path, content_addressed):
+    """
+    Versions compressées à jour ? Un nom haché désigne toujours le même contenu
+    (même si collectstatic réécrit les feuilles de style) ; sinon WhiteNoise
+    donne à .br / .gz la date du fichier source : même date = même contenu.
+    """
+    mtime = os.stat(path).st_mtime
+    for suffix in (".br", ".gz"):
+        try:
+            compressed = os.stat(path + suffix)
+        except FileNotFoundError:
+            continue
+        if content_addressed or compressed.st_mtime == mtime:
+            return True
+    return False
+
+
+class BundledStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    # {% static %} vers un fichier absent du manifeste : URL non hachée (404 comme
+    # avant) plutôt qu'une erreur 500 ; ces références sont signalées par audit_static
+    manifest_strict = False
+    _collecting = False
+
+    # Les cartes de sources (sourceMappingURL) ne sont pas publiées : la plupart
+    # des bibliothèques tierces livrées dans ngo/static référencent une carte absente
+    patterns = tuple(
+        (extension, tuple(
+            pattern for pattern in entries
+            if "sourceMappingURL" not in (pattern if isinstance(pattern, str) else pattern[0])
+        ))
+        for extension, entries in ManifestStaticFilesStorage.patterns
+    )
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None or self.exists(name):
+                raise
+            # url() d'une feuille tierce vers un fichier absent : laissée telle quelle (404 comme avant) ;
+            # signalée pendant collectstatic, pas à chaque recherche dans le manifeste (manifest_strict)
+            if self._collecting:
+                logger.warning("Fichier statique référencé introuvable : %s", name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        self._collecting = True
+        try:
+            yield from self._post_process_bundles(paths, dry_run, **options)
+        finally:
+            self._collecting = False
+
+    def _post_process_bundles(self, paths, dry_run, **options):
+        if not dry_run:
+            for name in getattr(settings, "STATIC_BUNDLES", {}):
+                content = build_bundle(name, lambda source: _read_source(paths, source)).encode("utf-8")
+                if self.exists(name):
+                    with self.open(name) as current:
+                        changed = current.read() != content
+                    if changed:
+                        self.delete(name)
+                else:
+                    changed = True
+                if changed:  # inchangé : fichier et versions compressées conservés
+                    self._save(name, ContentFile(content))
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def compress_files(self, paths):
+        """Compression en processus parallèles, limitée aux fichiers nouveaux ou modifiés."""
+        extensions = getattr(settings, "WHITENOISE_SKIP_COMPRESS_EXTENSIONS", None)
+        compressor = self.create_compressor(extensions=extensions, quiet=True)
+        hashed = set(self.hashed_files.values())
+        pending = [
+            path for path in paths
+            if compressor.should_compress(path) and not _already_compressed(self.path(path), path in hashed)
+        ]
+        if not pending:
+            return
+        root = self.path("")
+        workers = getattr(settings, "STATIC_COMPRESS_WORKERS", None) or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            full_paths = [self.path(path) for path in pending]
+            for path, written in zip(pending, executor.map(partial(_compress, extensions), full_paths, chunksize=16)):
+                for compressed_path in written:
+                    yield path, os.path.relpath(compressed_path, root).replace(os.sep, "/")
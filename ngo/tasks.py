@@ -18,3 +18,89 @@ def notify_inactive_entrepreneurs():
     return f"{inactive_users.count()} notifications envoyées."
 
 
+
+
+@shared_task
+def snapshot_exchange_rates():
+    """Instantané journalier des taux de change (historique utilisé par ngo.currency)."""
+    from ngo.currency import snapshot_rates
+    count = snapshot_rates()
+    return f"{count} taux enregistrés."
+
+
+@shared_task
+def update_repayment_schedules():
+    """Échéanciers manquants (campagnes closes en masse) et échéances passées en retard."""
+    from ngo import repayments
+    created = repayments.generate_pending_schedules()
+    overdue = repayments.mark_overdue()
+    return f"{created} échéances créées, {overdue} en retard."
+
+
+@shared_task(ignore_result=True)
+def process_payment_events():
+    """Applique par lots les événements de paiement en attente (voir ngo.payments)."""
+    from ngo import payments
+    count = payments.process_events()
+    return f"{count} événements de paiement traités."
+
+
+@shared_task(ignore_result=True)
+def publish_campaign_progress(kind, pks):
+    """Publication regroupée de la progression de campagnes très sollicitées (voir ngo.events)."""
+    from ngo import events
+    events.publish_progress(kind, pks)
+
+
+@shared_task(ignore_result=True)
+def process_payment_proof(label, pk):
+    """Miniature et empreinte perceptuelle d'une preuve de paiement (voir ngo.proofs)."""
+    from ngo import proofs
+    proofs.process_proof(label, pk)
+
+
+@shared_task(ignore_result=True)
+def generate_lite_thumbnail(image_name):
+    """Miniature d'une image pour le mode allégé (voir ngo.lite)."""
+    from ngo import lite
+    lite.generate_thumbnail(image_name)
+
+
+@shared_task(ignore_result=True)
+def close_campaigns():
+    """Objectifs atteints et campagnes arrivées à échéance (voir ngo.lifecycle)."""
+    from ngo import lifecycle
+    log = lifecycle.run()
+    return f"{log.campaigns_completed + log.loans_completed} terminées, {log.campaigns_failed + log.loans_failed} échouées."
+
+
+@shared_task(ignore_result=True)
+def assign_rewards():
+    """Récompenses des contributions payées depuis le dernier passage (voir ngo.rewards)."""
+    from ngo import rewards
+    evaluated, assigned = rewards.assign_rewards()
+    return f"{evaluated} contributions évaluées, {assigned} récompenses attribuées."
+
+
+@shared_task(ignore_result=True)
+def compute_revenue():
+    """Commissions non enregistrées et agrégats de revenus (voir ngo.revenue)."""
+    from ngo import revenue
+    commissions, rollups = revenue.run()
+    return f"{commissions} commissions rattrapées, {rollups} agrégats journaliers."
+
+
+@shared_task(ignore_result=True)
+def rollup_analytics():
+    """Compartiments journaliers des statistiques des derniers jours (voir ngo.analytics)."""
+    from ngo import analytics
+    written = analytics.run()
+    return f"{written} statistiques journalières écrites."
+
+
+@shared_task(ignore_result=True)
+def generate_intermediaire_report(profile_id, fmt):
+    """Export CSV / PDF du portefeuille d'un intermédiaire (voir ngo.reports)."""
+    from ngo import reports, routers
+    with routers.replica_reads():
+        return reports.generate_export(profile_id, fmt)
@@ -0,0 +1,11 @@
+from django import template
+
+from ngo import lite
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(image):
+    """URL de la miniature d'une image (mode allégé), "" si indisponible."""
+    return lite.thumbnail_url(image)
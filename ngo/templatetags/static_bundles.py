@@ -0,0 +1,16 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from ngo import staticfiles
+
+register = template.Library()
+
+
+@register.simple_tag
+def static_bundle(name):
+    """Balises <link> / <script> d'un bundle de STATIC_BUNDLES (ses sources une à une en développement)."""
+    paths = [name] if staticfiles.bundles_enabled() else settings.STATIC_BUNDLES[name]
+    tag = '<link rel="stylesheet" href="{}">' if name.endswith(".css") else '<script src="{}"></script>'
+    return format_html_join("\n    ", tag, ((static(path),) for path in paths))
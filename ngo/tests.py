@@ -1,3 +1,674 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from dateutil.relativedelta import relativedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import currency as currency_engine
+from . import events, ledger, lite, payments, proofs, reference, repayments, reports, revenue, routers, tasks, throttle
+from .middleware import PrimaryPinMiddleware
+from .models import (
+    Campaign, Category, Commission, Contribution, Country, Currency, ExchangeRate, LedgerEntry, LoanCampaign, Payment, PaymentEvent,
+    Project, ProjectBalance, ProofHashBand, Region, RepaymentInstallment, Reward, User, WithdrawalRequest,
+)
+
+
+class ProcessPaymentEventsTests(TestCase):
+    """Boîte de réception des webhooks de paiement, de l'enregistrement au traitement par lots."""
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(
+            code="XAF", name="Franc CFA", symbol="FCFA", exchange_rate_to_usd=Decimal("0.0016")
+        )
+        region = Region.objects.create(name="Afrique centrale")
+        country = Country.objects.create(
+            code="CM", name="Cameroun", region=region, currency=currency, project_submission_fee=5000
+        )
+        Category.objects.create(name="Agriculture")
+        entrepreneur = User.objects.create_user(
+            email="ent@example.com", password="pw12345!", role="entrepreneur", country=country
+        )
+        project = Project.objects.create(
+            title="Puits", entrepreneur=entrepreneur, description="Puits d'eau potable",
+            country=country, target_amount=1000000, status="approved",
+        )
+        cls.campaign = Campaign.objects.create(
+            title="Campagne eau", project=project, goal_amount=500000, status="active", created_by=entrepreneur
+        )
+
+    def record(self, transaction_id, amount, event_type="payment.completed"):
+        payments.record_event("other", {
+            "type": event_type,
+            "transaction_id": transaction_id,
+            "amount": str(amount),
+            "campaign_id": self.campaign.pk,
+        })
+
+    def test_process_events_applies_every_batch(self):
+        for index in range(5):
+            self.record(f"tx-{index}", 1000)
+        self.record("tx-failed", 1000, event_type="payment.failed")
+
+        with mock.patch.object(events, "campaigns_changed") as campaigns_changed:
+            with self.captureOnCommitCallbacks(execute=True):
+                processed = payments.process_events(batch_size=2)
+
+        self.assertEqual(processed, 6)
+        self.assertFalse(PaymentEvent.objects.filter(status="pending").exists())
+        self.assertEqual(Contribution.objects.filter(campaign=self.campaign, payment_status="completed").count(), 5)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.collected_amount, Decimal("5000"))
+        # Un appel par lot, après validation de chaque transaction
+        self.assertEqual(campaigns_changed.call_count, 3)
+        campaigns_changed.assert_called_with({self.campaign.pk}, set())
+
+    def test_progress_publication_is_coalesced_per_campaign(self):
+        cache.clear()
+        with mock.patch.object(events.LocalBroker, "listening", return_value=True), \
+                mock.patch.object(events, "_send") as send, \
+                mock.patch.object(events, "_progress_rows", wraps=events._progress_rows) as rows, \
+                mock.patch.object(tasks.publish_campaign_progress, "apply_async") as deferred:
+            for _update in range(5):
+                events.campaigns_changed({self.campaign.pk})
+            # Une publication immédiate, les suivantes regroupées en une seule tâche
+            self.assertEqual((rows.call_count, send.call_count, deferred.call_count), (1, 1, 1))
+            kind, pks = deferred.call_args.kwargs["args"]
+            events.publish_progress(kind, pks)
+        self.assertEqual((rows.call_count, send.call_count), (2, 2))
+
+    def pledge(self, amount=1000):
+        return Contribution.objects.create(
+            campaign=self.campaign, amount=Decimal(amount), contribution_type="donation", payment_method="other"
+        )
+
+    def apply(self, contribution, transaction_id, amount, event_type="payment.completed"):
+        event, _created = payments.record_event("other", {
+            "type": event_type,
+            "transaction_id": transaction_id,
+            "amount": str(amount),
+            "contribution_id": str(contribution.pk),  # chaîne, comme certaines passerelles
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            payments.process_events()
+        event.refresh_from_db()
+        contribution.refresh_from_db()
+        return event
+
+    @override_settings(PAYMENT_WEBHOOK_SECRET="secret")
+    def test_webhook_signature(self):
+        body = json.dumps({"type": "payment.completed", "transaction_id": "tx-sig", "amount": "10", "campaign_id": 1})
+        url = reverse("payment_webhook", args=["other"])
+        response = self.client.post(url, body, content_type="application/json", headers={"X-Signature": "0" * 64})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+        signature = payments.sign(body.encode(), "secret")
+        response = self.client.post(url, body, content_type="application/json", headers={"X-Signature": signature})
+        self.assertEqual(response.json()["status"], "received")
+
+    def test_duplicate_transaction_is_recorded_once(self):
+        self.record("tx-dup", 1000)
+        event, created = payments.record_event("other", {
+            "type": "payment.completed", "transaction_id": "tx-dup", "amount": "1000", "campaign_id": self.campaign.pk,
+        })
+        self.assertFalse(created)
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            payments.process_events()
+        self.assertEqual(Contribution.objects.count(), 1)
+
+    def test_string_contribution_id_completes_the_pledge(self):
+        contribution = self.pledge()
+        event = self.apply(contribution, "tx-str", "1000.00")
+        self.assertEqual(event.status, "processed")
+        self.assertEqual(contribution.payment_status, "completed")
+        self.assertEqual(Contribution.objects.count(), 1)
+
+    def test_amount_mismatch_is_ignored(self):
+        contribution = self.pledge(100000)
+        event = self.apply(contribution, "tx-small", 100)
+        self.assertEqual(event.status, "ignored")
+        self.assertIn("Montant", event.error)
+        self.assertEqual(contribution.payment_status, "pending")
+
+    def test_completed_contribution_is_not_changed_again(self):
+        contribution = self.pledge()
+        self.apply(contribution, "tx-ok", 1000)
+
+        failed = self.apply(contribution, "tx-late-failure", 1000, event_type="payment.failed")
+        again = self.apply(contribution, "tx-second", 1000)
+
+        self.assertEqual((failed.status, again.status), ("ignored", "ignored"))
+        self.assertEqual((contribution.payment_status, contribution.transaction_id), ("completed", "tx-ok"))
+
+
+class ReportVersionTests(TestCase):
+    """Versions des rapports d'intermédiaires : écrites à la validation de la transaction."""
+
+    def test_touch_waits_for_commit(self):
+        key = reports.VERSION_KEY.format(42)
+        cache.delete(key)
+        with self.captureOnCommitCallbacks() as callbacks:
+            reports.touch_entrepreneurs([42, None])
+            self.assertIsNone(cache.get(key))
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertIsNotNone(cache.get(key))
+
+
+class CountryCurrencyTests(TestCase):
+    """Devise figée à l'enregistrement, y compris pour un pays absent de l'instantané de référence."""
+
+    def test_country_created_after_snapshot(self):
+        currency = Currency.objects.create(code="NGN", name="Naira", symbol="₦", exchange_rate_to_usd=Decimal("0.0007"))
+        region = Region.objects.create(name="Afrique de l'Ouest")
+        reference.invalidate()
+        snapshot = reference.reference_data()
+        self.addCleanup(reference.invalidate)
+        country = Country.objects.create(
+            code="NG", name="Nigeria", region=region, currency=currency, project_submission_fee=5000
+        )
+        entrepreneur = User.objects.create_user(
+            email="ng@example.com", password="pw12345!", role="entrepreneur", country=country
+        )
+        project = Project.objects.create(
+            title="Forage", entrepreneur=entrepreneur, description="Forage", country=country, target_amount=1000
+        )
+
+        campaign = Campaign.objects.create(title="Campagne forage", project=project, goal_amount=1000, created_by=entrepreneur)
+
+        with mock.patch.object(reference, "reference_data", return_value=snapshot):
+            self.assertIsNone(snapshot.country(country.pk))
+            contribution = Contribution.objects.create(campaign=campaign, amount=100, contribution_type="donation")
+            withdrawal = WithdrawalRequest.objects.create(entrepreneur=entrepreneur, project=project, amount=50)
+
+        self.assertEqual(contribution.currency_id, currency.pk)
+        self.assertEqual(withdrawal.currency_id, currency.pk)
+        # Tarification lue en base puis retenue dans l'instantané
+        self.assertEqual(snapshot.submission_fee(country.pk), (5000, currency))
+        with self.assertNumQueries(0):
+            self.assertEqual(snapshot.intermediaire_fee(country.pk)[1], currency)
+            self.assertEqual(snapshot.commission_rate(country.pk), country.commission_rate)
+
+
+class CurrencyTotalTests(TestCase):
+    """Totaux convertis : taux historisé du jour de chaque ligne, devise du pays en repli."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usd = Currency.objects.create(code="USD", name="Dollar", symbol="$", exchange_rate_to_usd=1)
+        cls.zar = Currency.objects.create(code="ZAR", name="Rand", symbol="R", exchange_rate_to_usd=Decimal("0.05"))
+        region = Region.objects.create(name="Afrique australe")
+        country = Country.objects.create(code="ZA", name="Afrique du Sud", region=region, currency=cls.zar)
+        entrepreneur = User.objects.create_user(
+            email="za@example.com", password="pw12345!", role="entrepreneur", country=country
+        )
+        project = Project.objects.create(
+            title="Serre", entrepreneur=entrepreneur, description="Serre", country=country, target_amount=1000
+        )
+        cls.campaign = Campaign.objects.create(title="Campagne serre", project=project, goal_amount=1000, created_by=entrepreneur)
+
+    def setUp(self):
+        reference.invalidate()
+        self.today = timezone.localdate()
+        ExchangeRate.objects.filter(currency=self.zar).delete()
+        for days, rate in ((30, "0.10"), (10, "0.20")):
+            ExchangeRate.objects.create(currency=self.zar, date=self.today - timedelta(days=days), rate_to_usd=Decimal(rate))
+
+    def contribute(self, amount, days_ago, **fields):
+        contribution = Contribution.objects.create(
+            campaign=self.campaign, amount=Decimal(amount), contribution_type="donation", **fields
+        )
+        Contribution.objects.filter(pk=contribution.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return contribution
+
+    def test_rate_of_the_day_of_each_row(self):
+        self.contribute("100", 40)  # avant le premier instantané : taux courant 0.05
+        self.contribute("100", 20)  # 0.10
+        self.contribute("100", 5)   # 0.20
+        self.assertEqual(
+            ExchangeRate.objects.get(currency=self.zar, date=self.today - timedelta(days=30)).valid_until,
+            self.today - timedelta(days=10),
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(currency_engine.contributions_total(Contribution.objects.all(), "USD"), Decimal("35.00"))
+        # Vers ZAR, chaque jour est reconverti à son propre taux
+        self.assertEqual(currency_engine.contributions_total(Contribution.objects.all(), "ZAR"), Decimal("300.00"))
+
+    def test_row_without_currency_uses_country_currency(self):
+        contribution = self.contribute("100", 5)
+        Contribution.objects.filter(pk=contribution.pk).update(currency=None)
+        self.assertEqual(currency_engine.contributions_total(Contribution.objects.all(), "USD"), Decimal("20.00"))
+
+    def test_reward_label_uses_campaign_currency(self):
+        reward = Reward(campaign=self.campaign, title="Panier", description="Légumes", minimum_amount=Decimal("50"))
+        self.assertEqual(str(reward), "Panier (50 ZAR min)")
+
+
+class CommissionTests(TestCase):
+    """Commissions : taux et montant de l'écriture au grand livre, pas le taux courant du pays."""
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(
+            code="XOF", name="Franc CFA", symbol="FCFA", exchange_rate_to_usd=Decimal("0.0016")
+        )
+        region = Region.objects.create(name="Afrique de l'Ouest")
+        cls.country = Country.objects.create(
+            code="SN", name="Sénégal", region=region, currency=currency, project_submission_fee=5000,
+            commission_rate=5,
+        )
+        entrepreneur = User.objects.create_user(
+            email="sn@example.com", password="pw12345!", role="entrepreneur", country=cls.country
+        )
+        project = Project.objects.create(
+            title="Verger", entrepreneur=entrepreneur, description="Verger", country=cls.country, target_amount=1000
+        )
+        cls.campaign = Campaign.objects.create(
+            title="Campagne verger", project=project, goal_amount=1000, created_by=entrepreneur
+        )
+
+    def setUp(self):
+        reference.invalidate()
+
+    def contribute(self, amount):
+        return Contribution.objects.create(
+            campaign=self.campaign, amount=amount, contribution_type="donation", payment_status="completed"
+        )
+
+    def test_commission_recorded_with_posting(self):
+        contribution = self.contribute(Decimal("1000"))
+        self.country.commission_rate = 10
+        self.country.save()
+
+        commission = Commission.objects.get(contribution=contribution)
+        self.assertEqual(commission.rate, Decimal("5"))
+        self.assertEqual(commission.amount, Decimal("50.00"))
+        self.assertEqual(revenue.compute_commissions()[0], 0)
+
+    def test_backfill_reads_the_posting(self):
+        contribution = self.contribute(Decimal("1000"))
+        Commission.objects.filter(contribution=contribution).delete()
+        self.country.commission_rate = 10
+        self.country.save()
+
+        count, dates = revenue.compute_commissions()
+
+        self.assertEqual(count, 1)
+        self.assertEqual(dates, {contribution.created_at.date()})
+        commission = Commission.objects.get(contribution=contribution)
+        posted = LedgerEntry.objects.get(contribution=contribution, account="commission")
+        self.assertEqual(commission.amount, posted.amount)
+        self.assertEqual(commission.rate, Decimal("5"))
+        self.assertEqual(commission.gross, Decimal("1000"))
+
+
+class PrimaryPinMiddlewareTests(TestCase):
+    """Épinglage sur le primaire après une écriture, en WSGI comme en ASGI."""
+
+    def write(self):
+        Region.objects.create(name="Afrique australe")
+        return HttpResponse()
+
+    def test_sync(self):
+        middleware = PrimaryPinMiddleware(lambda request: self.write())
+        with mock.patch.object(routers, "replica_configured", return_value=True):
+            response = middleware(RequestFactory().get("/"))
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    async def test_async(self):
+        async def get_response(request):
+            return await sync_to_async(self.write)()
+
+        middleware = PrimaryPinMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with mock.patch.object(routers, "replica_configured", return_value=True):
+            response = await middleware(RequestFactory().get("/"))
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+
+class ProofDuplicateTests(TestCase):
+    """Doublons de preuves : comparés par la tâche de fond, lus tels quels par la file."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(email=f"proof{index}@example.com", password="pw12345!", role="entrepreneur")
+            for index in range(3)
+        ]
+
+    def payment(self, user, shade):
+        image = Image.new("RGB", (64, 64))
+        image.paste((shade, shade, shade), (0, 0, 32, 64))
+        buffer = BytesIO()
+        image.save(buffer, format="JPEG")
+        payment = Payment(
+            user=user, amount=5000, payment_type="project_submission", payment_method="mobile_money"
+        )
+        payment.proof.save("preuve.jpg", ContentFile(buffer.getvalue()), save=False)
+        with self.captureOnCommitCallbacks():
+            payment.save()
+        self.addCleanup(payment.proof.delete, save=False)
+        proofs.process_proof("payment", payment.pk)
+        payment.refresh_from_db()
+        return payment
+
+    def test_duplicates_recorded_on_both_sides(self):
+        first = self.payment(self.users[0], 255)
+        second = self.payment(self.users[1], 250)
+        own = self.payment(self.users[1], 255)  # même utilisateur que second : pas un doublon entre eux
+        first.refresh_from_db()
+
+        self.assertEqual(sorted(first.proof_duplicates), [["payment", second.pk], ["payment", own.pk]])
+        self.assertEqual(second.proof_duplicates, [["payment", first.pk]])
+        with self.assertNumQueries(0):
+            items = proofs.attach_duplicates([first, second])
+        self.assertEqual(items[1].duplicates, [("payment", first.pk)])
+
+        second.delete()
+        first.refresh_from_db()
+        self.assertEqual(first.proof_duplicates, [["payment", own.pk]])
+        self.assertFalse(ProofHashBand.objects.filter(label="payment", object_id=second.pk).exists())
+
+    def test_only_proofs_sharing_a_band_are_compared(self):
+        first = self.payment(self.users[0], 255)
+        original = first.proof_hash
+        self.assertEqual(ProofHashBand.objects.filter(label="payment", object_id=first.pk).count(), len(proofs.BAND_BOUNDS))
+
+        def flipped(count):
+            """Empreinte d'origine avec un bit inversé dans chacune des ``count`` premières tranches."""
+            value = int(original, 16)
+            for start, _end in proofs.BAND_BOUNDS[:count]:
+                value ^= 1 << (63 - 4 * start)
+            return f"{value:016x}"
+
+        # Distance 7 : aucune tranche commune, la preuve n'est pas candidate
+        Payment.objects.filter(pk=first.pk).update(proof_hash=flipped(7))
+        proofs.record_duplicates("payment", first.pk)
+        other = self.payment(self.users[1], 255)
+        self.assertEqual(other.proof_hash, original)
+        self.assertEqual(other.proof_duplicates, [])
+
+        # Distance 6 : une tranche commune suffit à la retrouver
+        Payment.objects.filter(pk=first.pk).update(proof_hash=flipped(6))
+        proofs.record_duplicates("payment", first.pk)
+        other.refresh_from_db()
+        self.assertEqual(other.proof_duplicates, [["payment", first.pk]])
+
+
+class LedgerTests(TestCase):
+    """Grand livre : encaissements, réservation, rejet et versement des retraits, contre-passation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(
+            code="GHS", name="Cedi", symbol="₵", exchange_rate_to_usd=Decimal("0.08")
+        )
+        region = Region.objects.create(name="Afrique de l'Ouest")
+        country = Country.objects.create(
+            code="GH", name="Ghana", region=region, currency=currency, project_submission_fee=5000, commission_rate=10,
+        )
+        cls.entrepreneur = User.objects.create_user(
+            email="gh@example.com", password="pw12345!", role="entrepreneur", country=country
+        )
+        cls.project = Project.objects.create(
+            title="Boulangerie", entrepreneur=cls.entrepreneur, description="Four", country=country, target_amount=5000
+        )
+        cls.campaign = Campaign.objects.create(
+            title="Campagne four", project=cls.project, goal_amount=5000, created_by=cls.entrepreneur
+        )
+
+    def setUp(self):
+        reference.invalidate()
+        self.contribution = Contribution.objects.create(
+            campaign=self.campaign, amount=Decimal("1000"), contribution_type="donation", payment_status="completed"
+        )
+
+    def balance(self):
+        return ProjectBalance.objects.get(pk=self.project.pk)
+
+    def withdraw(self, amount):
+        return ledger.request_withdrawal(self.project, self.entrepreneur, Decimal(amount))
+
+    def test_contribution_credits_net_of_commission(self):
+        balance = self.balance()
+        self.assertEqual(balance.available, Decimal("900.00"))
+        self.assertEqual(balance.commission, Decimal("100.00"))
+        self.assertEqual(ledger.record_contributions([self.contribution.pk]), 0)
+        self.assertEqual(ledger.check(), [])
+
+    def test_hold_reserves_available_balance(self):
+        self.withdraw("600")
+        balance = self.balance()
+        self.assertEqual((balance.available, balance.reserved), (Decimal("300.00"), Decimal("600.00")))
+        with self.assertRaises(ledger.PendingWithdrawal):
+            self.withdraw("100")
+
+    def test_hold_above_available_is_refused(self):
+        with self.assertRaises(ledger.InsufficientFunds):
+            self.withdraw("901")
+        self.assertFalse(WithdrawalRequest.objects.exists())
+        self.assertEqual(self.balance().reserved, 0)
+
+    def test_rejection_releases_hold(self):
+        withdrawal = self.withdraw("600")
+        self.assertEqual(ledger.set_withdrawal_status([withdrawal.pk], "rejected"), 1)
+        balance = self.balance()
+        self.assertEqual((balance.available, balance.reserved), (Decimal("900.00"), Decimal("0.00")))
+        # Déjà rejeté : plus de transition
+        self.assertEqual(ledger.set_withdrawal_status([withdrawal.pk], "paid"), 0)
+        self.assertEqual(ledger.check(), [])
+
+    def test_payout_moves_hold_to_withdrawn(self):
+        withdrawal = self.withdraw("600")
+        ledger.set_withdrawal_status([withdrawal.pk], "approved")
+        self.assertEqual(ledger.set_withdrawal_status([withdrawal.pk], "paid"), 1)
+        balance = self.balance()
+        self.assertEqual(
+            (balance.available, balance.reserved, balance.withdrawn),
+            (Decimal("300.00"), Decimal("0.00"), Decimal("600.00")),
+        )
+        self.assertEqual(ledger.check(), [])
+
+    def test_contribution_no_longer_completed_is_reversed(self):
+        self.contribution.payment_status = "failed"
+        self.contribution.save()
+        balance = self.balance()
+        self.assertEqual((balance.available, balance.commission, balance.collected), (0, 0, 0))
+        self.assertFalse(Commission.objects.filter(contribution=self.contribution).exists())
+        self.assertEqual(ledger.reverse_contributions([self.contribution.pk]), 0)
+
+        self.contribution.payment_status = "completed"
+        self.contribution.save()
+        self.assertEqual(self.balance().available, Decimal("900.00"))
+        self.assertEqual(ledger.check(), [])
+
+
+class RepaymentScheduleTests(TestCase):
+    """Échéancier généré au passage à « terminée », à partir de la date de clôture enregistrée."""
+
+    @classmethod
+    def setUpTestData(cls):
+        currency = Currency.objects.create(
+            code="KES", name="Shilling", symbol="KSh", exchange_rate_to_usd=Decimal("0.0077")
+        )
+        region = Region.objects.create(name="Afrique de l'Est")
+        country = Country.objects.create(
+            code="KE", name="Kenya", region=region, currency=currency, project_submission_fee=5000,
+        )
+        entrepreneur = User.objects.create_user(
+            email="ke@example.com", password="pw12345!", role="entrepreneur", country=country
+        )
+        cls.project = Project.objects.create(
+            title="Atelier", entrepreneur=entrepreneur, description="Couture", country=country, target_amount=5000
+        )
+
+    def setUp(self):
+        reference.invalidate()
+        self.loan = LoanCampaign.objects.create(
+            project=self.project, title="Prêt atelier", goal_amount=1000, interest_rate=12, repayment_duration=6,
+            status="active",
+        )
+        self.contribution = Contribution.objects.create(
+            loan_campaign=self.loan, amount=Decimal("1000"), contribution_type="loan", payment_status="completed"
+        )
+
+    def test_schedule_generated_once_on_transition(self):
+        self.loan.status = "completed"
+        with mock.patch.object(repayments, "generate_schedule", wraps=repayments.generate_schedule) as generate, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.loan.save()
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(RepaymentInstallment.objects.filter(loan_campaign=self.loan).count(), 6)
+        self.assertIsNotNone(self.loan.closed_at)
+
+        self.loan.title = "Prêt atelier (clos)"
+        with mock.patch.object(repayments, "generate_schedule") as generate, self.captureOnCommitCallbacks(execute=True):
+            self.loan.save()
+        generate.assert_not_called()
+
+    def test_first_due_date_follows_stored_closing_date(self):
+        self.loan.status = "completed"
+        self.loan.save()
+        closed_at = self.loan.closed_at
+        self.loan.refresh_from_db()
+        self.assertEqual(self.loan.closed_at, closed_at)
+        expected = timezone.localdate(closed_at) + relativedelta(months=1)
+        with mock.patch.object(timezone, "now", return_value=closed_at + timedelta(days=45)):
+            self.assertEqual(repayments.first_due_date(self.loan), expected)
+
+
+@override_settings(
+    LOGIN_THROTTLE_IP_BURST=3, LOGIN_THROTTLE_IP_PER_MINUTE=6,
+    LOGIN_THROTTLE_EMAIL_BURST=2, LOGIN_THROTTLE_EMAIL_PER_MINUTE=6,
+)
+class LoginThrottleTests(TestCase):
+    """Seaux à jetons en mémoire : remplissage, refus sans consommer l'autre seau, remise à plein, éviction."""
+
+    def setUp(self):
+        self.buckets = throttle.LocalBuckets()
+        self.clock = mock.patch("ngo.throttle.time").start()
+        self.clock.monotonic.return_value = 1000.0
+        mock.patch.object(throttle, "_store", self.buckets).start()
+        self.addCleanup(mock.patch.stopall)
+        self.request = RequestFactory().post("/login/", REMOTE_ADDR="10.0.0.1")
+
+    def tick(self, seconds):
+        self.clock.monotonic.return_value += seconds
+
+    def tokens(self, key):
+        tokens, stamp, limit = self.buckets._buckets[key]
+        return throttle._refill(tokens, stamp, limit, self.clock.monotonic.return_value)
+
+    def test_refill_at_constant_rate(self):
+        self.assertEqual(throttle.check_login(self.request, "a@example.com"), 0)
+        self.assertEqual(throttle.check_login(self.request, "a@example.com"), 0)
+        # Seau e-mail vide : un jeton toutes les 10 s (6 par minute)
+        self.assertAlmostEqual(throttle.check_login(self.request, "a@example.com"), 10)
+        self.tick(4)
+        self.assertAlmostEqual(throttle.check_login(self.request, "a@example.com"), 6)
+        self.tick(6)
+        self.assertEqual(throttle.check_login(self.request, "a@example.com"), 0)
+
+    def test_empty_email_bucket_leaves_ip_bucket_untouched(self):
+        ip_key = f"{throttle.PREFIX}:ip:10.0.0.1"
+        for _attempt in range(2):
+            throttle.check_login(self.request, "a@example.com")
+        self.assertAlmostEqual(self.tokens(ip_key), 1)
+        self.assertTrue(throttle.check_login(self.request, "a@example.com"))
+        self.assertAlmostEqual(self.tokens(ip_key), 1)
+        self.assertEqual(throttle.rejections(1)[timezone.localdate().isoformat()], {"email": 1})
+
+    def test_empty_ip_bucket_leaves_email_bucket_untouched(self):
+        for index in range(3):
+            throttle.check_login(self.request, f"user{index}@example.com")
+        self.assertTrue(throttle.check_login(self.request, "b@example.com"))
+        self.assertNotIn(throttle._email_key("b@example.com"), self.buckets._buckets)
+        self.assertEqual(throttle.rejections(1)[timezone.localdate().isoformat()], {"ip": 1})
+
+    def test_successful_login_refills_email_bucket(self):
+        for _attempt in range(2):
+            throttle.check_login(self.request, "a@example.com")
+        throttle.login_succeeded("A@example.com ")
+        self.assertNotIn(throttle._email_key("a@example.com"), self.buckets._buckets)
+        other = RequestFactory().post("/login/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(throttle.check_login(other, "a@example.com"), 0)
+
+    def test_full_buckets_forgotten_beyond_max_keys(self):
+        mock.patch.object(throttle, "LOCAL_MAX_KEYS", 4).start()
+        limit = throttle.Limit(2, 6)
+        self.buckets.take([("old", limit)])
+        self.tick(5)
+        self.buckets.take([("recent", limit)])
+        self.buckets.take([("busy", limit)])
+        self.buckets.take([("busy", limit)])
+        self.buckets.take([("fourth", limit)])
+        # « old » est de nouveau plein, les autres non : seul « old » est oublié
+        self.tick(6)
+        self.buckets.take([("new", limit)])
+        self.assertEqual(set(self.buckets._buckets), {"recent", "busy", "fourth", "new"})
+
+    def test_startup_warning_without_shared_store(self):
+        with override_settings(LOGIN_THROTTLE_URL=""), self.assertLogs("ngo.throttle", "WARNING"):
+            self.assertTrue(throttle.warn_if_local())
+        with override_settings(LOGIN_THROTTLE_URL="redis://localhost:6379/0"), self.assertNoLogs("ngo.throttle"):
+            self.assertFalse(throttle.warn_if_local())
+
+
+class LiteThumbnailTests(TestCase):
+    """Miniatures du mode allégé : URL lue dans le cache, création confiée à la tâche Celery."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+
+    def setUp(self):
+        cache.clear()
+        buffer = BytesIO()
+        Image.new("RGB", (1200, 800), (20, 120, 60)).save(buffer, format="JPEG")
+        self.image = Project(image=default_storage.save("projects/images/serre.jpg", ContentFile(buffer.getvalue()))).image
+
+    def test_generated_in_background_then_served_from_cache(self):
+        with mock.patch.object(tasks.generate_lite_thumbnail, "apply_async") as apply_async:
+            self.assertEqual(lite.thumbnail_url(self.image), "")
+            self.assertEqual(lite.thumbnail_url(self.image), "")
+        apply_async.assert_called_once_with(args=[self.image.name], retry=False)
+
+        url = lite.generate_thumbnail(self.image.name)
+        self.assertTrue(url.endswith(f"-{settings.LITE_THUMBNAIL_SIZE}.jpg"))
+        with self.assertNumQueries(0), mock.patch.object(lite, "generate_thumbnail") as generate:
+            self.assertEqual(lite.thumbnail_url(self.image), url)
+        generate.assert_not_called()
+        with default_storage.open(lite._thumbnail_name(self.image.name)) as stored, Image.open(stored) as thumbnail:
+            self.assertLessEqual(max(thumbnail.size), settings.LITE_THUMBNAIL_SIZE)
+
+    def test_generated_inline_when_broker_is_down(self):
+        with mock.patch.object(tasks.generate_lite_thumbnail, "apply_async", side_effect=OSError("broker")):
+            self.assertEqual(lite.thumbnail_url(self.image), "")
+        self.assertTrue(lite.thumbnail_url(self.image))
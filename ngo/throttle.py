@@ -0,0 +1,261 @@
+"""
+Limitation des tentatives de connexion par seaux à jetons (token bucket).
+
+Chaque tentative prend un jeton dans le seau de l'adresse IP et dans celui de
+l'e-mail visé ; un seau se remplit à vitesse constante jusqu'à sa capacité.
+Si l'un des deux est vide, la tentative est refusée avant tout calcul de mot
+de passe (PBKDF2) : le bourrage d'identifiants ne coûte plus de CPU. Une
+connexion réussie remplit de nouveau le seau de l'e-mail.
+
+Stockage :
+
+- ``LocalBuckets`` : dans le processus ; chaque worker gunicorn a ses propres
+  seaux (la limite réelle est multipliée par WEB_CONCURRENCY, signalé au
+  démarrage par ``warn_if_local``) ;
+- ``RedisBuckets`` (``LOGIN_THROTTLE_URL=redis://...``) : seaux partagés par
+  tous les workers, lus et mis à jour atomiquement par un script Lua.
+
+Les refus sont journalisés et comptés par jour et par seau (``rejections()``,
+commande ``login_throttle_stats``).
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "ngo:throttle:login"
+REJECTIONS_KEY = "ngo:throttle:rejected:{}"
+REJECTIONS_DAYS = 30  # durée de conservation des compteurs (Redis)
+LOCAL_MAX_KEYS = 10000  # au-delà, les seaux pleins sont oubliés
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: int
+    per_minute: float
+
+    @property
+    def rate(self):
+        """Jetons rendus par seconde."""
+        return self.per_minute / 60
+
+
+def limits():
+    return {
+        "ip": Limit(settings.LOGIN_THROTTLE_IP_BURST, settings.LOGIN_THROTTLE_IP_PER_MINUTE),
+        "email": Limit(settings.LOGIN_THROTTLE_EMAIL_BURST, settings.LOGIN_THROTTLE_EMAIL_PER_MINUTE),
+    }
+
+
+def _refill(tokens, stamp, limit, now):
+    return min(limit.capacity, tokens + max(0, now - stamp) * limit.rate)
+
+
+# --------------------------
+# Stockage des seaux
+# --------------------------
+class LocalBuckets:
+    """Seaux en mémoire du processus."""
+
+    shared = False
+
+    def __init__(self):
+        self._buckets = {}  # clé -> (jetons, horodatage, limite)
+        self._rejections = Counter()  # (jour, seau) -> refus
+        self._lock = threading.Lock()
+
+    def take(self, buckets):
+        """
+        Prend un jeton dans chacun des seaux [(clé, limite)], ou dans aucun si
+        l'un est vide : renvoie (secondes d'attente, index du seau vide) ou (0, None).
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, limit in buckets:
+                tokens, stamp, _limit = self._buckets.get(key, (limit.capacity, now, limit))
+                levels.append(_refill(tokens, stamp, limit, now))
+            for index, ((_key, limit), tokens) in enumerate(zip(buckets, levels)):
+                if tokens < 1:
+                    return (1 - tokens) / limit.rate, index
+            if len(self._buckets) >= LOCAL_MAX_KEYS:
+                self._forget_full(now)
+            for (key, limit), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - 1, now, limit)
+        return 0, None
+
+    def _forget_full(self, now):
+        # Un seau rempli est identique à un seau absent
+        for key, (tokens, stamp, limit) in list(self._buckets.items()):
+            if _refill(tokens, stamp, limit, now) >= limit.capacity:
+                del self._buckets[key]
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def count_rejection(self, day, scope):
+        with self._lock:
+            self._rejections[day, scope] += 1
+
+    def rejections(self, days):
+        with self._lock:
+            return {day: {scope: count for (d, scope), count in self._rejections.items() if d == day} for day in days}
+
+
+TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call("HMGET", key, "tokens", "stamp")
+    local tokens = tonumber(state[1]) or capacity
+    local stamp = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+    if tokens < 1 then
+        return {tostring((1 - tokens) / rate), i}
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local tokens = levels[i] - 1
+    redis.call("HSET", key, "tokens", tostring(tokens), "stamp", ARGV[1])
+    redis.call("PEXPIRE", key, math.ceil((capacity - tokens) / rate * 1000))
+end
+return {"0", 0}
+"""
+
+
+class RedisBuckets:
+    """Seaux partagés entre workers : une seule requête Redis par tentative."""
+
+    shared = True
+
+    def __init__(self, url):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(TAKE_SCRIPT)
+
+    def take(self, buckets):
+        arguments = [repr(time.time())]
+        for _key, limit in buckets:
+            arguments += [limit.capacity, repr(limit.rate)]
+        wait, index = self._take(keys=[key for key, _limit in buckets], args=arguments)
+        wait = float(wait)
+        return (wait, index - 1) if wait else (0, None)
+
+    def reset(self, key):
+        self._client.delete(key)
+
+    def count_rejection(self, day, scope):
+        key = REJECTIONS_KEY.format(day)
+        with self._client.pipeline(transaction=False) as pipe:
+            pipe.hincrby(key, scope, 1)
+            pipe.expire(key, REJECTIONS_DAYS * 86400)
+            pipe.execute()
+
+    def rejections(self, days):
+        with self._client.pipeline(transaction=False) as pipe:
+            for day in days:
+                pipe.hgetall(REJECTIONS_KEY.format(day))
+            rows = pipe.execute()
+        return {
+            day: {scope.decode(): int(count) for scope, count in row.items()}
+            for day, row in zip(days, rows)
+        }
+
+
+_store = None
+
+
+def warn_if_local():
+    """Au démarrage : seaux en mémoire, la limite réelle est multipliée par le nombre de workers."""
+    if getattr(settings, "LOGIN_THROTTLE_URL", ""):
+        return False
+    logger.warning(
+        "LOGIN_THROTTLE_URL non défini : seaux de connexion propres à chaque worker, "
+        "limites effectives multipliées par WEB_CONCURRENCY (%s)",
+        getattr(settings, "WEB_CONCURRENCY", 1),
+    )
+    return True
+
+
+def store():
+    global _store
+    if _store is None:
+        url = getattr(settings, "LOGIN_THROTTLE_URL", "")
+        _store = RedisBuckets(url) if url else LocalBuckets()
+    return _store
+
+
+# --------------------------
+# Connexion
+# --------------------------
+def client_ip(request):
+    """
+    Adresse du client : derrière TRUSTED_PROXY_COUNT proxys, l'entrée de
+    X-Forwarded-For ajoutée par le plus proche de nous (les précédentes sont
+    fournies par le client et falsifiables).
+    """
+    proxies = getattr(settings, "TRUSTED_PROXY_COUNT", 0)
+    forwarded = [part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if part.strip()]
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _email_key(email):
+    digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+    return f"{PREFIX}:email:{digest}"
+
+
+def check_login(request, email):
+    """
+    Prend un jeton pour une tentative de connexion : 0 si elle est autorisée,
+    sinon le nombre de secondes avant qu'elle le soit.
+    """
+    current = limits()
+    buckets = [(f"{PREFIX}:ip:{client_ip(request)}", current["ip"])]
+    if email:
+        buckets.append((_email_key(email), current["email"]))
+    try:
+        wait, index = store().take(buckets)
+    except Exception:
+        # Stockage indisponible : la connexion ne doit pas en dépendre
+        logger.exception("Limitation des connexions indisponible")
+        return 0
+    if not wait:
+        return 0
+    scope = ("ip", "email")[index]
+    logger.warning("Tentative de connexion refusée (seau %s vide) depuis %s", scope, client_ip(request))
+    try:
+        store().count_rejection(timezone.localdate().isoformat(), scope)
+    except Exception:
+        logger.exception("Comptage du refus de connexion impossible")
+    return wait
+
+
+def login_succeeded(email):
+    """Connexion réussie : le seau de l'e-mail est de nouveau plein."""
+    try:
+        store().reset(_email_key(email))
+    except Exception:
+        logger.exception("Limitation des connexions indisponible")
+
+
+def rejections(days=7):
+    """{jour ISO: {"ip": n, "email": n}} des ``days`` derniers jours, du plus récent au plus ancien."""
+    today = timezone.localdate()
+    return store().rejections([(today - timedelta(days=offset)).isoformat() for offset in range(days)])
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include, reverse_lazy
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
@@ -10,7 +11,10 @@ from .views import (
     user_logout,notification_detail_entrepreneur,
 )
 from . import views
+from . import async_views
 
+# Tableaux de bord : variantes asynchrones sous ASGI (voir ngo/async_views.py)
+dashboards = async_views if settings.ASYNC_DASHBOARDS else views
 
 urlpatterns = [
     path('login/redirect/', views.login_redirect, name='login_redirect'),
@@ -20,9 +24,12 @@ urlpatterns = [
 
     # Dashboards
     path('dashboard/', login_required(views.dashboard), name='dashboard'),
-    path("dashboard/entrepreneur/", views.dashboard_entrepreneur, name="dashboard_entrepreneur"),
-    path("dashboard/investisseur/", views.dashboard_investisseur, name="dashboard_investisseur"),
-    path("dashboard/intermediaire/", views.dashboard_intermediaire, name="dashboard_intermediaire"),
+    path("dashboard/entrepreneur/", dashboards.dashboard_entrepreneur, name="dashboard_entrepreneur"),
+    path("dashboard/investisseur/", dashboards.dashboard_investisseur, name="dashboard_investisseur"),
+    path("dashboard/intermediaire/", dashboards.dashboard_intermediaire, name="dashboard_intermediaire"),
+    path("events/stream/", async_views.event_stream, name="event_stream"),
+    path("events/campaign/<int:pk>/", async_views.campaign_progress_stream, {"kind": "campaign"}, name="campaign_progress_stream"),
+    path("events/loan/<int:pk>/", async_views.campaign_progress_stream, {"kind": "loan"}, name="loan_campaign_progress_stream"),
 
     #About-us
     path("about-us/", views.about_us, name="about_us"),
@@ -48,6 +55,11 @@ urlpatterns = [
     path("projets/<slug:slug>/supprimer/", views.project_delete, name="project_delete"),
     path("projets/<slug:slug>/", views.project_detail, name="project_detail"),  # toujours en dernier
 
+    # Recherche
+    path("recherche/", views.search, name="search"),
+    path("autocomplete/entrepreneurs/", views.autocomplete_entrepreneurs, name="autocomplete_entrepreneurs"),
+    path("autocomplete/projets/", views.autocomplete_projects, name="autocomplete_projects"),
+
     # Campaigns
     path("campaigns/", views.campaign_list, name="campaign_list"),
     path("campaigns/<int:pk>/", views.campaign_detail, name="campaign_detail"),
@@ -199,6 +211,7 @@ urlpatterns = [
     path('dashboard/intermediaire/loan-campaign/<int:loan_campaign_id>/',views.intermediaire_loan_campaigns_detail,name='intermediaire_loan_campaign_detail'),
     path('dashboard/intermediaire/reports/', views.intermediaire_reports, name='intermediaire_reports'),
     path('dashboard/intermediaire/reports/<int:project_id>/', views.intermediaire_reports_detail, name='intermediaire_reports_detail'),
+    path('dashboard/intermediaire/reports/export/<str:fmt>/', views.intermediaire_report_export, name='intermediaire_report_export'),
     path('dashboard/intermediaire/projects/<int:project_id>/delete/', views.intermediaire_project_delete, name='intermediaire_project_delete'),
     path('dashboard/intermediaire/projects/<int:project_id>/complete/', views.intermediaire_project_complete, name='intermediaire_project_complete'),
     path('dashboard/intermediaire/contributions/',views.intermediaire_contributions_list,name='intermediaire_contributions_list'),
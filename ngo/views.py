@@ -1,22 +1,27 @@
 from django.shortcuts import render,redirect, get_object_or_404
 from django.contrib.auth import views as auth_views
-import os
 from django.conf import settings
 from django.contrib.auth.views import PasswordResetView
 from django.contrib.auth import get_user_model
 from django.contrib import messages
 from django.core.mail import send_mail
-from django.http import HttpResponse,JsonResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.utils import timezone
 from django.utils.timesince import timesince
 from django.db.models import Sum, Count, Q
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import login
 from django.utils.translation import get_language, gettext as _
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
+import json
 import logging
+import math
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
@@ -33,14 +38,48 @@ from .models import (User,EntrepreneurProfile,InvestisseurProfile,IntermediaireP
                      Currency,Region,Country,Payment,Category,Project,ProjectPhoto,Campaign,Contribution,
                      Partner,Update,Testimonial,Reward,LoanCampaign,ContactMessage,TeamMember,IntermediairePayment,
                      WithdrawalRequest)
+from . import search as search_engine
+from .reference import reference_data
+from . import currency as currency_engine
+from . import repayments
+from . import payments
+from . import ledger
+from . import reports
+from . import content
+from . import throttle
+from . import lite
+from .routers import replica_reads
+
+# ---------------------------
+# Webhook de paiement
+# ---------------------------
+@csrf_exempt
+@require_POST
+def payment_webhook(request, provider):
+    """
+    Réception idempotente d'un événement de paiement : signature vérifiée,
+    événement stocké dans la boîte de réception, traitement différé (Celery).
+    """
+    if not payments.verify_signature(provider, request.body, request.headers.get("X-Signature", "")):
+        return JsonResponse({"status": "invalid_signature"}, status=401)
+    try:
+        data = json.loads(request.body)
+        event, created = payments.record_event(provider, data)
+    except (ValueError, payments.InvalidEvent) as exc:
+        return JsonResponse({"status": "invalid", "error": str(exc)}, status=400)
+
+    # 200 aussi pour un doublon : le prestataire doit cesser de renvoyer l'événement
+    return JsonResponse({"status": "received" if created else "duplicate", "event": event.pk})
+
 
 # ---------------------------
 # Home / Accueil
 # ---------------------------
+@replica_reads()
 def home(request):
     projects = Project.objects.filter(status="approved")[:6]
     campaigns = Campaign.objects.filter(status="active")[:6]
-    categories = Category.objects.all().order_by("name")[:6]
+    categories = reference_data().objects("categories")[:6]
     partners = Partner.objects.filter(active=True)
     team = TeamMember.objects.all().order_by("order")[:6]
     testimonials = Testimonial.objects.filter(approved=True).order_by("-created_at")[:6]
@@ -54,18 +93,20 @@ def home(request):
         "testimonials": testimonials,
     }
 
-    return render(request, "ngo/index.html", context)
+    return lite.render(request, "ngo/index.html", context)
 
 
 # ---------------------------
 # Categorie
 # ---------------------------
+@replica_reads()
 def category_list(request):
     """Affiche la liste de toutes les catégories."""
-    categories = Category.objects.all().order_by("name")
+    categories = reference_data().objects("categories")
     return render(request, "ngo/categorie/categorie_list.html", {"categories": categories})
 
 
+@replica_reads()
 def category_detail(request, slug):
     category = get_object_or_404(Category, slug=slug)
 
@@ -92,6 +133,7 @@ def category_detail(request, slug):
 # ---------------------------
 # Liste des projets
 # ---------------------------
+@replica_reads()
 def project_list(request):
     projects = Project.objects.filter(status="approved").select_related("country").prefetch_related("categories")
 
@@ -103,8 +145,9 @@ def project_list(request):
     if category_slug:
         projects = projects.filter(categories__slug=category_slug)
 
-    countries = Country.objects.filter(active=True)
-    categories = Category.objects.all()
+    ref = reference_data()
+    countries = ref.objects("countries", active_only=True)
+    categories = ref.objects("categories")
 
     context={
         'projects':projects,
@@ -114,19 +157,89 @@ def project_list(request):
         'selected_category':category_slug,
     }
 
-    return render(request, "ngo/projet/project_list.html", context)
+    return lite.render(request, "ngo/projet/project_list.html", context, paginate_lists=["projects"])
 
 # ---------------------------
 # Détail d’un projet
 # --------------------------- 
+@replica_reads()
 def project_detail(request, slug):
     project = get_object_or_404(Project, slug=slug, status="approved")
-    return render(request, "ngo/projet/project_detail.html", {"project": project})
+    return lite.render(request, "ngo/projet/project_detail.html", {"project": project})
+
+
+# ---------------------------
+# Recherche plein texte
+# ---------------------------
+SEARCH_RESULTS_PER_PAGE = 12
+
+
+@replica_reads()
+def search(request):
+    """
+    Recherche dans les projets, campagnes et partenaires publics.
+    Un onglet par type de résultat, chacun paginé et trié par pertinence.
+    """
+    query = request.GET.get("q", "").strip()[:200]
+    kind = request.GET.get("type", "projects")
+    if kind not in search_engine.SPECS:
+        kind = "projects"
+
+    counts = {}
+    page_obj = None
+    if query:
+        results = {name: search_engine.search(name, query) for name in search_engine.SPECS}
+        counts = {name: qs.count() for name, qs in results.items()}
+        page_obj = Paginator(results[kind], SEARCH_RESULTS_PER_PAGE).get_page(request.GET.get("page"))
+        page_obj.object_list = search_engine.attach_snippets(page_obj.object_list, kind, query)
+
+    context = {
+        "query": query,
+        "kind": kind,
+        "page_obj": page_obj,
+        "tabs": [
+            ("projects", _("Projets"), counts.get("projects", 0)),
+            ("campaigns", _("Campagnes"), counts.get("campaigns", 0)),
+            ("partners", _("Partenaires"), counts.get("partners", 0)),
+        ],
+    }
+    return render(request, "ngo/search/search_results.html", context)
+
+
+# ---------------------------
+# Autocomplétion (JSON)
+# ---------------------------
+@login_required
+def autocomplete_entrepreneurs(request):
+    """
+    Entrepreneurs correspondant à ``q`` pour l'intermédiaire connecté.
+    ``scope=available`` : non encore représentés ; ``scope=represented`` : déjà représentés.
+    """
+    if not request.user.is_intermediaire:
+        return JsonResponse({"results": []}, status=403)
+
+    profile = request.user.intermediaire_profile
+    if request.GET.get("scope") == "represented":
+        queryset = profile.represented_entrepreneurs.all()
+    else:
+        queryset = User.objects.exclude(represented_by_intermediaires=profile)
+
+    results = search_engine.autocomplete_entrepreneurs(request.GET.get("q", ""), queryset)
+    return JsonResponse({"results": results})
+
+
+def autocomplete_projects(request):
+    """Titres de projets publics correspondant à ``q``."""
+    results = search_engine.autocomplete_projects(request.GET.get("q", ""))
+    for project in results:
+        project["url"] = reverse("project_detail", args=[project["slug"]])
+    return JsonResponse({"results": results})
 
 
 # ---------------------------
 # Campaigns
 # ---------------------------
+@replica_reads()
 def campaign_list(request):
     """
     Affiche la liste de toutes les campagnes actives (don participatif) 
@@ -150,6 +263,7 @@ def campaign_list(request):
     return render(request, "ngo/campaign/campaign_list.html", context)
 
 
+@replica_reads()
 def campaign_detail(request, pk):
     campaign = get_object_or_404(Campaign, pk=pk)
 
@@ -169,13 +283,14 @@ def campaign_detail(request, pk):
         "contributions": contributions,
     }
 
-    return render(request, "ngo/campaign/campaign_detail.html", context)
+    return lite.render(request, "ngo/campaign/campaign_detail.html", context, paginate_lists=["contributions"])
 
 
 
 # -------------------
 # Liste des LoanCampaigns
 # -------------------
+@replica_reads()
 def loan_campaign_list(request):
     """
     Affiche la liste de toutes les campagnes de prêt actives
@@ -208,6 +323,7 @@ def loan_campaign_list(request):
     return render(request, "ngo/loan/loan_campaign_list.html", context)
 
 
+@replica_reads()
 def loan_campaign_detail(request, pk):
     # Récupération de la campagne de prêt
     loan_campaign = get_object_or_404(LoanCampaign, pk=pk)
@@ -239,6 +355,7 @@ def loan_campaign_detail(request, pk):
 # ---------------------------
 # Contributions (liste simple - pas de compte utilisateur)
 # ---------------------------
+@replica_reads()
 def contribution_list(request, campaign_id):
     campaign = get_object_or_404(Campaign, pk=campaign_id)
     contributions = campaign.contributions.filter(payment_status="completed")
@@ -251,21 +368,31 @@ def contribution_list(request, campaign_id):
 # ---------------------------
 # Countries (liste des pays d’intervention)
 # ---------------------------
+def _reference_or_404(obj):
+    """Équivalent de get_object_or_404 pour le cache de référence."""
+    if obj is None:
+        raise Http404
+    return obj
+
+
+@replica_reads()
 def country_list(request):
-    countries = Country.objects.filter(active=True).order_by("name")
+    countries = reference_data().objects("countries", active_only=True)
     return render(request, "ngo/country/country_list.html", {"countries": countries})
 
+@replica_reads()
 def country_detail(request, slug):
     """Affiche les détails d’un pays."""
-    country = get_object_or_404(Country, slug=slug, active=True)
+    country = _reference_or_404(reference_data().country_by_slug(slug))
     return render(request, "ngo/country/country_detail.html", {"country": country})
 
 # -------------------------------------------------
 # catégories de projets financés dans un pays donné
 # -------------------------------------------------
+@replica_reads()
 def funded_categories_for_country(request, country_slug):
-    # Récupérer le pays
-    country = get_object_or_404(Country, slug=country_slug, active=True)
+    # Récupérer le pays (cache de référence, sans requête)
+    country = _reference_or_404(reference_data().country_by_slug(country_slug))
 
     # Filtrer les catégories liées à des projets financés dans ce pays
     categories = Category.objects.filter(
@@ -286,13 +413,15 @@ def funded_categories_for_country(request, country_slug):
 # -------------------------------------------------------
 # projets financés dans une catégorie donnée pour ce pays
 # ------------------------------------------------------
+@replica_reads()
 def projects_by_category(request, country_slug, category_slug):
-    country = get_object_or_404(Country, slug=country_slug, active=True)
-    category = get_object_or_404(Category, slug=category_slug)
+    ref = reference_data()
+    country = _reference_or_404(ref.country_by_slug(country_slug))
+    category = _reference_or_404(ref.category_by_slug(category_slug))
 
     projects = Project.objects.filter(
         country=country,
-        category=category,
+        categories=category,
         status__in=["approved", "completed"],
         collected_amount__gt=0
     ).annotate(
@@ -309,6 +438,7 @@ def projects_by_category(request, country_slug, category_slug):
 # ---------------------------
 # Partners
 # ---------------------------
+@replica_reads()
 def partner_list(request):
     partners = Partner.objects.filter(active=True)
     return render(request, "ngo/partner/partner_list.html", {"partners": partners})
@@ -317,6 +447,7 @@ def partner_list(request):
 # ---------------------------
 # Team
 # ---------------------------
+@replica_reads()
 def team_list(request):
     team = TeamMember.objects.all().order_by("order")
     return render(request, "ngo/team/team_list.html", {"team": team})
@@ -325,6 +456,7 @@ def team_list(request):
 # ---------------------------
 # Testimonials
 # ---------------------------
+@replica_reads()
 def testimonial_list(request):
     testimonials = Testimonial.objects.all().order_by("-created_at")
     return render(request, "ngo/testimonial/testimonial_list.html", {"testimonials": testimonials})
@@ -351,602 +483,40 @@ def about_us(request):
     return render(request, "ngo/info/about_us.html")
 
 # ---------------------------
-# Que faisons nous
+# Pages d'information (contenu : ngo/content.py)
 # ---------------------------
-
 def que_faisons_nous(request):
-    steps = [
-        {"title": _("Dépôt du dossier de projet"), 
-         "actors": _("Porteur de projet"), 
-         "desc": _("Soumission du projet avec business plan, besoin de financement et pièces administratives."), 
-         "image": "assets/img/etude/steps/depot.jpg"},
-        {"title": _("Étude de recevabilité"), 
-         "actors": _("Cabinet d’accompagnement"), 
-         "desc": _("Analyse de la complétude et cohérence du dossier avant instruction."), 
-         "image": "assets/img/etude/steps/recevabilite.jpeg"},
-        {"title": _("Analyse technique et économique"), 
-         "actors": _("Experts IGIA"), 
-         "desc": _("Étude du modèle économique et de la faisabilité du projet."), 
-         "image": "assets/img/etude/steps/analyse.jpg"},
-        {"title": _("Contrôle de conformité légale"), 
-         "actors": _("Cabinet juridique"), 
-         "desc": _("Vérification de la conformité réglementaire et administrative."), 
-         "image": "assets/img/etude/steps/legal.jpg"},
-        {"title": _("Validation financière"), 
-         "actors": _("Comité financier"), 
-         "desc": _("Évaluation financière et recommandation du mode de financement."), 
-         "image": "assets/img/etude/steps/financier.jpg"},
-        {"title": _("Comité d’agrément"), 
-         "actors": _("Comité d’investissement"), 
-         "desc": _("Décision finale sur le financement du projet."), 
-         "image": "assets/img/etude/steps/agrement.jpg"},
-        {"title": _("Mise en ligne sur IGIA"), 
-         "actors": _("Équipe IT & Com"), 
-         "desc": _("Publication du projet sur la plateforme pour levée de fonds."), 
-         "image": "assets/img/etude/steps/mise_en_ligne.jpg"},
-        {"title": _("Suivi post-validation"), 
-         "actors": _("Cabinet de suivi"), 
-         "desc": _("Accompagnement et évaluation trimestrielle du projet."), 
-         "image": "assets/img/etude/steps/suivi.jpg"},
-    ]
-
-    domaines = [
-        {"title": _("Entrepreneuriat & Innovation"), 
-         "subtitle": _("Soutenir les jeunes et startups à fort potentiel."), 
-         "image": "assets/img/etude/domains/entrepreneurship.jpg", 
-         "points": [_("Financement de startups"), _("Incubation de projets"), _("Création de TPE/PME"), _("Innovation sociale")]},
-        {"title": _("Agriculture & Développement rural"), 
-         "subtitle": _("Appuyer la sécurité alimentaire et l’économie verte."), 
-         "image": "assets/img/etude/domains/agriculture.jpg", 
-         "points": [_("Agriculture durable"), _("Élevage et pisciculture"), _("Transformation agroalimentaire")]},
-        {"title": _("Technologie & Numérique"), 
-         "subtitle": _("Encourager l’innovation technologique."), 
-         "image": "assets/img/etude/domains/tech.jpg", 
-         "points": [_("Startups tech"), _("Solutions fintech"), _("Cybersécurité"), _("E-learning")]},
-        {"title": _("Éducation & Emploi"), 
-         "subtitle": _("Former et insérer les jeunes."), 
-         "image": "assets/img/etude/domains/education.jpg", 
-         "points": [_("Formation professionnelle"), _("Éducation financière"), _("Mentorat")]},
-        {"title": _("Énergie & Environnement"), 
-         "subtitle": _("Favoriser la transition écologique."), 
-         "image": "assets/img/etude/domains/energy.jpg", 
-         "points": [_("Énergies renouvelables"), _("Recyclage"), _("Reboisement")]},
-        {"title": _("Santé & Bien-être"), 
-         "subtitle": _("Promouvoir l’accès équitable à la santé."), 
-         "image": "assets/img/etude/domains/health.jpg", 
-         "points": [_("Centres communautaires"), _("Télé-médecine"), _("Nutrition")]},
-        {"title": _("Transport & Petits Métiers"), 
-         "subtitle": _("Soutenir les acteurs du quotidien et les petits entrepreneurs."), 
-         "image": "assets/img/etude/domains/transport.jpg", 
-         "points": [_("Moto-taxi, taxi, transport local"), _("Call-box et salons de coiffure"), _("Bars, cafés et petits commerces"), _("Artisanat et ateliers mécaniques")]},
-    ]
+    return content.render_page(request, "que_faisons_nous")
 
-    return render(request, 'ngo/info/what_we_do.html', {'steps': steps, 'domaines': domaines})
-
-# ---------------------------
-# Agrement securite
-# ---------------------------
 def agrement_securite(request):
-    sections = [
-        {"title": _("Plateforme agréée DNB"),
-         "desc": _("IGIA est enregistrée auprès des autorités financières et agréée par l’Autorité des Marchés Financiers."),
-         "image": "assets/img/lever/agrement.png"},
-        {"title": _("Label Croissance Verte"),
-         "desc": _("IGIA est reconnue pour son engagement envers la durabilité et la transparence des financements."),
-         "image": "assets/img/lever/ABN-AMRO.png"},
-        {"title": _("Confiance et transparence"),
-         "desc": _("Nous veillons à ce que chaque projet respecte les exigences éthiques et environnementales."),
-         "image": "assets/img/lever/dok.png"},
-    ]
-
-    securite_points = [
-        {"title": _("Environnement sécurisé"),
-         "desc": _("L’ensemble du site IGIA est protégé par le protocole HTTPS pour garantir la sécurité des échanges.")},
-        {"title": _("Transactions sécurisées"),
-         "desc": _("Les opérations sont gérées via des protocoles de paiement semi-automatiques pour éviter tout risque de fraude.")},
-        {"title": _("Accès crypté"),
-         "desc": _("Votre mot de passe reste confidentiel et vos données ne sont jamais partagées avec des tiers.")},
-        {"title": _("Protection des transactions"),
-         "desc": _("Nos partenaires bancaires et opérateurs assurent la continuité et la sécurité des opérations même en cas d’incident.")},
-    ]
-
-    return render(request, 'ngo/info/agrement_securite.html', {
-        'sections': sections,
-        'securite_points': securite_points,
-    })
+    return content.render_page(request, "agrement_securite")
 
-# ---------------------------
-# Financement inclusif
-# ---------------------------
 def financement_igia(request):
-    """
-    Vue combinée : Financement participatif et inclusif IGIA.
-    """
+    return content.render_page(request, "financement_igia")
 
-    # -----------------------
-    # Contenu 1 : financement participatif
-    # -----------------------
-    types_financement = [
-        {
-            "title": _("Financement Corporate / Bridge / Mezzanine"),
-            "desc": _(
-                "IGIA structure des financements participatifs allant jusqu'à 10 M€, "
-                "en associant notre plateforme et nos partenaires financiers. "
-                "Nous adaptons les solutions corporate, bridge ou mezzanine selon le stade de développement des projets."
-            ),
-            "image": "assets/img/lever/corporate.jpg",
-        },
-        {
-            "title": _("Financements à vocation territoriale"),
-            "desc": _(
-                "IGIA favorise l’adhésion des citoyens dès la phase de développement des projets. "
-                "Nous proposons des modalités sur-mesure et une communication spécifique pour les territoires et riverains."
-            ),
-            "image": "assets/img/lever/territorial.jpg",
-        },
-        {
-            "title": _("Financements liés aux AO / AMI"),
-            "desc": _(
-                "Pour les appels d’offres nationaux et territoriaux, IGIA accompagne les projets afin d’optimiser leur sélection "
-                "grâce à l’expertise en financement participatif et à la structuration de dossiers complets."
-            ),
-            "image": "assets/img/lever/ami.png",
-        },
-    ]
-
-    accompagnement = [
-        _("Analyse financière complète du projet"),
-        _("Rédaction et vérification de la documentation contractuelle"),
-        _("Présentation du projet à notre communauté d'investisseurs"),
-        _("Communication adaptée avant, pendant et après la collecte"),
-        _("Suivi des souscriptions et clôture de l’opération"),
-        _("Suivi des transactions et reporting aux investisseurs"),
-    ]
-
-    tarifs = [
-        _("IGIA ne prélève aucun frais aux investisseurs."),
-        _("Pour chaque levée de fonds réussie, un pourcentage compris entre 2 %% et 6 %% du montant collecté est facturé au porteur de projet."),
-        _("Frais de mise en ligne détaillés par devis selon le projet."),
-        _("Frais de communication éventuels, également détaillés par devis."),
-    ]
-
-    realisations = [
-        {
-            "title": _("Opérations à enjeu local"),
-            "desc": _(
-                "IGIA associe les citoyens et riverains au financement des projets, créant une appropriation locale et "
-                "favorisant le développement territorial. "
-                "Nous atteignons jusqu'à 100%% des objectifs de collecte grâce aux investisseurs locaux."
-            ),
-            "image": "assets/img/lever/local.jpg",
-        },
-        {
-            "title": _("Opérations d’envergure jusqu’à 10 M€"),
-            "desc": _(
-                "Avec notre communauté d’investisseurs et nos partenaires financiers, IGIA structure des financements jusqu'à 10 M€. "
-                "Nous accompagnons chaque projet dans la structuration, la documentation contractuelle et la visibilité de l’opération."
-            ),
-            "image": "assets/img/lever/envergure.jpg",
-        },
-    ]
-
-    # -----------------------
-    # Contenu 2 : financement inclusif
-    # -----------------------
-    models = [
-        {
-            "title": _("Financement d’Amorçage Solidaire"),
-            "desc": _(
-                "Ce modèle s’adresse aux porteurs d’idées ou micro-projets à fort impact local. "
-                "Il permet de recevoir un micro-capital (0 à 2 000 €) grâce à des dons ou micro-investissements, "
-                "débloqués progressivement selon l’avancement du projet. "
-                "L’entrepreneur bénéficie d’un accompagnement obligatoire par un mentor IGIA."
-            ),
-            "image": "assets/img/lever/seed.jpg",
-        },
-        {
-            "title": _("Financement Communautaire Garanti"),
-            "desc": _(
-                "Le porteur de projet mobilise son entourage ou sa communauté (amis, famille, diaspora) "
-                "pour garantir symboliquement son projet. "
-                "Une fois un seuil atteint, IGIA ou un partenaire complète le montant restant. "
-                "C’est un modèle de solidarité encadrée, où la réussite du projet profite à tous."
-            ),
-            "image": "assets/img/lever/community.png",
-        },
-        {
-            "title": _("Financement par Mise à Disposition d’Actif"),
-            "desc": _(
-                "IGIA ou un investisseur achète un bien productif (voiture, moto, fauteuil, matériel). "
-                "Le bénéficiaire l’utilise via une location avec option d’achat ou un micro-crédit souple. "
-                "Les revenus générés servent à rembourser l’actif, menant à une autonomie complète en 12 à 36 mois."
-            ),
-            "image": "assets/img/lever/asset.png",
-        },
-        {
-            "title": _("Financement par Tiers de Confiance"),
-            "desc": _(
-                "IGIA collabore avec des intermédiaires locaux agréés (ONG, incubateurs, coopératives). "
-                "Ces partenaires reçoivent les fonds et accompagnent les porteurs de projets sur le terrain. "
-                "Ce modèle réduit les risques et garantit un suivi éthique et durable."
-            ),
-            "image": "assets/img/lever/trusted.png",
-        },
-    ]
-
-    avantages = [
-        {"title": _("Accessibilité"), "desc": _("Ouvert à tous les porteurs d’idées, même sans capital initial.")},
-        {"title": _("Encadrement"), "desc": _("Chaque bénéficiaire est accompagné par un mentor ou un partenaire agréé.")},
-        {"title": _("Transparence"), "desc": _("Les fonds sont débloqués étape par étape, selon les résultats concrets.")},
-        {"title": _("Autonomisation"), "desc": _("Les modèles visent à créer de véritables propriétaires et entrepreneurs.")},
-    ]
-
-    # -----------------------
-    # Devise IGIA
-    # -----------------------
-    devise = _(
-        "IGIA combine mobilisation collective et financement solidaire (Crowdlending) et "
-        "financement participatif (Crowdfunding) pour que chaque idée, qu’elle vienne d’un entrepreneur "
-        "avec ou sans capital, ait une chance de devenir réalité."
-    )
-
-    return render(request, 'ngo/info/financement_igia.html', {
-        'types_financement': types_financement,
-        'accompagnement': accompagnement,
-        'tarifs': tarifs,
-        'realisations': realisations,
-        'models': models,
-        'avantages': avantages,
-        'devise': devise,
-    })
-
-# ---------------------------
-# Guide d'utilisation
-# ---------------------------
 def guide_utilisation(request):
-    # Données pour chaque profil
-    profiles = [
-        {
-            "role": _("Entrepreneur"),
-            "steps": [
-                _("Connectez-vous au Dashboard."),
-                _("Cliquez sur 'Créer un projet'."),
-                _("Remplissez le formulaire : titre, description, montant, durée, type de financement (crowdfunding/crowdlending), contreparties."),
-                _("Acquittez-vous des frais de soumission."),
-                _("Après approbation, votre projet sera visible sur la plateforme.")
-            ],
-            "note": [
-                _("Facilités de paiement disponibles selon votre région et votre pays de résidence."),
-                _("Crowdfunding : contrepartie ou produit."),
-                _("Crowdlending : remboursement avec intérêts.")
-            ],
-            "warnings": [
-                _("Projets visibles uniquement après validation : tous les projets doivent être soumis et validés par IGIA avant de pouvoir recevoir des fonds."),
-                _("Recevoir des fonds directement d’investisseurs en dehors de la plateforme peut entraîner la suspension du projet et l'exclusion définitive."),
-                _("La plateforme ne pourra pas gérer les remboursements ni calculer les intérêts si c’est fait en dehors du site.")
-            ] 
-        },
-        {
-            "role": _("Investisseur"),
-            "steps": [
-                _("Connectez-vous au Dashboard."),
-                _("Cliquez sur 'Explorer les projets'."),
-                _("Filtrez selon vos critères : montant minimal, type de financement, durée, secteur."),
-                _("Consultez la page détaillée : taux, durée, montant minimum, risques, modalités de remboursement."),
-                _("Cliquez sur 'Investir maintenant', choisissez le montant et confirmez le paiement.")
-            ],
-            "note": [
-                _("Crowdfunding : soutien et contrepartie."),
-                _("Crowdlending : prêt avec intérêts.")
-            ],
-            "warnings": [
-                _("Toujours passer par la plateforme IGIA : les investissements doivent être effectués via le site."),
-                _("Ne jamais verser directement de l’argent à l’entrepreneur sans passer par la plateforme.")
-            ],
-            "reason": [
-                _("Sécurisation des transactions."),
-                _("Suivi des remboursements et intérêts dans le cadre du crowdlending."),
-                _("Garantie de conformité aux conditions de financement.")
-            ]
-        },
-        {
-            "role": _("Intermédiaire"),
-            "steps": [
-                _("Connectez-vous au Dashboard."),
-                _("Cliquez sur 'Mes Intermédiaires'."),
-                _("Ajoutez les projets que vous représentez et les entrepreneurs que vous accompagnez."),
-                _("Soumettez les projets pour le compte de l’entrepreneur si nécessaire."),
-                _("Suivez l’avancement des investissements et recevez vos commissions automatiquement.")
-            ],
-            "note": [
-                _("Facilite la collecte de fonds et simplifie le processus pour les entrepreneurs et investisseurs.")
-            ],
-            "warnings": [
-                _("Respect strict du processus IGIA : les intermédiaires ne doivent pas contourner la plateforme."),
-                _("Toutes les transactions doivent passer par IGIA."),
-                _("Les commissions sont calculées uniquement sur les investissements effectués via la plateforme.")
-            ]
-        }
-    ]
+    return content.render_page(request, "guide_utilisation")
 
-    # Sécurité et prévention des scams
-    security = {
-        "title": _("Protection contre les emails frauduleux"),
-        "message": [
-            _("Tous les emails officiels IGIA proviennent du domaine @igia.com."),
-            _("Tout email venant d’une adresse différente doit être considéré comme suspect."),
-            _("IGIA ne demande jamais de transférer de l’argent en dehors de la plateforme ni vos identifiants de compte par email."),
-            _("Suivant chaque région et pays IGIA ne fait des transactions qu'avec ses partenaires agréés et ses partenaires sont communiqués lors des paiements."),
-            _("Vérifiez toujours le Dashboard IGIA pour confirmer toute demande d’investissement ou transaction."),
-            _("Ne transférez jamais d’argent ni ne communiquez vos identifiants en dehors de la plateforme."),
-            _("Ne cliquez jamais sur des liens ou téléchargez des fichiers provenant de sources inconnues."),
-            _("En cas de suspicion, signalez immédiatement l'email à contact@igia.com."),
-            _("Vérifiez toujours votre Dashboard IGIA avant de confirmer toute transaction.")
-        ]
-    }
-
-    contact_info = {
-        "email": "contact@igia.com",
-        "phone": "01.82.83.97.52"
-    }
-
-    return render(request, "ngo/info/guide_utilisation.html", {
-        "profiles": profiles,
-        "contact_info": contact_info,
-        "security": security
-    })
-
-# ---------------------------
-# Mention Legale
-# ---------------------------
 def mentions_legales(request):
-    """Page des mentions légales IGIA avec gestion des risques internationaux"""
-
-    categories = [
-        "politique",
-        "economique",
-        "infrastructures",
-        "social",
-        "environnement",
-        "gouvernance",
-    ]
-
-    context = {
-        "company": {
-            "name": "Infinity Global Investment & Aid (IGIA) NV",
-            "capital": "300 000 000 €",
-            "siren": "805 178 860",
-            "tva": "NE09805178860",
-            "ape": "7022Z",
-            "address": "94 rue de la Victoria, 75009 Utrecht, Pays-Bas",
-            "email": "contact@igia.com",
-            "phone": "+33 1 82 83 97 52",
-            "director": "Amaury Blais",
-            "amf_number": "PSFP 2012-22",
-        },
-        "bank": {
-            "name": "ABN AMRO BANK NV",
-            "address": "Gustav Mahlerlaan 10, 1082 PP Amsterdam, Pays-Bas",
-            "email": "customercare@be.abnamro.com",
-            "rcs": "500 486 915",
-            "agrement": "ACPR du 1 avril 2018",
-        },
-        "host": {
-            "name": "Heroku, Inc.",
-            "address": "650 7th Street, San Francisco, CA 94103",
-            "contact_url": "https://www.heroku.com/contact",
-            "security_url": "https://www.heroku.com/policy/security",
-        },
-        "risks": [
-            {"type": _("Politique & Juridique"), "solutions": _("Assurances MIGA, arbitrage international, partenaires certifiés.")},
-            {"type": _("Économique & Monétaire"), "solutions": _("Couverture de change, diversification, devises fortes.")},
-            {"type": _("Infrastructures & Logistique"), "solutions": _("Plan logistique, zones viabilisées, technologie verte.")},
-            {"type": _("Social & Culturel"), "solutions": _("Dialogue communautaire, emploi local, RSE.")},
-            {"type": _("Environnement & Climat"), "solutions": _("Études d’impact, technologies durables, plans de résilience.")},
-            {"type": _("Gouvernance & Transparence"), "solutions": _("Audit externe, suivi digital IGIA, normes ISO 37001.")},
-        ],
-        "categories": categories,
-    }
-
-    return render(request, "ngo/info/mentions_legales.html", context)
+    return content.render_page(request, "mentions_legales")
 
-# ---------------------------
-# Confidentialite
-# ---------------------------
 def confidentialite(request):
-    """Page de politique de confidentialité IGIA"""
-    
-    context = {
-        "sections": [
-            {
-                "title": _("1. Protection des données personnelles"),
-                "content": _(
-                    "IGIA respecte la législation en matière de protection des données (loi Informatique et Libertés du 6 janvier 1978). "
-                    "Le site est déclaré auprès du Department of Constitutional Affairs and Legislation (DCAL) sous le numéro 1807840. "
-                    "Les données collectées ne sont jamais utilisées à des fins publicitaires. "
-                    "Les utilisateurs disposent de droits d’accès, de rectification et d’opposition (articles 26, 34 à 38 et 36). "
-                    "Ces droits peuvent être exercés via le compte IGIA ou à l’adresse : contact@igia.com."
-                ),
-            },
-            {
-                "title": _("2. Sécurité et confidentialité des comptes"),
-                "content": _(
-                    "IGIA ne demandera jamais de mot de passe par téléphone ou e-mail. "
-                    "L’utilisateur doit se déconnecter après chaque session, en particulier sur un poste partagé. "
-                    "Les informations relatives aux projets financiers sont strictement confidentielles et ne doivent pas être divulguées. "
-                    "L’utilisateur s’engage à ne pas les utiliser à d’autres fins que l’étude des projets."
-                ),
-            },
-            {
-                "title": _("3. Politique de cookies"),
-                "content": _(
-                    "Le site IGIA utilise des cookies pour améliorer la navigation et collecter des statistiques d’utilisation. "
-                    "Les cookies ne contiennent aucune donnée personnelle et servent uniquement à identifier plus rapidement l’utilisateur. "
-                    "L’utilisateur peut désactiver les cookies via les paramètres de son navigateur, mais cela peut altérer certaines fonctionnalités."
-                ),
-            },
-        ],
-        "contact_email": "contact@igia.com",
-    }
-
-    return render(request, "ngo/info/confidentialite.html", context)
+    return content.render_page(request, "confidentialite")
 
-# ---------------------------
-# Reclamation
-# ---------------------------
 def reclamations(request):
-    """Page de gestion des réclamations IGIA conformément au règlement européen"""
+    return content.render_page(request, "reclamations")
 
-    context = {
-        "contact": {
-            "email": "reclamation@igia.com",
-            "address": "94 rue de la Victoire, 75009 Paris",
-            "phone": "+33 1 82 83 97 52",
-        },
-        "procedure": [
-            {
-                "title": _("Dépôt d’une réclamation"),
-                "details": _(
-                    "La réclamation peut être envoyée par email, courrier ou via le modèle PDF disponible sur le site. "
-                    "IGIA accuse réception sous 10 jours ouvrables."
-                ),
-            },
-            {
-                "title": _("Examen et traitement"),
-                "details": _(
-                    "IGIA évalue la clarté, la complétude et la recevabilité de la réclamation. "
-                    "Des informations complémentaires peuvent être demandées pour un traitement optimal."
-                ),
-            },
-            {
-                "title": _("Décision et communication"),
-                "details": _(
-                    "Une réponse motivée est adressée dans un délai maximum de 30 jours ouvrés. "
-                    "Toute décision inclut les voies de recours possibles."
-                ),
-            },
-            {
-                "title": _("Médiation"),
-                "details": _(
-                    "En cas de désaccord, le réclamant peut saisir le Médiateur WTW : "
-                    "formulaire en ligne sur wtwco.com, téléphone +31 (0) 88 541 3000, "
-                    "ou courrier à l’Autorité des marchés financiers d’Amsterdam."
-                ),
-            },
-        ],
-        "mediator": {
-            "name": "WTW Médiation",
-            "website": "https://www.wtwco.com/fr-fr/about-us/office-locations",
-            "phone": "+31 (0) 88 541 3000",
-            "address": "Autorité des marchés financiers – Médiation, Prof. E.M. Meijerslaan 5, Amstelveen 1183 AV, Amsterdam",
-        },
-    }
-
-    return render(request, "ngo/info/reclamations.html", context)
-
-# --------------------------------
-# Condition generale d'utilisation
-# --------------------------------
 def conditions_generales_utilisation(request):
-    """
-    Page complète des Conditions Générales d’Utilisation (CGU) du site IGIA.
-    Inclut le contenu textuel du document juridique stocké dans /static/docs/cgu_igia_LANG.txt
-    et les informations de l’entreprise.
-    """
+    return content.render_page(request, "conditions_generales_utilisation")
 
-    # Langue active
-    lang = get_language()  # ex: "fr", "en", "es","nl"
-    filename = f"cgu_igia_{lang}.txt"
-    cgu_path = os.path.join(settings.BASE_DIR, "ngo", "static", "docs", filename)
-
-    # Lecture sécurisée du fichier CGU traduit
-    try:
-        with open(cgu_path, "r", encoding="utf-8") as f:
-            cgu_text = f.read()
-    except FileNotFoundError:
-        # Message alternatif si le fichier n’existe pas pour la langue donnée
-        cgu_text = _(
-            "Le document officiel des Conditions Générales d’Utilisation est temporairement "
-            "indisponible dans votre langue. Veuillez réessayer ultérieurement ou contacter "
-            "notre support à contact@igia.com."
-        )
-
-    # Informations sur l’entreprise IGIA
-    company = {
-        "name": "Infinity Global Investment & Aid (IGIA)",
-        "address": "94 rue de la Victoria, 75009 Utrecht, Pays-Bas",
-        "email": "contact@igia.com",
-        "phone": "+33 1 82 83 97 52",
-        "siren": "KVB 805 168 860",
-        "tva": "NE 09805178860",
-        "capital": "300 000 000 €",
-        "rcs": "RCS de Utrecht",
-        "psfp": "n°2012-22 (AMF)",
-    }
-
-    # Contexte transmis au template
-    context = {
-        "title": _("Conditions Générales d’Utilisation"),
-        "meta_description": _(
-            "Découvrez les conditions générales d'utilisation de la plateforme IGIA : sécurité, "
-            "transparence et conformité AMF."
-        ),
-        "company": company,
-        "cgu_text": cgu_text,
-        "last_update": _("Applicables depuis le 9 novembre 2023"),
-        "hero": {
-            "title": _("Conditions Générales d’Utilisation"),
-            "subtitle": _("Sécurité, transparence et responsabilité pour chaque investisseur IGIA."),
-            "background": "assets/img/about/hero-bg.jpg",
-        },
-    }
-
-    return render(request, "ngo/info/conditions_generales_utilisation.html", context)
-
-# --------------------------------
-# Donnees personelles
-# --------------------------------
 def donnees_personnelles(request):
-    """
-    Page Politique de Protection des Données Personnelles (RGPD).
-    Le contenu est chargé dynamiquement selon la langue active (FR, EN, etc.).
-    """
-
-    # 🔹 Langue active
-    lang = get_language()  # Exemple : "fr", "en"
-    filename = f"donnees_personnelles_{lang}.txt"
-    file_path = os.path.join(settings.BASE_DIR, "ngo", "static", "docs/donner", filename)
+    return content.render_page(request, "donnees_personnelles")
 
-    # 🔹 Lecture du texte RGPD
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            rgpd_text = f.read()
-    except FileNotFoundError:
-        rgpd_text = _(
-            "La politique de protection des données personnelles est temporairement indisponible. "
-            "Veuillez réessayer plus tard ou contacter notre équipe à contact@igia.com."
-        )
-
-    # 🔹 Contexte envoyé au template
-    context = {
-        "title": _("Politique de protection des données personnelles"),
-        "meta_description": _(
-            "Découvrez comment IGIA protège vos données personnelles conformément au RGPD."
-        ),
-        "rgpd_text": rgpd_text,
-        "last_update": _("Dernière mise à jour : 9 novembre 2023"),
-        "hero": {
-            "title": _("Données personnelles"),
-            "subtitle": _("Sécurité, transparence et confidentialité de vos informations avec IGIA."),
-            "background": "assets/img/about/hero-bg.jpg",
-        },
-    }
-
-    return render(request, "ngo/info/donnees_personnelles.html", context)
 
 # --------------------------------
 # Actualite
 # --------------------------------
+@replica_reads()
 def actualite_list(request):
     """
     Page des actualités IGIA.
@@ -999,7 +569,7 @@ def inbox_entrepreneur(request):
         msg.sender_image = (
             msg.sender.profile_image.url
             if hasattr(msg.sender, "profile_image") and msg.sender.profile_image
-            else "/static/assets/img/team/default.png"
+            else "/static/assets/img/team/default.jpg"
         )
         msg.sender_name = msg.sender.full_name or msg.sender.email
 
@@ -1010,7 +580,7 @@ def inbox_entrepreneur(request):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
     user_full_name = user.full_name or user.email
 
     context = {
@@ -1036,7 +606,7 @@ def inbox_investisseur(request):
         msg.sender_image = (
             msg.sender.profile_image.url
             if hasattr(msg.sender, "profile_image") and msg.sender.profile_image
-            else "/static/assets/img/team/default.png"
+            else "/static/assets/img/team/default.jpg"
         )
         msg.sender_name = msg.sender.full_name or msg.sender.email
 
@@ -1051,7 +621,7 @@ def inbox_investisseur(request):
         user_profile_image = (
             user.profile_image.url
             if hasattr(user, "profile_image") and user.profile_image
-            else "/static/assets/img/team/default.png"
+            else "/static/assets/img/team/default.jpg"
         )
     user_full_name = user.full_name or user.email
 
@@ -1280,7 +850,7 @@ def entrepreneur_project_list(request):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -1315,13 +885,14 @@ def project_create(request):
         return redirect("home")
 
     # 🔍 Vérifie que l'utilisateur a un pays
-    if not user.country:
+    country = reference_data().country_or_fetch(user.country_id) if user.country_id else None
+    if country is None:
         messages.error(request, "Veuillez définir votre pays dans votre profil avant de soumettre un projet.")
         return redirect("dashboard_entrepreneur")
 
-    country = user.country
-    fee = country.project_submission_fee
-    currency = country.currency.code
+    # 💰 Frais et devise depuis le cache de référence (aucune requête)
+    fee, fee_currency = reference_data().submission_fee(country.pk)
+    currency = fee_currency.code
 
     if request.method == "POST":
         form = ProjectForm(request.POST, request.FILES)
@@ -1339,9 +910,13 @@ def project_create(request):
                     return render(
                         request,
                         "ngo/dashboard/entrepreneur/pages/projet/project_create_form.html",
-                        {"form": form, "payment_form": payment_form, "fee": fee, "currency": currency}
+                        {"form": form, "payment_form": payment_form, "fee": fee, "currency": currency,
+                         "is_intermediaire": True}
                     )
-                project.entrepreneur = get_object_or_404(User, pk=entrepreneur_id, role="entrepreneur")
+                # ✅ Uniquement parmi les entrepreneurs qu'il représente (cf. autocomplétion)
+                project.entrepreneur = get_object_or_404(
+                    user.intermediaire_profile.represented_entrepreneurs, pk=entrepreneur_id, role="entrepreneur"
+                )
             else:
                 project.entrepreneur = user  # entrepreneur soumet pour lui-même
 
@@ -1356,7 +931,8 @@ def project_create(request):
             payment.user = user
             payment.project = project
             payment.amount = fee
-            payment.currency = currency
+            payment.currency = fee_currency
+            payment.country = country
             payment.payment_type = "project_submission"
             payment.is_successful = False  # à valider par l'admin
             payment.save()
@@ -1375,7 +951,7 @@ def project_create(request):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -1387,6 +963,7 @@ def project_create(request):
         "title": "Créer un Projet",
         "user_profile_image": user_profile_image,
         "user_full_name": user_full_name,
+        "is_intermediaire": user.is_intermediaire,
     }
 
     return render(
@@ -1433,7 +1010,7 @@ def project_update(request, slug):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -1482,7 +1059,7 @@ def project_delete(request, slug):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -1539,7 +1116,7 @@ def project_payment_verify(request, project_slug):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -1587,7 +1164,7 @@ def validate_project(request, project_id):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -1673,21 +1250,27 @@ def _login_view(request, role, template_name):
         return redirect(get_dashboard_url_for_role(request.user))
 
     if request.method == "POST":
+        email = request.POST.get("username", "")
+        # 🔹 Tentatives trop nombreuses : refus avant tout calcul de mot de passe
+        wait = throttle.check_login(request, email)
+        if wait:
+            messages.error(request, f"Trop de tentatives de connexion. Réessayez dans {math.ceil(wait)} secondes.")
+            form = CustomLoginForm(request, initial={"username": email})
+            response = render(request, template_name, {"form": form}, status=429)
+            response["Retry-After"] = str(math.ceil(wait))
+            return response
+
         form = CustomLoginForm(request, data=request.POST)
         if form.is_valid():
-            email = form.cleaned_data.get("username")
-            password = form.cleaned_data.get("password")
-            user = authenticate(request, email=email, password=password)
-
-            if user is not None:
-                if user.role == role:
-                    login(request, user)
-                    messages.success(request, f"Bienvenue {user.display_name()} 👋")
-                    return redirect(get_dashboard_url_for_role(user))
-                else:
-                    messages.error(request, "Vous ne pouvez pas vous connecter ici avec ce rôle.")
+            # Utilisateur déjà authentifié par le formulaire (un seul hachage du mot de passe)
+            user = form.get_user()
+            if user.role == role:
+                throttle.login_succeeded(email)
+                login(request, user)
+                messages.success(request, f"Bienvenue {user.display_name()} 👋")
+                return redirect(get_dashboard_url_for_role(user))
             else:
-                messages.error(request, "Adresse e-mail ou mot de passe incorrect.")
+                messages.error(request, "Vous ne pouvez pas vous connecter ici avec ce rôle.")
     else:
         form = CustomLoginForm()
 
@@ -1737,6 +1320,7 @@ def dashboard(request):
 # Dashboard Entrepreneur
 # ---------------------------
 @login_required
+@replica_reads()
 def dashboard_entrepreneur(request):
     user = request.user
 
@@ -1756,7 +1340,7 @@ def dashboard_entrepreneur(request):
         msg.time_since = timesince(msg.created_at)
         msg.sender_image = (
             getattr(msg.sender, "profile_image.url", None)
-            or "/static/assets/img/team/default.png"
+            or "/static/assets/img/team/default.jpg"
         )
 
     # -----------------------------
@@ -1792,12 +1376,11 @@ def dashboard_entrepreneur(request):
         project.progress = project.progress_percentage()
         project.total_collected_display = project.collected_amount or 0
         project.contributions = Contribution.objects.filter(
-            project=project, payment_status="completed"
-        ).order_by("-created_at")
+            Q(campaign__project=project) | Q(loan_campaign__project=project), payment_status="completed"
+        ).select_related("investor", "campaign__project", "loan_campaign__project").order_by("-created_at")
 
         for c in project.contributions:
             c.percentage = c.percentage_of_project
-            c.investor_name = getattr(c.investor, "full_name", c.contributor_name)
 
     # -----------------------------
     # Retraits
@@ -1815,7 +1398,7 @@ def dashboard_entrepreneur(request):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = getattr(user, "profile_image.url", "/static/assets/img/team/default.png")
+        user_profile_image = getattr(user, "profile_image.url", "/static/assets/img/team/default.jpg")
 
     user_full_name = getattr(user, "full_name", None) or user.email
 
@@ -1846,13 +1429,16 @@ def dashboard_entrepreneur(request):
         "title": _("Tableau de bord Entrepreneur"),
     }
 
-    return render(request, "ngo/dashboard/entrepreneur/entrepreneur.html", context)
+    return lite.render(
+        request, "ngo/dashboard/entrepreneur/entrepreneur.html", context, paginate_lists=["withdrawal_requests"]
+    )
 
 
 # ---------------------------
 # Dashboard Investisseur
 # ---------------------------
 @login_required
+@replica_reads()
 def dashboard_investisseur(request):
     # Vérifie que l'utilisateur est bien un investisseur
     if not getattr(request.user, "is_investisseur", False):
@@ -1870,12 +1456,13 @@ def dashboard_investisseur(request):
         payment_status="completed"
     )
 
-    # Statistiques globales
-    total_invested = sum(c.amount for c in contributions)
+    # Statistiques globales (converties dans la devise de reporting, en SQL)
+    total_invested = currency_engine.contributions_total(contributions)
     projects_supported = set(c.project for c in contributions)
 
     stats = {
         "total_invested": total_invested,
+        "reporting_currency": currency_engine.reporting_currency(),
         "projects_supported_count": len(projects_supported),
         "capital_available": profile.capital_available,
     }
@@ -1914,10 +1501,11 @@ def dashboard_investisseur(request):
         "unread_messages_count": unread_messages_count,
     }
 
-    return render(
+    return lite.render(
         request,
         "ngo/dashboard/investisseur/investisseur.html",
-        context
+        context,
+        paginate_lists=["contributions", "projects_supported"],
     )
 
 
@@ -1941,6 +1529,7 @@ def intermediaire_required(view_func):
 # -------------------------------
 @login_required
 @intermediaire_required
+@replica_reads()
 def dashboard_intermediaire(request):
     # Notification et Message sont déjà importés depuis ngo.models
     profile = get_object_or_404(IntermediaireProfile, user=request.user)
@@ -1960,11 +1549,12 @@ def dashboard_intermediaire(request):
 
     stats = {
         "total_projects": projects.count(),
-        "total_collected": projects.aggregate(Sum("collected_amount"))["collected_amount__sum"] or 0,
+        "total_collected": currency_engine.projects_collected_total(projects),
         "active_campaigns": campaigns.filter(status="active").count(),
         "completed_campaigns": campaigns.filter(status="completed").count(),
         "failed_campaigns": campaigns.filter(status="failed").count(),
-        "total_payments": payments.aggregate(Sum("amount"))["amount__sum"] or 0,
+        "total_payments": currency_engine.payments_total(payments),
+        "reporting_currency": currency_engine.reporting_currency(),
         "total_contributions": contributions.count(),
     }
 
@@ -1984,7 +1574,7 @@ def dashboard_intermediaire(request):
             contributions_images.append(c.loan_campaign.image.url)
         if len(contributions_images) >= 5:
             break
-    entrepreneurs_images = [e.avatar.url for e in entrepreneurs if e.avatar][:5]
+    entrepreneurs_images = [e.profile_image.url for e in entrepreneurs if e.profile_image][:5]
 
     full_name = profile.get_full_name()
     avatar = profile.get_avatar_url()
@@ -2008,7 +1598,7 @@ def dashboard_intermediaire(request):
         "unread_messages_count": unread_messages_count,
     }
 
-    return render(request, "ngo/dashboard/intermediaire/intermediaire.html", context)
+    return lite.render(request, "ngo/dashboard/intermediaire/intermediaire.html", context)
 
 
 
@@ -2117,30 +1707,27 @@ def request_withdrawal(request, project_id):
     """
     project = get_object_or_404(Project, id=project_id, entrepreneur=request.user)
 
+    available = ledger.available_balance(project.pk)
+
     if request.method == "POST":
-        form = WithdrawalRequestForm(request.POST, project=project)
+        form = WithdrawalRequestForm(request.POST, project=project, available=available)
         if form.is_valid():
-            amount = form.cleaned_data["amount"]
-
-            # Vérifie si le projet a assez de fonds
-            if amount > project.collected_amount:
+            try:
+                # Vérification du solde et réservation sous verrou (ngo/ledger.py)
+                ledger.request_withdrawal(
+                    project, request.user, form.cleaned_data["amount"], form.cleaned_data["reason"]
+                )
+            except ledger.InsufficientFunds:
                 messages.error(request, _("❌ Montant supérieur aux fonds disponibles."))
                 return redirect("dashboard_entrepreneur")
-
-            # Vérifie s'il existe déjà une demande en attente
-            if WithdrawalRequest.objects.filter(project=project, status="pending").exists():
+            except ledger.PendingWithdrawal:
                 messages.warning(request, _("⚠️ Une demande de retrait est déjà en attente pour ce projet."))
                 return redirect("dashboard_entrepreneur")
 
-            withdrawal = form.save(commit=False)
-            withdrawal.entrepreneur = request.user
-            withdrawal.project = project
-            withdrawal.save()
-
             messages.success(request, _("✅ Votre demande de retrait a été soumise avec succès."))
             return redirect("dashboard_entrepreneur")
     else:
-        form = WithdrawalRequestForm(project=project)
+        form = WithdrawalRequestForm(project=project, available=available)
 
     # 🧑‍💼 Avatar et nom de l’entrepreneur connecté
     user = request.user
@@ -2148,7 +1735,7 @@ def request_withdrawal(request, project_id):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -2207,7 +1794,7 @@ def project_contributions(request, slug):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -2248,7 +1835,7 @@ def entrepreneur_profile_view(request, user_id=None):
         entrepreneur_profile = user.entrepreneur_profile
         user_profile_image = entrepreneur_profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -2298,7 +1885,7 @@ def update_entrepreneur_profile(request):
         entrepreneur_profile = user.entrepreneur_profile
         user_profile_image = entrepreneur_profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -2337,7 +1924,7 @@ def entrepreneur_deactivate_account(request):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -2386,7 +1973,7 @@ def entrepreneur_delete_account(request):
         profile = user.entrepreneur_profile
         user_profile_image = profile.get_avatar_url()
     else:
-        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.png"
+        user_profile_image = user.profile_image.url if user.profile_image else "/static/assets/img/team/default.jpg"
 
     user_full_name = user.full_name or user.email
 
@@ -2641,7 +2228,7 @@ def projects_available_investisseur(request):
 
     # Récupération des projets approuvés
     projects = Project.objects.filter(status="approved").order_by("-created_at")
-    categories = Category.objects.all()
+    categories = reference_data().objects("categories")
 
     # Récupération ou création du profil investisseur
     profile, created = InvestisseurProfile.objects.get_or_create(
@@ -2733,12 +2320,13 @@ def contributions_list_investisseur(request):
     contributions = Contribution.objects.filter(
         investor=request.user
     ).order_by('-created_at')
-    total_invested = sum(c.amount for c in contributions)
+    total_invested = currency_engine.contributions_total(contributions)
 
     context = {
         "contributions": contributions,
         "title": "Mes contributions",
         "total_invested": total_invested,
+        "reporting_currency": currency_engine.reporting_currency(),
         "user_profile_image": user_profile_image,
         "user_full_name": user_full_name,
     }
@@ -2772,7 +2360,7 @@ def contribution_detail_investisseur(request, pk):
 
     # Récupère la contribution de cet investisseur uniquement
     contribution = get_object_or_404(
-        Contribution.objects.select_related("campaign", "loan_campaign", "investor"),
+        Contribution.objects.select_related("campaign", "loan_campaign", "investor", "currency"),
         pk=pk,
         investor=request.user
     )
@@ -2780,15 +2368,15 @@ def contribution_detail_investisseur(request, pk):
     # Déterminer la campagne associée (classique ou prêt)
     campaign = contribution.campaign or contribution.loan_campaign
 
-    # Calcul du rendement estimé si taux d'intérêt disponible
-    estimated_return = None
-    if hasattr(campaign, "interest_rate") and campaign.interest_rate:
-        estimated_return = contribution.amount * (1 + (campaign.interest_rate / 100))
+    # Échéancier du prêt (enregistré après clôture, projeté sinon)
+    installments = repayments.projected_schedule(contribution)
+    estimated_return = sum(item.amount for item in installments) if installments else None
 
     context = {
         "contribution": contribution,
         "campaign": campaign,
         "estimated_return": estimated_return,
+        "installments": installments,
         "user_profile_image": user_profile_image,
         "user_full_name": user_full_name,
     }
@@ -3150,7 +2738,7 @@ def notification_investisseur(request):
     else:
         profile = getattr(user, "profile", None)
 
-    user_profile_image = profile.get_avatar_url() if profile else "/static/assets/img/team/default.png"
+    user_profile_image = profile.get_avatar_url() if profile else "/static/assets/img/team/default.jpg"
     user_full_name = profile.get_full_name() if profile else (user.full_name or user.email)
 
     context = {
@@ -3192,7 +2780,7 @@ def notification_detail_investisseur(request, pk):
     else:
         profile = getattr(user, "profile", None)
 
-    user_profile_image = profile.get_avatar_url() if profile else "/static/assets/img/team/default.png"
+    user_profile_image = profile.get_avatar_url() if profile else "/static/assets/img/team/default.jpg"
     user_full_name = profile.get_full_name() if profile else (user.full_name or user.email)
 
     context = {
@@ -3444,7 +3032,7 @@ def intermediaire_payment_upload(request):
         return redirect("intermediaire_payments")
 
     # 🔹 Informations pour le template
-    currencies = Currency.objects.all().order_by("code")
+    currencies = reference_data().objects("currencies")
     full_name = profile.get_full_name()
     avatar = profile.get_avatar_url()
 
@@ -3499,17 +3087,12 @@ def intermediaire_add_entrepreneur(request):
         )
         return redirect("intermediaire_entrepreneurs")
 
-    # Exclure les entrepreneurs déjà associés à cet intermédiaire
-    entrepreneurs = User.objects.filter(role="entrepreneur").exclude(
-        id__in=profile.represented_entrepreneurs.all()
-    )
-
+    # La liste des entrepreneurs est chargée à la demande via l'autocomplétion
     # 🔹 Ajout : nom complet + avatar
     full_name = profile.get_full_name()
     avatar = profile.get_avatar_url()
 
     context = {
-        "entrepreneurs": entrepreneurs,
         "profile": profile,
         "full_name": full_name,  # ✅ Nom complet de l’intermédiaire
         "avatar": avatar,        # ✅ Photo de profil
@@ -3860,19 +3443,18 @@ def intermediaire_loan_campaigns_detail(request, loan_campaign_id):
 # -------------------------------
 @login_required
 @intermediaire_required
+@replica_reads()
 def intermediaire_reports(request):
     """Tableau des statistiques et rapports de performance de l’intermédiaire."""
     profile = get_object_or_404(IntermediaireProfile, user=request.user)
-    entrepreneurs = profile.get_entrepreneurs()
-    projects = Project.objects.filter(entrepreneur__in=entrepreneurs)
 
-    # 🔹 Récupération des stats principales
+    # 🔹 Portefeuille calculé en requêtes groupées et mis en cache (ngo/reports.py)
+    report = reports.portfolio(profile)
     stats = {
-        "total_projects": projects.count(),
-        "total_collected": projects.aggregate(Sum("collected_amount"))["collected_amount__sum"] or 0,
-        "active_campaigns": Campaign.objects.filter(project__in=projects, status="active").count(),
-        "completed_campaigns": Campaign.objects.filter(project__in=projects, status="completed").count(),
-        "failed_campaigns": Campaign.objects.filter(project__in=projects, status="failed").count(),
+        **report["totals"],
+        "total_projects": report["totals"]["projects"],
+        "total_collected": report["totals"]["collected"],
+        "reporting_currency": report["currency"],
     }
 
     # 🔹 Nom complet + avatar (pour affichage global)
@@ -3882,8 +3464,11 @@ def intermediaire_reports(request):
     context = {
         "profile": profile,
         "stats": stats,
+        "report": report,
+        "projects": report["projects"],
         "full_name": full_name,
         "avatar": avatar,
+        "export_formats": reports.FORMATS,
     }
 
     return render(
@@ -3895,32 +3480,28 @@ def intermediaire_reports(request):
 
 @login_required
 @intermediaire_required
+@replica_reads()
 def intermediaire_reports_detail(request, project_id):
     """Affiche le rapport détaillé d’un projet représenté par l’intermédiaire."""
     profile = get_object_or_404(IntermediaireProfile, user=request.user)
-    entrepreneurs = profile.get_entrepreneurs()
 
     # Vérification que le projet appartient bien à un entrepreneur représenté
-    project = get_object_or_404(Project, id=project_id, entrepreneur__in=entrepreneurs)
-
-    # Campagnes associées
-    campaigns = Campaign.objects.filter(project=project)
-    loan_campaigns = LoanCampaign.objects.filter(project=project)
-
-    # Statistiques détaillées
-    total_collected = campaigns.aggregate(Sum("collected_amount"))["collected_amount__sum"] or 0
-    total_goal = campaigns.aggregate(Sum("goal_amount"))["goal_amount__sum"] or 0
-    completion_rate = (total_collected / total_goal * 100) if total_goal > 0 else 0
+    report = reports.portfolio(profile)
+    project = next((row for row in report["projects"] if row["id"] == project_id), None)
+    if project is None:
+        raise Http404
 
     stats = {
-        "total_campaigns": campaigns.count(),
-        "loan_campaigns": loan_campaigns.count(),
-        "total_goal": total_goal,
-        "total_collected": total_collected,
-        "completion_rate": round(completion_rate, 2),
-        "active": campaigns.filter(status="active").count(),
-        "completed": campaigns.filter(status="completed").count(),
-        "failed": campaigns.filter(status="failed").count(),
+        "total_campaigns": len(project["campaigns"]),
+        "loan_campaigns": len(project["loans"]),
+        "total_goal": project["goal"],
+        "total_collected": project["collected"],
+        "completion_rate": project["completion"],
+        "contributions": project["contributions"],
+        "currency": project["currency"],
+        "active": sum(1 for row in project["campaigns"] if row["status"] == "active"),
+        "completed": sum(1 for row in project["campaigns"] if row["status"] == "completed"),
+        "failed": sum(1 for row in project["campaigns"] if row["status"] == "failed"),
     }
 
     # Infos de profil (pour en-tête)
@@ -3932,8 +3513,8 @@ def intermediaire_reports_detail(request, project_id):
         "full_name": full_name,
         "avatar": avatar,
         "project": project,
-        "campaigns": campaigns,
-        "loan_campaigns": loan_campaigns,
+        "campaigns": project["campaigns"],
+        "loan_campaigns": project["loans"],
         "stats": stats,
     }
 
@@ -3944,6 +3525,28 @@ def intermediaire_reports_detail(request, project_id):
     )
 
 
+@login_required
+@intermediaire_required
+@replica_reads()
+def intermediaire_report_export(request, fmt):
+    """Téléchargement du rapport de portefeuille (CSV / PDF), généré en arrière-plan."""
+    if fmt not in reports.FORMATS:
+        raise Http404
+    profile = get_object_or_404(IntermediaireProfile, user=request.user)
+    path = reports.export_path(profile, fmt)
+    if default_storage.exists(path):
+        return FileResponse(
+            default_storage.open(path, "rb"),
+            as_attachment=True,
+            filename=f"rapport-portefeuille-{timezone.localdate():%Y%m%d}.{fmt}",
+        )
+    reports.schedule_export(profile, fmt)
+    if default_storage.exists(path):
+        # Broker indisponible : export produit en ligne
+        return redirect("intermediaire_report_export", fmt=fmt)
+    messages.info(request, _("⏳ Votre rapport est en cours de génération. Réessayez dans quelques instants."))
+    return redirect("intermediaire_reports")
+
 
 @login_required
 @intermediaire_required
@@ -3968,8 +3571,16 @@ def intermediaire_project_complete(request, project_id):
     project = get_object_or_404(Project, id=project_id, entrepreneur__in=profile.get_entrepreneurs())
 
     # Mettre à jour le statut de toutes les campagnes liées
-    Campaign.objects.filter(project=project, status="active").update(status="completed")
-    LoanCampaign.objects.filter(project=project, status="active").update(status="completed")
+    now = timezone.now()
+    Campaign.objects.filter(project=project, status="active").update(status="completed", closed_at=now)
+    loan_campaigns = list(LoanCampaign.objects.filter(project=project, status="active"))
+    LoanCampaign.objects.filter(pk__in=[loan.pk for loan in loan_campaigns]).update(status="completed", closed_at=now)
+    for loan_campaign in loan_campaigns:
+        loan_campaign.status, loan_campaign.closed_at = "completed", now
+
+    # update() ne déclenche pas post_save : échéanciers générés ici
+    for loan_campaign in loan_campaigns:
+        repayments.generate_schedule(loan_campaign)
 
     project.status = "completed"
     project.save(update_fields=["status"])